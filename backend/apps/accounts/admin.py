@@ -3,7 +3,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
 
-from .models import CustomUser, UserDocument, UserActivityLog
+from .models import AdminArea, CustomUser, UserDocument, UserActivityLog
 
 # ✅ AJOUT (sans casser) : importer Driver si l'app existe
 try:
@@ -271,3 +271,15 @@ class UserActivityLogAdmin(admin.ModelAdmin):
 
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(AdminArea)
+class AdminAreaAdmin(admin.ModelAdmin):
+    """Référentiel des zones (renommage / correction des zones créées depuis les saisies libres)."""
+
+    list_display = ("name", "level", "parent", "key", "created_at")
+    list_filter = ("level",)
+    search_fields = ("name", "key", "parent__name")
+    readonly_fields = ("created_at",)
+    list_select_related = ("parent",)
+    ordering = ("level", "name")
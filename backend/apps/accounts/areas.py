@@ -0,0 +1,101 @@
+# ========================= apps/accounts/areas.py =========================
+"""
+Référentiel géographique (AdminArea): rapprochement des saisies libres province / commune.
+
+- normalize(): minuscules, sans accents ni ponctuation, préfixes "province de" / "commune de" retirés
+- rapprochement: clé normalisée identique, sinon similarité difflib >= FUZZY_CUTOFF
+  parmi les zones du même niveau (et de la même province pour une commune)
+- AreaResolver.resolve(): zone la plus précise (commune, sinon province), créée si inconnue
+Les fonctions pures (normalize, best_match) sont aussi utilisées par la migration de reprise.
+"""
+
+from __future__ import annotations
+
+import difflib
+import re
+import unicodedata
+
+FUZZY_CUTOFF = 0.85
+
+_PREFIXES = re.compile(r"^(province|commune|ville|zone)( (de|du|d))? ")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(value) -> str:
+    """'  Province de Gitéga ' -> 'gitega'; 'Bujumbura-Mairie' -> 'bujumbura mairie'."""
+    text = unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode()
+    text = _NON_ALNUM.sub(" ", text.lower()).strip()
+    return _PREFIXES.sub("", text).strip()
+
+
+def display_name(value) -> str:
+    return " ".join(str(value or "").split()).strip().title()
+
+
+def best_match(key: str, candidates) -> int | None:
+    """candidates: [(id, key)] -> id de la zone correspondante (exacte, sinon la plus proche) ou None."""
+    if not key:
+        return None
+    keys = {}
+    for area_id, candidate in candidates:
+        if candidate == key:
+            return area_id
+        keys.setdefault(candidate, area_id)
+    close = difflib.get_close_matches(key, list(keys), n=1, cutoff=FUZZY_CUTOFF)
+    return keys[close[0]] if close else None
+
+
+class AreaResolver:
+    @staticmethod
+    def _get_or_create(model, level: str, raw: str, parent=None):
+        key = normalize(raw)
+        if not key:
+            return None
+        candidates = model.objects.filter(level=level, parent=parent).values_list("id", "key")
+        area_id = best_match(key, candidates)
+        if area_id is not None:
+            return model.objects.get(pk=area_id)
+        area, _ = model.objects.get_or_create(
+            level=level, parent=parent, key=key, defaults={"name": display_name(raw)}
+        )
+        return area
+
+    @staticmethod
+    def resolve(province, commune=None, *, model=None):
+        """Zone la plus précise pour (province, commune); None si les deux sont vides."""
+        if model is None:
+            from .models import AdminArea as model
+
+        province_area = AreaResolver._get_or_create(model, "province", province)
+        commune_area = AreaResolver._get_or_create(model, "commune", commune, parent=province_area)
+        return commune_area or province_area
+
+    @staticmethod
+    def remember_loaded(instance) -> None:
+        """
+        À appeler dans from_db(): province / commune lues en base deviennent la source de la zone
+        chargée; prepare_save() ne relance alors le rapprochement que si elles changent.
+        (champs différés: rien n'est retenu, la sauvegarde complète rapproche comme avant)
+        """
+        values = instance.__dict__
+        if "province" in values and "commune" in values:
+            instance._area_source = (values["province"] or "", values["commune"] or "")
+
+    @staticmethod
+    def prepare_save(instance, save_kwargs: dict) -> None:
+        """
+        À appeler dans save(): renseigne instance.area depuis province / commune
+        (et ajoute "area" à update_fields si la sauvegarde est partielle).
+        Sans effet si la sauvegarde ne touche pas ces champs.
+        """
+        update_fields = save_kwargs.get("update_fields")
+        if update_fields is not None and not {"province", "commune"} & set(update_fields):
+            return
+
+        source = (instance.province or "", instance.commune or "")
+        if instance.area_id and getattr(instance, "_area_source", None) == source:
+            return
+        instance.area = AreaResolver.resolve(*source) if any(source) else None
+        instance._area_source = source
+        if update_fields is not None:
+            save_kwargs["update_fields"] = {*update_fields, "area"}
@@ -0,0 +1,113 @@
+# ========================= apps/accounts/codes.py =========================
+"""
+Allocation des codes métier (chauffeur, PDV, agent) sans sondes d'existence.
+
+Principe:
+- un compteur monotone par type (séquence PostgreSQL: nextval est atomique, jamais réutilisé)
+- le compteur passe par une permutation bijective sur 24 bits (réseau de Feistel)
+  => codes d'apparence aléatoire, uniques par construction
+- formats inchangés: CH_ANNEE_HEX, PDV{année}{HEX}, AG{année}{HEX} (6 hex)
+
+⚠️ CODE_ALLOCATOR_SALT fixe la permutation: ne jamais le modifier après mise en production.
+
+Codes historiques (tirage aléatoire, antérieurs aux séquences): une valeur de séquence peut
+retomber sur l'un d'eux. save_with_code() intercepte alors l'IntegrityError (savepoint) et
+prend la valeur suivante; aucune requête supplémentaire hors collision.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import secrets
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+HEX_BITS = 24  # 6 caractères hexadécimaux
+HALF_BITS = HEX_BITS // 2
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 4
+MAX_COLLISIONS = 5
+
+
+class CodeAllocator:
+    """
+    Usage:
+        CodeAllocator.allocate("driver")          -> "CH_2025_4F1A9C"
+        CodeAllocator.allocate_many("pdv", 5000)  -> ["PDV20257B21E0", ...] (une seule requête)
+    """
+
+    KINDS = {
+        "driver": ("CH_{year}_{hex}", "seasky_code_driver_seq"),
+        "pdv": ("PDV{year}{hex}", "seasky_code_pdv_seq"),
+        "agent": ("AG{year}{hex}", "seasky_code_agent_seq"),
+    }
+
+    @classmethod
+    def allocate(cls, kind: str, year: int | None = None) -> str:
+        return cls.allocate_many(kind, 1, year=year)[0]
+
+    @classmethod
+    def allocate_many(cls, kind: str, count: int, year: int | None = None) -> list[str]:
+        if kind not in cls.KINDS:
+            raise ValueError(f"Type de code inconnu: {kind}")
+        if count <= 0:
+            return []
+
+        pattern, sequence = cls.KINDS[kind]
+        year = year or timezone.now().year
+        return [pattern.format(year=year, hex=cls._to_hex(kind, n)) for n in cls._next_values(sequence, count)]
+
+    @classmethod
+    def save_with_code(cls, instance, field: str, kind: str, save):
+        """
+        Alloue `field` puis exécute save() (callable sans argument) dans un savepoint.
+        Collision avec un code historique => code suivant; toute autre IntegrityError est relevée.
+        """
+        for attempt in range(MAX_COLLISIONS):
+            setattr(instance, field, cls.allocate(kind))
+            try:
+                with transaction.atomic():
+                    return save()
+            except IntegrityError:
+                code = getattr(instance, field)
+                taken = type(instance)._default_manager.filter(**{field: code}).exclude(pk=instance.pk).exists()
+                if not taken or attempt == MAX_COLLISIONS - 1:
+                    raise
+
+    @staticmethod
+    def _next_values(sequence: str, count: int) -> list[int]:
+        if connection.vendor != "postgresql":
+            # Environnements de dev sans séquences: tirage aléatoire (non garanti unique)
+            return [secrets.randbelow(1 << HEX_BITS) for _ in range(count)]
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [sequence, count])
+            values = [row[0] for row in cursor.fetchall()]
+
+        if values and values[-1] >= (1 << HEX_BITS):
+            raise OverflowError(f"Espace de codes épuisé pour la séquence {sequence}")
+        return values
+
+    @classmethod
+    def _to_hex(cls, kind: str, n: int) -> str:
+        return f"{cls.permute(kind, n):06X}"
+
+    @staticmethod
+    def _round_key(kind: str, index: int) -> bytes:
+        salt = getattr(settings, "CODE_ALLOCATOR_SALT", "seasky")
+        return f"{salt}:{kind}:{index}".encode("utf-8")
+
+    @classmethod
+    def _feistel(cls, kind: str, half: int, index: int) -> int:
+        digest = hashlib.blake2b(half.to_bytes(2, "big"), key=cls._round_key(kind, index), digest_size=4).digest()
+        return int.from_bytes(digest, "big") & HALF_MASK
+
+    @classmethod
+    def permute(cls, kind: str, n: int) -> int:
+        """Bijection [0, 2^24) -> [0, 2^24)."""
+        left, right = (n >> HALF_BITS) & HALF_MASK, n & HALF_MASK
+        for index in range(ROUNDS):
+            left, right = right, left ^ cls._feistel(kind, right, index)
+        return (left << HALF_BITS) | right
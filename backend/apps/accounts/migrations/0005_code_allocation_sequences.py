@@ -0,0 +1,30 @@
+# Séquences PostgreSQL utilisées par apps.accounts.codes.CodeAllocator
+
+from django.db import migrations
+
+SEQUENCES = ("seasky_code_driver_seq", "seasky_code_pdv_seq", "seasky_code_agent_seq")
+
+
+def create_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in SEQUENCES:
+        schema_editor.execute(f"CREATE SEQUENCE IF NOT EXISTS {name} START WITH 1 MINVALUE 1 MAXVALUE 16777215 NO CYCLE")
+
+
+def drop_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in SEQUENCES:
+        schema_editor.execute(f"DROP SEQUENCE IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_customuser_agent_code_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequences, drop_sequences),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_created_at_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminArea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nom')),
+                ('key', models.CharField(max_length=100, verbose_name='Clé normalisée')),
+                ('level', models.CharField(choices=[('province', 'Province'), ('commune', 'Commune')], max_length=10, verbose_name='Niveau')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='accounts.adminarea', verbose_name='Zone parente')),
+            ],
+            options={
+                'verbose_name': 'Zone administrative',
+                'verbose_name_plural': 'Zones administratives',
+                'ordering': ['level', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='area',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='users', to='accounts.adminarea', verbose_name='Zone'),
+        ),
+        migrations.AddConstraint(
+            model_name='adminarea',
+            constraint=models.UniqueConstraint(fields=('level', 'parent', 'key'), name='uniq_admin_area_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='adminarea',
+            constraint=models.UniqueConstraint(condition=models.Q(('parent__isnull', True)), fields=('level', 'key'), name='uniq_admin_area_root_key'),
+        ),
+    ]
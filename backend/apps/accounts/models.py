@@ -3,14 +3,14 @@ from __future__ import annotations
 
 from datetime import date
 import uuid
-import secrets
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .areas import AreaResolver
+
 
 # =============================================================================
 # CUSTOM USER MODEL
@@ -193,6 +193,15 @@ class CustomUser(AbstractUser):
     province = models.CharField(max_length=100, null=True, blank=True, verbose_name=_("Province"))
     commune = models.CharField(max_length=100, null=True, blank=True, verbose_name=_("Commune"))
     colline_or_quartier = models.CharField(max_length=100, null=True, blank=True, verbose_name=_("Colline/Quartier"))
+    # ✅ zone normalisée (commune, sinon province), dérivée de province / commune à la sauvegarde
+    area = models.ForeignKey(
+        "accounts.AdminArea",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="users",
+        verbose_name=_("Zone"),
+    )
 
     # -------------------------------------------------------------------------
     # Contact d'urgence
@@ -270,13 +279,20 @@ class CustomUser(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Date de création"))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Date de mise à jour"))
 
+    # champs dont la valeur chargée est conservée (cf. from_db)
+    LOADED_TRACKED_FIELDS = ("account_type", "role", "is_active", "area_id")
+
     # -------------------------------------------------------------------------
     # Helpers
     # -------------------------------------------------------------------------
-    @staticmethod
-    def _gen_agent_code() -> str:
-        year = timezone.now().year
-        return f"AG{year}{secrets.token_hex(3).upper()}"
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        AreaResolver.remember_loaded(instance)
+        # ✅ valeurs chargées: les signaux (compteurs, classements par zone) comparent sans relire la ligne
+        loaded = instance.__dict__
+        instance._loaded = {f: loaded[f] for f in cls.LOADED_TRACKED_FIELDS if f in loaded}
+        return instance
 
     def save(self, *args, **kwargs):
         # QR only for livreur (existant)
@@ -287,13 +303,16 @@ class CustomUser(AbstractUser):
         if not self.full_name and (self.first_name or self.last_name):
             self.full_name = f"{self.first_name} {self.last_name}".strip()
 
-        # ✅ Matricule Agent
+        # ✅ zone normalisée (référentiel AdminArea)
+        AreaResolver.prepare_save(self, kwargs)
+
+        # ✅ Matricule Agent (collision avec un matricule historique => matricule suivant)
         if self.role == self.Roles.AGENT and not self.agent_code:
-            for _ in range(10):
-                code = self._gen_agent_code()
-                if not CustomUser.objects.filter(agent_code=code).exists():
-                    self.agent_code = code
-                    break
+            from .codes import CodeAllocator
+
+            return CodeAllocator.save_with_code(
+                self, "agent_code", "agent", lambda: super(CustomUser, self).save(*args, **kwargs)
+            )
 
         super().save(*args, **kwargs)
 
@@ -327,6 +346,8 @@ class CustomUser(AbstractUser):
             models.Index(fields=["phone"]),
             models.Index(fields=["email"]),
             models.Index(fields=["agent_code"]),
+            # ✅ listes admin paginées par clé (-created_at, -id)
+            models.Index(fields=["created_at", "id"]),
         ]
 
 
@@ -397,3 +418,46 @@ class UserActivityLog(models.Model):
         ordering = ["-created_at"]
         verbose_name = _("Journal d'activité")
         verbose_name_plural = _("Journaux d'activité")
+
+
+# =============================================================================
+# RÉFÉRENTIEL GÉOGRAPHIQUE
+# =============================================================================
+class AdminArea(models.Model):
+    """
+    Zone administrative normalisée: province > commune.
+    Les saisies libres (province / commune) des utilisateurs, PDV et fournisseurs y sont rapprochées
+    (apps/accounts/areas.py); les agrégats géographiques se font sur cette clé.
+    """
+
+    class Levels(models.TextChoices):
+        PROVINCE = "province", _("Province")
+        COMMUNE = "commune", _("Commune")
+
+    name = models.CharField(max_length=100, verbose_name=_("Nom"))
+    key = models.CharField(max_length=100, verbose_name=_("Clé normalisée"))
+    level = models.CharField(max_length=10, choices=Levels.choices, verbose_name=_("Niveau"))
+    parent = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="children",
+        verbose_name=_("Zone parente"),
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["level", "name"]
+        verbose_name = _("Zone administrative")
+        verbose_name_plural = _("Zones administratives")
+        constraints = [
+            models.UniqueConstraint(fields=["level", "parent", "key"], name="uniq_admin_area_key"),
+            # provinces: parent NULL (NULL n'est pas comparé par la contrainte ci-dessus)
+            models.UniqueConstraint(
+                fields=["level", "key"], condition=models.Q(parent__isnull=True), name="uniq_admin_area_root_key"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_level_display()})"
@@ -0,0 +1,162 @@
+# ========================= apps/accounts/profiles.py =========================
+"""
+Fiche utilisateur complète (admin / profil) en un nombre fixe de requêtes.
+
+- 1 requête: utilisateur + wallet, chauffeur (+ disponibilité), fournisseur, zone (select_related)
+- 5 requêtes prefetch: groupes, documents, PDV (agent / partenaire, stock joint), dernières activités
+  (Prefetch tranché: les N plus récentes par utilisateur, pas tout l'historique)
+Le nombre de requêtes ne dépend ni du type de compte ni du volume de documents / PDV / activités;
+relations absentes (pas de chauffeur, pas de wallet...) = None sans requête supplémentaire.
+"""
+
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+
+from .models import UserActivityLog, UserDocument
+
+RECENT_ACTIVITY = 10
+
+CARD_SELECT = ("wallet", "driver", "driver__availability", "supplier", "supplier__area", "area")
+
+
+def _related(obj, name):
+    """Relation inverse one-to-one déjà chargée (select_related), None si absente."""
+    try:
+        return getattr(obj, name)
+    except Exception:
+        return None
+
+
+class UserProfileAssembler:
+    @staticmethod
+    def queryset(*, recent_activity: int = RECENT_ACTIVITY):
+        from apps.pdv.models import PointDeVente
+
+        pdvs = PointDeVente.objects.select_related("stock", "area").order_by("-created_at", "-id")
+        return (
+            get_user_model()
+            .objects.select_related(*CARD_SELECT)
+            .prefetch_related(
+                "groups",
+                Prefetch("documents", queryset=UserDocument.objects.order_by("-uploaded_at")),
+                Prefetch("pdv_agent", queryset=pdvs),
+                Prefetch("pdv_partner", queryset=pdvs),
+                Prefetch(
+                    "activity_logs",
+                    queryset=UserActivityLog.objects.order_by("-created_at", "-id")[:recent_activity],
+                    to_attr="recent_activity",
+                ),
+            )
+        )
+
+    @staticmethod
+    def get(user_id):
+        return UserProfileAssembler.queryset().filter(pk=user_id).first()
+
+    # ------------------------------------------------------------------ sections
+    @staticmethod
+    def wallet(user):
+        wallet = _related(user, "wallet")
+        if wallet is None:
+            return None
+        return {
+            "id": wallet.pk,
+            "address": wallet.address,
+            "provider": wallet.provider,
+            "balance": str(wallet.balance),
+            "locked_balance": str(wallet.locked_balance),
+            "is_active": wallet.is_active,
+        }
+
+    @staticmethod
+    def driver(user):
+        driver = _related(user, "driver")
+        if driver is None:
+            return None
+        availability = _related(driver, "availability")
+        return {
+            "id": driver.pk,
+            "driver_code": driver.driver_code,
+            "transport_mode": driver.transport_mode,
+            "status": driver.status,
+            "is_verified": driver.is_verified,
+            "commission_rate": str(driver.commission_rate),
+            "assigned_zone": driver.assigned_zone,
+            "availability": (
+                {
+                    "is_available": availability.is_available,
+                    "location_lat": availability.location_lat,
+                    "location_lng": availability.location_lng,
+                    "last_location_update": availability.last_location_update,
+                }
+                if availability
+                else None
+            ),
+        }
+
+    @staticmethod
+    def supplier(user):
+        supplier = _related(user, "supplier")
+        if supplier is None:
+            return None
+        return {
+            "id": supplier.pk,
+            "type": supplier.type,
+            "province": supplier.province,
+            "commune": supplier.commune,
+            "address": supplier.address,
+            "area": supplier.area.name if supplier.area else None,
+        }
+
+    @staticmethod
+    def pdvs(user):
+        out = []
+        for relation, pdvs in (("agent", user.pdv_agent.all()), ("partner", user.pdv_partner.all())):
+            for pdv in pdvs:
+                stock = _related(pdv, "stock")
+                out.append(
+                    {
+                        "id": pdv.pk,
+                        "relation": relation,
+                        "name": pdv.name,
+                        "code": pdv.code,
+                        "province": pdv.province,
+                        "commune": pdv.commune,
+                        "area": pdv.area.name if pdv.area else None,
+                        "stock_liters": str(stock.current_liters) if stock else None,
+                    }
+                )
+        return out
+
+    @staticmethod
+    def activity(user):
+        return [
+            {"id": log.pk, "action": log.action, "ip_address": log.ip_address, "created_at": log.created_at}
+            for log in getattr(user, "recent_activity", [])
+        ]
+
+    # ------------------------------------------------------------------ fiche
+    @staticmethod
+    def card(user, *, request=None, serializer_class=None) -> dict:
+        """
+        Données du serializer (UserDetailSerializer par défaut, documents et groupes déjà chargés)
+        + sections wallet / driver / supplier / pdvs / recent_activity.
+        `user` doit provenir de UserProfileAssembler.queryset().
+        """
+        if serializer_class is None:
+            from .serializers import UserDetailSerializer as serializer_class
+
+        data = serializer_class(user, context={"request": request}).data
+        data.update(
+            {
+                "area": {"id": user.area_id, "name": user.area.name} if user.area else None,
+                "wallet": UserProfileAssembler.wallet(user),
+                "driver": UserProfileAssembler.driver(user),
+                "supplier": UserProfileAssembler.supplier(user),
+                "pdvs": UserProfileAssembler.pdvs(user),
+                "recent_activity": UserProfileAssembler.activity(user),
+            }
+        )
+        return data
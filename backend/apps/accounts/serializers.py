@@ -253,8 +253,9 @@ class UserSerializer(serializers.ModelSerializer):
         return _account_category_label(obj)
 
     def get_groups(self, obj):
+        # .all(): profite du prefetch_related("groups") des querysets de liste / fiche
         try:
-            return list(obj.groups.values_list("name", flat=True))
+            return [group.name for group in obj.groups.all()]
         except Exception:
             return []
 
@@ -614,8 +615,9 @@ class UserDetailSerializer(serializers.ModelSerializer):
         return _account_category_label(obj)
 
     def get_groups(self, obj):
+        # .all(): profite du prefetch_related("groups") des querysets de liste / fiche
         try:
-            return list(obj.groups.values_list("name", flat=True))
+            return [group.name for group in obj.groups.all()]
         except Exception:
             return []
 
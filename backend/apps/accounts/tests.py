@@ -1,3 +1,176 @@
+# ========================= apps/accounts/tests.py =========================
+"""
+Budget de requêtes de la fiche utilisateur (UserProfileAssembler).
+
+Chaque type de compte est chargé avec des relations volumineuses (documents, PDV, historique
+d'activité): la fiche doit rester à un nombre fixe de requêtes, quel que soit le rôle,
+côté service comme côté endpoints admin.
+
+Allocation des codes (CodeAllocator): collision avec un code historique => code suivant.
+
+Zones (AreaResolver): un objet rechargé n'est rapproché que si province / commune changent.
+"""
+
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.drivers.models import Driver
+from apps.pdv.models import PDVStock, PointDeVente
+from apps.suppliers.models import Supplier
+
+from .codes import CodeAllocator
+from .models import AdminArea, UserActivityLog, UserDocument
+from .profiles import RECENT_ACTIVITY, UserProfileAssembler
+
+# 1 (utilisateur + one-to-one) + 5 prefetch (groupes, documents, PDV agent, PDV partenaire, activité)
+CARD_QUERIES = 6
+
+DOCUMENTS = 4
+ACTIVITY_LOGS = RECENT_ACTIVITY + 5
+PDVS = 3
+
+
+class UserProfileAssemblerQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        groups = [Group.objects.create(name=f"profile-group-{i}") for i in range(2)]
+
+        cls.admin = User.objects.create(
+            username="profile-admin", phone="+25779100000", role="admin", is_staff=True, province="Gitega"
+        )
+        cls.users = {}
+        for i, role in enumerate(User.Roles.values):
+            if role == "admin":
+                continue
+            user = User.objects.create(
+                username=f"profile-{role}",
+                phone=f"+2577910{i:04d}",
+                role=role,
+                province="Gitega",
+                commune="Giheta",
+            )
+            user.groups.set(groups)
+            UserDocument.objects.bulk_create(
+                [
+                    UserDocument(user=user, document_type="other", file=f"user_documents/{role}-{n}.pdf")
+                    for n in range(DOCUMENTS)
+                ]
+            )
+            UserActivityLog.objects.bulk_create(
+                [UserActivityLog(user=user, action=f"action-{n}") for n in range(ACTIVITY_LOGS)]
+            )
+            cls.users[role] = user
+
+        Driver.objects.create(user=cls.users["livreur"], transport_mode="moto", commission_rate=Decimal("2.50"))
+        Supplier.objects.create(user=cls.users["fournisseur"], province="Gitega", commune="Giheta")
+        for n in range(PDVS):
+            pdv = PointDeVente.objects.create(
+                name=f"PDV {n}",
+                agent_user=cls.users["agent"],
+                partner=cls.users["partenaire"],
+                province="Gitega",
+                commune="Giheta",
+            )
+            PDVStock.objects.get_or_create(pdv=pdv)
+
+    def test_card_queries_per_account_type(self):
+        for role, user in self.users.items():
+            with self.subTest(role=role):
+                with self.assertNumQueries(CARD_QUERIES):
+                    card = UserProfileAssembler.card(UserProfileAssembler.get(user.pk))
+                self.assertEqual(card["role"], role)
+                self.assertEqual(len(card["documents"]), DOCUMENTS)
+                self.assertEqual(len(card["groups"]), 2)
+                self.assertEqual(len(card["recent_activity"]), RECENT_ACTIVITY)
+
+    def test_card_sections(self):
+        driver = UserProfileAssembler.card(UserProfileAssembler.get(self.users["livreur"].pk))
+        self.assertEqual(driver["driver"]["transport_mode"], "moto")
+        self.assertIsNotNone(driver["driver"]["availability"])
+        self.assertIsNone(driver["supplier"])
+
+        supplier = UserProfileAssembler.card(UserProfileAssembler.get(self.users["fournisseur"].pk))
+        self.assertEqual(supplier["supplier"]["area"], "Giheta")
+        self.assertIsNone(supplier["driver"])
+
+        agent = UserProfileAssembler.card(UserProfileAssembler.get(self.users["agent"].pk))
+        partner = UserProfileAssembler.card(UserProfileAssembler.get(self.users["partenaire"].pk))
+        self.assertEqual([p["relation"] for p in agent["pdvs"]], ["agent"] * PDVS)
+        self.assertEqual([p["relation"] for p in partner["pdvs"]], ["partner"] * PDVS)
+
+        actions = [log["action"] for log in agent["recent_activity"]]
+        self.assertEqual(actions[0], f"action-{ACTIVITY_LOGS - 1}")
+
+    def test_admin_endpoints_query_budget(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        for role, user in self.users.items():
+            with self.subTest(role=role, endpoint="admin-dashboard"):
+                with self.assertNumQueries(CARD_QUERIES):
+                    response = client.get(f"/api/v1/admin-dashboard/users/{user.pk}/")
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("wallet", response.data)
+
+            with self.subTest(role=role, endpoint="admin-users"):
+                with self.assertNumQueries(CARD_QUERIES):
+                    response = client.get(f"/api/v1/admin/users/{user.pk}/")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data["id"], user.pk)
+
+    def test_unknown_user(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        self.assertEqual(client.get("/api/v1/admin-dashboard/users/999999/").status_code, 404)
+        self.assertEqual(client.get("/api/v1/admin/users/999999/").status_code, 404)
+
+
+class CodeAllocatorCollisionTests(TestCase):
+    def test_legacy_code_collision_takes_next_value(self):
+        User = get_user_model()
+        legacy = User.objects.create(
+            username="legacy-agent", phone="+25779200001", role="agent", agent_code="AG2024F00F00"
+        )
+
+        PointDeVente.objects.create(name="Historique", code="PDV2024A1B2C3", agent_user=legacy)
+        with mock.patch.object(CodeAllocator, "allocate", side_effect=["PDV2024A1B2C3", "PDV2024000001"]):
+            pdv = PointDeVente.objects.create(name="Nouveau", agent_user=legacy)
+        self.assertEqual(pdv.code, "PDV2024000001")
+
+        with mock.patch.object(CodeAllocator, "allocate", side_effect=["AG2024F00F00", "AG2024000001"]):
+            agent = User.objects.create(username="new-agent", phone="+25779200002", role="agent")
+        self.assertEqual(agent.agent_code, "AG2024000001")
+
+    def test_other_integrity_errors_are_raised(self):
+        User = get_user_model()
+        User.objects.create(username="dup-agent", phone="+25779200003", role="agent")
+        with mock.patch.object(CodeAllocator, "allocate", side_effect=["AG2024000009"]) as allocate:
+            with self.assertRaises(IntegrityError):
+                User.objects.create(username="dup-agent", phone="+25779200004", role="agent")
+        self.assertEqual(allocate.call_count, 1)
+
+
+class AreaResolutionOnSaveTests(TestCase):
+    def test_loaded_object_resolves_only_on_location_change(self):
+        User = get_user_model()
+        user = User.objects.create(username="area-user", phone="+25779330000", province="Gitega")
+        supplier = Supplier.objects.create(user=user, province="Ngozi")
+
+        for model, pk in ((User, user.pk), (Supplier, supplier.pk)):
+            with self.subTest(model=model.__name__):
+                loaded = model.objects.get(pk=pk)
+                with CaptureQueriesContext(connection) as queries:
+                    loaded.save()
+                self.assertFalse([q for q in queries if AdminArea._meta.db_table in q["sql"]])
 
-# Create your tests here.
+        loaded = User.objects.get(pk=user.pk)
+        loaded.province = "Ngozi"
+        loaded.save()
+        self.assertEqual(loaded.area, AdminArea.objects.get(level="province", key="ngozi"))
@@ -1,12 +1,13 @@
 import logging
 
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import get_user_model
+from django.http import Http404
 
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
@@ -19,6 +20,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 
 from .models import UserActivityLog, UserDocument
+from .profiles import UserProfileAssembler
 from .serializers import (
     LoginSerializer,
     PasswordChangeSerializer,
@@ -56,13 +58,13 @@ def is_admin_user(user) -> bool:
 
 
 def _get_user_with_documents(user_id: int):
+    # ✅ groupes + documents chargés en 2 requêtes fixes (UserDetailSerializer)
     try:
-        qs = User.objects.filter(pk=user_id)
-        try:
-            qs = qs.prefetch_related("documents")
-        except Exception:
-            pass
-        return qs.first()
+        return (
+            User.objects.filter(pk=user_id)
+            .prefetch_related("groups", Prefetch("documents", queryset=UserDocument.objects.order_by("-uploaded_at")))
+            .first()
+        )
     except Exception:
         return None
 
@@ -430,7 +432,7 @@ class AgentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         if not is_admin_user(self.request.user):
             return User.objects.none()
-        return User.objects.filter(role="agent").order_by("-created_at")
+        return User.objects.filter(role="agent").prefetch_related("groups").order_by("-created_at")
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -510,8 +512,9 @@ class AdminUsersViewSet(viewsets.ModelViewSet):
     pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
-        # ✅ Base queryset
-        qs = User.objects.all().order_by("-created_at", "-id")
+        # ✅ Base queryset (fiche: relations chargées en un nombre fixe de requêtes)
+        base = UserProfileAssembler.queryset() if self.action == "retrieve" else User.objects.prefetch_related("groups")
+        qs = base.order_by("-created_at", "-id")
 
         # ✅ Exclure admins/staff/superuser de la liste
         qs = qs.exclude(Q(is_superuser=True) | Q(is_staff=True) | Q(role__iexact="admin"))
@@ -579,8 +582,12 @@ class AdminUsersViewSet(viewsets.ModelViewSet):
             )
 
     def retrieve(self, request, *args, **kwargs):
+        # ✅ fiche complète (profil, groupes, documents, wallet, chauffeur, fournisseur, PDV, activité)
+        # en un nombre fixe de requêtes
         try:
-            return super().retrieve(request, *args, **kwargs)
+            return Response(UserProfileAssembler.card(self.get_object(), request=request))
+        except Http404:
+            raise
         except Exception as e:
             logger.exception("AdminUsersViewSet.retrieve error: %s", e)
             return Response({"detail": "Erreur serveur."}, status=500)
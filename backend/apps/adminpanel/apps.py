@@ -6,3 +6,7 @@ class AdminPanelConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.adminpanel"
     verbose_name = "Admin Panel"
+
+    def ready(self):
+        # ✅ compteurs du tableau de bord maintenus par signaux
+        from . import signals  # noqa
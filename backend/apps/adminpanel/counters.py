@@ -0,0 +1,246 @@
+# ========================= apps/adminpanel/counters.py =========================
+"""
+Compteurs du tableau de bord admin, maintenus dans Redis.
+
+- deux hash Redis: compteurs globaux (users / drivers / pdv / wallet) et compteurs du jour
+  (livraisons, collectes, ventes, transactions; une clé par jour, TTL 3 jours)
+- mises à jour incrémentales (HINCRBY) après commit: signaux post_save / post_delete
+  + appels explicites sur les chemins bulk_create / queryset.update()
+- réconciliation périodique avec la base (Celery), et à froid si le hash est absent
+- lecture: un aller-retour Redis (pipeline) quelle que soit la taille des tables
+Redis indisponible: la lecture retombe sur le calcul en base, les incréments sont ignorés.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_KEY = "seasky:dashboard:counters"
+DAY_KEY = "seasky:dashboard:day:{day}"
+DAY_TTL = 3 * 86400
+
+GROUPS = ("users", "drivers", "pdv", "wallet")
+DAY_FIELDS = ("deliveries", "collections", "sales", "transactions")
+FLOAT_FIELDS = ("pdv.stock_liters",)
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+def _decode(raw: dict) -> dict:
+    out = {}
+    for key, value in raw.items():
+        key = key.decode() if isinstance(key, bytes) else key
+        value = value.decode() if isinstance(value, bytes) else value
+        out[key] = float(value) if key in FLOAT_FIELDS else int(float(value))
+    return out
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+class DashboardCounters:
+    # ------------------------------------------------------------------ calcul en base
+    @staticmethod
+    def compute_group(group: str) -> dict:
+        if group == "users":
+            User = get_user_model()
+            fields = {"users.total": 0, "users.blocked": User.objects.filter(is_active=False).count()}
+            for account_type, count in User.objects.values_list("account_type").annotate(n=Count("id")).order_by():
+                fields[f"users.type.{account_type or ''}"] = count
+                fields["users.total"] += count
+            for role, count in User.objects.values_list("role").annotate(n=Count("id")).order_by():
+                fields[f"users.role.{role or ''}"] = count
+            return fields
+
+        if group == "drivers":
+            from apps.drivers.compliance import ComplianceIndex
+            from apps.drivers.models import Driver, DriverAvailability
+
+            drivers = Driver.objects.aggregate(total=Count("id"), verified=Count("id", filter=Q(is_verified=True)))
+            return {
+                "drivers.total": drivers["total"],
+                "drivers.verified": drivers["verified"],
+                "drivers.available": DriverAvailability.objects.filter(is_available=True).count(),
+                "drivers.documents_expiring_soon": ComplianceIndex.summary("driver_document")["expiring_soon"],
+            }
+
+        if group == "pdv":
+            from apps.pdv.models import PDVStock, PointDeVente
+
+            return {
+                "pdv.total": PointDeVente.objects.count(),
+                "pdv.stock_liters": float(PDVStock.objects.aggregate(total=Sum("current_liters"))["total"] or 0),
+            }
+
+        if group == "wallet":
+            from apps.wallet.models import Wallet
+
+            return {"wallet.total": Wallet.objects.count()}
+
+        raise ValueError(f"Groupe inconnu: {group}")
+
+    @staticmethod
+    def compute_day(day=None) -> dict:
+        from apps.logistics.models import Collection, Delivery
+        from apps.pdv.models import PDVSale
+        from apps.wallet.models import WalletTransaction
+
+        start, end = _day_bounds(day or timezone.localdate())
+        return {
+            "deliveries": Delivery.objects.filter(delivered_at__gte=start, delivered_at__lt=end).count(),
+            "collections": Collection.objects.filter(collected_at__gte=start, collected_at__lt=end).count(),
+            "sales": PDVSale.objects.filter(sold_at__gte=start, sold_at__lt=end).count(),
+            "transactions": WalletTransaction.objects.filter(created_at__gte=start, created_at__lt=end).count(),
+        }
+
+    # ------------------------------------------------------------------ écriture Redis
+    @staticmethod
+    def _replace(fields: dict, groups) -> None:
+        """Remplace les champs des groupes `groups` par `fields` (champs obsolètes supprimés)."""
+        r = _redis()
+        stale = [
+            key for key in (k.decode() if isinstance(k, bytes) else k for k in r.hkeys(GLOBAL_KEY))
+            if key.split(".", 1)[0] in groups and key not in fields
+        ]
+        pipe = r.pipeline()
+        if stale:
+            pipe.hdel(GLOBAL_KEY, *stale)
+        if fields:
+            pipe.hset(GLOBAL_KEY, mapping=fields)
+        if set(groups) >= set(GROUPS):
+            pipe.hset(GLOBAL_KEY, "meta.reconciled_at", int(timezone.now().timestamp()))
+        pipe.execute()
+
+    @staticmethod
+    def _store_day(day, values: dict) -> None:
+        key = DAY_KEY.format(day=day.isoformat())
+        pipe = _redis().pipeline()
+        pipe.hset(key, mapping={**values, "ready": 1})
+        pipe.expire(key, DAY_TTL)
+        pipe.execute()
+
+    @staticmethod
+    def refresh(*groups) -> None:
+        """Recalcule des groupes en base et remplace leurs champs (champs obsolètes supprimés)."""
+        groups = groups or GROUPS
+        fields = {}
+        for group in groups:
+            fields.update(DashboardCounters.compute_group(group))
+        DashboardCounters._replace(fields, groups)
+
+    @staticmethod
+    def refresh_day(day=None) -> None:
+        day = day or timezone.localdate()
+        DashboardCounters._store_day(day, DashboardCounters.compute_day(day))
+
+    @staticmethod
+    def store(snapshot: dict) -> None:
+        """Écrit dans Redis un snapshot déjà calculé (compute_snapshot), sans refaire les agrégats."""
+        DashboardCounters._replace(snapshot["counters"], GROUPS)
+        DashboardCounters._store_day(snapshot["date"], snapshot["day"])
+
+    @staticmethod
+    def reconcile() -> dict:
+        """Recalcule tout en base (une seule fois), réaligne Redis et retourne le snapshot calculé."""
+        snapshot = DashboardCounters.compute_snapshot()
+        DashboardCounters.store(snapshot)
+        return snapshot
+
+    @staticmethod
+    def refresh_on_commit(*groups) -> None:
+        """Pour les écritures ensemblistes (queryset.update) qui ne déclenchent pas de signaux."""
+
+        def _do():
+            try:
+                DashboardCounters.refresh(*groups)
+            except Exception:
+                logger.warning("Dashboard counters refresh failed (%s)", groups, exc_info=True)
+
+        transaction.on_commit(_do)
+
+    # ------------------------------------------------------------------ incréments
+    @staticmethod
+    def _apply(global_deltas: dict, day_deltas: dict) -> None:
+        try:
+            pipe = _redis().pipeline()
+            for field, amount in global_deltas.items():
+                if field in FLOAT_FIELDS:
+                    pipe.hincrbyfloat(GLOBAL_KEY, field, float(amount))
+                else:
+                    pipe.hincrby(GLOBAL_KEY, field, int(amount))
+            for (day, field), amount in day_deltas.items():
+                key = DAY_KEY.format(day=day.isoformat())
+                pipe.hincrby(key, field, int(amount))
+                pipe.expire(key, DAY_TTL)
+            pipe.execute()
+        except Exception:
+            # la réconciliation périodique rattrapera l'écart
+            logger.warning("Dashboard counters update failed", exc_info=True)
+
+    @staticmethod
+    def bump(global_deltas: dict | None = None, *, day_deltas: dict | None = None) -> None:
+        """
+        Incréments appliqués après commit (rien si la transaction est annulée).
+        global_deltas: {"users.total": 1, ...}; day_deltas: {(date, "sales"): 3, ...}
+        """
+        global_deltas = {k: v for k, v in (global_deltas or {}).items() if v}
+        day_deltas = {k: v for k, v in (day_deltas or {}).items() if v}
+        if global_deltas or day_deltas:
+            transaction.on_commit(lambda: DashboardCounters._apply(global_deltas, day_deltas))
+
+    @staticmethod
+    def bump_day(field: str, when=None, amount: int = 1) -> None:
+        day = timezone.localdate(when) if when else timezone.localdate()
+        DashboardCounters.bump(day_deltas={(day, field): amount})
+
+    # ------------------------------------------------------------------ lecture
+    @staticmethod
+    def snapshot() -> dict:
+        """
+        Compteurs globaux + du jour, un aller-retour Redis.
+        Hash absent (démarrage, flush) -> réconciliation synchrone puis relecture.
+        """
+        today = timezone.localdate()
+        day_key = DAY_KEY.format(day=today.isoformat())
+        r = _redis()
+
+        for attempt in range(2):
+            pipe = r.pipeline()
+            pipe.hgetall(GLOBAL_KEY)
+            pipe.hgetall(day_key)
+            counters, day = (_decode(raw) for raw in pipe.execute())
+
+            cold_global = "meta.reconciled_at" not in counters
+            cold_day = "ready" not in day
+            if not (cold_global or cold_day) or attempt:
+                break
+            if cold_global:
+                DashboardCounters.refresh()
+            if cold_day:
+                DashboardCounters.refresh_day(today)
+
+        return {"counters": counters, "day": day, "cached": True}
+
+    @staticmethod
+    def compute_snapshot() -> dict:
+        """Même forme que snapshot(), calculée en base (?fresh=1, ou Redis indisponible)."""
+        counters = {}
+        for group in GROUPS:
+            counters.update(DashboardCounters.compute_group(group))
+        counters["meta.reconciled_at"] = int(timezone.now().timestamp())
+        today = timezone.localdate()
+        return {"counters": counters, "day": DashboardCounters.compute_day(today), "date": today, "cached": False}
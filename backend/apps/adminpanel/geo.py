@@ -0,0 +1,178 @@
+# ========================= apps/adminpanel/geo.py =========================
+"""
+Agrégats géographiques quotidiens (AreaDailyRollup) sur le référentiel AdminArea.
+
+- calcul d'une journée: une requête agrégée par source (ventes, livraisons, collectes, stock),
+  groupée par zone feuille (zone du PDV / du fournisseur), puis cumul vers les provinces en mémoire
+- écriture: upsert (bulk_create update_conflicts) sur (area, day); rejouable à volonté
+- lecture (carte): une requête sur (level, day) — aucune agrégation des tables d'événements
+- stock: solde du dernier mouvement de chaque PDV avant la fin de la journée
+Les PDV / fournisseurs sans zone (province et commune vides) ne sont pas comptés.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from .counters import _day_bounds
+from .models import AreaDailyRollup
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0")
+METRICS = (
+    "pdv_count",
+    "stock_liters",
+    "sales_liters",
+    "sales_count",
+    "deliveries_liters",
+    "deliveries_count",
+    "collections_liters",
+    "collections_value",
+    "collections_count",
+)
+
+
+class AreaRollups:
+    # ------------------------------------------------------------------ calcul
+    @staticmethod
+    def leaf_metrics(day) -> dict:
+        """{area_id: {metric: valeur}} pour les zones portées directement par les PDV / fournisseurs."""
+        from apps.logistics.models import Collection, Delivery
+        from apps.pdv.models import PDVSale, PointDeVente, StockMovement
+
+        start, end = _day_bounds(day)
+        metrics = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+
+        sales = (
+            PDVSale.objects.filter(sold_at__gte=start, sold_at__lt=end, pdv__area__isnull=False)
+            .values_list("pdv__area_id")
+            .annotate(liters=Sum("liters_sold"), n=Count("id"))
+            .order_by()
+        )
+        for area_id, liters, n in sales:
+            metrics[area_id].update(sales_liters=liters or ZERO, sales_count=n)
+
+        deliveries = (
+            Delivery.objects.filter(delivered_at__gte=start, delivered_at__lt=end, pdv__area__isnull=False)
+            .values_list("pdv__area_id")
+            .annotate(liters=Sum("quantity_liters"), n=Count("id"))
+            .order_by()
+        )
+        for area_id, liters, n in deliveries:
+            metrics[area_id].update(deliveries_liters=liters or ZERO, deliveries_count=n)
+
+        collections = (
+            Collection.objects.filter(collected_at__gte=start, collected_at__lt=end, supplier__area__isnull=False)
+            .values_list("supplier__area_id")
+            .annotate(liters=Sum("quantity_liters"), value=Sum("value_amount"), n=Count("id"))
+            .order_by()
+        )
+        for area_id, liters, value, n in collections:
+            metrics[area_id].update(collections_liters=liters or ZERO, collections_value=value or ZERO, collections_count=n)
+
+        last_balance = (
+            StockMovement.objects.filter(pdv=OuterRef("pk"), occurred_at__lt=end)
+            .order_by("-occurred_at", "-id")
+            .values("balance_after")[:1]
+        )
+        pdvs = (
+            PointDeVente.objects.filter(area__isnull=False, created_at__lt=end)
+            .annotate(balance=Subquery(last_balance, output_field=DecimalField(max_digits=12, decimal_places=2)))
+            .values_list("area_id", "balance")
+        )
+        for area_id, balance in pdvs:
+            metrics[area_id]["pdv_count"] += 1
+            metrics[area_id]["stock_liters"] += balance or ZERO
+
+        return metrics
+
+    @staticmethod
+    def compute(day) -> dict:
+        """{area_id: metrics} zones feuilles + cumul sur les zones parentes."""
+        from apps.accounts.models import AdminArea
+
+        parents = dict(AdminArea.objects.values_list("id", "parent_id"))
+        totals = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+        for area_id, values in AreaRollups.leaf_metrics(day).items():
+            node = area_id
+            while node is not None:
+                for metric, value in values.items():
+                    totals[node][metric] += value
+                node = parents.get(node)
+        return totals
+
+    # ------------------------------------------------------------------ écriture
+    @staticmethod
+    def refresh(day=None) -> int:
+        """Recalcule et remplace les agrégats d'une journée (défaut: aujourd'hui)."""
+        from apps.accounts.models import AdminArea
+
+        day = day or timezone.localdate()
+        totals = AreaRollups.compute(day)
+        levels = dict(AdminArea.objects.filter(pk__in=list(totals)).values_list("id", "level"))
+
+        rows = [
+            AreaDailyRollup(area_id=area_id, level=levels[area_id], day=day, **values)
+            for area_id, values in totals.items()
+            if area_id in levels
+        ]
+        with transaction.atomic():
+            # zones sans activité ce jour-là (ex: PDV déplacé / supprimé depuis le dernier calcul)
+            AreaDailyRollup.objects.filter(day=day).exclude(area_id__in=list(levels)).delete()
+            AreaDailyRollup.objects.bulk_create(
+                rows,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=["area", "day"],
+                update_fields=[*METRICS, "level", "updated_at"],
+            )
+        logger.info("Area rollups day=%s areas=%s", day, len(rows))
+        return len(rows)
+
+    @staticmethod
+    def refresh_range(date_from, date_to) -> int:
+        count, day = 0, date_from
+        while day <= date_to:
+            count += AreaRollups.refresh(day)
+            day += timedelta(days=1)
+        return count
+
+    # ------------------------------------------------------------------ lecture
+    @staticmethod
+    def map(level: str, date_from, date_to, parent_id=None) -> list[dict]:
+        """Une ligne par zone: flux cumulés sur la période, stock et nombre de PDV au dernier jour."""
+        qs = AreaDailyRollup.objects.filter(level=level, day__gte=date_from, day__lte=date_to)
+        if parent_id:
+            qs = qs.filter(area__parent_id=parent_id)
+
+        last_day = Q(day=date_to)
+        rows = (
+            qs.values("area_id", "area__name", "area__parent_id")
+            .annotate(
+                sales_liters=Sum("sales_liters"),
+                sales_count=Sum("sales_count"),
+                deliveries_liters=Sum("deliveries_liters"),
+                deliveries_count=Sum("deliveries_count"),
+                collections_liters=Sum("collections_liters"),
+                collections_value=Sum("collections_value"),
+                collections_count=Sum("collections_count"),
+                stock_liters=Sum("stock_liters", filter=last_day),
+                pdv_count=Sum("pdv_count", filter=last_day),
+            )
+            .order_by("area__name")
+        )
+        return [
+            {
+                "area": {"id": r.pop("area_id"), "name": r.pop("area__name"), "parent_id": r.pop("area__parent_id")},
+                **{k: (str(v) if isinstance(v, Decimal) else (v or 0)) for k, v in r.items()},
+            }
+            for r in rows
+        ]
@@ -0,0 +1,186 @@
+# ========================= apps/adminpanel/listing.py =========================
+"""
+Listes admin paginées (keyset), projection de champs et comptage approximatif.
+
+- pagination par clé (tri, id) décroissante: ?cursor= opaque, coût constant quelle que soit la page
+- ?limit= (défaut 50, max 200): jamais de charge de 500 lignes par défaut
+- ?fields=a,b.c: projection sur les colonnes déclarées; seules celles-ci sont lues (.values())
+- ?count=approx (défaut) | exact | none
+    approx: pg_class.reltuples si aucun filtre (PostgreSQL), sinon comptage plafonné (COUNT_CAP)
+- lignes construites depuis .values(): les noms pointés ("driver.name") deviennent des objets imbriqués
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+COUNT_CAP = 10000
+
+
+def _encode_cursor(values) -> str:
+    values = [v.isoformat() if hasattr(v, "isoformat") else v for v in values]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    """Retourne (datetime de tri, pk); tout curseur altéré => 400, jamais jusqu'à l'ORM."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        # ✅ champs de tri = dates: une chaîne ISO valide, rien d'autre
+        sort_value = parse_datetime(sort_value) if isinstance(sort_value, str) else None
+        if sort_value is None or isinstance(pk, bool):
+            raise ValueError(cursor)
+        return sort_value, int(pk)
+    except Exception:
+        raise ValidationError({"cursor": "Curseur invalide."})
+
+
+def _nest(row: dict) -> dict:
+    out = {}
+    for key, value in row.items():
+        if isinstance(value, Decimal):
+            value = str(value)
+        parts = key.split(".")
+        target = out
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return out
+
+
+class AdminListing:
+    """
+    Déclaration d'une liste admin.
+
+    columns: {"nom.de.sortie": "lookup__orm" | expression}  (les expressions sont annotées)
+    default_fields: colonnes renvoyées sans ?fields=
+    sort_field: champ date du tri keyset (décroissant, départagé par id)
+    """
+
+    def __init__(self, *, columns: dict, default_fields, sort_field: str):
+        self.columns = columns
+        self.default_fields = list(default_fields)
+        self.sort_field = sort_field
+
+    # ------------------------------------------------------------------ paramètres
+    def selected_fields(self, request) -> list[str]:
+        raw = (request.query_params.get("fields") or "").strip()
+        if not raw:
+            return self.default_fields
+
+        wanted = [f.strip() for f in raw.split(",") if f.strip()]
+        selected = []
+        for name in wanted:
+            # "driver" sélectionne toutes les colonnes "driver.*"
+            matches = [c for c in self.columns if c == name or c.startswith(name + ".")]
+            if not matches:
+                raise ValidationError({"fields": f"Champ inconnu: {name}"})
+            selected.extend(m for m in matches if m not in selected)
+        if "id" not in selected:
+            selected.insert(0, "id")
+        return selected
+
+    @staticmethod
+    def limit(request) -> int:
+        try:
+            value = int(request.query_params.get("limit", DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            raise ValidationError({"limit": "Entier attendu."})
+        return max(1, min(value, MAX_LIMIT))
+
+    # ------------------------------------------------------------------ comptage
+    @staticmethod
+    def estimated_rows(model) -> int | None:
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            # table partitionnée: somme des partitions
+            cursor.execute(
+                """
+                SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint
+                FROM pg_class c
+                WHERE c.oid = %s::regclass
+                   OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)
+                """,
+                [model._meta.db_table, model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row else None
+
+    def count(self, qs, mode: str, filtered: bool):
+        """Retourne (count, exact: bool) ou (None, False) si count=none."""
+        if mode == "none":
+            return None, False
+        if mode == "exact":
+            return qs.count(), True
+
+        if not filtered:
+            estimate = self.estimated_rows(qs.model)
+            if estimate:
+                return estimate, False
+
+        capped = qs.order_by().values("pk")[: COUNT_CAP + 1].count()
+        return min(capped, COUNT_CAP), capped <= COUNT_CAP
+
+    # ------------------------------------------------------------------ page
+    def paginate(self, request, qs, *, filtered: bool = False) -> dict:
+        fields = self.selected_fields(request)
+        limit = self.limit(request)
+        count_mode = (request.query_params.get("count") or "approx").strip().lower()
+        if count_mode not in ("approx", "exact", "none"):
+            raise ValidationError({"count": "approx | exact | none"})
+
+        count, exact = self.count(qs, count_mode, filtered)
+
+        page_qs = qs.order_by(f"-{self.sort_field}", "-pk")
+
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            sort_value, pk = _decode_cursor(cursor)
+            page_qs = page_qs.filter(
+                Q(**{f"{self.sort_field}__lt": sort_value}) | Q(**{self.sort_field: sort_value, "pk__lt": pk})
+            )
+
+        # alias internes: les noms pointés ("driver.name") ne sont pas des alias SQL valides
+        aliases = {name: f"c{i}" for i, name in enumerate(fields)}
+        projection = {
+            aliases[name]: F(self.columns[name]) if isinstance(self.columns[name], str) else self.columns[name]
+            for name in fields
+        }
+        rows = list(page_qs.values(_k_sort=F(self.sort_field), _k_pk=F("pk"), **projection)[: limit + 1])
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = _encode_cursor([last["_k_sort"], last["_k_pk"]])
+
+        results = [_nest({name: row[aliases[name]] for name in fields}) for row in rows]
+
+        next_url = None
+        if next_cursor:
+            params = request.query_params.copy()
+            params["cursor"] = next_cursor
+            next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+        return {
+            "count": count,
+            "count_exact": exact,
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "next": next_url,
+            "fields": fields,
+            "results": results,
+        }
@@ -0,0 +1,27 @@
+# ========================= apps/adminpanel/management/commands/area_rollups.py =========================
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.adminpanel.geo import AreaRollups
+
+
+class Command(BaseCommand):
+    help = "Recalcule les agrégats quotidiens par zone (AreaDailyRollup): aujourd'hui, ou une plage pour la reprise."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="dernier jour (YYYY-MM-DD), défaut: aujourd'hui")
+        parser.add_argument("--days", type=int, default=1, help="nombre de jours à recalculer (jusqu'à --date)")
+
+    def handle(self, *args, **options):
+        try:
+            end = date.fromisoformat(options["date"]) if options["date"] else timezone.localdate()
+        except ValueError:
+            raise CommandError("--date invalide (YYYY-MM-DD).")
+        if options["days"] < 1:
+            raise CommandError("--days doit être >= 1.")
+
+        start = end - timedelta(days=options["days"] - 1)
+        rows = AreaRollups.refresh_range(start, end)
+        self.stdout.write(self.style.SUCCESS(f"✅ {rows} agrégats écrits ({start} -> {end})"))
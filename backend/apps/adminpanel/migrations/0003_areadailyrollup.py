@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_admin_areas'),
+        ('adminpanel', '0002_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AreaDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(max_length=10)),
+                ('day', models.DateField()),
+                ('pdv_count', models.PositiveIntegerField(default=0)),
+                ('stock_liters', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('sales_liters', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('sales_count', models.PositiveIntegerField(default=0)),
+                ('deliveries_liters', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('deliveries_count', models.PositiveIntegerField(default=0)),
+                ('collections_liters', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('collections_value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('collections_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='accounts.adminarea')),
+            ],
+            options={
+                'ordering': ('-day', 'area'),
+                'indexes': [models.Index(fields=['level', 'day'], name='adminpanel__level_e09109_idx')],
+                'constraints': [models.UniqueConstraint(fields=('area', 'day'), name='uniq_area_daily_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Reprise: rattache les utilisateurs, PDV et fournisseurs existants à une AdminArea
+# (rapprochement approximatif des saisies libres province / commune, cf. apps.accounts.areas)
+
+from django.db import migrations
+
+from apps.accounts.areas import AreaResolver
+
+SOURCES = (
+    ("accounts", "CustomUser"),
+    ("pdv", "PointDeVente"),
+    ("suppliers", "Supplier"),
+)
+
+
+def backfill_areas(apps, schema_editor):
+    AdminArea = apps.get_model("accounts", "AdminArea")
+    resolved = {}
+
+    for app_label, model_name in SOURCES:
+        model = apps.get_model(app_label, model_name)
+        pairs = (
+            model.objects.filter(area__isnull=True)
+            .values_list("province", "commune")
+            .distinct()
+            .order_by()
+        )
+        for province, commune in list(pairs):
+            if not (province or commune):
+                continue
+            key = (province or "", commune or "")
+            if key not in resolved:
+                area = AreaResolver.resolve(*key, model=AdminArea)
+                resolved[key] = area.pk if area else None
+            if resolved[key]:
+                model.objects.filter(province=province, commune=commune, area__isnull=True).update(
+                    area_id=resolved[key]
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0007_admin_areas"),
+        ("pdv", "0008_pointdevente_area"),
+        ("suppliers", "0002_supplier_area"),
+        ("adminpanel", "0003_areadailyrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_areas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,183 @@
+# ========================= apps/adminpanel/models.py =========================
+from __future__ import annotations
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class ReportJob(models.Model):
+    """
+    Rapport admin exécuté en arrière-plan (Celery) puis déposé dans le stockage (CSV / Parquet).
+    Le client suit le statut via /admin-dashboard/reports/{id}/ et télécharge par URL signée.
+    """
+
+    STATUS = (
+        ("pending", "En attente"),
+        ("running", "En cours"),
+        ("completed", "Terminé"),
+        ("failed", "Échec"),
+    )
+    FORMATS = (
+        ("csv", "CSV"),
+        ("parquet", "Parquet"),
+    )
+
+    report = models.CharField(max_length=50)  # clé de REPORTS (apps/adminpanel/reports.py)
+    params = models.JSONField(default=dict, blank=True)
+    file_format = models.CharField(max_length=10, choices=FORMATS, default="csv")
+    status = models.CharField(max_length=20, choices=STATUS, default="pending", db_index=True)
+
+    file = models.CharField(max_length=255, blank=True, default="")  # nom dans default_storage
+    row_count = models.PositiveIntegerField(default=0)
+    size_bytes = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="report_jobs",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [models.Index(fields=["created_by", "created_at"])]
+
+    def __str__(self):
+        return f"ReportJob#{self.pk} {self.report} {self.status}"
+
+
+class NotificationOutbox(models.Model):
+    """
+    Envoi de notification en attente de distribution (une ligne par envoi, quel que soit le public).
+    Le worker Celery résout le public, insère les Notification par lots, met à jour les compteurs
+    non lus (Redis) et pousse l'événement via Channels.
+    """
+
+    STATUS = (
+        ("pending", "En attente"),
+        ("processing", "En cours"),
+        ("done", "Distribué"),
+        ("failed", "Échec"),
+    )
+    LEVELS = (
+        ("info", "Info"),
+        ("success", "Succès"),
+        ("warning", "Avertissement"),
+        ("error", "Erreur"),
+    )
+
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True, default="")
+    level = models.CharField(max_length=10, choices=LEVELS, default="info")
+    data = models.JSONField(default=dict, blank=True)
+
+    # public: rôles (ex: ["agent"]) et/ou utilisateurs explicites; les deux vides = tous les actifs
+    roles = models.JSONField(default=list, blank=True)
+    user_ids = models.JSONField(default=list, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS, default="pending")
+    recipients_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="notification_outbox",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    # pris en charge par un worker; "processing" plus ancien que le délai = worker mort, repris
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            # ✅ file du drainer: seules les lignes en attente / en cours sont indexées
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status__in=["pending", "processing"]),
+                name="notif_outbox_queue_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"NotificationOutbox#{self.pk} {self.status} {self.title[:30]}"
+
+
+class Notification(models.Model):
+    """Notification d'un utilisateur (inbox). read_at NULL = non lue."""
+
+    # index couvert par (user, id)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications", db_index=False
+    )
+    outbox = models.ForeignKey(
+        NotificationOutbox, null=True, blank=True, on_delete=models.SET_NULL, related_name="notifications"
+    )
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True, default="")
+    level = models.CharField(max_length=10, choices=NotificationOutbox.LEVELS, default="info")
+    data = models.JSONField(default=dict, blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-id",)
+        indexes = [
+            # ✅ inbox (curseur -id)
+            models.Index(fields=["user", "id"], name="notif_user_id_idx"),
+            # ✅ non lues: comptage et filtre ?unread=1 sur un index réduit aux lignes non lues
+            models.Index(fields=["user", "id"], condition=models.Q(read_at__isnull=True), name="notif_unread_idx"),
+        ]
+        constraints = [
+            # un envoi ne produit qu'une notification par utilisateur (drainer rejouable)
+            models.UniqueConstraint(fields=["outbox", "user"], name="uniq_notification_outbox_user"),
+        ]
+
+    def __str__(self):
+        return f"Notification#{self.pk} user={self.user_id} {self.title[:30]}"
+
+
+class AreaDailyRollup(models.Model):
+    """
+    Agrégats quotidiens par zone (AdminArea), matérialisés par Celery (apps/adminpanel/geo.py).
+    Une ligne par zone et par jour, communes ET provinces (les provinces cumulent leurs communes):
+    la carte nationale se lit en une requête indexée (level, day).
+    """
+
+    area = models.ForeignKey("accounts.AdminArea", on_delete=models.CASCADE, related_name="daily_rollups")
+    level = models.CharField(max_length=10)  # copie de area.level (filtre sans jointure)
+    day = models.DateField()
+
+    pdv_count = models.PositiveIntegerField(default=0)
+    stock_liters = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # stock en fin de journée
+    sales_liters = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    sales_count = models.PositiveIntegerField(default=0)
+    deliveries_liters = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    deliveries_count = models.PositiveIntegerField(default=0)
+    collections_liters = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    collections_value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    collections_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("-day", "area")
+        constraints = [
+            models.UniqueConstraint(fields=["area", "day"], name="uniq_area_daily_rollup"),
+        ]
+        indexes = [
+            models.Index(fields=["level", "day"]),
+        ]
+
+    def __str__(self):
+        return f"AreaDailyRollup(area={self.area_id}, {self.day})"
@@ -0,0 +1,293 @@
+# ========================= apps/adminpanel/notifications.py =========================
+"""
+Notifications utilisateurs: outbox + distribution asynchrone.
+
+- envoi (requête HTTP): une seule ligne NotificationOutbox, quel que soit le public (10k agents compris);
+  la distribution est confiée à Celery après commit
+- distribution (worker): public résolu en iterator(), Notification insérées par lots (bulk_create),
+  compteurs non lus incrémentés dans Redis, push Channels par groupe (rôle / utilisateur / tous)
+- reprise: une ligne "processing" plus ancienne que PROCESSING_TIMEOUT (worker mort) est reprise;
+  les notifications déjà insérées ne sont ni dupliquées ni recomptées
+- compteur non lu: hash Redis user_id -> count; champ absent = recalcul en base (index partiel
+  sur les non lues) puis mise en cache; les incréments ne touchent que les champs déjà en cache;
+  le hash expire (UNREAD_TTL): un comptage concurrent d'une insertion ne reste pas faux indéfiniment
+- Redis / Channels indisponibles: compteurs lus en base, push perdu (l'inbox reste la source de vérité)
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Notification, NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+UNREAD_KEY = "seasky:notifications:unread"
+UNREAD_TTL = 300
+BATCH_SIZE = 2000
+DRAIN_LIMIT = 20
+PROCESSING_TIMEOUT = 900
+
+# HINCRBY uniquement sur les champs déjà en cache (un champ absent sera recalculé en base)
+_INCR_EXISTING = """
+local n = tonumber(ARGV[1])
+for i = 2, #ARGV do
+    if redis.call('HEXISTS', KEYS[1], ARGV[i]) == 1 then
+        redis.call('HINCRBY', KEYS[1], ARGV[i], n)
+    end
+end
+return 1
+"""
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+def user_group(user_id) -> str:
+    return f"notifications.user.{user_id}"
+
+
+def role_group(role) -> str:
+    return f"notifications.role.{role or 'none'}"
+
+
+ALL_GROUP = "notifications.all"
+
+
+class UnreadCounter:
+    @staticmethod
+    def count_db(user_id) -> int:
+        return Notification.objects.filter(user_id=user_id, read_at__isnull=True).count()
+
+    @staticmethod
+    def get(user_id) -> int:
+        try:
+            r = _redis()
+            cached = r.hget(UNREAD_KEY, user_id)
+            if cached is not None:
+                return max(int(cached), 0)
+            count = UnreadCounter.count_db(user_id)
+            UnreadCounter._store(r, user_id, count)
+            return count
+        except Exception:
+            logger.warning("Unread counter unavailable (user=%s), counting in database", user_id, exc_info=True)
+            return UnreadCounter.count_db(user_id)
+
+    @staticmethod
+    def incr(user_ids, amount: int = 1) -> None:
+        user_ids = [str(uid) for uid in user_ids]
+        if not user_ids or not amount:
+            return
+        try:
+            r = _redis()
+            for i in range(0, len(user_ids), 1000):
+                r.eval(_INCR_EXISTING, 1, UNREAD_KEY, amount, *user_ids[i:i + 1000])
+        except Exception:
+            # champs invalidés: prochain get() recalcule en base
+            logger.warning("Unread counter update failed, invalidating", exc_info=True)
+            UnreadCounter.invalidate(user_ids)
+
+    @staticmethod
+    def _store(r, user_id, value: int) -> None:
+        # ✅ échéance posée à la création du hash seulement (NX): tout le cache se recalcule au plus tard après UNREAD_TTL
+        pipe = r.pipeline()
+        pipe.hset(UNREAD_KEY, user_id, value)
+        pipe.expire(UNREAD_KEY, int(getattr(settings, "NOTIFICATIONS_UNREAD_TTL", UNREAD_TTL)), nx=True)
+        pipe.execute()
+
+    @staticmethod
+    def set(user_id, value: int) -> None:
+        try:
+            UnreadCounter._store(_redis(), user_id, value)
+        except Exception:
+            logger.warning("Unread counter set failed (user=%s)", user_id, exc_info=True)
+
+    @staticmethod
+    def invalidate(user_ids) -> None:
+        try:
+            if user_ids:
+                _redis().hdel(UNREAD_KEY, *user_ids)
+        except Exception:
+            logger.warning("Unread counter invalidation failed", exc_info=True)
+
+
+class NotificationService:
+    # ------------------------------------------------------------------ envoi (requête)
+    @staticmethod
+    def broadcast(*, title, body="", level="info", data=None, roles=None, user_ids=None, created_by=None):
+        """Enregistre l'envoi (une ligne) et planifie la distribution après commit."""
+        outbox = NotificationOutbox.objects.create(
+            title=title,
+            body=body or "",
+            level=level,
+            data=data or {},
+            roles=sorted(set(roles or [])),
+            user_ids=sorted(set(user_ids or [])),
+            created_by=created_by,
+        )
+
+        def _enqueue():
+            from .tasks import deliver_notifications
+
+            try:
+                deliver_notifications.delay(outbox.pk)
+            except Exception:
+                # la tâche périodique drainera l'outbox
+                logger.warning("Notification outbox=%s not enqueued", outbox.pk, exc_info=True)
+
+        transaction.on_commit(_enqueue)
+        return outbox
+
+    # ------------------------------------------------------------------ distribution (worker)
+    @staticmethod
+    def audience(outbox):
+        qs = get_user_model().objects.filter(is_active=True)
+        if outbox.roles or outbox.user_ids:
+            qs = qs.filter(Q(role__in=outbox.roles) | Q(pk__in=outbox.user_ids))
+        return qs.order_by("pk").values_list("pk", flat=True)
+
+    @staticmethod
+    def processing_timeout() -> timedelta:
+        return timedelta(seconds=int(getattr(settings, "NOTIFICATIONS_PROCESSING_TIMEOUT", PROCESSING_TIMEOUT)))
+
+    @staticmethod
+    def _claim(outbox_id=None):
+        now = timezone.now()
+        with transaction.atomic():
+            # en attente, ou "processing" abandonnée par un worker mort
+            stale = Q(status="processing") & (
+                Q(claimed_at__lt=now - NotificationService.processing_timeout()) | Q(claimed_at__isnull=True)
+            )
+            qs = NotificationOutbox.objects.select_for_update(skip_locked=True).filter(Q(status="pending") | stale)
+            if outbox_id is not None:
+                qs = qs.filter(pk=outbox_id)
+            outbox = qs.order_by("created_at").first()
+            if outbox:
+                if outbox.status == "processing":
+                    logger.warning("Notification outbox=%s reclaimed (claimed_at=%s)", outbox.pk, outbox.claimed_at)
+                NotificationOutbox.objects.filter(pk=outbox.pk).update(status="processing", claimed_at=now)
+        return outbox
+
+    @staticmethod
+    def deliver(outbox_id=None):
+        """Distribue un envoi en attente (le plus ancien si outbox_id est None). Retourne l'outbox ou None."""
+        outbox = NotificationService._claim(outbox_id)
+        if outbox is None:
+            return None
+
+        now = timezone.now()
+        total = 0
+        try:
+            batch = []
+            for user_id in NotificationService.audience(outbox).iterator(chunk_size=BATCH_SIZE):
+                batch.append(user_id)
+                if len(batch) >= BATCH_SIZE:
+                    total += NotificationService._insert(outbox, batch, now)
+                    batch = []
+            if batch:
+                total += NotificationService._insert(outbox, batch, now)
+        except Exception as exc:
+            logger.exception("Notification outbox=%s failed after %s recipients", outbox.pk, total)
+            NotificationOutbox.objects.filter(pk=outbox.pk).update(
+                status="failed", error=str(exc)[:2000], recipients_count=total, processed_at=timezone.now()
+            )
+            outbox.refresh_from_db()
+            return outbox
+
+        NotificationOutbox.objects.filter(pk=outbox.pk).update(
+            status="done", recipients_count=total, processed_at=timezone.now()
+        )
+        NotificationService.push(outbox, now)
+        logger.info("Notification outbox=%s delivered to %s users", outbox.pk, total)
+        outbox.refresh_from_db()
+        return outbox
+
+    @staticmethod
+    def _insert(outbox, user_ids, now) -> int:
+        """Insère les notifications manquantes du lot; retourne (et compte) les seules lignes créées."""
+        # ✅ reprise: destinataires déjà servis exclus (index unique outbox, user) => ni doublon ni double incrément
+        done = set(
+            Notification.objects.filter(outbox=outbox, user_id__in=user_ids).values_list("user_id", flat=True)
+        )
+        user_ids = [uid for uid in user_ids if uid not in done]
+        if not user_ids:
+            return 0
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=user_id,
+                    outbox=outbox,
+                    title=outbox.title,
+                    body=outbox.body,
+                    level=outbox.level,
+                    data=outbox.data,
+                    created_at=now,
+                )
+                for user_id in user_ids
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        UnreadCounter.incr(user_ids, 1)
+        return len(user_ids)
+
+    @staticmethod
+    def drain(limit: int = DRAIN_LIMIT) -> int:
+        done = 0
+        while done < limit and NotificationService.deliver() is not None:
+            done += 1
+        return done
+
+    @staticmethod
+    def push(outbox, created_at) -> None:
+        """Un message par groupe (rôle / utilisateur / tous), pas un par destinataire."""
+        if outbox.roles or outbox.user_ids:
+            groups = [role_group(role) for role in outbox.roles] + [user_group(uid) for uid in outbox.user_ids]
+        else:
+            groups = [ALL_GROUP]
+
+        message = {
+            "type": "notification.push",  # -> NotificationsConsumer.notification_push
+            "outbox_id": outbox.pk,
+            "title": outbox.title,
+            "body": outbox.body,
+            "level": outbox.level,
+            "data": outbox.data,
+            "created_at": created_at.isoformat(),
+        }
+        try:
+            from channels.layers import get_channel_layer
+
+            layer = get_channel_layer()
+            if layer is None:
+                return
+            send = async_to_sync(layer.group_send)
+            for group in groups:
+                send(group, message)
+        except Exception:
+            logger.warning("Notification outbox=%s push failed", outbox.pk, exc_info=True)
+
+    # ------------------------------------------------------------------ lecture
+    @staticmethod
+    def mark_read(user, ids=None) -> int:
+        """Marque lues les notifications `ids` (toutes si None). Retourne le nombre mis à jour."""
+        qs = Notification.objects.filter(user=user, read_at__isnull=True)
+        if ids is not None:
+            qs = qs.filter(pk__in=ids)
+        updated = qs.update(read_at=timezone.now())
+        if ids is None:
+            UnreadCounter.set(user.pk, 0)
+        elif updated:
+            UnreadCounter.incr([user.pk], -updated)
+        return updated
@@ -0,0 +1,336 @@
+# ========================= apps/adminpanel/reports.py =========================
+"""
+Rapports admin lourds, exécutés hors requête HTTP (Celery) et déposés dans le stockage.
+
+- chaque rapport est une spécification déclarative: modèle, champ date, dimensions (GROUP BY)
+  et mesures (agrégats); une seule requête agrégée, lue en iterator() (curseur serveur)
+- paramètres: date_from / date_to (défaut: 12 derniers mois), group_by (sous-ensemble des dimensions)
+- sortie CSV (toujours disponible) ou Parquet (si pyarrow est installé), écrite dans un fichier
+  temporaire puis envoyée dans default_storage (disque local ou S3)
+- téléchargement: URL présignée S3 si le stockage la supporte, sinon lien signé (TimestampSigner)
+  servi par /admin-dashboard/reports/{id}/download/
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import logging
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+PARQUET_BATCH = 10000
+DEFAULT_MONTHS = 12
+SIGNING_SALT = "adminpanel.report-download"
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ReportSpec:
+    """
+    Déclaration d'un rapport.
+
+    dimensions: {"nom_colonne": "lookup__orm" | expression} (GROUP BY, ordre de tri)
+    measures: {"nom_colonne": agrégat}
+    filters: Q appliqué en plus de la fenêtre de dates
+    Les noms de colonnes ne doivent pas reprendre un nom de champ du modèle (alias .values()).
+    """
+
+    def __init__(self, *, label: str, model: str, time_field: str, dimensions: dict, measures: dict, filters=None):
+        self.label = label
+        self.model = model
+        self.time_field = time_field
+        self.dimensions = dimensions
+        self.measures = measures
+        self.filters = filters or Q()
+
+    def get_model(self):
+        from django.apps import apps
+
+        return apps.get_model(self.model)
+
+
+REPORTS = {
+    "sales_liters_by_area": ReportSpec(
+        label="Litres vendus par mois / province / commune (ventes PDV)",
+        model="pdv.PDVSale",
+        time_field="sold_at",
+        dimensions={
+            "month": TruncMonth("sold_at"),
+            "province": "pdv__province",
+            "commune": "pdv__commune",
+        },
+        measures={"liters": Sum("liters_sold"), "sales": Count("id")},
+    ),
+    "delivered_liters_by_area": ReportSpec(
+        label="Litres livrés par mois / province / commune",
+        model="logistics.Delivery",
+        time_field="delivered_at",
+        dimensions={
+            "month": TruncMonth("delivered_at"),
+            "province": "pdv__province",
+            "commune": "pdv__commune",
+        },
+        measures={"liters": Sum("quantity_liters"), "deliveries": Count("id")},
+    ),
+    "collections_by_driver": ReportSpec(
+        label="Collectes par mois / chauffeur",
+        model="logistics.Collection",
+        time_field="collected_at",
+        dimensions={
+            "month": TruncMonth("collected_at"),
+            "driver_code": "driver__driver_code",
+            "driver_username": "driver__user__username",
+        },
+        measures={"liters": Sum("quantity_liters"), "value": Sum("value_amount"), "collections": Count("id")},
+    ),
+    "driver_earnings": ReportSpec(
+        label="Gains chauffeurs par mois (crédits wallet réussis)",
+        model="wallet.WalletTransaction",
+        time_field="created_at",
+        dimensions={
+            "month": TruncMonth("created_at"),
+            "driver_code": "wallet__user__driver__driver_code",
+            "driver_username": "wallet__user__username",
+        },
+        measures={"earnings": Sum("amount"), "transactions": Count("id")},
+        filters=Q(
+            wallet__user__driver__isnull=False,
+            tx_type__in=("credit", "transfer_in"),
+            status="success",
+        ),
+    ),
+}
+
+
+def _render(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime("%Y-%m") if timezone.is_aware(value) else value.strftime("%Y-%m")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m")
+    # Decimal / None conservés: csv les écrit tels quels, Parquet garde un type décimal
+    return value
+
+
+class ReportBuilder:
+    # ------------------------------------------------------------------ validation (requête HTTP)
+    @staticmethod
+    def clean(report: str, params: dict | None, file_format: str) -> dict:
+        """Valide la demande; retourne les paramètres normalisés (stockés sur le ReportJob)."""
+        spec = REPORTS.get(report)
+        if spec is None:
+            raise ValidationError({"report": f"Rapport inconnu. Disponibles: {', '.join(REPORTS)}"})
+        if file_format not in dict(ReportJob.FORMATS):
+            raise ValidationError({"format": "csv | parquet"})
+        if file_format == "parquet" and not parquet_available():
+            raise ValidationError({"format": "Parquet indisponible sur ce serveur (pyarrow non installé)."})
+
+        params = params or {}
+        today = timezone.localdate()
+        default_from = (today - timedelta(days=DEFAULT_MONTHS * 31)).replace(day=1)
+        try:
+            date_to = parse_date(str(params.get("date_to") or today))
+            date_from = parse_date(str(params.get("date_from") or default_from))
+        except ValueError:
+            date_from = date_to = None
+        if not date_from or not date_to:
+            raise ValidationError({"params": "date_from / date_to: format YYYY-MM-DD."})
+        if date_from > date_to:
+            raise ValidationError({"params": "date_from doit précéder date_to."})
+
+        group_by = params.get("group_by") or list(spec.dimensions)
+        if isinstance(group_by, str):
+            group_by = [g.strip() for g in group_by.split(",") if g.strip()]
+        unknown = [g for g in group_by if g not in spec.dimensions]
+        if unknown:
+            raise ValidationError({"params": f"group_by inconnu: {', '.join(unknown)}"})
+
+        return {
+            "date_from": date_from.isoformat(),
+            "date_to": date_to.isoformat(),
+            # ordre de la spécification (tri stable, colonnes lisibles)
+            "group_by": [d for d in spec.dimensions if d in group_by],
+        }
+
+    # ------------------------------------------------------------------ requête
+    @staticmethod
+    def queryset(report: str, params: dict):
+        spec = REPORTS[report]
+        start = timezone.make_aware(datetime.combine(date.fromisoformat(params["date_from"]), time.min))
+        end = timezone.make_aware(datetime.combine(date.fromisoformat(params["date_to"]) + timedelta(days=1), time.min))
+
+        dims = {
+            name: F(spec.dimensions[name]) if isinstance(spec.dimensions[name], str) else spec.dimensions[name]
+            for name in params["group_by"]
+        }
+        qs = spec.get_model().objects.filter(
+            spec.filters,
+            **{f"{spec.time_field}__gte": start, f"{spec.time_field}__lt": end},
+        )
+        return qs.values(**dims).annotate(**spec.measures).order_by(*dims)
+
+    @staticmethod
+    def columns(report: str, params: dict) -> list[str]:
+        return list(params["group_by"]) + list(REPORTS[report].measures)
+
+    @staticmethod
+    def rows(report: str, params: dict):
+        columns = ReportBuilder.columns(report, params)
+        for row in ReportBuilder.queryset(report, params).iterator(chunk_size=CHUNK_SIZE):
+            yield [_render(row[c]) for c in columns]
+
+    # ------------------------------------------------------------------ écriture
+    @staticmethod
+    def write_csv(fh, columns, rows) -> int:
+        text = io.TextIOWrapper(fh, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow(columns)
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        text.flush()
+        text.detach()  # fh reste ouvert pour l'envoi
+        return count
+
+    @staticmethod
+    def parquet_schema(report: str, params: dict):
+        """
+        Schéma Parquet explicite, déduit des champs de la spécification (jamais des données):
+        une colonne entièrement vide ou des montants qui grossissent au fil des mois
+        ne changent pas les types d'un lot à l'autre.
+        """
+        import pyarrow as pa
+
+        annotations = ReportBuilder.queryset(report, params).query.annotations
+        measures = REPORTS[report].measures
+        fields = []
+        for name in ReportBuilder.columns(report, params):
+            output = annotations[name].output_field
+            kind = output.get_internal_type()
+            if kind == "DecimalField":
+                # ✅ échelle du modèle; une somme dépasse vite max_digits => précision maximale
+                precision = 38 if name in measures else output.max_digits
+                fields.append(pa.field(name, pa.decimal128(precision, output.decimal_places)))
+            elif kind in ("IntegerField", "BigIntegerField", "SmallIntegerField", "PositiveIntegerField",
+                          "PositiveBigIntegerField", "PositiveSmallIntegerField", "AutoField", "BigAutoField"):
+                fields.append(pa.field(name, pa.int64()))
+            elif kind == "FloatField":
+                fields.append(pa.field(name, pa.float64()))
+            else:
+                # texte, et dates rendues "YYYY-MM" par _render
+                fields.append(pa.field(name, pa.string()))
+        return pa.schema(fields)
+
+    @staticmethod
+    def write_parquet(fh, schema, rows) -> int:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(fh, schema)
+        columns = schema.names
+        batch = []
+        count = 0
+
+        def flush():
+            writer.write_table(pa.Table.from_pylist([dict(zip(columns, r)) for r in batch], schema=schema))
+
+        for row in rows:
+            batch.append(row)
+            count += 1
+            if len(batch) >= PARQUET_BATCH:
+                flush()
+                batch = []
+        if batch:
+            flush()
+        writer.close()
+        return count
+
+    # ------------------------------------------------------------------ exécution (worker)
+    @staticmethod
+    def run(job_id: int) -> ReportJob:
+        job = ReportJob.objects.get(pk=job_id)
+        if job.status == "completed":
+            return job
+
+        ReportJob.objects.filter(pk=job.pk).update(status="running", started_at=timezone.now(), error="")
+        try:
+            columns = ReportBuilder.columns(job.report, job.params)
+            rows = ReportBuilder.rows(job.report, job.params)
+            with tempfile.TemporaryFile() as fh:
+                if job.file_format == "parquet":
+                    count = ReportBuilder.write_parquet(fh, ReportBuilder.parquet_schema(job.report, job.params), rows)
+                else:
+                    count = ReportBuilder.write_csv(fh, columns, rows)
+                size = fh.tell()
+                fh.seek(0)
+                name = default_storage.save(
+                    f"reports/{timezone.now():%Y/%m}/{job.report}-{job.pk}.{job.file_format}",
+                    File(fh),
+                )
+        except Exception as exc:
+            logger.exception("Report job=%s (%s) failed", job.pk, job.report)
+            ReportJob.objects.filter(pk=job.pk).update(status="failed", error=str(exc)[:2000], finished_at=timezone.now())
+        else:
+            ReportJob.objects.filter(pk=job.pk).update(
+                status="completed", file=name, row_count=count, size_bytes=size, finished_at=timezone.now()
+            )
+            logger.info("Report job=%s (%s) rows=%s size=%s file=%s", job.pk, job.report, count, size, name)
+
+        job.refresh_from_db()
+        return job
+
+    # ------------------------------------------------------------------ téléchargement
+    @staticmethod
+    def download_ttl() -> int:
+        return int(getattr(settings, "REPORT_DOWNLOAD_TTL", 900))
+
+    @staticmethod
+    def sign(job: ReportJob) -> str:
+        return signing.TimestampSigner(salt=SIGNING_SALT).sign(str(job.pk))
+
+    @staticmethod
+    def unsign(token: str, job_id) -> bool:
+        try:
+            value = signing.TimestampSigner(salt=SIGNING_SALT).unsign(token, max_age=ReportBuilder.download_ttl())
+        except signing.BadSignature:
+            return False
+        return value == str(job_id)
+
+    @staticmethod
+    def download_url(job: ReportJob, request) -> str | None:
+        if job.status != "completed" or not job.file:
+            return None
+        # S3 avec querystring_auth: URL présignée, le fichier ne transite pas par Django
+        if getattr(default_storage, "querystring_auth", False):
+            return default_storage.url(job.file, expire=ReportBuilder.download_ttl())
+        path = reverse("admin-dashboard-report-download", kwargs={"report_id": job.pk})
+        return request.build_absolute_uri(f"{path}?token={ReportBuilder.sign(job)}")
@@ -6,6 +6,8 @@ from rest_framework import serializers
 
 from apps.accounts.serializers import UserSerializer, UserDetailSerializer
 
+from .models import Notification, NotificationOutbox, ReportJob
+
 User = get_user_model()
 
 
@@ -21,3 +23,68 @@ class AdminUserDetailSerializer(UserDetailSerializer):
 class AdminBlockUserSerializer(serializers.Serializer):
     is_active = serializers.BooleanField(required=True)
     reason = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+class ReportRequestSerializer(serializers.Serializer):
+    report = serializers.CharField()
+    format = serializers.ChoiceField(choices=["csv", "parquet"], required=False, default="csv")
+    params = serializers.DictField(required=False, default=dict)
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReportJob
+        fields = [
+            "id",
+            "report",
+            "params",
+            "file_format",
+            "status",
+            "row_count",
+            "size_bytes",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ["id", "title", "body", "level", "data", "created_at", "read_at"]
+        read_only_fields = fields
+
+
+class NotificationBroadcastSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=200)
+    body = serializers.CharField(required=False, allow_blank=True, default="")
+    level = serializers.ChoiceField(choices=NotificationOutbox.LEVELS, required=False, default="info")
+    data = serializers.DictField(required=False, default=dict)
+    roles = serializers.ListField(
+        child=serializers.ChoiceField(choices=User.Roles.choices), required=False, default=list
+    )
+    user_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+
+
+class NotificationMarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+
+
+class NotificationOutboxSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NotificationOutbox
+        fields = [
+            "id",
+            "title",
+            "level",
+            "roles",
+            "user_ids",
+            "status",
+            "recipients_count",
+            "error",
+            "created_at",
+            "processed_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,208 @@
+# ========================= apps/adminpanel/signals.py =========================
+"""
+Maintien incrémental des compteurs du tableau de bord (DashboardCounters) et diffusion
+des événements métier aux tableaux de bord connectés (realtime.events.AdminEvents).
+Les incréments / envois sont appliqués après commit; les chemins bulk_create / update()
+appellent DashboardCounters / AdminEvents directement.
+"""
+
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.drivers.models import Driver, DriverAvailability
+from apps.logistics.models import Collection, Delivery
+from apps.pdv.models import PDVSale, PointDeVente, StockMovement
+from apps.wallet.models import Wallet, WalletTransaction
+from realtime import events
+from realtime.events import AdminEvents
+
+from .counters import DashboardCounters
+
+User = get_user_model()
+
+USER_FIELDS = ("account_type", "role", "is_active")
+
+
+def _touches(update_fields, fields) -> bool:
+    return update_fields is None or bool(set(update_fields) & set(fields))
+
+
+def _user_deltas(values: dict, sign: int) -> dict:
+    return {
+        "users.total": sign,
+        f"users.type.{values['account_type'] or ''}": sign,
+        f"users.role.{values['role'] or ''}": sign,
+        "users.blocked": sign if not values["is_active"] else 0,
+    }
+
+
+def _loaded_changes(instance, fields):
+    """
+    (précédent, courant) pour `fields`: valeurs chargées (from_db) contre valeurs enregistrées,
+    sans relire la ligne; la référence est ensuite alignée sur le courant.
+    None si une valeur manque (champ différé, instance jamais chargée): écart réaligné par reconcile.
+    """
+    values = instance.__dict__
+    loaded = values.setdefault("_loaded", {})
+    current = {f: values[f] for f in fields if f in values}
+    previous = {f: loaded[f] for f in fields if f in loaded}
+    loaded.update(current)
+    if len(current) != len(fields) or len(previous) != len(fields):
+        return None
+    return previous, current
+
+
+# ---------------------------------------------------------------- utilisateurs
+@receiver(post_save, sender=User)
+def count_user(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        _loaded_changes(instance, USER_FIELDS)
+        DashboardCounters.bump(_user_deltas({f: getattr(instance, f) for f in USER_FIELDS}, 1))
+        return
+    if not _touches(update_fields, USER_FIELDS):
+        return
+
+    changes = _loaded_changes(instance, USER_FIELDS)
+    if not changes or changes[0] == changes[1]:
+        return
+    previous, current = changes
+
+    deltas = _user_deltas(previous, -1)
+    for field, amount in _user_deltas(current, 1).items():
+        deltas[field] = deltas.get(field, 0) + amount
+    DashboardCounters.bump(deltas)
+
+    if previous["is_active"] != current["is_active"]:
+        AdminEvents.publish(
+            events.USER_UNBLOCKED if current["is_active"] else events.USER_BLOCKED,
+            {"user_id": instance.pk, "username": instance.username, "role": current["role"]},
+        )
+
+
+@receiver(post_delete, sender=User)
+def uncount_user(sender, instance, **kwargs):
+    DashboardCounters.bump(_user_deltas({f: getattr(instance, f) for f in USER_FIELDS}, -1))
+
+
+# ---------------------------------------------------------------- chauffeurs
+@receiver(post_save, sender=Driver)
+def count_driver(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        _loaded_changes(instance, ("is_verified",))
+        DashboardCounters.bump({"drivers.total": 1, "drivers.verified": int(bool(instance.is_verified))})
+        return
+    if not _touches(update_fields, ("is_verified",)):
+        return
+
+    changes = _loaded_changes(instance, ("is_verified",))
+    if changes and bool(changes[0]["is_verified"]) != bool(changes[1]["is_verified"]):
+        DashboardCounters.bump({"drivers.verified": 1 if instance.is_verified else -1})
+
+
+@receiver(post_delete, sender=Driver)
+def uncount_driver(sender, instance, **kwargs):
+    DashboardCounters.bump({"drivers.total": -1, "drivers.verified": -int(bool(instance.is_verified))})
+
+
+@receiver(post_save, sender=DriverAvailability)
+def count_availability(sender, instance, created, **kwargs):
+    # _loaded_is_available: valeur chargée (mise à jour par save() après post_save)
+    previous = False if created else getattr(instance, "_loaded_is_available", None)
+    if previous is None or bool(previous) == bool(instance.is_available):
+        return
+    DashboardCounters.bump({"drivers.available": 1 if instance.is_available else -1})
+
+
+@receiver(post_delete, sender=DriverAvailability)
+def uncount_availability(sender, instance, **kwargs):
+    if instance.is_available:
+        DashboardCounters.bump({"drivers.available": -1})
+
+
+# ---------------------------------------------------------------- PDV / wallets
+@receiver(post_save, sender=PointDeVente)
+def count_pdv(sender, instance, created, **kwargs):
+    if created:
+        DashboardCounters.bump({"pdv.total": 1})
+
+
+@receiver(post_delete, sender=PointDeVente)
+def uncount_pdv(sender, instance, **kwargs):
+    DashboardCounters.bump({"pdv.total": -1})
+    # le stock du PDV part avec lui (cascade): somme recalculée
+    DashboardCounters.refresh_on_commit("pdv")
+
+
+@receiver(post_save, sender=StockMovement)
+def count_stock_movement(sender, instance, created, **kwargs):
+    if created:
+        DashboardCounters.bump({"pdv.stock_liters": instance.quantity})
+
+
+@receiver(post_save, sender=Wallet)
+def count_wallet(sender, instance, created, **kwargs):
+    if created:
+        DashboardCounters.bump({"wallet.total": 1})
+
+
+@receiver(post_delete, sender=Wallet)
+def uncount_wallet(sender, instance, **kwargs):
+    DashboardCounters.bump({"wallet.total": -1})
+
+
+# ---------------------------------------------------------------- activité du jour
+DAY_EVENTS = (
+    (Delivery, "deliveries", "delivered_at"),
+    (Collection, "collections", "collected_at"),
+    (PDVSale, "sales", "sold_at"),
+    (WalletTransaction, "transactions", "created_at"),
+)
+
+
+def _connect_day_counter(model, field, time_attr):
+    def on_save(sender, instance, created, **kwargs):
+        if created:
+            DashboardCounters.bump_day(field, getattr(instance, time_attr))
+
+    def on_delete(sender, instance, **kwargs):
+        DashboardCounters.bump_day(field, getattr(instance, time_attr), -1)
+
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f"dashboard_day_{field}_save")
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f"dashboard_day_{field}_delete")
+
+
+for _model, _field, _time_attr in DAY_EVENTS:
+    _connect_day_counter(_model, _field, _time_attr)
+
+
+# ---------------------------------------------------------------- temps réel (AdminEventsConsumer)
+@receiver(post_save, sender=Delivery)
+def publish_delivery(sender, instance, created, **kwargs):
+    if created:
+        AdminEvents.publish(
+            events.DELIVERY_CONFIRMED,
+            {
+                "id": instance.pk,
+                "pdv_id": instance.pdv_id,
+                "driver_id": instance.driver_id,
+                "quantity_liters": instance.quantity_liters,
+                "delivered_at": instance.delivered_at,
+                "confirmed_at": instance.confirmed_at,
+            },
+        )
+
+
+@receiver(post_save, sender=PDVSale)
+def publish_sale(sender, instance, created, **kwargs):
+    if created:
+        AdminEvents.publish(events.SALE_REPORTED, events.sale_item(instance))
+
+
+@receiver(post_save, sender=StockMovement)
+def publish_stock_movement(sender, instance, created, **kwargs):
+    if created:
+        AdminEvents.publish(events.STOCK_CHANGED, events.stock_item(instance))
+
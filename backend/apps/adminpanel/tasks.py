@@ -0,0 +1,49 @@
+# ========================= apps/adminpanel/tasks.py =========================
+"""
+Tâches Celery du tableau de bord admin.
+"""
+
+from __future__ import annotations
+
+from celery import shared_task
+
+from .counters import DashboardCounters
+
+
+@shared_task(name="adminpanel.reconcile_dashboard_counters")
+def reconcile_dashboard_counters() -> bool:
+    """Réaligne les compteurs Redis sur la base (rattrape les écarts: updates ensemblistes, Redis indisponible...)."""
+    DashboardCounters.reconcile()
+    return True
+
+
+@shared_task(name="adminpanel.run_report")
+def run_report(job_id: int) -> dict:
+    """Exécute un ReportJob (requête agrégée -> CSV/Parquet -> default_storage)."""
+    from .reports import ReportBuilder
+
+    job = ReportBuilder.run(job_id)
+    return {"id": job.pk, "status": job.status, "rows": job.row_count, "file": job.file}
+
+
+@shared_task(name="adminpanel.deliver_notifications")
+def deliver_notifications(outbox_id: int | None = None) -> int:
+    """Distribue un envoi (outbox_id) ou draine les envois en attente (filet de sécurité périodique)."""
+    from .notifications import NotificationService
+
+    if outbox_id is not None:
+        return int(NotificationService.deliver(outbox_id) is not None)
+    return NotificationService.drain()
+
+
+@shared_task(name="adminpanel.rollup_areas")
+def rollup_areas(day: str | None = None, days_back: int = 0) -> int:
+    """Recalcule les agrégats par zone de `day` (ISO, défaut aujourd'hui) et des `days_back` jours précédents."""
+    from datetime import date, timedelta
+
+    from django.utils import timezone
+
+    from .geo import AreaRollups
+
+    end = date.fromisoformat(day) if day else timezone.localdate()
+    return AreaRollups.refresh_range(end - timedelta(days=days_back), end)
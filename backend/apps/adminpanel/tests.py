@@ -0,0 +1,172 @@
+# ========================= apps/adminpanel/tests.py =========================
+"""
+Listes admin keyset: un curseur altéré est refusé en 400, jamais transmis à l'ORM.
+
+Rapports Parquet: schéma fixé par la spécification (nécessite pyarrow), stable d'un lot à l'autre.
+
+Notifications: un envoi abandonné en "processing" est repris sans doublon ni double comptage.
+
+Compteurs du tableau de bord: changements détectés contre les valeurs chargées, sans relire la ligne;
+?fresh=1 calcule les agrégats une seule fois puis les écrit dans le cache.
+"""
+
+import base64
+import io
+import json
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from apps.drivers.models import Driver
+
+from .counters import GROUPS, DashboardCounters
+from .listing import _decode_cursor, _encode_cursor
+from .models import Notification, NotificationOutbox
+from .notifications import UNREAD_KEY, NotificationService, UnreadCounter
+from .reports import ReportBuilder, parquet_available
+
+
+def _raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+class AdminCursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        cursor = _encode_cursor(["2026-01-02T03:04:05+00:00", 42])
+        sort_value, pk = _decode_cursor(cursor)
+        self.assertEqual((sort_value.year, sort_value.hour, pk), (2026, 3, 42))
+
+    def test_tampered_cursors_are_rejected(self):
+        for values in ([123, 1], [None, 1], ["pas-une-date", 1], ["2026-13-45T00:00:00", 1], ["2026-01-02", "x"]):
+            with self.subTest(values=values), self.assertRaises(ValidationError):
+                _decode_cursor(_raw_cursor(values))
+        with self.assertRaises(ValidationError):
+            _decode_cursor("%%%")
+
+
+@unittest.skipUnless(parquet_available(), "pyarrow requis")
+class ParquetSchemaTests(TestCase):
+    def test_schema_comes_from_spec_not_first_batch(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        params = ReportBuilder.clean("collections_by_driver", {}, "parquet")
+        schema = ReportBuilder.parquet_schema("collections_by_driver", params)
+        self.assertEqual(schema.field("driver_code").type, pa.string())
+        self.assertEqual(schema.field("value").type, pa.decimal128(38, 2))
+        self.assertEqual(schema.field("collections").type, pa.int64())
+
+        rows = [
+            ["2026-01", None, None, Decimal("1.50"), Decimal("3.00"), 1],
+            ["2026-02", "DRV-1", "driver", Decimal("123456789012345.25"), Decimal("999999999999999.99"), 7],
+        ]
+        fh = io.BytesIO()
+        with mock.patch("apps.adminpanel.reports.PARQUET_BATCH", 1):
+            self.assertEqual(ReportBuilder.write_parquet(fh, schema, iter(rows)), 2)
+        fh.seek(0)
+        table = pq.read_table(fh)
+        self.assertEqual(table.schema, schema)
+        self.assertEqual(table.column("driver_code").to_pylist(), [None, "DRV-1"])
+
+
+@mock.patch("apps.adminpanel.notifications.NotificationService.push")
+@mock.patch("apps.adminpanel.notifications.UnreadCounter.incr")
+class NotificationReclaimTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.users = [
+            User.objects.create(username=f"notif-{i}", phone=f"+2577940000{i}", role="agent") for i in range(3)
+        ]
+
+    def outbox(self, claimed_minutes_ago):
+        return NotificationOutbox.objects.create(
+            title="Relance",
+            user_ids=[u.pk for u in self.users],
+            status="processing",
+            claimed_at=timezone.now() - timedelta(minutes=claimed_minutes_ago),
+        )
+
+    def test_live_processing_row_is_left_alone(self, incr, push):
+        outbox = self.outbox(claimed_minutes_ago=1)
+        self.assertIsNone(NotificationService.deliver(outbox.pk))
+
+    def test_stale_processing_row_is_reclaimed_without_recount(self, incr, push):
+        outbox = self.outbox(claimed_minutes_ago=60)
+        # le worker mort avait déjà servi le premier destinataire
+        Notification.objects.create(user=self.users[0], outbox=outbox, title=outbox.title)
+
+        outbox = NotificationService.deliver(outbox.pk)
+        self.assertEqual((outbox.status, outbox.recipients_count), ("done", 2))
+        self.assertEqual(Notification.objects.filter(outbox=outbox).count(), 3)
+        self.assertEqual(sorted(incr.call_args.args[0]), sorted(u.pk for u in self.users[1:]))
+
+    def test_unread_cache_expires(self, incr, push):
+        r = mock.MagicMock()
+        r.hget.return_value = None
+        with mock.patch("apps.adminpanel.notifications._redis", return_value=r):
+            self.assertEqual(UnreadCounter.get(self.users[0].pk), 0)
+        pipe = r.pipeline.return_value
+        pipe.hset.assert_called_once_with(UNREAD_KEY, self.users[0].pk, 0)
+        self.assertTrue(pipe.expire.call_args.kwargs["nx"])
+
+
+@mock.patch("apps.adminpanel.signals.DashboardCounters.bump")
+class DashboardCounterSignalTests(TestCase):
+    def test_user_role_change_uses_loaded_values(self, bump):
+        User = get_user_model()
+        user = User.objects.create(username="counter-user", phone="+25779950000", role="client")
+        loaded = User.objects.get(pk=user.pk)
+        loaded.role = "agent"
+        bump.reset_mock()
+        with CaptureQueriesContext(connection) as queries:
+            loaded.save(update_fields=["role"])
+
+        self.assertFalse([q for q in queries if f'FROM "{User._meta.db_table}"' in q["sql"]])
+        deltas = bump.call_args.args[0]
+        self.assertEqual((deltas["users.role.client"], deltas["users.role.agent"], deltas["users.total"]), (-1, 1, 0))
+
+        bump.reset_mock()
+        loaded.save(update_fields=["role"])
+        bump.assert_not_called()
+
+    def test_driver_verification_uses_loaded_values(self, bump):
+        user = get_user_model().objects.create(username="counter-driver", phone="+25779950001", role="livreur")
+        driver = Driver.objects.get(pk=Driver.objects.create(user=user).pk)
+        driver.is_verified = True
+        bump.reset_mock()
+        with CaptureQueriesContext(connection) as queries:
+            driver.save(update_fields=["is_verified", "verification_date"])
+        self.assertFalse([q for q in queries if f'FROM "{Driver._meta.db_table}"' in q["sql"]])
+        bump.assert_called_once_with({"drivers.verified": 1})
+
+
+class DashboardOverviewTests(TestCase):
+    def test_fresh_overview_computes_once_and_stores(self):
+        admin = get_user_model().objects.create(
+            username="overview-admin", phone="+25779960000", role="admin", is_staff=True, is_superuser=True
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        r = mock.MagicMock()
+        r.hkeys.return_value = []
+        with mock.patch("apps.adminpanel.counters._redis", return_value=r), mock.patch.object(
+            DashboardCounters, "compute_group", wraps=DashboardCounters.compute_group
+        ) as compute_group, mock.patch.object(
+            DashboardCounters, "compute_day", wraps=DashboardCounters.compute_day
+        ) as compute_day:
+            response = client.get("/api/v1/admin-dashboard/overview/?fresh=1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["users"]["total"], 1)
+        self.assertEqual((compute_group.call_count, compute_day.call_count), (len(GROUPS), 1))
+        self.assertTrue(r.pipeline.return_value.hset.called)
@@ -1,31 +1,203 @@
 # ========================= apps/adminpanel/views.py =========================
 from __future__ import annotations
 
+import logging
+
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Sum, Q
+from django.db.models import F, Q, Value
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.functions import Coalesce, NullIf
+from django.http import FileResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from apps.accounts.models import UserActivityLog
+from apps.accounts.models import AdminArea, UserActivityLog
+from apps.accounts.profiles import UserProfileAssembler
 from apps.accounts.views import is_admin_user
-from apps.drivers.models import Driver, DriverAvailability, DriverDocument, DriverPerformance
-from apps.pdv.models import PointDeVente, PDVSale, PDVStock
+from apps.drivers.leaderboard import DriverLeaderboard, board_from_params, window_from_params
+from apps.drivers.models import Driver
+from apps.pdv.models import PointDeVente
 from apps.logistics.models import Collection, Delivery
-from apps.wallet.models import Wallet, WalletTransaction
-
+from apps.wallet.models import Wallet
+
+from .counters import DashboardCounters
+from .geo import AreaRollups
+from .listing import AdminListing
+from .models import Notification, NotificationOutbox, ReportJob
+from .notifications import NotificationService, UnreadCounter
+from .reports import CONTENT_TYPES, REPORTS, ReportBuilder
 from .serializers import (
     AdminUserListSerializer,
     AdminUserDetailSerializer,
     AdminBlockUserSerializer,
+    NotificationBroadcastSerializer,
+    NotificationMarkReadSerializer,
+    NotificationOutboxSerializer,
+    NotificationSerializer,
+    ReportJobSerializer,
+    ReportRequestSerializer,
 )
 
+logger = logging.getLogger(__name__)
+
 User = get_user_model()
 
 
+def _display_name(prefix: str):
+    """full_name, sinon username (comme `user.full_name or user.username`)."""
+    return Coalesce(NullIf(F(f"{prefix}full_name"), Value("")), F(f"{prefix}username"))
+
+
+# ========================= Listes admin (keyset, ?fields=, ?count=) =========================
+USERS_LISTING = AdminListing(
+    columns={
+        name: name
+        for name in (
+            "id", "username", "email", "full_name", "phone", "account_type", "role",
+            "client_type", "supplier_type", "delivery_type", "merchant_type",
+            "kyc_status", "account_status", "agent_code",
+            "is_active", "is_staff", "is_superuser",
+            "last_login_at", "created_at", "updated_at",
+        )
+    },
+    default_fields=[
+        "id", "username", "full_name", "email", "phone", "account_type", "role",
+        "account_status", "kyc_status", "agent_code", "is_active", "created_at",
+    ],
+    sort_field="created_at",
+)
+
+PDV_LISTING = AdminListing(
+    columns={
+        "id": "id",
+        "name": "name",
+        "code": "code",
+        "province": "province",
+        "commune": "commune",
+        "area.id": "area_id",
+        "area.name": "area__name",
+        "address": "address",
+        "latitude": "latitude",
+        "longitude": "longitude",
+        "agent.id": "agent_user_id",
+        "agent.username": "agent_user__username",
+        "agent.full_name": "agent_user__full_name",
+        "agent.phone": "agent_user__phone",
+        "agent.agent_code": "agent_user__agent_code",
+        "stock.current_liters": "stock__current_liters",
+        "stock.last_event_at": "stock__last_event_at",
+        "stock.updated_at": "stock__updated_at",
+        "created_at": "created_at",
+    },
+    default_fields=[
+        "id", "name", "code", "province", "commune", "address",
+        "agent.id", "agent.username", "agent.full_name", "agent.phone", "agent.agent_code",
+        "stock.current_liters", "stock.last_event_at", "stock.updated_at", "created_at",
+    ],
+    sort_field="created_at",
+)
+
+DELIVERIES_LISTING = AdminListing(
+    columns={
+        "id": "id",
+        "quantity_liters": "quantity_liters",
+        "delivered_at": "delivered_at",
+        "pdv.id": "pdv_id",
+        "pdv.name": "pdv__name",
+        "pdv.code": "pdv__code",
+        "driver.id": "driver_id",
+        "driver.driver_code": "driver__driver_code",
+        "driver.name": _display_name("driver__user__"),
+        "confirmed_by": "confirmed_by__username",
+        "confirmed_at": "confirmed_at",
+    },
+    default_fields=[
+        "id", "quantity_liters", "delivered_at", "pdv.id", "pdv.name", "pdv.code",
+        "driver.id", "driver.driver_code", "driver.name", "confirmed_by", "confirmed_at",
+    ],
+    sort_field="delivered_at",
+)
+
+COLLECTIONS_LISTING = AdminListing(
+    columns={
+        "id": "id",
+        "quantity_liters": "quantity_liters",
+        "value_amount": "value_amount",
+        "amount_paid": "amount_paid",
+        "collected_at": "collected_at",
+        "status": "status",
+        "supplier.id": "supplier_id",
+        "supplier.name": _display_name("supplier__user__"),
+        "driver.id": "driver_id",
+        "driver.driver_code": "driver__driver_code",
+        "driver.name": _display_name("driver__user__"),
+    },
+    default_fields=[
+        "id", "quantity_liters", "value_amount", "collected_at", "status",
+        "supplier.id", "supplier.name", "driver.id", "driver.driver_code", "driver.name",
+    ],
+    sort_field="collected_at",
+)
+
+
+# ========================= Notifications =========================
+class NotificationCursorPagination(CursorPagination):
+    page_size = 30
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("-id",)
+
+
+def _inbox_queryset(request):
+    qs = Notification.objects.filter(user=request.user)
+    if str(request.query_params.get("unread", "")).lower() in ("1", "true", "yes"):
+        qs = qs.filter(read_at__isnull=True)
+    return qs
+
+
+def _inbox_response(view, request):
+    paginator = NotificationCursorPagination()
+    page = paginator.paginate_queryset(_inbox_queryset(request), request, view=view)
+    response = paginator.get_paginated_response(NotificationSerializer(page, many=True).data)
+    response.data["unread"] = UnreadCounter.get(request.user.pk)
+    return response
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Base: /api/v1/notifications/
+    Inbox de l'utilisateur connecté (tous rôles). Temps réel: ws/notifications/.
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        return _inbox_queryset(self.request)
+
+    def list(self, request, *args, **kwargs):
+        return _inbox_response(self, request)
+
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request):
+        return Response({"unread": UnreadCounter.get(request.user.pk)})
+
+    @action(detail=False, methods=["post"], url_path="mark-read")
+    def mark_read(self, request):
+        """Payload: { ids?: [...] } — sans ids: tout marquer comme lu."""
+        ser = NotificationMarkReadSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        updated = NotificationService.mark_read(request.user, ser.validated_data.get("ids"))
+        return Response({"updated": updated, "unread": UnreadCounter.get(request.user.pk)})
+
+
 class AdminDashboardViewSet(viewsets.GenericViewSet):
     """
     Base: /api/v1/admin-dashboard/
@@ -40,65 +212,69 @@ class AdminDashboardViewSet(viewsets.GenericViewSet):
 
     @action(detail=False, methods=["get"], url_path="overview")
     def overview(self, request):
+        """
+        Compteurs servis depuis Redis (DashboardCounters: incréments après commit + réconciliation).
+        ?fresh=1: calcul direct en base, écrit tel quel dans le cache (agrégats calculés une seule fois).
+        """
         deny = self._deny_if_not_admin(request)
         if deny:
             return deny
 
-        today = timezone.localdate()
-        start_day = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-
-        users_by_type = list(
-            User.objects.values("account_type").annotate(count=Count("id")).order_by("-count")
-        )
-        users_by_role = list(
-            User.objects.values("role").annotate(count=Count("id")).order_by("-count")
-        )
-
-        drivers_total = Driver.objects.count()
-        drivers_verified = Driver.objects.filter(is_verified=True).count()
-        drivers_available = DriverAvailability.objects.filter(is_available=True).count()
-
-        pdv_total = PointDeVente.objects.count()
-        pdv_stock_sum = PDVStock.objects.aggregate(total=Sum("current_liters")).get("total") or 0
-
-        deliveries_today = Delivery.objects.filter(delivered_at__gte=start_day).count()
-        collections_today = Collection.objects.filter(collected_at__gte=start_day).count()
-        sales_today = PDVSale.objects.filter(sold_at__gte=start_day).count()
-
-        blocked_accounts = User.objects.filter(is_active=False).count()
-
-        wallet_total = Wallet.objects.count()
-        tx_today = WalletTransaction.objects.filter(created_at__gte=start_day).count()
+        fresh = str(request.query_params.get("fresh", "")).lower() in ("1", "true", "yes")
+        snapshot = None
+        if not fresh:
+            try:
+                snapshot = DashboardCounters.snapshot()
+            except Exception:
+                logger.warning("Dashboard counters unavailable, computing from database", exc_info=True)
+        if snapshot is None:
+            snapshot = DashboardCounters.compute_snapshot()
+            if fresh:
+                try:
+                    DashboardCounters.store(snapshot)
+                except Exception:
+                    logger.warning("Dashboard counters reconcile failed", exc_info=True)
+
+        counters, day = snapshot["counters"], snapshot["day"]
+
+        def breakdown(prefix, label):
+            rows = [
+                {label: key[len(prefix):] or None, "count": count}
+                for key, count in counters.items()
+                if key.startswith(prefix) and count
+            ]
+            return sorted(rows, key=lambda row: -row["count"])
 
         return Response(
             {
                 "timestamp": timezone.now().isoformat(),
+                "cached": snapshot["cached"],
+                "counters_reconciled_at": counters.get("meta.reconciled_at"),
                 "users": {
-                    "total": User.objects.count(),
-                    "blocked": blocked_accounts,
-                    "by_account_type": users_by_type,
-                    "by_role": users_by_role,
+                    "total": counters.get("users.total", 0),
+                    "blocked": counters.get("users.blocked", 0),
+                    "by_account_type": breakdown("users.type.", "account_type"),
+                    "by_role": breakdown("users.role.", "role"),
                 },
                 "drivers": {
-                    "total": drivers_total,
-                    "verified": drivers_verified,
-                    "available_now": drivers_available,
-                    "documents_expiring_soon": DriverDocument.objects.filter(
-                        expiry_date__gte=today, expiry_date__lte=today + timezone.timedelta(days=30)
-                    ).count(),
+                    "total": counters.get("drivers.total", 0),
+                    "verified": counters.get("drivers.verified", 0),
+                    "available_now": counters.get("drivers.available", 0),
+                    "documents_expiring_soon": counters.get("drivers.documents_expiring_soon", 0),
                 },
                 "pdv": {
-                    "total": pdv_total,
-                    "stock_total_liters": float(pdv_stock_sum),
-                    "sales_today": sales_today,
+                    "total": counters.get("pdv.total", 0),
+                    "stock_total_liters": round(float(counters.get("pdv.stock_liters", 0)), 2),
+                    "sales_today": day.get("sales", 0),
                 },
                 "logistics": {
-                    "deliveries_today": deliveries_today,
-                    "collections_today": collections_today,
+                    "deliveries_today": day.get("deliveries", 0),
+                    "collections_today": day.get("collections", 0),
                 },
                 "wallet": {
-                    "wallets_total": wallet_total,
-                    "transactions_today": tx_today,
+                    "wallets_total": counters.get("wallet.total", 0),
+                    "transactions_today": day.get("transactions", 0),
+                    # solde temps réel: lecture par index (is_platform_wallet), jamais mise en cache
                     "platform_wallet": Wallet.objects.filter(is_platform_wallet=True).values("id", "address", "balance").first(),
                 },
             }
@@ -111,7 +287,7 @@ class AdminDashboardViewSet(viewsets.GenericViewSet):
         if deny:
             return deny
 
-        qs = User.objects.all().order_by("-created_at")
+        qs = User.objects.all()
 
         account_type = (request.query_params.get("account_type") or "").strip()
         role = (request.query_params.get("role") or "").strip()
@@ -133,8 +309,8 @@ class AdminDashboardViewSet(viewsets.GenericViewSet):
                 | Q(email__icontains=search)
             )
 
-        data = AdminUserListSerializer(qs[:500], many=True, context={"request": request}).data
-        return Response({"count": qs.count(), "results": data})
+        filtered = bool(account_type or role or active is not None or search)
+        return Response(USERS_LISTING.paginate(request, qs, filtered=filtered))
 
     @action(detail=False, methods=["get"], url_path="users/(?P<user_id>[^/.]+)")
     def user_detail(self, request, user_id=None):
@@ -142,10 +318,13 @@ class AdminDashboardViewSet(viewsets.GenericViewSet):
         if deny:
             return deny
 
-        user = User.objects.filter(id=user_id).first()
+        # ✅ fiche complète en un nombre fixe de requêtes (apps/accounts/profiles.py)
+        user = UserProfileAssembler.get(user_id) if str(user_id).isdigit() else None
         if not user:
             return Response({"detail": "User introuvable."}, status=404)
-        return Response(AdminUserDetailSerializer(user, context={"request": request}).data)
+        return Response(
+            UserProfileAssembler.card(user, request=request, serializer_class=AdminUserDetailSerializer)
+        )
 
     @action(detail=False, methods=["post"], url_path="users/(?P<user_id>[^/.]+)/set-active")
     def set_user_active(self, request, user_id=None):
@@ -216,7 +395,7 @@ class AdminDashboardViewSet(viewsets.GenericViewSet):
         if deny:
             return deny
 
-        qs = PointDeVente.objects.all().select_related("agent_user", "partner", "stock").order_by("-created_at")
+        qs = PointDeVente.objects.all()
 
         province = (request.query_params.get("province") or "").strip()
         if province:
@@ -226,36 +405,12 @@ class AdminDashboardViewSet(viewsets.GenericViewSet):
         if commune:
             qs = qs.filter(commune__icontains=commune)
 
-        data = []
-        for p in qs[:500]:
-            stock = getattr(p, "stock", None)
-            data.append(
-                {
-                    "id": p.id,
-                    "name": p.name,
-                    "code": p.code,
-                    "province": p.province,
-                    "commune": p.commune,
-                    "address": p.address,
-                    "agent": {
-                        "id": p.agent_user_id,
-                        "username": getattr(p.agent_user, "username", None),
-                        "full_name": getattr(p.agent_user, "full_name", None),
-                        "phone": getattr(p.agent_user, "phone", None),
-                        "agent_code": getattr(p.agent_user, "agent_code", None),
-                    },
-                    "stock": {
-                        "current_liters": str(getattr(stock, "current_liters", "0")),
-                        "last_event_at": getattr(stock, "last_event_at", None),
-                        "updated_at": getattr(stock, "updated_at", None),
-                    }
-                    if stock
-                    else None,
-                    "created_at": p.created_at,
-                }
-            )
+        # ✅ zone normalisée: une commune, ou une province (ses communes comprises)
+        area = (request.query_params.get("area") or "").strip()
+        if area.isdigit():
+            qs = qs.filter(Q(area_id=area) | Q(area__parent_id=area))
 
-        return Response({"count": qs.count(), "results": data})
+        return Response(PDV_LISTING.paginate(request, qs, filtered=bool(province or commune or area)))
 
     # -------------------- LOGISTICS --------------------
     @action(detail=False, methods=["get"], url_path="deliveries")
@@ -264,29 +419,17 @@ class AdminDashboardViewSet(viewsets.GenericViewSet):
         if deny:
             return deny
 
-        qs = Delivery.objects.all().select_related("driver", "driver__user", "pdv", "confirmed_by").order_by("-delivered_at")
+        qs = Delivery.objects.all()
 
         pdv_id = request.query_params.get("pdv_id")
         if pdv_id:
             qs = qs.filter(pdv_id=pdv_id)
 
-        return Response(
-            {
-                "count": qs.count(),
-                "results": [
-                    {
-                        "id": d.id,
-                        "quantity_liters": str(d.quantity_liters),
-                        "delivered_at": d.delivered_at,
-                        "pdv": {"id": d.pdv_id, "name": d.pdv.name, "code": d.pdv.code},
-                        "driver": {"id": d.driver_id, "driver_code": d.driver.driver_code, "name": d.driver.user.full_name or d.driver.user.username},
-                        "confirmed_by": getattr(d.confirmed_by, "username", None),
-                        "confirmed_at": d.confirmed_at,
-                    }
-                    for d in qs[:500]
-                ],
-            }
-        )
+        driver_id = request.query_params.get("driver_id")
+        if driver_id:
+            qs = qs.filter(driver_id=driver_id)
+
+        return Response(DELIVERIES_LISTING.paginate(request, qs, filtered=bool(pdv_id or driver_id)))
 
     @action(detail=False, methods=["get"], url_path="collections")
     def collections(self, request):
@@ -294,50 +437,176 @@ class AdminDashboardViewSet(viewsets.GenericViewSet):
         if deny:
             return deny
 
-        qs = Collection.objects.all().select_related("supplier", "supplier__user", "driver", "driver__user").order_by("-collected_at")
+        qs = Collection.objects.all()
+
+        filters = {
+            key: request.query_params.get(param)
+            for param, key in (("status", "status"), ("driver_id", "driver_id"), ("supplier_id", "supplier_id"))
+            if request.query_params.get(param)
+        }
+        if filters:
+            qs = qs.filter(**filters)
+
+        return Response(COLLECTIONS_LISTING.paginate(request, qs, filtered=bool(filters)))
+
+    # -------------------- DRIVERS REPORTS --------------------
+    @action(detail=False, methods=["get"], url_path="drivers/leaderboard")
+    def drivers_leaderboard(self, request):
+        deny = self._deny_if_not_admin(request)
+        if deny:
+            return deny
 
+        # ✅ classement précalculé (Redis): ?days=7|30|90, ?mode=, ?area=
+        days = window_from_params(request.query_params)
+        rows = DriverLeaderboard.top(days, board_from_params(request.query_params), 20)
         return Response(
             {
-                "count": qs.count(),
+                "days": days,
                 "results": [
                     {
-                        "id": c.id,
-                        "quantity_liters": str(c.quantity_liters),
-                        "value_amount": str(c.value_amount),
-                        "collected_at": c.collected_at,
-                        "status": c.status,
-                        "supplier": {"id": c.supplier_id, "name": c.supplier.user.full_name or c.supplier.user.username},
-                        "driver": {"id": c.driver_id, "driver_code": c.driver.driver_code, "name": c.driver.user.full_name or c.driver.user.username},
+                        "rank": row["rank"],
+                        "driver_id": row["driver_id"],
+                        "driver__driver_code": row["driver__driver_code"],
+                        "driver__user__full_name": row["driver__user__full_name"],
+                        "avg_efficiency": row["score"],
                     }
-                    for c in qs[:500]
+                    for row in rows
                 ],
             }
         )
 
-    # -------------------- DRIVERS REPORTS --------------------
-    @action(detail=False, methods=["get"], url_path="drivers/leaderboard")
-    def drivers_leaderboard(self, request):
+    # -------------------- CARTE PAR ZONE --------------------
+    @action(detail=False, methods=["get"], url_path="areas/map")
+    def areas_map(self, request):
+        """
+        ?level=province|commune (défaut province), ?parent=<id province> (communes d'une province),
+        ?date_from / ?date_to (YYYY-MM-DD, défaut aujourd'hui).
+        Lu depuis AreaDailyRollup (tâche adminpanel.rollup_areas): flux cumulés sur la période,
+        stock et nombre de PDV au dernier jour.
+        """
         deny = self._deny_if_not_admin(request)
         if deny:
             return deny
 
-        start = timezone.now() - timezone.timedelta(days=30)
-        rows = (
-            DriverPerformance.objects.filter(period_end__gte=start)
-            .values("driver_id", "driver__driver_code", "driver__user__full_name")
-            .annotate(avg_efficiency=Sum("efficiency_score") / Count("id"))
-            .order_by("-avg_efficiency")[:20]
-        )
-        return Response({"results": list(rows)})
+        level = request.query_params.get("level") or AdminArea.Levels.PROVINCE
+        if level not in AdminArea.Levels.values:
+            return Response({"detail": "level doit être province ou commune."}, status=400)
 
-    # -------------------- NOTIFICATIONS / MESSAGES (stub prêt) --------------------
-    @action(detail=False, methods=["get"], url_path="notifications")
+        today = timezone.localdate()
+        try:
+            date_to = parse_date(request.query_params.get("date_to") or "") or today
+            date_from = parse_date(request.query_params.get("date_from") or "") or date_to
+        except ValueError:
+            return Response({"detail": "Dates invalides (YYYY-MM-DD)."}, status=400)
+        if date_from > date_to:
+            return Response({"detail": "date_from doit précéder date_to."}, status=400)
+
+        parent = request.query_params.get("parent")
+        rows = AreaRollups.map(level, date_from, date_to, parent_id=int(parent) if (parent or "").isdigit() else None)
+        return Response({"level": level, "date_from": date_from, "date_to": date_to, "results": rows})
+
+    # -------------------- NOTIFICATIONS (outbox + distribution Celery) --------------------
+    @action(detail=False, methods=["get", "post"], url_path="notifications")
     def notifications(self, request):
         """
-        ✅ Pour l’instant stub.
-        Quand tu me donnes ton futur model Notification/Message, on branche.
+        GET: inbox de l'admin connecté (curseur, ?unread=1) + compteur non lu.
+        POST: { title, body?, level?, data?, roles?: [...], user_ids?: [...] } -> 202
+              (roles et user_ids vides = tous les utilisateurs actifs); distribution asynchrone.
+        """
+        deny = self._deny_if_not_admin(request)
+        if deny:
+            return deny
+
+        if request.method == "GET":
+            return _inbox_response(self, request)
+
+        ser = NotificationBroadcastSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        outbox = NotificationService.broadcast(**ser.validated_data, created_by=request.user)
+        return Response(NotificationOutboxSerializer(outbox).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=["get"], url_path="notifications/outbox")
+    def notifications_outbox(self, request):
+        deny = self._deny_if_not_admin(request)
+        if deny:
+            return deny
+        return Response(NotificationOutboxSerializer(NotificationOutbox.objects.all()[:50], many=True).data)
+
+    # ========================= Rapports asynchrones =========================
+    def _report_payload(self, request, job):
+        data = ReportJobSerializer(job).data
+        data["download_url"] = ReportBuilder.download_url(job, request)
+        return data
+
+    @action(detail=False, methods=["get", "post"], url_path="reports")
+    def reports(self, request):
+        """
+        GET: rapports disponibles + derniers jobs.
+        POST: { report, format?: csv|parquet, params?: {date_from, date_to, group_by} } -> 202 + job
+        L'exécution se fait dans un worker Celery; suivre GET reports/{id}/.
         """
         deny = self._deny_if_not_admin(request)
         if deny:
             return deny
-        return Response({"count": 0, "results": []})
+
+        if request.method == "GET":
+            jobs = ReportJob.objects.all()[:50]
+            return Response(
+                {
+                    "available": [
+                        {"key": key, "label": spec.label, "dimensions": list(spec.dimensions), "measures": list(spec.measures)}
+                        for key, spec in REPORTS.items()
+                    ],
+                    "jobs": [self._report_payload(request, job) for job in jobs],
+                }
+            )
+
+        ser = ReportRequestSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+        params = ReportBuilder.clean(data["report"], data["params"], data["format"])
+
+        from .tasks import run_report
+
+        job = ReportJob.objects.create(
+            report=data["report"],
+            params=params,
+            file_format=data["format"],
+            created_by=request.user,
+        )
+        transaction.on_commit(lambda: run_report.delay(job.pk))
+        return Response(self._report_payload(request, job), status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=["get"], url_path=r"reports/(?P<report_id>\d+)")
+    def report_detail(self, request, report_id=None):
+        deny = self._deny_if_not_admin(request)
+        if deny:
+            return deny
+
+        job = ReportJob.objects.filter(pk=report_id).first()
+        if not job:
+            return Response({"detail": "Rapport introuvable."}, status=404)
+        return Response(self._report_payload(request, job))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"reports/(?P<report_id>\d+)/download",
+        permission_classes=[AllowAny],
+        authentication_classes=[],
+    )
+    def report_download(self, request, report_id=None):
+        """Lien signé (?token=) à durée limitée: aucune session/JWT requise."""
+        if not ReportBuilder.unsign(request.query_params.get("token", ""), report_id):
+            return Response({"detail": "Lien invalide ou expiré."}, status=403)
+
+        job = ReportJob.objects.filter(pk=report_id, status="completed").exclude(file="").first()
+        if not job:
+            return Response({"detail": "Rapport introuvable."}, status=404)
+
+        return FileResponse(
+            default_storage.open(job.file, "rb"),
+            as_attachment=True,
+            filename=job.file.rsplit("/", 1)[-1],
+            content_type=CONTENT_TYPES.get(job.file_format, "application/octet-stream"),
+        )
@@ -0,0 +1,174 @@
+# ========================= apps/api/tests.py =========================
+"""
+Budget de requêtes des listes de l'API v1 (PostgreSQL requis: les migrations RunSQL, index
+partiels et partitionnement, ne se construisent pas sur SQLite).
+
+- chaque endpoint liste du routeur, plus les listes @action du tableau de bord admin, est appelé
+  avec N puis 10N lignes; le nombre de requêtes doit être identique (aucun N+1 dans les serializers)
+- passe admin (tout visible) puis passes chauffeur / agent / fournisseur: les querysets filtrés
+  par rôle ne doivent pas réintroduire de N+1
+"""
+
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import UserDocument
+from apps.adminpanel.models import Notification
+from apps.drivers.models import Driver, DriverDocument, DriverPerformance
+from apps.drivers.utils import DriverAnalytics
+from apps.logistics.models import Attendance, Collection, Delivery, Shift
+from apps.pdv.models import PDVStock, PointDeVente
+from apps.suppliers.models import Supplier
+from apps.wallet.models import Wallet, WalletTransaction
+
+from .urls import router
+
+# listes exposées en @action (GenericViewSet sans .list): absentes du parcours du routeur
+ADMIN_DASHBOARD_LISTS = (
+    "users",
+    "pdv",
+    "deliveries",
+    "collections",
+    "drivers/leaderboard",
+    "notifications",
+)
+
+# listes réellement servies (200) à chaque rôle, sur son périmètre
+SCOPED_LISTS = {
+    "livreur": ("collections", "deliveries", "attendance", "shifts"),
+    "agent": ("pdv", "deliveries", "attendance"),
+    "fournisseur": ("collections",),
+}
+
+
+@skipUnless(connection.vendor == "postgresql", "Migrations RunSQL: PostgreSQL requis")
+class ListEndpointQueryBudgetTests(TestCase):
+    """
+    Chaque ligne seedée touche toutes les relations lues par les serializers (groupes, documents,
+    performances, stock, wallet...) et le périmètre des comptes témoins (chauffeur, agent,
+    fournisseur). Les listes sont paginées: au-delà d'une page, un N+1 se voit déjà entre 1 et 10 lignes.
+    """
+
+    N = 1
+    SCALE = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.group = Group.objects.create(name="budget")
+        cls.admin = User.objects.create(
+            username="budget-admin", phone="+25779900000", role="admin", is_staff=True, is_superuser=True
+        )
+        cls.viewers = {
+            role: User.objects.create(username=f"budget-viewer-{role}", phone=f"+2577990000{i}", role=role)
+            for i, role in enumerate(SCOPED_LISTS, start=1)
+        }
+        cls.viewer_driver = Driver.objects.create(user=cls.viewers["livreur"], transport_mode="moto")
+        cls.viewer_supplier = Supplier.objects.create(user=cls.viewers["fournisseur"])
+        # agent: les livraisons visibles sont celles de son premier PDV
+        cls.viewer_pdv = PointDeVente.objects.create(name="PDV budget témoin", agent_user=cls.viewers["agent"])
+        PDVStock.objects.get_or_create(pdv=cls.viewer_pdv)
+        cls.seq = 0
+
+    @classmethod
+    def seed(cls, n):
+        User = get_user_model()
+        today = timezone.localdate()
+        now = timezone.now()
+        for _ in range(n):
+            cls.seq += 1
+            k = cls.seq
+            users = {}
+            for i, role in enumerate(("livreur", "fournisseur", "agent", "client")):
+                user = User.objects.create(
+                    username=f"budget-{role}-{k}", phone=f"+2577{k:04d}{i:03d}", role=role, province="Gitega"
+                )
+                user.groups.add(cls.group)
+                UserDocument.objects.create(user=user, document_type="other", file=f"user_documents/{role}-{k}.pdf")
+                users[role] = user
+
+            driver = Driver.objects.create(user=users["livreur"], transport_mode="moto")
+            DriverDocument.objects.create(
+                driver=driver, document_type="license", file=f"driver_documents/{k}.pdf", verified_by=cls.admin
+            )
+            DriverPerformance.objects.create(driver=driver, period_start=today, period_end=today, efficiency_score=10)
+            supplier = Supplier.objects.create(user=users["fournisseur"])
+            pdv = PointDeVente.objects.create(name=f"PDV budget {k}", agent_user=users["agent"], partner=users["client"])
+            PDVStock.objects.get_or_create(pdv=pdv)
+
+            Collection.objects.create(supplier=supplier, driver=driver, quantity_liters=10, value_amount=100)
+            Delivery.objects.create(driver=driver, pdv=pdv, quantity_liters=5)
+            shift = Shift.objects.create(driver=driver, status="closed", started_at=now, pdvs_visited=2)
+            Attendance.objects.create(driver=driver, pdv=pdv, shift=shift, checkin_at=now)
+            wallet = Wallet.objects.filter(user=users["client"]).first()
+            if wallet:
+                WalletTransaction.objects.create(wallet=wallet, tx_type="credit", amount=Decimal("1"))
+            Notification.objects.create(user=cls.admin, title=f"budget {k}")
+
+            # périmètre des comptes témoins
+            agent_pdv = PointDeVente.objects.create(
+                name=f"PDV budget agent {k}", agent_user=cls.viewers["agent"], partner=users["client"]
+            )
+            PDVStock.objects.get_or_create(pdv=agent_pdv)
+            Collection.objects.create(
+                supplier=cls.viewer_supplier, driver=cls.viewer_driver, quantity_liters=10, value_amount=100
+            )
+            Delivery.objects.create(driver=cls.viewer_driver, pdv=cls.viewer_pdv, quantity_liters=5)
+            viewer_shift = Shift.objects.create(driver=cls.viewer_driver, status="closed", started_at=now)
+            Attendance.objects.create(driver=cls.viewer_driver, pdv=cls.viewer_pdv, shift=viewer_shift, checkin_at=now)
+            for viewer in cls.viewers.values():
+                Notification.objects.create(user=viewer, title=f"budget {k}")
+
+    def measure(self, user):
+        paths = [prefix for prefix, viewset, _ in router.registry if hasattr(viewset, "list")]
+        paths += [f"admin-dashboard/{name}" for name in ADMIN_DASHBOARD_LISTS]
+        client = APIClient()
+        counts = {}
+        for path in paths:
+            # utilisateur rechargé à chaque appel, comme une vraie requête: les relations inverses
+            # (driver / supplier) mises en cache par l'appel précédent fausseraient le comptage
+            client.force_authenticate(get_user_model().objects.get(pk=user.pk))
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(f"/api/v1/{path}/")
+            counts[path] = (response.status_code, len(queries))
+        return counts
+
+    def measure_all(self):
+        users = {"admin": self.admin, **self.viewers}
+        self.seed(self.N)
+        small = {name: self.measure(user) for name, user in users.items()}
+        self.seed(self.N * (self.SCALE - 1))
+        large = {name: self.measure(user) for name, user in users.items()}
+        return small, large
+
+    def test_list_endpoints_constant_queries(self):
+        small, large = self.measure_all()
+
+        for name, counts in small.items():
+            self.assertTrue(counts)
+            expected_ok = counts if name == "admin" else SCOPED_LISTS[name]
+            for path in expected_ok:
+                with self.subTest(user=name, endpoint=path):
+                    self.assertEqual(counts[path][0], 200)
+            for path, (status_code, queries) in counts.items():
+                with self.subTest(user=name, endpoint=path):
+                    self.assertEqual(
+                        large[name][path],
+                        (status_code, queries),
+                        f"{name} /api/v1/{path}/: requêtes N={queries} -> 10N={large[name][path][1]}",
+                    )
+
+    def test_annotated_performance_score(self):
+        self.seed(2)
+        for driver in DriverAnalytics.with_performance_counts(Driver.objects.exclude(pk=self.viewer_driver.pk)):
+            with self.subTest(driver=driver.pk):
+                self.assertEqual(driver.perf_collections_count, 1)
+                self.assertEqual(driver.performance_score, Driver.objects.get(pk=driver.pk).performance_score)
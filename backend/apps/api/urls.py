@@ -27,10 +27,10 @@ from apps.drivers.views import (
     DriverPerformanceViewSet,
 )
 from apps.pdv.views import PDVViewSet
-from apps.logistics.views import CollectionViewSet, DeliveryViewSet, AttendanceViewSet
+from apps.logistics.views import CollectionViewSet, DeliveryViewSet, AttendanceViewSet, RoutePlanningViewSet, ShiftViewSet
 from apps.qr.views import QRViewSet
 from apps.wallet.views import WalletViewSet
-from apps.adminpanel.views import AdminDashboardViewSet
+from apps.adminpanel.views import AdminDashboardViewSet, NotificationViewSet
 
 logger = logging.getLogger(__name__)
 
@@ -132,10 +132,13 @@ router.register(r"pdv", PDVViewSet, basename="pdv")
 router.register(r"collections", CollectionViewSet, basename="collections")
 router.register(r"deliveries", DeliveryViewSet, basename="deliveries")
 router.register(r"attendance", AttendanceViewSet, basename="attendance")
+router.register(r"shifts", ShiftViewSet, basename="shifts")
+router.register(r"logistics", RoutePlanningViewSet, basename="logistics")
 
 router.register(r"qr", QRViewSet, basename="qr")
 router.register(r"wallet", WalletViewSet, basename="wallet")
 router.register(r"admin-dashboard", AdminDashboardViewSet, basename="admin-dashboard")
+router.register(r"notifications", NotificationViewSet, basename="notifications")
 
 # ✅ Admin Users
 router.register(r"admin/users", AdminUsersViewSet, basename="admin-users")
@@ -7,8 +7,12 @@ from django.shortcuts import redirect
 from django.contrib.admin import SimpleListFilter
 from django.utils.translation import gettext_lazy as _
 
+from apps.adminpanel.counters import DashboardCounters
+
+from .exports import ADMIN_COLUMNS, DriverExporter
 from .models import Driver, DriverAvailability, DriverDocument, DriverPerformance
-from .utils import DriverCodeGenerator
+from .services import DriverBulkService
+from .utils import DriverAvailabilityTracker
 
 
 class LicenseExpiryFilter(SimpleListFilter):
@@ -119,7 +123,7 @@ class DriverAdmin(admin.ModelAdmin):
     date_hierarchy = "created_at"
     ordering = ["-created_at"]
 
-    actions = ["verify_drivers", "suspend_drivers", "activate_drivers", "export_drivers_csv"]
+    actions = ["verify_drivers", "suspend_drivers", "activate_drivers", "export_drivers_csv", "export_drivers_xlsx"]
 
     inlines = [DriverAvailabilityInline, DriverDocumentInline, DriverPerformanceInline]
 
@@ -232,69 +236,36 @@ class DriverAdmin(admin.ModelAdmin):
 
     action_buttons.short_description = _("Actions")
 
+    def _bulk(self, request, queryset, action):
+        return DriverBulkService.apply(
+            action,
+            queryset.values_list("id", flat=True),
+            performed_by_id=request.user.id,
+            ip_address=request.META.get("REMOTE_ADDR"),
+            user_agent=request.META.get("HTTP_USER_AGENT", "") or "",
+        )
+
     def verify_drivers(self, request, queryset):
-        updated = queryset.update(is_verified=True, verification_date=timezone.now())
+        updated = self._bulk(request, queryset, "verify")
         self.message_user(request, f"{updated} chauffeur(s) vérifié(s).", messages.SUCCESS)
 
     def suspend_drivers(self, request, queryset):
-        updated = queryset.update(status="inactive")
-        DriverAvailability.objects.filter(driver__in=queryset).update(is_available=False)
+        updated = self._bulk(request, queryset, "suspend")
         self.message_user(request, f"{updated} chauffeur(s) suspendu(s).", messages.WARNING)
 
     def activate_drivers(self, request, queryset):
-        updated = queryset.update(status="active")
+        updated = self._bulk(request, queryset, "activate")
         self.message_user(request, f"{updated} chauffeur(s) activé(s).", messages.SUCCESS)
 
     def export_drivers_csv(self, request, queryset):
-        import csv
-        from django.http import HttpResponse
-
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="drivers_export.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(
-            [
-                "Code",
-                "Nom",
-                "Téléphone",
-                "Email",
-                "Mode Transport",
-                "Statut",
-                "Permis",
-                "Expiration Permis",
-                "Assurance",
-                "Expiration Assurance",
-                "Zone",
-                "Salaire",
-                "Commission",
-                "Date Embauche",
-                "Vérifié",
-            ]
-        )
+        return DriverExporter.response(queryset, columns=ADMIN_COLUMNS, file_format="csv")
 
-        for driver in queryset.select_related("user"):
-            writer.writerow(
-                [
-                    driver.driver_code,
-                    driver.user.full_name or "",
-                    driver.user.phone or "",
-                    driver.user.email or "",
-                    driver.get_transport_mode_display(),
-                    driver.get_status_display(),
-                    driver.license_number or "",
-                    driver.license_expiry.strftime("%Y-%m-%d") if driver.license_expiry else "",
-                    driver.insurance_number or "",
-                    driver.insurance_expiry.strftime("%Y-%m-%d") if driver.insurance_expiry else "",
-                    driver.assigned_zone or "",
-                    driver.base_salary,
-                    driver.commission_rate,
-                    driver.hire_date.strftime("%Y-%m-%d") if driver.hire_date else "",
-                    "Oui" if driver.is_verified else "Non",
-                ]
-            )
+    export_drivers_csv.short_description = _("Exporter en CSV")
+
+    def export_drivers_xlsx(self, request, queryset):
+        return DriverExporter.response(queryset, columns=ADMIN_COLUMNS, file_format="xlsx")
 
-        return response
+    export_drivers_xlsx.short_description = _("Exporter en Excel (XLSX)")
 
     def get_urls(self):
         urls = super().get_urls()
@@ -318,6 +289,8 @@ class DriverAdmin(admin.ModelAdmin):
         driver.status = "inactive"
         driver.save(update_fields=["status", "updated_at"])
         DriverAvailability.objects.filter(driver=driver).update(is_available=False)
+        DriverAvailabilityTracker.record_bulk([driver.pk], False)
+        DashboardCounters.refresh_on_commit("drivers")
         self.message_user(request, f"Chauffeur {driver.driver_code} suspendu.", messages.WARNING)
         return redirect(reverse("admin:drivers_driver_changelist"))
 
@@ -329,7 +302,5 @@ class DriverAdmin(admin.ModelAdmin):
         return redirect(reverse("admin:drivers_driver_changelist"))
 
     def save_model(self, request, obj, form, change):
-        if not obj.driver_code:
-            obj.driver_code = DriverCodeGenerator.generate_unique_driver_code()
         super().save_model(request, obj, form, change)
         DriverAvailability.objects.get_or_create(driver=obj)
@@ -5,4 +5,8 @@ from django.apps import AppConfig
 class DriversConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.drivers'
-    label = 'drivers'
\ No newline at end of file
+    label = 'drivers'
+
+    def ready(self):
+        # ✅ index de conformité rafraîchi à l'enregistrement des documents
+        from . import signals  # noqa
@@ -0,0 +1,218 @@
+# ========================= apps/drivers/compliance.py =========================
+"""
+Index de conformité des documents (permis, assurances, pièces justificatives).
+
+- scan(): tâche nocturne, classe tous les documents en buckets d'expiration (upsert par lots)
+- refresh_*(): rafraîchissement ponctuel à l'enregistrement d'un document (signals)
+- summary(): compteurs par bucket en une requête groupée
+"""
+
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.db.models import Count, F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+NOTIFY_BATCH_SIZE = 500
+
+# document renouvelé / sans échéance: le cycle de notification repart de zéro
+RESET_NOTIFICATION_BUCKETS = ("valid", "without_expiry")
+
+UPSERT_FIELDS = [
+    "subject_type",
+    "bucket",
+    "expiry_date",
+    "days_left",
+    "user",
+    "driver",
+    "driver_document",
+    "user_document",
+    "computed_at",
+]
+
+
+def expiring_soon_days() -> int:
+    return int(getattr(settings, "COMPLIANCE_EXPIRING_SOON_DAYS", 30))
+
+
+class ComplianceIndex:
+    @staticmethod
+    def classify(expiry_date, today=None, soon_days=None):
+        """Retourne (bucket, days_left) — mêmes bornes que les anciens filtres (<= 30 jours inclus)."""
+        if not expiry_date:
+            return "without_expiry", None
+
+        today = today or timezone.localdate()
+        soon_days = expiring_soon_days() if soon_days is None else soon_days
+        days_left = (expiry_date - today).days
+
+        if days_left < 0:
+            return "expired", days_left
+        if days_left <= soon_days:
+            return "expiring_soon", days_left
+        return "valid", days_left
+
+    # -------------------------------------------------------------------------
+    # Construction des lignes
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _status(subject_type, object_id, expiry_date, *, today, soon_days, now, **relations):
+        from .models import ComplianceStatus
+
+        bucket, days_left = ComplianceIndex.classify(expiry_date, today, soon_days)
+        return ComplianceStatus(
+            key=f"{subject_type}:{object_id}",
+            subject_type=subject_type,
+            bucket=bucket,
+            expiry_date=expiry_date,
+            days_left=days_left,
+            computed_at=now,
+            **relations,
+        )
+
+    @staticmethod
+    def _iter_statuses(today, soon_days, now):
+        from apps.accounts.models import UserDocument
+        from .models import Driver, DriverDocument
+
+        kw = {"today": today, "soon_days": soon_days, "now": now}
+
+        rows = DriverDocument.objects.values_list("id", "driver_id", "driver__user_id", "expiry_date")
+        for doc_id, driver_id, user_id, expiry in rows.iterator(chunk_size=BATCH_SIZE):
+            yield ComplianceIndex._status(
+                "driver_document", doc_id, expiry,
+                driver_id=driver_id, user_id=user_id, driver_document_id=doc_id, **kw,
+            )
+
+        rows = UserDocument.objects.values_list("id", "user_id", "expiry_date")
+        for doc_id, user_id, expiry in rows.iterator(chunk_size=BATCH_SIZE):
+            yield ComplianceIndex._status("user_document", doc_id, expiry, user_id=user_id, user_document_id=doc_id, **kw)
+
+        rows = Driver.objects.values_list("id", "user_id", "license_expiry", "insurance_expiry")
+        for driver_id, user_id, license_expiry, insurance_expiry in rows.iterator(chunk_size=BATCH_SIZE):
+            yield ComplianceIndex._status("driver_license", driver_id, license_expiry, driver_id=driver_id, user_id=user_id, **kw)
+            yield ComplianceIndex._status("driver_insurance", driver_id, insurance_expiry, driver_id=driver_id, user_id=user_id, **kw)
+
+    @staticmethod
+    def _upsert(statuses):
+        from .models import ComplianceStatus
+
+        if statuses:
+            ComplianceStatus.objects.bulk_create(
+                statuses,
+                update_conflicts=True,
+                unique_fields=["key"],
+                update_fields=UPSERT_FIELDS,
+            )
+            renewed = [s.key for s in statuses if s.bucket in RESET_NOTIFICATION_BUCKETS]
+            if renewed:
+                ComplianceStatus.objects.filter(key__in=renewed).exclude(notified_bucket="").update(
+                    notified_bucket="", notified_at=None
+                )
+
+    # -------------------------------------------------------------------------
+    # Scan complet (nocturne)
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def scan(today=None, notify: bool = True) -> dict:
+        from .models import ComplianceStatus
+
+        today = today or timezone.localdate()
+        soon_days = expiring_soon_days()
+        now = timezone.now()
+
+        total = 0
+        batch = []
+        for status in ComplianceIndex._iter_statuses(today, soon_days, now):
+            batch.append(status)
+            if len(batch) >= BATCH_SIZE:
+                ComplianceIndex._upsert(batch)
+                total += len(batch)
+                batch = []
+        ComplianceIndex._upsert(batch)
+        total += len(batch)
+
+        # sécurité: lignes non revues pendant ce scan (sujet supprimé hors cascade)
+        stale, _ = ComplianceStatus.objects.filter(computed_at__lt=now).delete()
+
+        queued = ComplianceIndex.queue_notifications() if notify else 0
+        logger.info("Compliance scan: rows=%s stale=%s notifications_batches=%s", total, stale, queued)
+        return {"rows": total, "stale_deleted": stale, "notification_batches": queued}
+
+    @staticmethod
+    def queue_notifications() -> int:
+        """Met en file (par lots) les statuts passés à expiré / expire bientôt depuis la dernière notification."""
+        from .models import ComplianceStatus
+        from .tasks import notify_compliance
+
+        ids = list(
+            ComplianceStatus.objects.filter(bucket__in=["expired", "expiring_soon"], user__isnull=False)
+            .exclude(notified_bucket=F("bucket"))
+            .values_list("id", flat=True)
+        )
+        batches = 0
+        for i in range(0, len(ids), NOTIFY_BATCH_SIZE):
+            notify_compliance.delay(ids[i:i + NOTIFY_BATCH_SIZE])
+            batches += 1
+        return batches
+
+    # -------------------------------------------------------------------------
+    # Rafraîchissement ponctuel
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def refresh_driver_document(document):
+        ComplianceIndex._upsert([
+            ComplianceIndex._status(
+                "driver_document", document.pk, document.expiry_date,
+                today=timezone.localdate(), soon_days=expiring_soon_days(), now=timezone.now(),
+                driver_id=document.driver_id,
+                user_id=document.driver.user_id,
+                driver_document_id=document.pk,
+            )
+        ])
+
+    @staticmethod
+    def refresh_user_document(document):
+        ComplianceIndex._upsert([
+            ComplianceIndex._status(
+                "user_document", document.pk, document.expiry_date,
+                today=timezone.localdate(), soon_days=expiring_soon_days(), now=timezone.now(),
+                user_id=document.user_id,
+                user_document_id=document.pk,
+            )
+        ])
+
+    @staticmethod
+    def refresh_driver(driver):
+        kw = {"today": timezone.localdate(), "soon_days": expiring_soon_days(), "now": timezone.now()}
+        ComplianceIndex._upsert([
+            ComplianceIndex._status(
+                "driver_license", driver.pk, driver.license_expiry, driver_id=driver.pk, user_id=driver.user_id, **kw
+            ),
+            ComplianceIndex._status(
+                "driver_insurance", driver.pk, driver.insurance_expiry, driver_id=driver.pk, user_id=driver.user_id, **kw
+            ),
+        ])
+
+    # -------------------------------------------------------------------------
+    # Lecture
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def summary(subject_type: str = "driver_document") -> dict:
+        from .models import ComplianceStatus
+
+        counts = {bucket: 0 for bucket, _ in ComplianceStatus.BUCKETS}
+        rows = (
+            ComplianceStatus.objects.filter(subject_type=subject_type)
+            .values("bucket")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        for r in rows:
+            counts[r["bucket"]] = r["count"]
+        return counts
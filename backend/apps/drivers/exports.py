@@ -0,0 +1,250 @@
+# ========================= apps/drivers/exports.py =========================
+"""
+Export chauffeurs (CSV / CSV.gz / XLSX) en streaming.
+
+- lecture via .values() + iterator() (curseur serveur PostgreSQL), aucune instance modèle
+- validité permis/assurance calculée en SQL (Case/When)
+- pipeline unique partagé par l'API (DriverViewSet.export) et l'admin Django
+"""
+
+from __future__ import annotations
+
+import csv
+import tempfile
+import zipfile
+import zlib
+from xml.sax.saxutils import escape
+
+from django.db.models import BooleanField, Case, Value, When
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Driver
+
+CHUNK_SIZE = 2000
+
+TRANSPORT_LABELS = dict(Driver.MODES)
+STATUS_LABELS = dict(Driver.STATUS)
+
+# (en-tête, champ .values(), type de rendu)
+API_COLUMNS = [
+    ("Code", "driver_code", "text"),
+    ("Nom", "user__full_name", "text"),
+    ("Téléphone", "user__phone", "text"),
+    ("Email", "user__email", "text"),
+    ("Mode Transport", "transport_mode", "transport"),
+    ("Statut", "status", "status"),
+    ("Permis", "license_valid", "validity"),
+    ("Assurance", "insurance_valid", "validity"),
+    ("Zone", "assigned_zone", "text"),
+    ("Salaire Base", "base_salary", "number"),
+    ("Commission", "commission_rate", "number"),
+    ("Embauché le", "hire_date", "date"),
+    ("Vérifié", "is_verified", "yes_no"),
+]
+
+ADMIN_COLUMNS = [
+    ("Code", "driver_code", "text"),
+    ("Nom", "user__full_name", "text"),
+    ("Téléphone", "user__phone", "text"),
+    ("Email", "user__email", "text"),
+    ("Mode Transport", "transport_mode", "transport"),
+    ("Statut", "status", "status"),
+    ("Permis", "license_number", "text"),
+    ("Expiration Permis", "license_expiry", "date"),
+    ("Assurance", "insurance_number", "text"),
+    ("Expiration Assurance", "insurance_expiry", "date"),
+    ("Zone", "assigned_zone", "text"),
+    ("Salaire", "base_salary", "number"),
+    ("Commission", "commission_rate", "number"),
+    ("Date Embauche", "hire_date", "date"),
+    ("Vérifié", "is_verified", "yes_no"),
+]
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class _Echo:
+    """Pseudo-buffer: csv.writer renvoie directement la ligne formatée."""
+
+    def write(self, value):
+        return value
+
+
+class DriverExporter:
+    """
+    Pipeline d'export partagé.
+    Usage: DriverExporter.response(queryset, columns=API_COLUMNS, file_format="csv", compress=False)
+    """
+
+    @staticmethod
+    def rows(queryset, columns):
+        """Itère les lignes (valeurs brutes) sans charger de modèles."""
+        today = timezone.localdate()
+        fields = [source for _, source, _ in columns]
+
+        qs = queryset.prefetch_related(None)
+        if "license_valid" in fields:
+            qs = qs.annotate(
+                license_valid=Case(
+                    When(license_expiry__gte=today, then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField(),
+                )
+            )
+        if "insurance_valid" in fields:
+            qs = qs.annotate(
+                insurance_valid=Case(
+                    When(insurance_expiry__gte=today, then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField(),
+                )
+            )
+
+        for row in qs.values_list(*fields).iterator(chunk_size=CHUNK_SIZE):
+            yield [DriverExporter._render(value, kind) for value, (_, _, kind) in zip(row, columns)]
+
+    @staticmethod
+    def _render(value, kind):
+        if kind == "transport":
+            return TRANSPORT_LABELS.get(value, value or "")
+        if kind == "status":
+            return STATUS_LABELS.get(value, value or "")
+        if kind == "validity":
+            return "Valide" if value else "Expiré"
+        if kind == "yes_no":
+            return "Oui" if value else "Non"
+        if kind == "date":
+            return value.strftime("%Y-%m-%d") if value else ""
+        if kind == "number":
+            return value if value is not None else ""
+        return value or ""
+
+    @staticmethod
+    def iter_csv(queryset, columns):
+        writer = csv.writer(_Echo())
+        yield writer.writerow([header for header, _, _ in columns])
+        buffer = []
+        for row in DriverExporter.rows(queryset, columns):
+            buffer.append(writer.writerow(row))
+            if len(buffer) >= 500:
+                yield "".join(buffer)
+                buffer = []
+        if buffer:
+            yield "".join(buffer)
+
+    @staticmethod
+    def iter_gzip(chunks):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode("utf-8"))
+            if data:
+                yield data
+        yield compressor.flush()
+
+    @staticmethod
+    def write_xlsx(fh, queryset, columns, sheet_name: str = "Chauffeurs"):
+        """
+        XLSX minimal (inline strings) écrit ligne à ligne dans `fh`:
+        la feuille est streamée dans l'archive, la mémoire reste constante.
+        """
+        with zipfile.ZipFile(fh, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+            zf.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+            zf.writestr("xl/workbook.xml", _XLSX_WORKBOOK.format(name=escape(sheet_name)))
+            zf.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+
+            with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+                sheet.write(_XLSX_SHEET_HEAD.encode("utf-8"))
+                sheet.write(_xlsx_row([header for header, _, _ in columns]))
+                for row in DriverExporter.rows(queryset, columns):
+                    sheet.write(_xlsx_row(row))
+                sheet.write(_XLSX_SHEET_TAIL.encode("utf-8"))
+
+    @staticmethod
+    def response(queryset, *, columns=API_COLUMNS, file_format: str = "csv", compress: bool = False,
+                 filename: str = "drivers_export"):
+        file_format = (file_format or "csv").lower()
+
+        if file_format == "xlsx":
+            fh = tempfile.TemporaryFile()
+            DriverExporter.write_xlsx(fh, queryset, columns)
+            fh.seek(0)
+            return FileResponse(
+                fh,
+                as_attachment=True,
+                filename=f"{filename}.xlsx",
+                content_type=CONTENT_TYPES["xlsx"],
+            )
+
+        chunks = DriverExporter.iter_csv(queryset, columns)
+        if compress:
+            response = StreamingHttpResponse(DriverExporter.iter_gzip(chunks), content_type=CONTENT_TYPES["csv.gz"])
+            response["Content-Disposition"] = f'attachment; filename="{filename}.csv.gz"'
+            return response
+
+        response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES["csv"])
+        response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+        return response
+
+
+def _xlsx_cell(value) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    if hasattr(value, "as_tuple"):  # Decimal
+        return f"<c><v>{value}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def _xlsx_row(values) -> bytes:
+    return ("<row>" + "".join(_xlsx_cell(v) for v in values) + "</row>").encode("utf-8")
+
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    "</Relationships>"
+)
+
+_XLSX_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+_XLSX_SHEET_TAIL = "</sheetData></worksheet>"
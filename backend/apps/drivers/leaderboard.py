@@ -0,0 +1,268 @@
+# ========================= apps/drivers/leaderboard.py =========================
+"""
+Classements chauffeurs précalculés (Redis sorted sets).
+
+- score unique: moyenne de efficiency_score des DriverPerformance dont period_end est dans la fenêtre
+  (7 / 30 / 90 jours); utilisé par tous les écrans (admin, performances, analytics)
+- un classement par fenêtre et par tableau: "all", "mode:<transport_mode>", "area:<AdminArea id>"
+  (commune ET province de l'utilisateur chauffeur)
+- écriture: refresh_driver() après commit de chaque DriverPerformance (signal), rebuild() complet
+  chaque nuit (les fenêtres glissent d'un jour) et après les calculs groupés (bulk_create)
+- lecture: ZREVRANGE (top N) et ZREVRANK (rang d'un chauffeur, O(log n)); une requête pour les noms
+Redis indisponible: calcul en base avec la même formule.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from .models import Driver, DriverPerformance
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = (7, 30, 90)
+DEFAULT_WINDOW = 30
+PERIODS = {"weekly": 7, "monthly": 30, "quarterly": 90}
+
+BOARD_KEY = "seasky:leaderboard:{days}:{board}"
+BOARDS_KEY = "seasky:leaderboard:{days}:boards"  # set des tableaux existants (purge / retrait)
+STATS_KEY = "seasky:leaderboard:{days}:stats"  # hash driver_id -> json (note, volume, gains...)
+BUILT_FIELD = "_built_at"
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def window_from_params(params) -> int:
+    """?days=7|30|90 ou ?period=weekly|monthly|quarterly (défaut 30)."""
+    try:
+        days = int(params.get("days") or 0)
+    except (TypeError, ValueError):
+        days = 0
+    if days in WINDOWS:
+        return days
+    return PERIODS.get(params.get("period") or "", DEFAULT_WINDOW)
+
+
+def board_from_params(params) -> str:
+    """?mode=<transport_mode> ou ?area=<AdminArea id>, sinon classement général."""
+    mode = (params.get("mode") or "").strip()
+    if mode:
+        return f"mode:{mode}"
+    area = (params.get("area") or "").strip()
+    if area.isdigit():
+        return f"area:{area}"
+    return "all"
+
+
+def _boards(row) -> list[str]:
+    boards = ["all", f"mode:{row['driver__transport_mode']}"]
+    for area_id in (row["driver__user__area_id"], row["driver__user__area__parent_id"]):
+        if area_id:
+            boards.append(f"area:{area_id}")
+    return boards
+
+
+def _board_filter(board: str) -> dict:
+    kind, _, value = board.partition(":")
+    if kind == "mode":
+        return {"driver__transport_mode": value}
+    if kind == "area":
+        return {"area": value}
+    return {}
+
+
+class DriverLeaderboard:
+    # ------------------------------------------------------------------ calcul en base
+    @staticmethod
+    def aggregate(days: int, *, driver_ids=None, board: str = "all"):
+        """Une ligne par chauffeur: score (moyenne efficacité), note, volumes, gains sur la fenêtre."""
+        start = timezone.localdate() - timedelta(days=days)
+        qs = DriverPerformance.objects.filter(period_end__gte=start)
+        if driver_ids is not None:
+            qs = qs.filter(driver_id__in=driver_ids)
+
+        filters = _board_filter(board)
+        area = filters.pop("area", None)
+        if area:
+            qs = qs.filter(Q(driver__user__area_id=area) | Q(driver__user__area__parent_id=area))
+        if filters:
+            qs = qs.filter(**filters)
+
+        return (
+            qs.values(
+                "driver_id",
+                "driver__transport_mode",
+                "driver__user__area_id",
+                "driver__user__area__parent_id",
+            )
+            .annotate(
+                score=Avg("efficiency_score"),
+                rating=Avg("rating"),
+                collections_volume=Sum("collections_volume"),
+                deliveries_volume=Sum("deliveries_volume"),
+                earnings_sum=Sum("earnings"),
+                commission_sum=Sum("commission"),
+                performances=Count("id"),
+            )
+            .order_by("-score", "driver_id")
+        )
+
+    @staticmethod
+    def _stats(row) -> dict:
+        return {
+            "rating": float(row["rating"] or 0),
+            "total_volume": float((row["collections_volume"] or 0) + (row["deliveries_volume"] or 0)),
+            "total_earnings": float((row["earnings_sum"] or 0) + (row["commission_sum"] or 0)),
+            "performances": row["performances"],
+        }
+
+    # ------------------------------------------------------------------ écriture Redis
+    @staticmethod
+    def rebuild(windows=WINDOWS) -> dict:
+        """Recalcule entièrement les classements (remplacement atomique: MULTI/EXEC)."""
+        r = _redis()
+        sizes = {}
+        for days in windows:
+            boards, stats = {}, {}
+            for row in DriverLeaderboard.aggregate(days).iterator():
+                score = float(row["score"] or 0)
+                for board in _boards(row):
+                    boards.setdefault(board, {})[row["driver_id"]] = score
+                stats[row["driver_id"]] = json.dumps(DriverLeaderboard._stats(row))
+
+            old = [_text(b) for b in r.smembers(BOARDS_KEY.format(days=days))]
+            pipe = r.pipeline(transaction=True)
+            pipe.delete(
+                BOARDS_KEY.format(days=days),
+                STATS_KEY.format(days=days),
+                *[BOARD_KEY.format(days=days, board=b) for b in old],
+            )
+            for board, members in boards.items():
+                pipe.zadd(BOARD_KEY.format(days=days, board=board), members)
+            if boards:
+                pipe.sadd(BOARDS_KEY.format(days=days), *boards)
+            # marqueur de construction: une fenêtre vide n'est pas reconstruite à chaque lecture
+            pipe.hset(STATS_KEY.format(days=days), mapping={**stats, BUILT_FIELD: timezone.now().isoformat()})
+            pipe.execute()
+            sizes[days] = len(stats)
+        logger.info("Driver leaderboards rebuilt: %s", sizes)
+        return sizes
+
+    @staticmethod
+    def refresh_driver(driver_id) -> None:
+        """Repositionne un chauffeur dans tous ses classements (retiré des tableaux qu'il a quittés)."""
+        try:
+            r = _redis()
+            for days in WINDOWS:
+                if not r.hexists(STATS_KEY.format(days=days), BUILT_FIELD):
+                    continue  # jamais construit: la prochaine lecture reconstruit tout
+                row = DriverLeaderboard.aggregate(days, driver_ids=[driver_id]).first()
+                boards = [_text(b) for b in r.smembers(BOARDS_KEY.format(days=days))]
+
+                pipe = r.pipeline(transaction=True)
+                for board in boards:
+                    pipe.zrem(BOARD_KEY.format(days=days, board=board), driver_id)
+                if row:
+                    score = float(row["score"] or 0)
+                    for board in _boards(row):
+                        pipe.zadd(BOARD_KEY.format(days=days, board=board), {driver_id: score})
+                    pipe.sadd(BOARDS_KEY.format(days=days), *_boards(row))
+                    pipe.hset(STATS_KEY.format(days=days), driver_id, json.dumps(DriverLeaderboard._stats(row)))
+                else:
+                    pipe.hdel(STATS_KEY.format(days=days), driver_id)
+                pipe.execute()
+        except Exception:
+            # réaligné par la reconstruction nocturne
+            logger.warning("Leaderboard refresh failed for driver %s", driver_id, exc_info=True)
+
+    @staticmethod
+    def schedule_refresh(driver_id) -> None:
+        transaction.on_commit(lambda: DriverLeaderboard.refresh_driver(driver_id))
+
+    # ------------------------------------------------------------------ lecture
+    @staticmethod
+    def _with_names(entries) -> list[dict]:
+        """entries: [(driver_id, score, stats)] dans l'ordre du classement."""
+        ids = [driver_id for driver_id, _, _ in entries]
+        names = {
+            pk: (code, full_name)
+            for pk, code, full_name in Driver.objects.filter(pk__in=ids).values_list(
+                "pk", "driver_code", "user__full_name"
+            )
+        }
+        out = []
+        for rank, (driver_id, score, stats) in enumerate(entries, start=1):
+            code, full_name = names.get(driver_id, ("", ""))
+            out.append(
+                {
+                    "rank": rank,
+                    "driver_id": driver_id,
+                    "driver__driver_code": code,
+                    "driver__user__full_name": full_name,
+                    "score": score,
+                    **stats,
+                }
+            )
+        return out
+
+    @staticmethod
+    def top(days: int = DEFAULT_WINDOW, board: str = "all", limit: int = 20) -> list[dict]:
+        try:
+            r = _redis()
+            if not r.hexists(STATS_KEY.format(days=days), BUILT_FIELD):
+                DriverLeaderboard.rebuild([days])  # démarrage à froid
+            pairs = r.zrevrange(BOARD_KEY.format(days=days, board=board), 0, limit - 1, withscores=True)
+            ids = [int(_text(member)) for member, _ in pairs]
+            raw = r.hmget(STATS_KEY.format(days=days), ids) if ids else []
+            entries = [
+                (driver_id, float(score), json.loads(_text(stats)) if stats else {})
+                for driver_id, (_, score), stats in zip(ids, pairs, raw)
+            ]
+        except Exception:
+            logger.warning("Leaderboard unavailable (days=%s board=%s), computing in database", days, board, exc_info=True)
+            rows = DriverLeaderboard.aggregate(days, board=board)[:limit]
+            entries = [(row["driver_id"], float(row["score"] or 0), DriverLeaderboard._stats(row)) for row in rows]
+        return DriverLeaderboard._with_names(entries)
+
+    @staticmethod
+    def rank(driver_id, days: int = DEFAULT_WINDOW, board: str = "all") -> dict:
+        """Rang (1 = meilleur) d'un chauffeur; rank None s'il n'a aucune performance sur la fenêtre."""
+        try:
+            r = _redis()
+            if not r.hexists(STATS_KEY.format(days=days), BUILT_FIELD):
+                DriverLeaderboard.rebuild([days])
+            key = BOARD_KEY.format(days=days, board=board)
+            pipe = r.pipeline(transaction=False)
+            pipe.zrevrank(key, driver_id)
+            pipe.zscore(key, driver_id)
+            pipe.zcard(key)
+            position, score, total = pipe.execute()
+        except Exception:
+            logger.warning("Leaderboard unavailable (days=%s board=%s), ranking in database", days, board, exc_info=True)
+            rows = DriverLeaderboard.aggregate(days, board=board)
+            mine = next((row for row in rows.filter(driver_id=driver_id)), None)
+            total = rows.count()
+            score = float(mine["score"] or 0) if mine else None
+            position = rows.filter(score__gt=score).count() if mine else None
+
+        return {
+            "days": days,
+            "board": board,
+            "rank": position + 1 if position is not None else None,
+            "score": float(score) if score is not None else None,
+            "total": total,
+        }
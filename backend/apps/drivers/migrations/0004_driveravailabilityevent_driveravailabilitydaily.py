@@ -0,0 +1,76 @@
+# Generated by Django 5.2.9 on 2026-10-19 15:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def seed_opening_events(apps, schema_editor):
+    """État initial: un événement par disponibilité existante (horodaté à last_updated)."""
+    DriverAvailability = apps.get_model("drivers", "DriverAvailability")
+    DriverAvailabilityEvent = apps.get_model("drivers", "DriverAvailabilityEvent")
+
+    rows = DriverAvailability.objects.values_list(
+        "driver_id", "is_available", "last_updated", "driver__assigned_zone", "driver__transport_mode"
+    )
+    DriverAvailabilityEvent.objects.bulk_create(
+        [
+            DriverAvailabilityEvent(
+                driver_id=driver_id,
+                is_available=is_available,
+                occurred_at=last_updated,
+                zone=zone or "",
+                transport_mode=mode,
+            )
+            for driver_id, is_available, last_updated, zone, mode in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0003_alter_driveravailability_battery_level_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverAvailabilityDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Jour')),
+                ('zone', models.CharField(blank=True, default='', max_length=100, verbose_name='Zone')),
+                ('transport_mode', models.CharField(choices=[('vehicule', 'Véhicule'), ('velo', 'Vélo'), ('pied', 'À pied'), ('moto', 'Moto'), ('camion', 'Camion')], max_length=20, verbose_name='Mode de transport')),
+                ('available_minutes', models.PositiveIntegerField(default=0, verbose_name='Minutes disponibles (cumul)')),
+                ('peak_available', models.PositiveIntegerField(default=0, verbose_name='Pic de chauffeurs disponibles')),
+                ('drivers_available', models.PositiveIntegerField(default=0, verbose_name='Chauffeurs disponibles (distincts)')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Disponibilité journalière',
+                'verbose_name_plural': 'Disponibilités journalières',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day'], name='drivers_dri_day_f453f7_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'zone', 'transport_mode'), name='uniq_availability_day_zone_mode')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DriverAvailabilityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_available', models.BooleanField(verbose_name='Disponible')),
+                ('zone', models.CharField(blank=True, default='', max_length=100, verbose_name='Zone')),
+                ('transport_mode', models.CharField(choices=[('vehicule', 'Véhicule'), ('velo', 'Vélo'), ('pied', 'À pied'), ('moto', 'Moto'), ('camion', 'Camion')], max_length=20, verbose_name='Mode de transport')),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name="Date de l'événement")),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_events', to='drivers.driver')),
+            ],
+            options={
+                'verbose_name': 'Événement de disponibilité',
+                'verbose_name_plural': 'Événements de disponibilité',
+                'ordering': ['-occurred_at'],
+                'indexes': [models.Index(fields=['driver', 'occurred_at'], name='drivers_dri_driver__fb357f_idx'), models.Index(fields=['occurred_at'], name='drivers_dri_occurre_717695_idx')],
+            },
+        ),
+        migrations.RunPython(seed_opening_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.9 on 2026-10-19 15:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_compliance_index(apps, schema_editor):
+    """Index initial (le scan nocturne prend ensuite le relais)."""
+    from django.conf import settings as dj_settings
+
+    ComplianceStatus = apps.get_model("drivers", "ComplianceStatus")
+    DriverDocument = apps.get_model("drivers", "DriverDocument")
+    Driver = apps.get_model("drivers", "Driver")
+    UserDocument = apps.get_model("accounts", "UserDocument")
+
+    today = django.utils.timezone.localdate()
+    now = django.utils.timezone.now()
+    soon_days = int(getattr(dj_settings, "COMPLIANCE_EXPIRING_SOON_DAYS", 30))
+
+    def status(subject_type, object_id, expiry, **relations):
+        if not expiry:
+            bucket, days_left = "without_expiry", None
+        else:
+            days_left = (expiry - today).days
+            bucket = "expired" if days_left < 0 else "expiring_soon" if days_left <= soon_days else "valid"
+        return ComplianceStatus(
+            key=f"{subject_type}:{object_id}",
+            subject_type=subject_type,
+            bucket=bucket,
+            expiry_date=expiry,
+            days_left=days_left,
+            computed_at=now,
+            **relations,
+        )
+
+    rows = []
+    for doc_id, driver_id, user_id, expiry in DriverDocument.objects.values_list(
+        "id", "driver_id", "driver__user_id", "expiry_date"
+    ).iterator():
+        rows.append(status("driver_document", doc_id, expiry, driver_id=driver_id, user_id=user_id, driver_document_id=doc_id))
+    for doc_id, user_id, expiry in UserDocument.objects.values_list("id", "user_id", "expiry_date").iterator():
+        rows.append(status("user_document", doc_id, expiry, user_id=user_id, user_document_id=doc_id))
+    for driver_id, user_id, license_expiry, insurance_expiry in Driver.objects.values_list(
+        "id", "user_id", "license_expiry", "insurance_expiry"
+    ).iterator():
+        rows.append(status("driver_license", driver_id, license_expiry, driver_id=driver_id, user_id=user_id))
+        rows.append(status("driver_insurance", driver_id, insurance_expiry, driver_id=driver_id, user_id=user_id))
+
+    ComplianceStatus.objects.bulk_create(rows, batch_size=2000)
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_code_allocation_sequences'),
+        ('drivers', '0004_driveravailabilityevent_driveravailabilitydaily'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplianceStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True, verbose_name='Clé')),
+                ('subject_type', models.CharField(choices=[('driver_document', 'Document chauffeur'), ('user_document', 'Document utilisateur'), ('driver_license', 'Permis chauffeur'), ('driver_insurance', 'Assurance chauffeur')], max_length=30, verbose_name='Type')),
+                ('bucket', models.CharField(choices=[('expired', 'Expiré'), ('expiring_soon', 'Expire bientôt'), ('valid', 'Valide'), ('without_expiry', "Sans date d'expiration")], max_length=20, verbose_name='Statut')),
+                ('expiry_date', models.DateField(blank=True, null=True, verbose_name="Date d'expiration")),
+                ('days_left', models.IntegerField(blank=True, null=True, verbose_name='Jours restants')),
+                ('notified_bucket', models.CharField(blank=True, default='', max_length=20, verbose_name='Dernier statut notifié')),
+                ('notified_at', models.DateTimeField(blank=True, null=True, verbose_name='Notifié le')),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Calculé le')),
+                ('driver', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='compliance_statuses', to='drivers.driver')),
+                ('driver_document', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='compliance', to='drivers.driverdocument')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='compliance_statuses', to=settings.AUTH_USER_MODEL)),
+                ('user_document', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='compliance', to='accounts.userdocument')),
+            ],
+            options={
+                'verbose_name': 'Statut de conformité',
+                'verbose_name_plural': 'Statuts de conformité',
+                'ordering': ['expiry_date'],
+                'indexes': [models.Index(fields=['subject_type', 'bucket'], name='drivers_com_subject_f26415_idx'), models.Index(fields=['bucket', 'expiry_date'], name='drivers_com_bucket_b73087_idx')],
+            },
+        ),
+        migrations.RunPython(seed_compliance_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0005_compliancestatus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverAvailabilityDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True, verbose_name='Jour')),
+                ('peak_available', models.PositiveIntegerField(default=0, verbose_name='Pic de chauffeurs disponibles (journée)')),
+                ('closing_available', models.JSONField(blank=True, null=True, verbose_name='Disponibles à la clôture')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Disponibilité journalière (totaux)',
+                'verbose_name_plural': 'Disponibilités journalières (totaux)',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='driveravailabilitydaily',
+            name='peak_available',
+            field=models.PositiveIntegerField(default=0, verbose_name='Pic de chauffeurs disponibles (zone/mode)'),
+        ),
+    ]
@@ -112,6 +112,9 @@ class Driver(models.Model):
     created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # champs dont la valeur chargée est conservée (cf. from_db)
+    LOADED_TRACKED_FIELDS = ("is_verified",)
+
     class Meta:
         verbose_name = "Chauffeur"
         verbose_name_plural = "Chauffeurs"
@@ -127,16 +130,25 @@ class Driver(models.Model):
         name = getattr(self.user, "full_name", None) or getattr(self.user, "username", "")
         return f"{self.driver_code or 'NO_CODE'} - {name}"
 
-    def save(self, *args, **kwargs):
-        from .utils import DriverCodeGenerator
-
-        if not self.driver_code:
-            self.driver_code = DriverCodeGenerator.generate_unique_driver_code()
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # ✅ valeurs chargées: les signaux (compteurs du tableau de bord) comparent sans relire la ligne
+        loaded = instance.__dict__
+        instance._loaded = {f: loaded[f] for f in cls.LOADED_TRACKED_FIELDS if f in loaded}
+        return instance
 
+    def save(self, *args, **kwargs):
         if self.is_verified and not self.verification_date:
             self.verification_date = timezone.now()
 
-        super().save(*args, **kwargs)
+        if self.driver_code:
+            super().save(*args, **kwargs)
+        else:
+            # ✅ code alloué (collision avec un code historique => code suivant)
+            from apps.accounts.codes import CodeAllocator
+
+            CodeAllocator.save_with_code(self, "driver_code", "driver", lambda: super(Driver, self).save(*args, **kwargs))
 
         # ✅ toujours garantir availability
         DriverAvailability.objects.get_or_create(driver=self)
@@ -161,16 +173,21 @@ class Driver(models.Model):
     @property
     def performance_score(self) -> Decimal:
         try:
-            from .utils import DriverAnalytics
-            performance = DriverAnalytics.get_driver_performance(self.id)
+            from .performance import DriverPerformanceCalculator
 
-            collections_score = int(performance.get("collections", {}).get("count", 0)) * 10
-            delivery_score = int(performance.get("deliveries", {}).get("count", 0)) * 5
-            pdv_score = int(performance.get("pdvs_visited", 0)) * 2
+            # ✅ compteurs annotés par DriverAnalytics.with_performance_counts (listes): aucune requête
+            if hasattr(self, "perf_collections_count"):
+                return DriverPerformanceCalculator.efficiency(
+                    self.perf_collections_count, self.perf_deliveries_count, self.perf_pdvs_visited
+                )
 
-            total_score = collections_score + delivery_score + pdv_score
-            score = Decimal(min(total_score / 10, 100))
-            return score
+            from .utils import DriverAnalytics
+            performance = DriverAnalytics.get_driver_performance(self.id)
+            return DriverPerformanceCalculator.efficiency(
+                performance.get("collections", {}).get("count", 0),
+                performance.get("deliveries", {}).get("count", 0),
+                performance.get("pdvs_visited", 0),
+            )
         except Exception:
             return Decimal("0.00")
 
@@ -240,6 +257,25 @@ class DriverAvailability(models.Model):
     def __str__(self):
         return f"Disponibilité de {self.driver.driver_code}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_available = instance.__dict__.get("is_available")
+        return instance
+
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        previous = getattr(self, "_loaded_is_available", None)
+
+        super().save(*args, **kwargs)
+
+        # ✅ journal append-only: uniquement à la création ou si l'état change
+        if creating or previous != self.is_available:
+            from .utils import DriverAvailabilityTracker
+
+            DriverAvailabilityTracker.record(self.driver, self.is_available)
+        self._loaded_is_available = self.is_available
+
     @property
     def location(self):
         if self.location_lat is not None and self.location_lng is not None:
@@ -263,6 +299,88 @@ class DriverAvailability(models.Model):
         )
 
 
+class DriverAvailabilityEvent(models.Model):
+    """
+    Journal append-only des changements de disponibilité.
+    Zone et mode sont figés au moment de l'événement (agrégation par zone/mode).
+    """
+
+    driver = models.ForeignKey(Driver, on_delete=models.CASCADE, related_name="availability_events")
+
+    is_available = models.BooleanField(verbose_name="Disponible")
+    zone = models.CharField(max_length=100, blank=True, default="", verbose_name="Zone")
+    transport_mode = models.CharField(max_length=20, choices=Driver.MODES, verbose_name="Mode de transport")
+
+    occurred_at = models.DateTimeField(default=timezone.now, verbose_name="Date de l'événement")
+
+    class Meta:
+        verbose_name = "Événement de disponibilité"
+        verbose_name_plural = "Événements de disponibilité"
+        ordering = ["-occurred_at"]
+        indexes = [
+            models.Index(fields=["driver", "occurred_at"]),
+            models.Index(fields=["occurred_at"]),
+        ]
+
+    def __str__(self):
+        state = "disponible" if self.is_available else "indisponible"
+        return f"{self.driver_id} {state} @ {self.occurred_at:%Y-%m-%d %H:%M}"
+
+
+class DriverAvailabilityDaily(models.Model):
+    """
+    Agrégat journalier de disponibilité par zone et mode de transport.
+    Calculé à partir de DriverAvailabilityEvent (tâche nocturne).
+    """
+
+    day = models.DateField(verbose_name="Jour")
+    zone = models.CharField(max_length=100, blank=True, default="", verbose_name="Zone")
+    transport_mode = models.CharField(max_length=20, choices=Driver.MODES, verbose_name="Mode de transport")
+
+    available_minutes = models.PositiveIntegerField(default=0, verbose_name="Minutes disponibles (cumul)")
+    peak_available = models.PositiveIntegerField(default=0, verbose_name="Pic de chauffeurs disponibles (zone/mode)")
+    drivers_available = models.PositiveIntegerField(default=0, verbose_name="Chauffeurs disponibles (distincts)")
+
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Disponibilité journalière"
+        verbose_name_plural = "Disponibilités journalières"
+        ordering = ["-day"]
+        constraints = [
+            models.UniqueConstraint(fields=["day", "zone", "transport_mode"], name="uniq_availability_day_zone_mode"),
+        ]
+        indexes = [
+            models.Index(fields=["day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.zone or '-'} {self.transport_mode}: {self.available_minutes} min"
+
+
+class DriverAvailabilityDay(models.Model):
+    """
+    Totaux journaliers (toutes zones / modes) + état de clôture.
+    `closing_available` (chauffeurs disponibles à minuit, {driver_id: [zone, mode]}) sert d'état
+    d'ouverture du lendemain: le rollup ne relit pas tout l'historique des événements.
+    """
+
+    day = models.DateField(unique=True, verbose_name="Jour")
+
+    peak_available = models.PositiveIntegerField(default=0, verbose_name="Pic de chauffeurs disponibles (journée)")
+    closing_available = models.JSONField(null=True, blank=True, verbose_name="Disponibles à la clôture")
+
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Disponibilité journalière (totaux)"
+        verbose_name_plural = "Disponibilités journalières (totaux)"
+        ordering = ["-day"]
+
+    def __str__(self):
+        return f"{self.day}: pic {self.peak_available}"
+
+
 class DriverDocument(models.Model):
     DOCUMENT_TYPES = (
         ("license", "Permis de conduire"),
@@ -447,3 +565,78 @@ class DriverPerformance(models.Model):
     @property
     def total_earnings(self):
         return (self.earnings or Decimal("0.00")) + (self.commission or Decimal("0.00"))
+
+
+class ComplianceStatus(models.Model):
+    """
+    Index de conformité précalculé (tâche nocturne + rafraîchissement à l'enregistrement).
+    Une ligne par document / permis / assurance, classée dans un bucket d'expiration.
+    Les dashboards et filtres lisent ces buckets au lieu de recalculer des plages de dates.
+    """
+
+    SUBJECT_TYPES = (
+        ("driver_document", "Document chauffeur"),
+        ("user_document", "Document utilisateur"),
+        ("driver_license", "Permis chauffeur"),
+        ("driver_insurance", "Assurance chauffeur"),
+    )
+
+    BUCKETS = (
+        ("expired", "Expiré"),
+        ("expiring_soon", "Expire bientôt"),
+        ("valid", "Valide"),
+        ("without_expiry", "Sans date d'expiration"),
+    )
+
+    key = models.CharField(max_length=64, unique=True, verbose_name="Clé")  # ex: "driver_document:42"
+    subject_type = models.CharField(max_length=30, choices=SUBJECT_TYPES, verbose_name="Type")
+    bucket = models.CharField(max_length=20, choices=BUCKETS, verbose_name="Statut")
+
+    expiry_date = models.DateField(blank=True, null=True, verbose_name="Date d'expiration")
+    days_left = models.IntegerField(blank=True, null=True, verbose_name="Jours restants")
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name="compliance_statuses",
+    )
+    driver = models.ForeignKey(
+        Driver,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name="compliance_statuses",
+    )
+    driver_document = models.OneToOneField(
+        DriverDocument,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name="compliance",
+    )
+    user_document = models.OneToOneField(
+        "accounts.UserDocument",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name="compliance",
+    )
+
+    notified_bucket = models.CharField(max_length=20, blank=True, default="", verbose_name="Dernier statut notifié")
+    notified_at = models.DateTimeField(blank=True, null=True, verbose_name="Notifié le")
+
+    computed_at = models.DateTimeField(default=timezone.now, verbose_name="Calculé le")
+
+    class Meta:
+        verbose_name = "Statut de conformité"
+        verbose_name_plural = "Statuts de conformité"
+        ordering = ["expiry_date"]
+        indexes = [
+            models.Index(fields=["subject_type", "bucket"]),
+            models.Index(fields=["bucket", "expiry_date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.key} -> {self.bucket}"
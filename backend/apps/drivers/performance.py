@@ -0,0 +1,166 @@
+# ========================= apps/drivers/performance.py =========================
+"""
+Calcul des DriverPerformance par période (tous les chauffeurs en une passe).
+
+- une requête groupée par source (collectes, livraisons, PDV distincts des tournées clôturées), pas de boucle par chauffeur
+- commission = valeur des collectes x Driver.commission_rate (%)
+- efficacité: même barème que Driver.performance_score
+  (collectes x 10 + livraisons x 5 + PDV visités x 2) / 10, plafonné à 100
+- upsert bulk_create(update_conflicts=True) sur uniq_driver_period: rejouable; les champs saisis
+  à la main (gains, note, distance, carburant, incidents, réclamations, notes) ne sont pas écrasés
+- les chauffeurs sans activité sur la période n'ont pas de ligne (sauf ligne existante, remise à zéro)
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import Driver, DriverPerformance
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+UPSERT_FIELDS = [
+    "collections_count",
+    "collections_volume",
+    "deliveries_count",
+    "deliveries_volume",
+    "commission",
+    "efficiency_score",
+    "calculated_at",
+]
+
+
+def _bounds(period_start, period_end):
+    start = timezone.make_aware(datetime.combine(period_start, time.min))
+    end = timezone.make_aware(datetime.combine(period_end + timedelta(days=1), time.min))
+    return start, end
+
+
+class DriverPerformanceCalculator:
+    @staticmethod
+    def efficiency(collections_count, deliveries_count, pdvs_visited) -> Decimal:
+        points = int(collections_count or 0) * 10 + int(deliveries_count or 0) * 5 + int(pdvs_visited or 0) * 2
+        return min(Decimal(points) / 10, Decimal("100")).quantize(CENT, rounding=ROUND_HALF_UP)
+
+    @staticmethod
+    def metrics(period_start, period_end) -> dict:
+        """{driver_id: {...}} pour [period_start, period_end] (dates incluses)."""
+        from apps.logistics.models import Attendance, Collection, Delivery
+
+        start, end = _bounds(period_start, period_end)
+        metrics = defaultdict(
+            lambda: {
+                "collections_count": 0,
+                "collections_volume": ZERO,
+                "collections_value": ZERO,
+                "deliveries_count": 0,
+                "deliveries_volume": ZERO,
+                "pdvs_visited": 0,
+            }
+        )
+
+        collections = (
+            Collection.objects.filter(collected_at__gte=start, collected_at__lt=end)
+            .values_list("driver_id")
+            .annotate(n=Count("id"), liters=Sum("quantity_liters"), value=Sum("value_amount"))
+            .order_by()
+        )
+        for driver_id, n, liters, value in collections:
+            metrics[driver_id].update(
+                collections_count=n, collections_volume=liters or ZERO, collections_value=value or ZERO
+            )
+
+        deliveries = (
+            Delivery.objects.filter(delivered_at__gte=start, delivered_at__lt=end)
+            .values_list("driver_id")
+            .annotate(n=Count("id"), liters=Sum("quantity_liters"))
+            .order_by()
+        )
+        for driver_id, n, liters in deliveries:
+            metrics[driver_id].update(deliveries_count=n, deliveries_volume=liters or ZERO)
+
+        # PDV distincts visités pendant les tournées clôturées de la période
+        visits = (
+            Attendance.objects.filter(
+                type="arrival_pdv", shift__status="closed", shift__started_at__gte=start, shift__started_at__lt=end
+            )
+            .values_list("driver_id")
+            .annotate(visited=Count("pdv", distinct=True))
+            .order_by()
+        )
+        for driver_id, visited in visits:
+            metrics[driver_id]["pdvs_visited"] = visited or 0
+
+        return metrics
+
+    @staticmethod
+    def compute(period_start, period_end=None) -> int:
+        """Calcule et enregistre les performances de la période. Retourne le nombre de lignes écrites."""
+        period_end = period_end or period_start
+        metrics = DriverPerformanceCalculator.metrics(period_start, period_end)
+
+        # lignes existantes sans activité restante (collecte supprimée / réaffectée): remises à zéro
+        driver_ids = set(metrics) | set(
+            DriverPerformance.objects.filter(period_start=period_start, period_end=period_end).values_list(
+                "driver_id", flat=True
+            )
+        )
+
+        rates = dict(Driver.objects.filter(pk__in=driver_ids).values_list("pk", "commission_rate"))
+        now = timezone.now()
+        rows = []
+        for driver_id in sorted(driver_ids):
+            if driver_id not in rates:
+                continue
+            m = metrics[driver_id]
+            commission = (m["collections_value"] * (rates[driver_id] or ZERO) / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+            rows.append(
+                DriverPerformance(
+                    driver_id=driver_id,
+                    period_start=period_start,
+                    period_end=period_end,
+                    collections_count=m["collections_count"],
+                    collections_volume=m["collections_volume"],
+                    deliveries_count=m["deliveries_count"],
+                    deliveries_volume=m["deliveries_volume"],
+                    commission=commission,
+                    efficiency_score=DriverPerformanceCalculator.efficiency(
+                        m["collections_count"], m["deliveries_count"], m["pdvs_visited"]
+                    ),
+                    calculated_at=now,
+                )
+            )
+
+        with transaction.atomic():
+            DriverPerformance.objects.bulk_create(
+                rows,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["driver", "period_start", "period_end"],
+                update_fields=UPSERT_FIELDS,
+            )
+            # bulk_create n'émet pas post_save: classements reconstruits en une fois
+            transaction.on_commit(DriverPerformanceCalculator._rebuild_leaderboards)
+
+        logger.info("Driver performance %s..%s: %s rows", period_start, period_end, len(rows))
+        return len(rows)
+
+    @staticmethod
+    def _rebuild_leaderboards() -> None:
+        from .leaderboard import DriverLeaderboard
+
+        try:
+            DriverLeaderboard.rebuild()
+        except Exception:
+            logger.warning("Leaderboard rebuild after performance computation failed", exc_info=True)
@@ -10,7 +10,6 @@ from django.utils import timezone
 from rest_framework import serializers
 
 from .models import Driver, DriverAvailability, DriverDocument, DriverPerformance
-from .utils import DriverCodeGenerator
 
 User = get_user_model()
 
@@ -275,7 +274,11 @@ class DriverSerializer(serializers.ModelSerializer):
         return value
 
     def get_latest_performance(self, obj):
-        performance = obj.performances.order_by("-period_end").first()
+        # ✅ Prefetch tranché (DriverViewSet): dernière performance déjà chargée, sinon requête unitaire
+        if hasattr(obj, "latest_performances"):
+            performance = obj.latest_performances[0] if obj.latest_performances else None
+        else:
+            performance = obj.performances.order_by("-period_end").first()
         return DriverPerformanceSerializer(performance).data if performance else None
 
 
@@ -431,7 +434,6 @@ class DriverCreateSerializer(serializers.Serializer):
         # 2) Créer le chauffeur
         driver = Driver.objects.create(
             user=user,
-            driver_code=DriverCodeGenerator.generate_unique_driver_code(),
             transport_mode=validated_data.get("transport_mode", "vehicule"),
             license_number=validated_data.get("license_number", "") or "",
             license_expiry=validated_data.get("license_expiry"),
@@ -0,0 +1,119 @@
+# ========================= apps/drivers/services.py =========================
+"""
+Services métier chauffeurs (opérations ensemblistes).
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class DriverBulkService:
+    """
+    Actions groupées sur les chauffeurs en requêtes UPDATE ensemblistes:
+    aucun Driver.save() (pas de get_or_create availability / génération de code par ligne).
+    Chaque chauffeur touché reçoit une ligne d'audit UserActivityLog (bulk_create).
+    """
+
+    ACTIONS = ("verify", "suspend", "activate", "delete")
+
+    # au-delà: exécution asynchrone (Celery)
+    ASYNC_THRESHOLD = int(getattr(settings, "DRIVER_BULK_ASYNC_THRESHOLD", 2000))
+
+    @staticmethod
+    def apply(action: str, driver_ids, *, performed_by_id=None, ip_address=None, user_agent: str = "") -> int:
+        from apps.accounts.models import UserActivityLog
+        from apps.adminpanel.counters import DashboardCounters
+        from .models import Driver, DriverAvailability
+        from .utils import DriverAvailabilityTracker
+
+        if action not in DriverBulkService.ACTIONS:
+            raise ValueError(f"Action non reconnue: {action}")
+
+        now = timezone.now()
+        batch_id = uuid.uuid4().hex
+
+        with transaction.atomic():
+            ids = list(Driver.objects.filter(id__in=list(driver_ids)).values_list("id", flat=True))
+            if not ids:
+                return 0
+
+            drivers = Driver.objects.filter(id__in=ids)
+
+            if action == "verify":
+                count = drivers.update(
+                    is_verified=True,
+                    verification_date=Coalesce(F("verification_date"), Value(now)),
+                    updated_at=now,
+                )
+
+            elif action == "suspend":
+                count = drivers.update(status="inactive", updated_at=now)
+                availability = DriverAvailability.objects.filter(driver_id__in=ids, is_available=True)
+                went_offline = list(availability.values_list("driver_id", flat=True))
+                if went_offline:
+                    DriverAvailability.objects.filter(driver_id__in=went_offline).update(
+                        is_available=False, last_updated=now
+                    )
+                    DriverAvailabilityTracker.record_bulk(went_offline, False, occurred_at=now)
+
+            elif action == "activate":
+                count = drivers.update(status="active", updated_at=now)
+
+            else:  # delete
+                count = len(ids)
+                drivers.delete()
+
+            if action in ("verify", "suspend"):
+                # UPDATE ensembliste: pas de signaux, compteurs du tableau de bord recalculés
+                DashboardCounters.refresh_on_commit("drivers")
+
+            if performed_by_id:
+                UserActivityLog.objects.bulk_create(
+                    [
+                        UserActivityLog(
+                            user_id=performed_by_id,
+                            action=f"driver_bulk_{action}",
+                            details={"driver_id": driver_id, "batch_id": batch_id, "batch_size": len(ids)},
+                            ip_address=ip_address,
+                            user_agent=user_agent or "",
+                        )
+                        for driver_id in ids
+                    ],
+                    batch_size=1000,
+                )
+
+        logger.info("Driver bulk action=%s count=%s batch=%s by=%s", action, count, batch_id, performed_by_id)
+        return count
+
+    @staticmethod
+    def dispatch(action: str, driver_ids, *, performed_by_id=None, ip_address=None, user_agent: str = "") -> dict:
+        """
+        Exécute directement, ou via Celery si la sélection dépasse ASYNC_THRESHOLD.
+        Retourne {"async": bool, "count": int | None, "task_id": str | None}.
+        """
+        driver_ids = list(driver_ids)
+
+        if len(driver_ids) >= DriverBulkService.ASYNC_THRESHOLD:
+            from .tasks import bulk_driver_action
+
+            result = bulk_driver_action.delay(action, driver_ids, performed_by_id, ip_address, user_agent)
+            return {"async": True, "count": None, "task_id": result.id}
+
+        count = DriverBulkService.apply(
+            action,
+            driver_ids,
+            performed_by_id=performed_by_id,
+            ip_address=ip_address,
+            user_agent=user_agent,
+        )
+        return {"async": False, "count": count, "task_id": None}
@@ -0,0 +1,93 @@
+# ========================= apps/drivers/signals.py =========================
+from __future__ import annotations
+
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.accounts.models import UserDocument
+
+from .compliance import ComplianceIndex
+from .leaderboard import DriverLeaderboard
+from .models import Driver, DriverDocument, DriverPerformance
+
+logger = logging.getLogger(__name__)
+
+_UNKNOWN = object()
+
+
+@receiver(post_save, sender=DriverDocument)
+def refresh_driver_document_compliance(sender, instance, raw=False, **kwargs):
+    """✅ statut de conformité à jour dès l'enregistrement (sans attendre le scan nocturne)"""
+    if raw:
+        return
+    try:
+        ComplianceIndex.refresh_driver_document(instance)
+    except Exception:
+        logger.exception("Compliance refresh failed for driver document %s", instance.pk)
+
+
+@receiver(post_save, sender=UserDocument)
+def refresh_user_document_compliance(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        ComplianceIndex.refresh_user_document(instance)
+    except Exception:
+        logger.exception("Compliance refresh failed for user document %s", instance.pk)
+
+
+@receiver(post_save, sender=Driver)
+def refresh_driver_compliance(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Permis / assurance: seulement si les dates ont pu changer."""
+    if raw:
+        return
+    if update_fields is not None and not {"license_expiry", "insurance_expiry"} & set(update_fields):
+        return
+    try:
+        ComplianceIndex.refresh_driver(instance)
+    except Exception:
+        logger.exception("Compliance refresh failed for driver %s", instance.pk)
+
+
+@receiver(post_save, sender=DriverPerformance)
+@receiver(post_delete, sender=DriverPerformance)
+def refresh_driver_leaderboard(sender, instance, raw=False, **kwargs):
+    """✅ classements Redis à jour après commit (les calculs groupés appellent DriverLeaderboard.rebuild)"""
+    if raw:
+        return
+    DriverLeaderboard.schedule_refresh(instance.driver_id)
+
+
+@receiver(post_save, sender=Driver)
+def refresh_driver_boards(sender, instance, raw=False, created=False, update_fields=None, **kwargs):
+    """Changement de mode de transport: le chauffeur change de tableau."""
+    if raw or created:
+        return
+    if update_fields is not None and "transport_mode" not in update_fields:
+        return
+    DriverLeaderboard.schedule_refresh(instance.pk)
+
+
+@receiver(post_save, sender=get_user_model())
+def refresh_driver_area_boards(sender, instance, raw=False, created=False, update_fields=None, **kwargs):
+    """
+    Changement de zone (province / commune) d'un chauffeur: il change de tableaux "area:".
+    Comparaison avec la zone chargée (CustomUser.from_db), sans relire la ligne.
+    """
+    if raw or "area_id" not in instance.__dict__:
+        return
+    if update_fields is not None and "area" not in update_fields:
+        return
+    loaded = instance.__dict__.setdefault("_loaded", {})
+    previous = loaded.get("area_id", _UNKNOWN)
+    loaded["area_id"] = instance.area_id
+    if created or previous is _UNKNOWN or previous == instance.area_id:
+        return
+    if instance.role != sender.Roles.LIVREUR and instance.account_type != sender.AccountTypes.LIVREUR:
+        return
+    driver_id = Driver.objects.filter(user_id=instance.pk).values_list("pk", flat=True).first()
+    if driver_id:
+        DriverLeaderboard.schedule_refresh(driver_id)
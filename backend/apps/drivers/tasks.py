@@ -0,0 +1,130 @@
+# ========================= apps/drivers/tasks.py =========================
+"""
+Tâches Celery pour les chauffeurs.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db.models import F
+from django.utils import timezone
+
+from .utils import DriverAvailabilityTracker
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="drivers.rollup_driver_availability")
+def rollup_driver_availability(day: str | None = None) -> int:
+    """
+    Agrège les événements de disponibilité d'une journée (par défaut: hier).
+    `day` au format ISO (YYYY-MM-DD) pour recalculer un jour passé.
+    """
+    target = date.fromisoformat(day) if day else timezone.localdate() - timedelta(days=1)
+    rows = DriverAvailabilityTracker.rollup_day(target)
+    logger.info("Availability rollup day=%s rows=%s", target, len(rows))
+    return len(rows)
+
+
+@shared_task(name="drivers.bulk_driver_action")
+def bulk_driver_action(action: str, driver_ids: list, performed_by_id=None, ip_address=None, user_agent: str = "") -> int:
+    """Mode asynchrone de DriverBulkService (grandes sélections)."""
+    from .services import DriverBulkService
+
+    return DriverBulkService.apply(
+        action,
+        driver_ids,
+        performed_by_id=performed_by_id,
+        ip_address=ip_address,
+        user_agent=user_agent,
+    )
+
+
+@shared_task(name="drivers.scan_document_compliance")
+def scan_document_compliance() -> dict:
+    """Scan nocturne: reclasse tous les documents (expiré / expire bientôt / valide) et met en file les notifications."""
+    from .compliance import ComplianceIndex
+
+    return ComplianceIndex.scan()
+
+
+@shared_task(name="drivers.notify_compliance")
+def notify_compliance(status_ids: list) -> int:
+    """
+    Envoie un email groupé par utilisateur pour un lot de statuts,
+    puis marque les statuts comme notifiés (une seule requête UPDATE).
+    """
+    from .models import ComplianceStatus
+
+    statuses = (
+        ComplianceStatus.objects.filter(id__in=status_ids, bucket__in=["expired", "expiring_soon"])
+        .select_related("user", "driver_document", "user_document")
+        .order_by("user_id", "expiry_date")
+    )
+
+    per_user = defaultdict(list)
+    notified_ids = []
+    for status in statuses:
+        if status.notified_bucket == status.bucket:
+            continue
+        notified_ids.append(status.id)
+        if status.user and status.user.email:
+            per_user[status.user].append(status)
+
+    messages = []
+    for user, items in per_user.items():
+        lines = []
+        for s in items:
+            label = s.get_subject_type_display()
+            if s.driver_document_id:
+                label = f"{label} ({s.driver_document.get_document_type_display()})"
+            elif s.user_document_id:
+                label = f"{label} ({s.user_document.get_document_type_display()})"
+            state = "expiré" if s.bucket == "expired" else f"expire dans {s.days_left} jour(s)"
+            lines.append(f"- {label}: {state} (date: {s.expiry_date:%Y-%m-%d})")
+
+        body = (
+            f"Bonjour {user.full_name or user.username},\n\n"
+            "Les documents suivants nécessitent votre attention:\n"
+            + "\n".join(lines)
+            + "\n\nMerci de les renouveler depuis votre espace SeaSky."
+        )
+        messages.append(("SeaSky - Documents à renouveler", body, settings.DEFAULT_FROM_EMAIL, [user.email]))
+
+    if messages:
+        send_mass_mail(messages, fail_silently=True)
+
+    if notified_ids:
+        ComplianceStatus.objects.filter(id__in=notified_ids).update(
+            notified_bucket=F("bucket"), notified_at=timezone.now()
+        )
+
+    logger.info("Compliance notifications users=%s statuses=%s", len(messages), len(notified_ids))
+    return len(notified_ids)
+
+
+@shared_task(name="drivers.rebuild_leaderboards")
+def rebuild_leaderboards() -> dict:
+    """Reconstruction complète des classements (fenêtres glissantes 7 / 30 / 90 jours)."""
+    from .leaderboard import DriverLeaderboard
+
+    return DriverLeaderboard.rebuild()
+
+
+@shared_task(name="drivers.compute_driver_performance")
+def compute_driver_performance(day: str | None = None, period_days: int = 1) -> int:
+    """
+    DriverPerformance de la période de `period_days` jours se terminant à `day`
+    (ISO YYYY-MM-DD, par défaut: hier), pour tous les chauffeurs.
+    """
+    from .performance import DriverPerformanceCalculator
+
+    period_end = date.fromisoformat(day) if day else timezone.localdate() - timedelta(days=1)
+    period_start = period_end - timedelta(days=max(int(period_days), 1) - 1)
+    return DriverPerformanceCalculator.compute(period_start, period_end)
@@ -1,3 +1,131 @@
+# ========================= apps/drivers/tests.py =========================
+"""
+Agrégats de disponibilité: état d'ouverture repris de la clôture de la veille,
+pic journalier (toutes zones / modes) distinct des pics par (zone, mode).
+
+Index de conformité: un document renouvelé repart d'un cycle de notification vierge.
+
+Classements: un chauffeur qui change de zone est repositionné dans les tableaux "area:".
+"""
+
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import AdminArea
+from django.utils import timezone
+
+from .compliance import ComplianceIndex
+from .models import ComplianceStatus, Driver, DriverAvailabilityDaily, DriverAvailabilityDay, DriverAvailabilityEvent
+from .utils import DriverAvailabilityTracker
+
+
+class AvailabilityRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.drivers = [
+            Driver.objects.create(
+                user=User.objects.create(username=f"avail-{i}", phone=f"+2577930000{i}", role="livreur"),
+                transport_mode="moto",
+            )
+            for i in range(2)
+        ]
+        cls.day = timezone.localdate() - timedelta(days=2)
+
+    def at(self, hour):
+        return timezone.make_aware(datetime.combine(self.day, time(hour)), timezone.get_current_timezone())
+
+    def test_replay_starts_from_previous_closing(self):
+        first, second = self.drivers
+        # veille clôturée: `first` disponible à minuit (aucun événement historique à relire)
+        DriverAvailabilityDay.objects.create(
+            day=self.day - timedelta(days=1), closing_available={str(first.pk): ["Nord", "moto"]}
+        )
+        DriverAvailabilityEvent.objects.create(
+            driver=second, is_available=True, zone="Sud", transport_mode="moto", occurred_at=self.at(8)
+        )
+        DriverAvailabilityEvent.objects.create(
+            driver=first, is_available=False, zone="Nord", transport_mode="moto", occurred_at=self.at(10)
+        )
+
+        rows = {r["zone"]: r for r in DriverAvailabilityTracker.rollup_day(self.day)}
+        self.assertEqual(rows["Nord"]["available_minutes"], 10 * 60)
+        self.assertEqual(rows["Nord"]["peak_available"], 1)
+        self.assertEqual(rows["Sud"]["peak_available"], 1)
+        self.assertEqual(rows["Sud"]["available_minutes"], 16 * 60)
+
+        state = DriverAvailabilityDay.objects.get(day=self.day)
+        self.assertEqual(state.peak_available, 2)
+        self.assertEqual(state.closing_available, {str(second.pk): ["Sud", "moto"]})
+        self.assertEqual(DriverAvailabilityDaily.objects.filter(day=self.day).count(), 2)
+
+    def test_rerun_invalidates_next_day_opening(self):
+        DriverAvailabilityDay.objects.create(day=self.day - timedelta(days=1), closing_available={})
+        DriverAvailabilityDay.objects.create(day=self.day + timedelta(days=1), closing_available={})
+
+        DriverAvailabilityTracker.rollup_day(self.day)
+        self.assertIsNone(DriverAvailabilityDay.objects.get(day=self.day + timedelta(days=1)).closing_available)
+
+
+class ComplianceNotificationCycleTests(TestCase):
+    def test_renewed_document_is_notified_again(self):
+        driver = Driver.objects.create(
+            user=get_user_model().objects.create(username="compliance", phone="+25779310000", role="livreur"),
+            license_expiry=timezone.localdate() + timedelta(days=5),
+        )
+        ComplianceIndex.refresh_driver(driver)
+        status = ComplianceStatus.objects.get(key=f"driver_license:{driver.pk}")
+        self.assertEqual(status.bucket, "expiring_soon")
+        ComplianceStatus.objects.filter(pk=status.pk).update(notified_bucket="expiring_soon", notified_at=timezone.now())
+
+        # renouvellement: de nouveau valide => notification réinitialisée
+        driver.license_expiry = timezone.localdate() + timedelta(days=365)
+        ComplianceIndex.refresh_driver(driver)
+        status.refresh_from_db()
+        self.assertEqual((status.bucket, status.notified_bucket, status.notified_at), ("valid", "", None))
+
+        # la nouvelle échéance approche: de nouveau en file
+        driver.license_expiry = timezone.localdate() + timedelta(days=5)
+        ComplianceIndex.refresh_driver(driver)
+        with mock.patch("apps.drivers.tasks.notify_compliance.delay") as delay:
+            self.assertEqual(ComplianceIndex.queue_notifications(), 1)
+        self.assertIn(status.pk, delay.call_args.args[0])
+
+
+class LeaderboardAreaRefreshTests(TestCase):
+    def test_area_change_refreshes_driver_boards(self):
+        user = get_user_model().objects.create(username="board-area", phone="+25779320000", role="livreur")
+        driver = Driver.objects.create(user=user)
+        area = AdminArea.objects.create(name="Gitega", key="gitega", level="province")
+
+        with mock.patch("apps.drivers.signals.DriverLeaderboard.schedule_refresh") as refresh:
+            user.full_name = "Sans changement de zone"
+            user.save(update_fields=["full_name"])
+            refresh.assert_not_called()
+
+            user.area = area
+            user.save(update_fields=["area"])
+            refresh.assert_called_once_with(driver.pk)
+
+            # rechargé: zone comparée à la valeur lue, pas de relecture de la ligne
+            loaded = get_user_model().objects.get(pk=user.pk)
+            with CaptureQueriesContext(connection) as queries:
+                loaded.save()
+            self.assertFalse([q for q in queries if '"area_id" FROM' in q["sql"]])
+            self.assertEqual(refresh.call_count, 1)
 
-# Create your tests here.
+    def test_non_driver_area_change_skips_driver_lookup(self):
+        user = get_user_model().objects.create(username="board-agent", phone="+25779320001", role="agent")
+        area = AdminArea.objects.create(name="Ngozi", key="ngozi", level="province")
+        loaded = get_user_model().objects.get(pk=user.pk)
+        loaded.area = area
+        with mock.patch("apps.drivers.signals.DriverLeaderboard.schedule_refresh") as refresh:
+            with CaptureQueriesContext(connection) as queries:
+                loaded.save(update_fields=["area"])
+        refresh.assert_not_called()
+        self.assertFalse([q for q in queries if Driver._meta.db_table in q["sql"] or '"area_id" FROM' in q["sql"]])
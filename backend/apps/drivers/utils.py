@@ -7,8 +7,10 @@ from __future__ import annotations
 
 import secrets
 import string
-from datetime import datetime
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
 
+from django.db import transaction
 from django.utils import timezone
 
 
@@ -32,16 +34,17 @@ class DriverCodeGenerator:
 
     @staticmethod
     def generate_unique_driver_code() -> str:
-        from .models import Driver
+        """Code unique par construction (séquence + permutation), sans requête exists()."""
+        from apps.accounts.codes import CodeAllocator
+
+        return CodeAllocator.allocate("driver")
 
-        max_attempts = 10
-        for _ in range(max_attempts):
-            code = DriverCodeGenerator.generate_driver_code()
-            if not Driver.objects.filter(driver_code=code).exists():
-                return code
+    @staticmethod
+    def generate_unique_driver_codes(count: int) -> list[str]:
+        """Pré-allocation pour imports en masse (une seule requête)."""
+        from apps.accounts.codes import CodeAllocator
 
-        timestamp = int(timezone.now().timestamp())
-        return f"CH_{datetime.now().year}_{timestamp:08X}"
+        return CodeAllocator.allocate_many("driver", count)
 
     @staticmethod
     def validate_driver_code(code: str) -> bool:
@@ -136,6 +139,232 @@ class DriverStatusManager:
         return availability
 
 
+class DriverAvailabilityTracker:
+    """
+    Journal des changements de disponibilité + agrégats journaliers.
+    Les tendances lisent DriverAvailabilityDaily (une ligne par jour/zone/mode)
+    au lieu de scanner la table temps réel.
+    """
+
+    @staticmethod
+    def record(driver, is_available: bool, occurred_at=None):
+        from .models import DriverAvailabilityEvent
+
+        return DriverAvailabilityEvent.objects.create(
+            driver=driver,
+            is_available=bool(is_available),
+            zone=driver.assigned_zone or "",
+            transport_mode=driver.transport_mode,
+            occurred_at=occurred_at or timezone.now(),
+        )
+
+    @staticmethod
+    def record_bulk(driver_ids, is_available: bool, occurred_at=None) -> int:
+        """
+        Version ensembliste pour les mises à jour via queryset.update()
+        (qui ne passent pas par DriverAvailability.save()).
+        """
+        from .models import Driver, DriverAvailabilityEvent
+
+        occurred_at = occurred_at or timezone.now()
+        rows = Driver.objects.filter(id__in=list(driver_ids)).values_list("id", "assigned_zone", "transport_mode")
+        events = [
+            DriverAvailabilityEvent(
+                driver_id=driver_id,
+                is_available=bool(is_available),
+                zone=zone or "",
+                transport_mode=mode,
+                occurred_at=occurred_at,
+            )
+            for driver_id, zone, mode in rows
+        ]
+        DriverAvailabilityEvent.objects.bulk_create(events, batch_size=1000)
+        return len(events)
+
+    @staticmethod
+    def _day_bounds(day: date):
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime.combine(day, time.min), tz)
+        return start, start + timedelta(days=1)
+
+    @staticmethod
+    def _opening_state(day: date, start) -> dict:
+        """
+        Chauffeurs disponibles à minuit: {driver_id: (zone, mode)}.
+        Lu depuis l'état de clôture persisté de la veille; à défaut (premier rollup, veille non
+        clôturée), dernier événement avant minuit (DISTINCT ON, PostgreSQL).
+        """
+        from .models import DriverAvailabilityDay, DriverAvailabilityEvent
+
+        previous = (
+            DriverAvailabilityDay.objects.filter(day=day - timedelta(days=1), closing_available__isnull=False)
+            .values_list("closing_available", flat=True)
+            .first()
+        )
+        if previous is not None:
+            return {int(driver_id): (zone, mode) for driver_id, (zone, mode) in previous.items()}
+
+        opening = (
+            DriverAvailabilityEvent.objects.filter(occurred_at__lt=start)
+            .order_by("driver_id", "-occurred_at")
+            .distinct("driver_id")
+            .values_list("driver_id", "is_available", "zone", "transport_mode")
+        )
+        return {
+            driver_id: (zone, mode)
+            for driver_id, is_available, zone, mode in opening.iterator(chunk_size=2000)
+            if is_available
+        }
+
+    @staticmethod
+    def replay_day(day: date) -> dict:
+        """
+        Rejoue les événements d'une journée à partir de l'état d'ouverture et calcule:
+        - rows: par (zone, mode) minutes disponibles, pic simultané, chauffeurs distincts
+        - peak_available: pic simultané de la journée (toutes zones / modes)
+        - closing_available: disponibles à minuit (None si la journée n'est pas terminée)
+        """
+        from .models import DriverAvailabilityEvent
+
+        start, end = DriverAvailabilityTracker._day_bounds(day)
+        until = min(end, timezone.now())
+
+        seconds = defaultdict(float)
+        current = defaultdict(int)
+        peak = defaultdict(int)
+        distinct = defaultdict(set)
+        total = 0
+        state = {}  # driver_id -> (is_available, key, since)
+
+        for driver_id, key in DriverAvailabilityTracker._opening_state(day, start).items():
+            state[driver_id] = (True, key, start)
+            current[key] += 1
+            peak[key] = max(peak[key], current[key])
+            distinct[key].add(driver_id)
+            total += 1
+        day_peak = total
+
+        events = (
+            DriverAvailabilityEvent.objects.filter(occurred_at__gte=start, occurred_at__lt=until)
+            .order_by("occurred_at", "id")
+            .values_list("driver_id", "is_available", "zone", "transport_mode", "occurred_at")
+        )
+        for driver_id, is_available, zone, mode, occurred_at in events.iterator(chunk_size=2000):
+            key = (zone, mode)
+            previous = state.get(driver_id)
+            if previous and previous[0]:
+                seconds[previous[1]] += (occurred_at - previous[2]).total_seconds()
+                current[previous[1]] -= 1
+                total -= 1
+            if is_available:
+                current[key] += 1
+                peak[key] = max(peak[key], current[key])
+                distinct[key].add(driver_id)
+                total += 1
+                day_peak = max(day_peak, total)
+            state[driver_id] = (is_available, key, occurred_at)
+
+        for is_available, key, since in state.values():
+            if is_available and until > since:
+                seconds[key] += (until - since).total_seconds()
+
+        rows = [
+            {
+                "day": day,
+                "zone": zone,
+                "transport_mode": mode,
+                "available_minutes": int(seconds[(zone, mode)] // 60),
+                "peak_available": peak[(zone, mode)],
+                "drivers_available": len(distinct[(zone, mode)]),
+            }
+            for zone, mode in set(seconds) | set(peak)
+        ]
+        closing = None
+        if until >= end:
+            closing = {
+                str(driver_id): list(key) for driver_id, (is_available, key, _) in state.items() if is_available
+            }
+        return {"rows": rows, "peak_available": day_peak, "closing_available": closing}
+
+    @staticmethod
+    def rollup_day(day: date, persist: bool = True) -> list[dict]:
+        """
+        Agrégats d'une journée (voir replay_day). Persisté: lignes (zone, mode) remplacées et
+        totaux du jour (pic journalier + état de clôture, ouverture du lendemain) enregistrés.
+        """
+        from .models import DriverAvailabilityDaily, DriverAvailabilityDay
+
+        result = DriverAvailabilityTracker.replay_day(day)
+        rows = result["rows"]
+
+        if persist:
+            with transaction.atomic():
+                DriverAvailabilityDaily.objects.filter(day=day).delete()
+                DriverAvailabilityDaily.objects.bulk_create([DriverAvailabilityDaily(**row) for row in rows])
+                DriverAvailabilityDay.objects.update_or_create(
+                    day=day,
+                    defaults={
+                        "peak_available": result["peak_available"],
+                        "closing_available": result["closing_available"],
+                    },
+                )
+                # le lendemain déjà agrégé est parti d'une ancienne clôture: son ouverture n'est plus fiable
+                DriverAvailabilityDay.objects.filter(day=day + timedelta(days=1)).update(closing_available=None)
+
+        return rows
+
+    @staticmethod
+    def trend(days: int = 7) -> list[dict]:
+        """
+        Tendance sur `days` jours: jours passés lus depuis les agrégats,
+        aujourd'hui rejoué depuis la clôture d'hier (événements du jour seulement, non persisté).
+        peak_available = pic simultané de la journée (toutes zones / modes).
+        """
+        from django.db.models import Count, Sum
+        from django.db.models.functions import TruncDate
+        from .models import Driver, DriverAvailabilityDaily, DriverAvailabilityDay
+
+        today = timezone.localdate()
+        first_day = today - timedelta(days=days - 1)
+
+        per_day = defaultdict(lambda: {"available": 0, "available_minutes": 0, "peak_available": 0})
+        rows = (
+            DriverAvailabilityDaily.objects.filter(day__gte=first_day, day__lt=today)
+            .values("day")
+            .annotate(available=Sum("drivers_available"), available_minutes=Sum("available_minutes"))
+        )
+        for r in rows:
+            per_day[r["day"]].update(available=r["available"] or 0, available_minutes=r["available_minutes"] or 0)
+        peaks = DriverAvailabilityDay.objects.filter(day__gte=first_day, day__lt=today).values_list(
+            "day", "peak_available"
+        )
+        for day, peak_available in peaks:
+            per_day[day]["peak_available"] = peak_available
+
+        current = DriverAvailabilityTracker.replay_day(today)
+        for r in current["rows"]:
+            per_day[today]["available"] += r["drivers_available"]
+            per_day[today]["available_minutes"] += r["available_minutes"]
+        per_day[today]["peak_available"] = current["peak_available"]
+
+        # Effectif cumulé: une seule agrégation au lieu d'un COUNT par jour
+        running = Driver.objects.filter(created_at__date__lt=first_day).count()
+        hired = dict(
+            Driver.objects.filter(created_at__date__gte=first_day)
+            .annotate(day=TruncDate("created_at"))
+            .values("day")
+            .annotate(count=Count("id"))
+            .values_list("day", "count")
+        )
+
+        out = []
+        for i in range(days):
+            day = first_day + timedelta(days=i)
+            running += hired.get(day, 0)
+            out.append({"date": day.strftime("%Y-%m-%d"), "total": running, **per_day[day]})
+        return out
+
+
 class DriverAnalytics:
     """
     Analytics et statistiques pour les chauffeurs.
@@ -144,7 +373,7 @@ class DriverAnalytics:
     @staticmethod
     def get_driver_performance(driver_id, start_date=None, end_date=None):
         from django.db.models import Sum, Count
-        from apps.logistics.models import Collection, Delivery, Attendance  # ✅ FIX
+        from apps.logistics.models import Attendance, Collection, Delivery, Shift  # ✅ FIX
 
         if not start_date:
             start_date = timezone.now() - timezone.timedelta(days=30)
@@ -168,10 +397,28 @@ class DriverAnalytics:
             delivered_liters=Sum("quantity_liters"),
         )
 
-        pdvs_visited = Attendance.objects.filter(
+        # ✅ résumés de tournées (KPI figés à la clôture) au lieu des pointages bruts
+        shifts = Shift.objects.filter(
             driver_id=driver_id,
-            checkin_at__range=[start_date, end_date],
-        ).values("pdv").distinct().count()
+            status="closed",
+            started_at__range=[start_date, end_date],
+        ).aggregate(
+            total_shifts=Count("id"),
+            stops=Sum("stops_count"),
+            minutes=Sum("duration_minutes"),
+            time_at_pdv=Sum("time_at_pdv_minutes"),
+        )
+        # PDV distincts sur la période (un PDV revu sur plusieurs tournées compte une fois)
+        pdvs_visited = (
+            Attendance.objects.filter(
+                driver_id=driver_id,
+                type="arrival_pdv",
+                shift__status="closed",
+                shift__started_at__range=[start_date, end_date],
+            ).aggregate(n=Count("pdv", distinct=True))["n"]
+            or 0
+        )
+        shift_hours = (shifts["minutes"] or 0) / 60
 
         return {
             "collections": {
@@ -184,9 +431,53 @@ class DriverAnalytics:
                 "liters": float(deliveries["delivered_liters"] or 0),
             },
             "pdvs_visited": pdvs_visited,
+            "shifts": {
+                "count": shifts["total_shifts"] or 0,
+                "stops": shifts["stops"] or 0,
+                "hours": round(shift_hours, 2),
+                "time_at_pdv_minutes": shifts["time_at_pdv"] or 0,
+                "stops_per_hour": round((shifts["stops"] or 0) / shift_hours, 2) if shift_hours else 0.0,
+            },
             "period": {"start": start_date, "end": end_date},
         }
 
+    @staticmethod
+    def with_performance_counts(queryset, days: int = 30):
+        """
+        Annote les compteurs de Driver.performance_score (fenêtre glissante `days`) par sous-requêtes:
+        la liste des chauffeurs reste à nombre de requêtes constant (au lieu de 3 agrégats par ligne).
+        """
+        from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+        from django.db.models.functions import Coalesce
+        from apps.logistics.models import Attendance, Collection, Delivery
+
+        end = timezone.now()
+        start = end - timezone.timedelta(days=days)
+
+        def _per_driver(qs, aggregate):
+            return Coalesce(
+                Subquery(
+                    qs.filter(driver_id=OuterRef("pk")).order_by().values("driver_id").annotate(v=aggregate).values("v")[:1],
+                    output_field=IntegerField(),
+                ),
+                Value(0),
+            )
+
+        return queryset.annotate(
+            perf_collections_count=_per_driver(
+                Collection.objects.filter(collected_at__range=[start, end]), Count("id")
+            ),
+            perf_deliveries_count=_per_driver(
+                Delivery.objects.filter(delivered_at__range=[start, end]), Count("id")
+            ),
+            perf_pdvs_visited=_per_driver(
+                Attendance.objects.filter(
+                    type="arrival_pdv", shift__status="closed", shift__started_at__range=[start, end]
+                ),
+                Count("pdv", distinct=True),
+            ),
+        )
+
     @staticmethod
     def get_all_drivers_stats():
         from django.db.models import Count
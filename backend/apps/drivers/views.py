@@ -8,7 +8,7 @@ from __future__ import annotations
 import logging
 from datetime import timedelta
 
-from django.db.models import Count, Sum, Avg, Q
+from django.db.models import Count, Sum, Avg, Prefetch, Q, ProtectedError
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
 from django_filters import rest_framework as filters
@@ -20,6 +20,9 @@ from rest_framework.response import Response
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 
+from .compliance import ComplianceIndex
+from .exports import API_COLUMNS, DriverExporter
+from .leaderboard import DEFAULT_WINDOW, WINDOWS, DriverLeaderboard, board_from_params, window_from_params
 from .models import Driver, DriverAvailability, DriverDocument, DriverPerformance
 from .serializers import (
     DriverSerializer,
@@ -28,7 +31,8 @@ from .serializers import (
     DriverDocumentSerializer,
     DriverPerformanceSerializer,
 )
-from .utils import DriverAnalytics, DriverStatusManager
+from .services import DriverBulkService
+from .utils import DriverAnalytics, DriverAvailabilityTracker, DriverStatusManager
 
 logger = logging.getLogger(__name__)
 
@@ -84,7 +88,14 @@ class DriverViewSet(viewsets.ModelViewSet):
     queryset = (
         Driver.objects.all()
         .select_related("user", "availability")
-        .prefetch_related("documents", "performances")
+        .prefetch_related(
+            Prefetch("documents", queryset=DriverDocument.objects.select_related("verified_by")),
+            Prefetch(
+                "performances",
+                queryset=DriverPerformance.objects.order_by("-period_end", "-id")[:1],
+                to_attr="latest_performances",
+            ),
+        )
     )
     serializer_class = DriverSerializer
     filter_backends = [filters.DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -111,6 +122,10 @@ class DriverViewSet(viewsets.ModelViewSet):
     ]
     ordering = ["-created_at"]
 
+    def get_queryset(self):
+        # ✅ performance_score annoté (fenêtre de 30 jours calculée à chaque requête)
+        return DriverAnalytics.with_performance_counts(super().get_queryset())
+
     def get_serializer_class(self):
         if self.action == "create":
             return DriverCreateSerializer
@@ -176,10 +191,7 @@ class DriverViewSet(viewsets.ModelViewSet):
                     "total_volume": total_volume,
                     "avg_rating": float(recent["avg_rating"] or 0),
                 },
-                "documents_expiring_soon": DriverDocument.objects.filter(
-                    expiry_date__gte=today,
-                    expiry_date__lte=today + timedelta(days=30),
-                ).count(),
+                "documents_expiring_soon": ComplianceIndex.summary("driver_document")["expiring_soon"],
                 "available_now": DriverAvailability.objects.filter(is_available=True).count(),
             }
         )
@@ -250,50 +262,19 @@ class DriverViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def export(self, request):
-        from django.http import HttpResponse
-        import csv
-
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="drivers_export.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(
-            [
-                "Code",
-                "Nom",
-                "Téléphone",
-                "Email",
-                "Mode Transport",
-                "Statut",
-                "Permis",
-                "Assurance",
-                "Zone",
-                "Salaire Base",
-                "Commission",
-                "Embauché le",
-                "Vérifié",
-            ]
-        )
+        """
+        Export streaming des chauffeurs (filtres de la liste appliqués).
+        Query params:
+          - file_format: csv (défaut) | xlsx
+          - gzip: 1 pour compresser le CSV (.csv.gz)
+        """
+        file_format = (request.query_params.get("file_format") or "csv").lower()
+        if file_format not in ("csv", "xlsx"):
+            return Response({"success": False, "message": "Format non supporté (csv, xlsx)"}, status=400)
 
-        for driver in self.get_queryset():
-            writer.writerow(
-                [
-                    driver.driver_code,
-                    driver.user.full_name or "",
-                    driver.user.phone or "",
-                    driver.user.email or "",
-                    driver.get_transport_mode_display(),
-                    driver.get_status_display(),
-                    "Valide" if driver.license_is_valid else "Expiré",
-                    "Valide" if driver.insurance_is_valid else "Expiré",
-                    driver.assigned_zone or "",
-                    driver.base_salary,
-                    driver.commission_rate,
-                    driver.hire_date.strftime("%Y-%m-%d") if driver.hire_date else "",
-                    "Oui" if driver.is_verified else "Non",
-                ]
-            )
-        return response
+        compress = str(request.query_params.get("gzip", "")).lower() in ("1", "true", "yes")
+        queryset = self.filter_queryset(self.get_queryset())
+        return DriverExporter.response(queryset, columns=API_COLUMNS, file_format=file_format, compress=compress)
 
     @action(detail=False, methods=["post"])
     def bulk_actions(self, request):
@@ -303,37 +284,41 @@ class DriverViewSet(viewsets.ModelViewSet):
         if not action_type or not driver_ids:
             return Response({"success": False, "message": "Action et IDs requis"}, status=400)
 
-        drivers = Driver.objects.filter(id__in=driver_ids)
-
-        if action_type == "verify":
-            drivers.update(is_verified=True, verification_date=timezone.now())
-            message = f"{drivers.count()} chauffeurs vérifiés"
-
-        elif action_type == "suspend":
-            drivers.update(status="inactive")
-            DriverAvailability.objects.filter(driver__in=drivers).update(is_available=False)
-            message = f"{drivers.count()} chauffeurs suspendus"
+        if action_type not in DriverBulkService.ACTIONS:
+            return Response({"success": False, "message": "Action non reconnue"}, status=400)
 
-        elif action_type == "activate":
-            drivers.update(status="active")
-            message = f"{drivers.count()} chauffeurs activés"
+        try:
+            result = DriverBulkService.dispatch(
+                action_type,
+                driver_ids,
+                performed_by_id=request.user.id,
+                ip_address=request.META.get("REMOTE_ADDR"),
+                user_agent=request.META.get("HTTP_USER_AGENT", "") or "",
+            )
+        except ProtectedError:
+            return Response(
+                {"success": False, "message": "Suppression impossible: chauffeurs liés à des collectes/livraisons"},
+                status=400,
+            )
 
-        elif action_type == "delete":
-            count = drivers.count()
-            drivers.delete()
-            message = f"{count} chauffeurs supprimés"
+        logger.info("Bulk action=%s by=%s count=%s", action_type, request.user.username, len(driver_ids))
 
-        else:
-            return Response({"success": False, "message": "Action non reconnue"}, status=400)
+        if result["async"]:
+            return Response(
+                {
+                    "success": True,
+                    "message": f"Action planifiée pour {len(driver_ids)} chauffeurs",
+                    "task_id": result["task_id"],
+                },
+                status=status.HTTP_202_ACCEPTED,
+            )
 
-        logger.info("Bulk action=%s by=%s count=%s", action_type, request.user.username, len(driver_ids))
-        return Response({"success": True, "message": message, "count": len(driver_ids)})
+        labels = {"verify": "vérifiés", "suspend": "suspendus", "activate": "activés", "delete": "supprimés"}
+        count = result["count"]
+        return Response({"success": True, "message": f"{count} chauffeurs {labels[action_type]}", "count": count})
 
     @action(detail=False, methods=["get"])
     def analytics(self, request):
-        today = timezone.localdate()
-        last_7_days = [today - timedelta(days=i) for i in range(7)]
-
         hire_timeline = (
             Driver.objects.annotate(month=TruncMonth("hire_date"))
             .values("month")
@@ -352,16 +337,11 @@ class DriverViewSet(viewsets.ModelViewSet):
             .order_by("-avg_efficiency")
         )
 
-        availability_trend = []
-        for day in reversed(last_7_days):
-            available_count = DriverAvailability.objects.filter(last_updated__date=day, is_available=True).count()
-            availability_trend.append(
-                {
-                    "date": day.strftime("%Y-%m-%d"),
-                    "available": available_count,
-                    "total": Driver.objects.filter(created_at__date__lte=day).count(),
-                }
-            )
+        try:
+            days = min(max(int(request.query_params.get("days", 7)), 1), 90)
+        except (TypeError, ValueError):
+            days = 7
+        availability_trend = DriverAvailabilityTracker.trend(days)
 
         top_performers = self._get_top_performers()
         documents_status = self._get_documents_status()
@@ -389,43 +369,21 @@ class DriverViewSet(viewsets.ModelViewSet):
         )
 
     def _get_top_performers(self, limit=5):
-        start = timezone.now() - timedelta(days=30)
-
-        rows = (
-            DriverPerformance.objects.filter(period_end__gte=start)
-            .values("driver_id", "driver__driver_code", "driver__user__full_name")
-            .annotate(
-                total_score=Avg("efficiency_score"),
-                collections_volume=Sum("collections_volume"),
-                deliveries_volume=Sum("deliveries_volume"),
-            )
-            .order_by("-total_score")[:limit]
-        )
-
-        out = []
-        for r in rows:
-            total_volume = float((r.get("collections_volume") or 0) + (r.get("deliveries_volume") or 0))
-            out.append(
-                {
-                    "driver_id": r["driver_id"],
-                    "driver__driver_code": r["driver__driver_code"],
-                    "driver__user__full_name": r["driver__user__full_name"],
-                    "total_score": float(r.get("total_score") or 0),
-                    "total_volume": total_volume,
-                }
-            )
-        return out
+        # ✅ classement précalculé (Redis), même score que les autres écrans
+        return [
+            {
+                "driver_id": row["driver_id"],
+                "driver__driver_code": row["driver__driver_code"],
+                "driver__user__full_name": row["driver__user__full_name"],
+                "total_score": row["score"],
+                "total_volume": row.get("total_volume", 0.0),
+            }
+            for row in DriverLeaderboard.top(DEFAULT_WINDOW, "all", limit)
+        ]
 
     def _get_documents_status(self):
-        today = timezone.localdate()
-        return {
-            "expired": DriverDocument.objects.filter(expiry_date__lt=today).count(),
-            "expiring_soon": DriverDocument.objects.filter(
-                expiry_date__gte=today, expiry_date__lte=today + timedelta(days=30)
-            ).count(),
-            "valid": DriverDocument.objects.filter(expiry_date__gt=today + timedelta(days=30)).count(),
-            "without_expiry": DriverDocument.objects.filter(expiry_date__isnull=True).count(),
-        }
+        # ✅ index de conformité (1 requête groupée au lieu de 4 COUNT sur plages de dates)
+        return ComplianceIndex.summary("driver_document")
 
 
 class DriverDocumentViewSet(viewsets.ModelViewSet):
@@ -455,11 +413,10 @@ class DriverDocumentViewSet(viewsets.ModelViewSet):
 
         expired = self.request.query_params.get("expired")
         if expired is not None:
-            today = timezone.localdate()
             if str(expired).lower() == "true":
-                queryset = queryset.filter(expiry_date__lt=today)
+                queryset = queryset.filter(compliance__bucket="expired")
             else:
-                queryset = queryset.filter(Q(expiry_date__gte=today) | Q(expiry_date__isnull=True))
+                queryset = queryset.exclude(compliance__bucket="expired")
 
         return queryset
 
@@ -477,10 +434,11 @@ class DriverDocumentViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def expiring_soon(self, request):
-        today = timezone.localdate()
-        threshold = today + timedelta(days=30)
-
-        documents = DriverDocument.objects.filter(expiry_date__gte=today, expiry_date__lte=threshold).select_related("driver")
+        documents = (
+            DriverDocument.objects.filter(compliance__bucket="expiring_soon")
+            .select_related("driver")
+            .order_by("expiry_date")
+        )
         page = self.paginate_queryset(documents)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -577,41 +535,44 @@ class DriverPerformanceViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=["get"])
     def leaderboard(self, request):
-        period = request.query_params.get("period", "monthly")
-        if period == "weekly":
-            start_date = timezone.now() - timedelta(days=7)
-        elif period == "quarterly":
-            start_date = timezone.now() - timedelta(days=90)
-        else:
-            start_date = timezone.now() - timedelta(days=30)
-
-        rows = (
-            DriverPerformance.objects.filter(period_end__gte=start_date)
-            .values("driver_id", "driver__driver_code", "driver__user__full_name")
-            .annotate(
-                total_efficiency=Avg("efficiency_score"),
-                total_rating=Avg("rating"),
-                collections_volume=Sum("collections_volume"),
-                deliveries_volume=Sum("deliveries_volume"),
-                earnings_sum=Sum("earnings"),
-                commission_sum=Sum("commission"),
-            )
-            .order_by("-total_efficiency")[:20]
-        )
-
-        out = []
-        for r in rows:
-            total_volume = float((r.get("collections_volume") or 0) + (r.get("deliveries_volume") or 0))
-            total_earnings = float((r.get("earnings_sum") or 0) + (r.get("commission_sum") or 0))
-            out.append(
-                {
-                    "driver_id": r["driver_id"],
-                    "driver__driver_code": r["driver__driver_code"],
-                    "driver__user__full_name": r["driver__user__full_name"],
-                    "total_efficiency": float(r.get("total_efficiency") or 0),
-                    "total_rating": float(r.get("total_rating") or 0),
-                    "total_volume": total_volume,
-                    "total_earnings": total_earnings,
-                }
-            )
+        """
+        ?period=weekly|monthly|quarterly ou ?days=7|30|90; ?mode=<transport_mode> ou ?area=<zone id>.
+        Lu depuis les classements précalculés (apps/drivers/leaderboard.py).
+        """
+        days = window_from_params(request.query_params)
+        board = board_from_params(request.query_params)
+        out = [
+            {
+                "rank": row["rank"],
+                "driver_id": row["driver_id"],
+                "driver__driver_code": row["driver__driver_code"],
+                "driver__user__full_name": row["driver__user__full_name"],
+                "total_efficiency": row["score"],
+                "total_rating": row.get("rating", 0.0),
+                "total_volume": row.get("total_volume", 0.0),
+                "total_earnings": row.get("total_earnings", 0.0),
+            }
+            for row in DriverLeaderboard.top(days, board, 20)
+        ]
         return Response(out)
+
+    @action(detail=False, methods=["get"], url_path="my-rank")
+    def my_rank(self, request):
+        """
+        Rang du chauffeur connecté sur chaque fenêtre (7 / 30 / 90 jours), même filtres que leaderboard.
+        Admin: ?driver_id=<id> pour un autre chauffeur.
+        """
+        driver_id = getattr(getattr(request.user, "driver", None), "pk", None)
+        if _is_admin(request.user) and request.query_params.get("driver_id"):
+            driver_id = request.query_params.get("driver_id")
+        if not str(driver_id or "").isdigit():
+            return Response({"detail": "Profil chauffeur introuvable."}, status=404)
+
+        board = board_from_params(request.query_params)
+        return Response(
+            {
+                "driver_id": int(driver_id),
+                "board": board,
+                "windows": [DriverLeaderboard.rank(int(driver_id), days, board) for days in WINDOWS],
+            }
+        )
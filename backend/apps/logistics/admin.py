@@ -1,12 +1,13 @@
 # ========================= apps/logistics/admin.py =========================
 from django.contrib import admin
-from .models import Collection, Delivery, Attendance
+from .models import Collection, Delivery, Attendance, SettlementRun, Shift, SupplierPayout
 
 
 @admin.register(Collection)
 class CollectionAdmin(admin.ModelAdmin):
-    list_display = ("id", "supplier", "driver", "quantity_liters", "value_amount", "status", "collected_at")
+    list_display = ("id", "supplier", "driver", "quantity_liters", "value_amount", "amount_paid", "status", "collected_at")
     search_fields = ("supplier__user__username", "driver__user__username")
+    list_filter = ("status",)
 
 
 @admin.register(Delivery)
@@ -16,4 +17,27 @@ class DeliveryAdmin(admin.ModelAdmin):
 
 @admin.register(Attendance)
 class AttendanceAdmin(admin.ModelAdmin):
-    list_display = ("id", "driver", "pdv", "type", "checkin_at")
\ No newline at end of file
+    list_display = ("id", "driver", "pdv", "type", "shift", "checkin_at", "departed_at")
+    list_filter = ("type",)
+
+
+@admin.register(Shift)
+class ShiftAdmin(admin.ModelAdmin):
+    list_display = ("id", "driver", "status", "started_at", "ended_at", "stops_count", "pdvs_visited", "stops_per_hour")
+    list_filter = ("status",)
+    search_fields = ("driver__driver_code", "driver__user__username")
+
+class SupplierPayoutInline(admin.TabularInline):
+    model = SupplierPayout
+    extra = 0
+    can_delete = False
+    readonly_fields = ("supplier", "amount", "collections_count", "liters", "wallet_tx_out", "wallet_tx_in", "created_at")
+
+
+@admin.register(SettlementRun)
+class SettlementRunAdmin(admin.ModelAdmin):
+    list_display = ("run_key", "status", "suppliers_paid", "collections_settled", "total_amount", "started_at", "finished_at")
+    list_filter = ("status",)
+    search_fields = ("run_key",)
+    readonly_fields = [f.name for f in SettlementRun._meta.fields]
+    inlines = [SupplierPayoutInline]
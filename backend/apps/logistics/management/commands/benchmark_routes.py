@@ -0,0 +1,59 @@
+# ========================= apps/logistics/management/commands/benchmark_routes.py =========================
+import random
+import statistics
+
+from django.core.management.base import BaseCommand
+
+from apps.logistics.routing import RouteSolver
+
+
+class Command(BaseCommand):
+    help = "Benchmark du planificateur de tournées sur une flotte synthétique (aucun accès base)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pdvs", type=int, default=500)
+        parser.add_argument("--drivers", type=int, default=60)
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--radius-km", type=float, default=40.0)
+        parser.add_argument("--max-stops", type=int, default=0)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        depot = (-3.3822, 29.3644)
+        spread = options["radius_km"] / 111.0  # ~ degrés
+
+        def around():
+            return depot[0] + rng.uniform(-spread, spread), depot[1] + rng.uniform(-spread, spread)
+
+        stops = []
+        for i in range(options["pdvs"]):
+            lat, lng = around()
+            stops.append({"id": i + 1, "lat": lat, "lng": lng, "demand": rng.uniform(50, 600)})
+
+        vehicles = []
+        for i in range(options["drivers"]):
+            lat, lng = around()
+            vehicles.append({"id": i + 1, "lat": lat, "lng": lng, "capacity": rng.choice([1000, 2000, 3000, 5000])})
+
+        totals, result = [], None
+        for _ in range(max(1, options["runs"])):
+            result = RouteSolver.solve(depot, stops, vehicles, max_stops=options["max_stops"] or None)
+            totals.append(result["timings_ms"]["total"])
+
+        naive_km = sum(2 * d for d in _depot_distances(depot, stops))
+        self.stdout.write(
+            f"PDV={len(stops)} chauffeurs={len(vehicles)} runs={len(totals)}\n"
+            f"  temps total (ms): médiane={statistics.median(totals):.1f} min={min(totals):.1f} max={max(totals):.1f}\n"
+            f"  dernier run (ms): {result['timings_ms']}\n"
+            f"  tournées={len(result['routes'])} non affectés={len(result['unassigned'])}\n"
+            f"  distance planifiée={result['total_distance_km']:.1f} km (aller-retour individuel: {naive_km:.1f} km)"
+        )
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminé"))
+
+
+def _depot_distances(depot, stops):
+    from apps.logistics.routing import haversine_from
+    import numpy as np
+
+    return haversine_from(depot, np.array([[s["lat"], s["lng"]] for s in stops]))
@@ -0,0 +1,58 @@
+# ========================= apps/logistics/management/commands/partitions.py =========================
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.logistics.partitioning import PartitionManager
+
+
+class Command(BaseCommand):
+    help = (
+        "Partitionnement mensuel des tables d'événements (PostgreSQL): "
+        "status | convert | ensure (partitions à venir) | detach (archivage des anciennes)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["status", "convert", "ensure", "detach"])
+        parser.add_argument("--table", action="append", default=[], help="limiter à une table (répétable)")
+        parser.add_argument("--months-ahead", type=int, default=3)
+        parser.add_argument("--older-than", type=int, default=0, help="detach: âge minimum en mois")
+        parser.add_argument("--drop", action="store_true", help="detach: supprimer au lieu de conserver")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitionnement disponible uniquement sur PostgreSQL.")
+
+        targets = PartitionManager.targets()
+        if options["table"]:
+            targets = [(t, c) for t, c in targets if t in options["table"]]
+            if not targets:
+                raise CommandError("Aucune table partitionnable ne correspond.")
+
+        action = options["action"]
+        if action == "detach" and options["older_than"] <= 0:
+            raise CommandError("--older-than est requis pour detach.")
+
+        for table, column in targets:
+            if action == "status":
+                with connection.cursor() as cursor:
+                    if not PartitionManager.is_partitioned(cursor, table):
+                        self.stdout.write(f"{table}: non partitionnée")
+                        continue
+                    parts = PartitionManager.partitions(cursor, table)
+                self.stdout.write(f"{table} ({column}): {len(parts)} partitions")
+                for name, start, end, rows in parts:
+                    bounds = f"{start} -> {end}" if start else "DEFAULT"
+                    self.stdout.write(f"  {name:<40} {bounds:<26} ~{rows} lignes")
+
+            elif action == "convert":
+                done = PartitionManager.convert(table, column, months_ahead=options["months_ahead"])
+                self.stdout.write(self.style.SUCCESS(f"✅ {table} convertie") if done else f"{table}: déjà partitionnée")
+
+            elif action == "ensure":
+                created = PartitionManager.ensure_future(table, column, options["months_ahead"])
+                self.stdout.write(f"{table}: {len(created)} partition(s) créée(s) {', '.join(created)}")
+
+            else:
+                detached = PartitionManager.detach_older_than(table, options["older_than"], drop=options["drop"])
+                verb = "supprimée(s)" if options["drop"] else "détachée(s)"
+                self.stdout.write(f"{table}: {len(detached)} partition(s) {verb} {', '.join(detached)}")
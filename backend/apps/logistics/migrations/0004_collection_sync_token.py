@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-19 15:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0005_compliancestatus'),
+        ('logistics', '0003_alter_delivery_options_delivery_confirmed_at_and_more'),
+        ('qr', '0001_initial'),
+        ('suppliers', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='sync_token',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='collection',
+            constraint=models.UniqueConstraint(condition=models.Q(('sync_token', ''), _negated=True), fields=('created_by', 'sync_token'), name='uniq_collection_sync_token_per_author'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Partitionnement mensuel optionnel (PostgreSQL + LOGISTICS_PARTITIONING=1)
+
+from django.conf import settings
+from django.db import migrations
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql" or not getattr(settings, "LOGISTICS_PARTITIONING", False):
+        return
+
+    from apps.logistics.partitioning import PartitionManager
+
+    months_ahead = int(getattr(settings, "LOGISTICS_PARTITION_MONTHS_AHEAD", 3))
+    for table, column in PartitionManager.targets(apps):
+        PartitionManager.convert(table, column, months_ahead=months_ahead)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("logistics", "0005_settlement"),
+        ("pdv", "0006_pdvforecast"),
+        ("qr", "0001_initial"),
+    ]
+
+    operations = [
+        # conversion à sens unique (pas de retour automatique vers une table classique)
+        migrations.RunPython(partition_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.9 on 2026-10-19 15:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0005_compliancestatus'),
+        ('logistics', '0006_optional_partitioning'),
+        ('pdv', '0006_pdvforecast'),
+        ('qr', '0001_initial'),
+        ('suppliers', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['driver', 'checkin_at', 'pdv'], name='logistics_a_driver__3e4884_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collection',
+            index=models.Index(fields=['driver', 'collected_at'], name='logistics_c_driver__cb7fa1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collection',
+            index=models.Index(fields=['supplier', 'collected_at'], name='logistics_c_supplie_8f4d36_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collection',
+            index=models.Index(fields=['collected_at'], name='logistics_c_collect_34ec97_idx'),
+        ),
+    ]
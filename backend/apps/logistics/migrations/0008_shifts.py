@@ -0,0 +1,69 @@
+# Generated by Django 5.2.9 on 2026-10-19 15:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0005_compliancestatus'),
+        ('logistics', '0007_composite_indexes'),
+        ('qr', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='departed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='qr_scan',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendances', to='qr.qrscan'),
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='type',
+            field=models.CharField(choices=[('start_shift', 'Début de tournée'), ('arrival_pdv', 'Arrivée PDV'), ('end_shift', 'Fin de tournée')], default='start_shift', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='Shift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('open', 'Ouverte'), ('closed', 'Clôturée')], default='open', max_length=10)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_minutes', models.PositiveIntegerField(default=0)),
+                ('stops_count', models.PositiveIntegerField(default=0)),
+                ('pdvs_visited', models.PositiveIntegerField(default=0)),
+                ('time_at_pdv_minutes', models.PositiveIntegerField(default=0)),
+                ('stops_per_hour', models.DecimalField(decimal_places=2, default=0, max_digits=6)),
+                ('deliveries_count', models.PositiveIntegerField(default=0)),
+                ('delivered_liters', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='shifts', to='drivers.driver')),
+            ],
+            options={
+                'ordering': ('-started_at',),
+            },
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='shift',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendances', to='logistics.shift'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['driver', 'started_at'], name='logistics_s_driver__447b79_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['status', 'started_at'], name='logistics_s_status_fbe6f1_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='shift',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'open')), fields=('driver',), name='uniq_open_shift_per_driver'),
+        ),
+    ]
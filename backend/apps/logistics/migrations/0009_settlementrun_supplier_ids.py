@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0008_shifts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='settlementrun',
+            name='supplier_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0009_settlementrun_supplier_ids'),
+        ('qr', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='collection',
+            name='qr_scan',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='collections', to='qr.qrscan'),
+        ),
+        migrations.AlterField(
+            model_name='delivery',
+            name='qr_scan',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deliveries', to='qr.qrscan'),
+        ),
+    ]
@@ -33,16 +33,46 @@ class Collection(models.Model):
         on_delete=models.SET_NULL,
         related_name="collections_created",
     )
+    # pas de contrainte SQL: qr_qrscan peut être partitionnée (LOGISTICS_PARTITIONING)
     qr_scan = models.ForeignKey(
         QRScan,
         null=True,
         blank=True,
         on_delete=models.SET_NULL,
         related_name="collections",
+        db_constraint=False,
+    )
+
+    # ✅ offline-first: identifiant généré par le client (rejeu idempotent par auteur)
+    sync_token = models.CharField(max_length=64, blank=True, default="")
+
+    # ✅ règlement fournisseur (SettlementEngine)
+    amount_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid_at = models.DateTimeField(null=True, blank=True)
+    settlement_run = models.ForeignKey(
+        "SettlementRun",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="collections",
     )
 
     class Meta:
         ordering = ("-collected_at",)
+        indexes = [
+            # ✅ listes chauffeur / fournisseur (filtre + tri -collected_at) et stats par période
+            models.Index(fields=["driver", "collected_at"]),
+            models.Index(fields=["supplier", "collected_at"]),
+            # ✅ listes admin (tri -collected_at) et compteurs "aujourd'hui"
+            models.Index(fields=["collected_at"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["created_by", "sync_token"],
+                condition=~models.Q(sync_token=""),
+                name="uniq_collection_sync_token_per_author",
+            ),
+        ]
 
     def __str__(self):
         return f"Collection#{self.pk} supplier={self.supplier_id} driver={self.driver_id} liters={self.quantity_liters}"
@@ -70,13 +100,14 @@ class Delivery(models.Model):
     )
     confirmed_at = models.DateTimeField(null=True, blank=True)
 
-    # ✅ trace QR scan
+    # ✅ trace QR scan (pas de contrainte SQL: qr_qrscan peut être partitionnée)
     qr_scan = models.ForeignKey(
         QRScan,
         null=True,
         blank=True,
         on_delete=models.SET_NULL,
         related_name="deliveries",
+        db_constraint=False,
     )
 
     class Meta:
@@ -91,9 +122,142 @@ class Delivery(models.Model):
         return f"Delivery#{self.pk} driver={self.driver_id} pdv={self.pdv_id} liters={self.quantity_liters}"
 
 
+class Shift(models.Model):
+    """
+    Tournée chauffeur: ouverture -> arrivées PDV (scan QR du PDV) -> clôture.
+    Les KPI sont calculés une fois à la clôture (ShiftService.close); les analytics lisent ces résumés.
+    """
+
+    STATUS = (("open", "Ouverte"), ("closed", "Clôturée"))
+
+    driver = models.ForeignKey(Driver, on_delete=models.PROTECT, related_name="shifts")
+    status = models.CharField(max_length=10, choices=STATUS, default="open")
+    started_at = models.DateTimeField(default=timezone.now)
+    ended_at = models.DateTimeField(null=True, blank=True)
+
+    # ✅ KPI précalculés à la clôture
+    duration_minutes = models.PositiveIntegerField(default=0)
+    stops_count = models.PositiveIntegerField(default=0)
+    pdvs_visited = models.PositiveIntegerField(default=0)
+    time_at_pdv_minutes = models.PositiveIntegerField(default=0)
+    stops_per_hour = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    deliveries_count = models.PositiveIntegerField(default=0)
+    delivered_liters = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ("-started_at",)
+        indexes = [
+            models.Index(fields=["driver", "started_at"]),
+            models.Index(fields=["status", "started_at"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["driver"],
+                condition=models.Q(status="open"),
+                name="uniq_open_shift_per_driver",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Shift#{self.pk} driver={self.driver_id} {self.status}"
+
+
 class Attendance(models.Model):
-    TYPES = (("start_shift", "Début de tournée"), ("arrival_pdv", "Arrivée PDV"))
+    TYPES = (
+        ("start_shift", "Début de tournée"),
+        ("arrival_pdv", "Arrivée PDV"),
+        ("end_shift", "Fin de tournée"),
+    )
     driver = models.ForeignKey(Driver, on_delete=models.PROTECT)
     pdv = models.ForeignKey(PointDeVente, null=True, blank=True, on_delete=models.SET_NULL)
     checkin_at = models.DateTimeField(auto_now_add=True)
     type = models.CharField(max_length=20, choices=TYPES, default="start_shift")
+
+    shift = models.ForeignKey(Shift, null=True, blank=True, on_delete=models.SET_NULL, related_name="attendances")
+    # départ du PDV (arrivée suivante ou clôture): temps passé au PDV
+    departed_at = models.DateTimeField(null=True, blank=True)
+    # pas de contrainte SQL: qr_qrscan peut être partitionnée (LOGISTICS_PARTITIONING)
+    qr_scan = models.ForeignKey(
+        QRScan,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="attendances",
+        db_constraint=False,
+    )
+
+    class Meta:
+        indexes = [
+            # ✅ historique chauffeur (curseur -checkin_at) et PDV visités par période (index-only scan)
+            models.Index(fields=["driver", "checkin_at", "pdv"]),
+        ]
+
+
+class SettlementRun(models.Model):
+    """
+    Exécution du règlement des collectes fournisseurs (idempotente par run_key).
+    Un run relancé reprend les collectes restantes de son périmètre (cutoff, supplier_ids);
+    un run terminé n'est jamais rejoué.
+    """
+
+    STATUS = (
+        ("running", "En cours"),
+        ("completed", "Terminé"),
+        ("failed", "Échec"),
+    )
+
+    run_key = models.CharField(max_length=64, unique=True)
+    cutoff = models.DateTimeField()  # collectes prises en compte: collected_at <= cutoff
+    supplier_ids = models.JSONField(default=list, blank=True)  # périmètre du run ([] = tous les fournisseurs)
+    status = models.CharField(max_length=20, choices=STATUS, default="running", db_index=True)
+
+    suppliers_paid = models.PositiveIntegerField(default=0)
+    suppliers_skipped = models.PositiveIntegerField(default=0)
+    collections_settled = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+
+    error = models.TextField(blank=True, default="")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="settlement_runs",
+    )
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-started_at",)
+
+    def __str__(self):
+        return f"SettlementRun({self.run_key}) {self.status} total={self.total_amount}"
+
+
+class SupplierPayout(models.Model):
+    """Paiement d'un fournisseur dans un run (lié aux écritures wallet)."""
+
+    run = models.ForeignKey(SettlementRun, on_delete=models.CASCADE, related_name="payouts")
+    supplier = models.ForeignKey(Supplier, on_delete=models.PROTECT, related_name="payouts")
+
+    amount = models.DecimalField(max_digits=18, decimal_places=2)
+    collections_count = models.PositiveIntegerField(default=0)
+    liters = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    wallet_tx_out = models.ForeignKey(
+        "wallet.WalletTransaction", null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    wallet_tx_in = models.ForeignKey(
+        "wallet.WalletTransaction", null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["run", "supplier"]),
+        ]
+
+    def __str__(self):
+        return f"Payout run={self.run_id} supplier={self.supplier_id} amount={self.amount}"
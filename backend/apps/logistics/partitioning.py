@@ -0,0 +1,308 @@
+# ========================= apps/logistics/partitioning.py =========================
+"""
+Partitionnement mensuel (PostgreSQL, RANGE déclaratif) des tables d'événements volumineuses.
+
+- optionnel: activé par LOGISTICS_PARTITIONING (sinon tout est no-op), PostgreSQL uniquement
+- conversion unique d'une table existante: table partitionnée parente + une partition par mois
+  + une partition DEFAULT (filet de sécurité), données recopiées, index recréés sur la parente
+- maintenance: création des partitions des mois à venir, détachement (archivage) des anciennes
+- les requêtes "fenêtre récente" (collected_at >= ...) n'ouvrent qu'une partition (pruning);
+  l'archivage devient un DETACH au lieu d'un DELETE massif
+
+Contraintes PostgreSQL à connaître:
+- la clé primaire devient (id, colonne de date); id reste unique en pratique (séquence)
+- id: colonne IDENTITY (Django 5) remplacée par une séquence + DEFAULT nextval (les colonnes
+  IDENTITY ne sont pas admises sur une table partitionnée avant PostgreSQL 17)
+- FK entrantes: impossibles vers une PK composite. Les modèles les déclarent sans contrainte SQL
+  (db_constraint=False: Collection/Delivery/Attendance.qr_scan, StockMovement.sale/delivery;
+  on_delete reste appliqué par l'ORM); toute autre FK entrante trouvée est supprimée (journalisé)
+- un index unique doit contenir la colonne de partition: elle y est ajoutée automatiquement.
+  uniq_collection_sync_token_per_author devient (created_by, sync_token, collected_at): la saisie
+  groupée exige donc collected_at avec un sync_token (un rejeu renvoie le même horodatage)
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# (app_label, model_name, colonne de partition)
+PARTITIONED_MODELS = (
+    ("logistics", "Collection", "collected_at"),
+    ("logistics", "Delivery", "delivered_at"),
+    ("logistics", "Attendance", "checkin_at"),
+    ("pdv", "PDVSale", "sold_at"),
+    ("qr", "QRScan", "scanned_at"),
+)
+
+
+def enabled() -> bool:
+    return bool(getattr(settings, "LOGISTICS_PARTITIONING", False)) and connection.vendor == "postgresql"
+
+
+def _q(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+class PartitionManager:
+    @staticmethod
+    def targets(apps=None):
+        """[(table, column)] des tables concernées (apps = registre historique en migration)."""
+        if apps is None:
+            from django.apps import apps
+        out = []
+        for app_label, model_name, field_name in PARTITIONED_MODELS:
+            model = apps.get_model(app_label, model_name)
+            out.append((model._meta.db_table, model._meta.get_field(field_name).column))
+        return out
+
+    @staticmethod
+    def is_partitioned(cursor, table: str) -> bool:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+    @staticmethod
+    def partitions(cursor, table: str):
+        """[(nom, borne basse, borne haute | None pour DEFAULT, lignes estimées)]"""
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = %s AND p.relnamespace = 'public'::regnamespace
+            ORDER BY c.relname
+            """,
+            [table],
+        )
+        out = []
+        for name, bound, rows in cursor.fetchall():
+            found = re.findall(r"'(\d{4}-\d{2}-\d{2})", bound or "")
+            if len(found) == 2:
+                out.append((name, date.fromisoformat(found[0]), date.fromisoformat(found[1]), max(rows, 0)))
+            else:
+                out.append((name, None, None, max(rows, 0)))
+        return out
+
+    # ------------------------------------------------------------------ conversion
+    @staticmethod
+    def convert(table: str, column: str, *, months_ahead: int = 3) -> bool:
+        """
+        Convertit une table classique en table partitionnée par mois (une transaction, verrou exclusif).
+        Retourne False si la table est déjà partitionnée.
+        """
+        legacy = f"{table}_legacy"
+        with transaction.atomic(), connection.cursor() as cursor:
+            if PartitionManager.is_partitioned(cursor, table):
+                return False
+
+            cursor.execute(f"LOCK TABLE {_q(table)} IN ACCESS EXCLUSIVE MODE")
+
+            # FK entrantes: impossibles vers une PK composite (id, date)
+            cursor.execute(
+                "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+                "WHERE contype = 'f' AND confrelid = %s::regclass",
+                [table],
+            )
+            for referencing, constraint in cursor.fetchall():
+                logger.warning("Partitioning %s: dropping FK %s on %s", table, constraint, referencing)
+                cursor.execute(f"ALTER TABLE {referencing} DROP CONSTRAINT {_q(constraint)}")
+
+            # index existants (hors PK), recréés ensuite sur la parente
+            cursor.execute(
+                """
+                SELECT i.relname, pg_get_indexdef(x.indexrelid), x.indisunique
+                FROM pg_index x
+                JOIN pg_class i ON i.oid = x.indexrelid
+                WHERE x.indrelid = %s::regclass AND NOT x.indisprimary
+                """,
+                [table],
+            )
+            indexes = cursor.fetchall()
+
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype IN ('f', 'c')",
+                [table],
+            )
+            constraints = cursor.fetchall()
+
+            cursor.execute(f"SELECT date_trunc('month', MIN({_q(column)}))::date FROM {_q(table)}")
+            first = cursor.fetchone()[0]
+
+            cursor.execute(f"ALTER TABLE {_q(table)} RENAME TO {_q(legacy)}")
+
+            # id IDENTITY -> séquence (le DROP IDENTITY libère le nom <table>_id_seq; les valeurs restent)
+            cursor.execute(
+                "SELECT attidentity FROM pg_attribute WHERE attrelid = %s::regclass AND attname = 'id'", [legacy]
+            )
+            identity = cursor.fetchone()[0] in ("a", "d")
+            if identity:
+                cursor.execute(f"ALTER TABLE {_q(legacy)} ALTER COLUMN id DROP IDENTITY")
+
+            cursor.execute(
+                f"CREATE TABLE {_q(table)} (LIKE {_q(legacy)} INCLUDING DEFAULTS INCLUDING GENERATED) "
+                f"PARTITION BY RANGE ({_q(column)})"
+            )
+            new_sequence = None
+            if identity:
+                new_sequence = f"{table}_id_seq"
+                cursor.execute(f"CREATE SEQUENCE {_q(new_sequence)} OWNED BY {_q(table)}.id")
+                cursor.execute(
+                    f"ALTER TABLE {_q(table)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)", [new_sequence]
+                )
+            current = _month_start(timezone.localdate())
+            month = _month_start(first) if first else current
+            while month <= _add_months(current, months_ahead):
+                PartitionManager._create_partition(cursor, table, month)
+                month = _add_months(month, 1)
+            cursor.execute(f"CREATE TABLE {_q(table + '_default')} PARTITION OF {_q(table)} DEFAULT")
+
+            cursor.execute(f"INSERT INTO {_q(table)} SELECT * FROM {_q(legacy)}")
+
+            # séquence: ex-identity -> recalage de la nouvelle; serial -> la séquence change de propriétaire
+            if new_sequence:
+                cursor.execute(
+                    f"SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {_q(table)}), 0) + 1, false)",
+                    [new_sequence],
+                )
+            else:
+                cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [legacy])
+                old_sequence = cursor.fetchone()[0]
+                if old_sequence:
+                    cursor.execute(f"ALTER SEQUENCE {old_sequence} OWNED BY {_q(table)}.id")
+
+            cursor.execute(f"DROP TABLE {_q(legacy)}")
+
+            # contraintes et index après la copie (plus rapide, et les noms sont libérés)
+            cursor.execute(f"ALTER TABLE {_q(table)} ADD PRIMARY KEY (id, {_q(column)})")
+            for name, definition in constraints:
+                cursor.execute(f"ALTER TABLE {_q(table)} ADD CONSTRAINT {_q(name)} {definition}")
+            for _name, definition, unique in indexes:
+                if unique:
+                    definition = PartitionManager._with_partition_key(definition, column)
+                cursor.execute(definition)
+
+        logger.info("Partitioning %s: converted (monthly on %s, from %s)", table, column, first)
+        return True
+
+    @staticmethod
+    def _with_partition_key(definition: str, column: str) -> str:
+        """CREATE UNIQUE INDEX ... (a, b) [WHERE ...] -> (a, b, column): requis sur une table partitionnée."""
+        match = re.match(r"^(.* USING \w+ \()(.*?)(\).*)$", definition)
+        if not match or column in [c.strip().strip('"') for c in match.group(2).split(",")]:
+            return definition
+        return f"{match.group(1)}{match.group(2)}, {_q(column)}{match.group(3)}"
+
+    # ------------------------------------------------------------------ maintenance
+    @staticmethod
+    def _create_partition(cursor, table: str, month: date) -> str:
+        name = partition_name(table, month)
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {_q(name)} PARTITION OF {_q(table)} FOR VALUES FROM (%s) TO (%s)",
+            [month.isoformat(), _add_months(month, 1).isoformat()],
+        )
+        return name
+
+    @staticmethod
+    def ensure_future(table: str, column: str, months_ahead: int = 3) -> list[str]:
+        """
+        Crée les partitions manquantes du mois courant à +months_ahead.
+        Les lignes déjà tombées dans DEFAULT pour ce mois y sont déplacées avant l'attachement.
+        """
+        created = []
+        current = _month_start(timezone.localdate())
+        default = f"{table}_default"
+
+        with connection.cursor() as cursor:
+            if not PartitionManager.is_partitioned(cursor, table):
+                return created
+            existing = {name for name, *_ in PartitionManager.partitions(cursor, table)}
+
+            for offset in range(months_ahead + 1):
+                month = _add_months(current, offset)
+                name = partition_name(table, month)
+                if name in existing:
+                    continue
+                bounds = [month.isoformat(), _add_months(month, 1).isoformat()]
+                with transaction.atomic():
+                    cursor.execute(f"CREATE TABLE {_q(name)} (LIKE {_q(table)} INCLUDING DEFAULTS)")
+                    if default in existing:
+                        cursor.execute(
+                            f"WITH moved AS (DELETE FROM {_q(default)} "
+                            f"WHERE {_q(column)} >= %s AND {_q(column)} < %s RETURNING *) "
+                            f"INSERT INTO {_q(name)} SELECT * FROM moved",
+                            bounds,
+                        )
+                    cursor.execute(
+                        f"ALTER TABLE {_q(table)} ATTACH PARTITION {_q(name)} FOR VALUES FROM (%s) TO (%s)",
+                        bounds,
+                    )
+                created.append(name)
+        return created
+
+    @staticmethod
+    def detach_older_than(table: str, months: int, *, drop: bool = False) -> list[str]:
+        """
+        Détache les partitions entièrement antérieures à (mois courant - months).
+        Les tables détachées restent en base (archive, export/pg_dump) sauf drop=True.
+        """
+        cutoff = _add_months(_month_start(timezone.localdate()), -months)
+        detached = []
+        with connection.cursor() as cursor:
+            if not PartitionManager.is_partitioned(cursor, table):
+                return detached
+            for name, _start, end, _rows in PartitionManager.partitions(cursor, table):
+                if end is None or end > cutoff:
+                    continue
+                with transaction.atomic():
+                    cursor.execute(f"ALTER TABLE {_q(table)} DETACH PARTITION {_q(name)}")
+                    if drop:
+                        cursor.execute(f"DROP TABLE {_q(name)}")
+                detached.append(name)
+        if detached:
+            logger.info("Partitioning %s: %s %s", table, "dropped" if drop else "detached", ", ".join(detached))
+        return detached
+
+    @staticmethod
+    def maintain(months_ahead: int | None = None, retention_months: int | None = None) -> dict:
+        """Tâche périodique: partitions à venir (+ détachement si une rétention est configurée)."""
+        if not enabled():
+            return {}
+        months_ahead = months_ahead if months_ahead is not None else int(
+            getattr(settings, "LOGISTICS_PARTITION_MONTHS_AHEAD", 3)
+        )
+        retention_months = retention_months if retention_months is not None else int(
+            getattr(settings, "LOGISTICS_PARTITION_RETENTION_MONTHS", 0)
+        )
+        report = {}
+        for table, column in PartitionManager.targets():
+            entry = {"created": PartitionManager.ensure_future(table, column, months_ahead)}
+            if retention_months > 0:
+                entry["detached"] = PartitionManager.detach_older_than(table, retention_months)
+            report[table] = entry
+        return report
@@ -0,0 +1,334 @@
+# ========================= apps/logistics/routing.py =========================
+"""
+Planification des tournées HQ -> PDV (problème de tournées avec capacité, CVRP).
+
+- matrice de distances haversine vectorisée (NumPy)
+- heuristique de Clarke & Wright (savings), contrainte de capacité
+- amélioration locale 2-opt de chaque tournée
+- affectation des tournées aux chauffeurs disponibles (capacité suffisante, plus proche du dépôt)
+
+Entrée "pure" (RouteSolver.solve) utilisable hors base: benchmark, tests, simulations.
+"""
+
+from __future__ import annotations
+
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Coalesce
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_matrix(coords) -> np.ndarray:
+    """coords: (n, 2) [lat, lng] en degrés -> matrice (n, n) des distances en km."""
+    rad = np.radians(np.asarray(coords, dtype=np.float64))
+    lat = rad[:, 0][:, None]
+    lng = rad[:, 1][:, None]
+
+    dlat = lat.T - lat
+    dlng = lng.T - lng
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin(dlng / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_from(origin, coords) -> np.ndarray:
+    """Distances (km) d'un point vers n points."""
+    if len(coords) == 0:
+        return np.zeros(0)
+    return haversine_matrix(np.vstack([np.asarray(origin, dtype=np.float64)[None, :], coords]))[0, 1:]
+
+
+class RouteSolver:
+    """
+    Solveur CVRP heuristique.
+    Noeud 0 = dépôt; noeuds 1..n = PDV. Les tournées partent et reviennent au dépôt.
+    """
+
+    @staticmethod
+    def savings_routes(dist: np.ndarray, demands: np.ndarray, capacity: float, max_stops: int | None = None):
+        """Clarke & Wright (version parallèle). Retourne une liste de tournées (listes de noeuds 1..n)."""
+        n = len(demands)
+        if n == 0:
+            return []
+
+        # savings s(i, j) = d(0, i) + d(0, j) - d(i, j), calculés en une passe vectorisée
+        iu, ju = np.triu_indices(n, k=1)
+        iu += 1
+        ju += 1
+        savings = dist[0, iu] + dist[0, ju] - dist[iu, ju]
+        order = np.argsort(-savings, kind="stable")
+        order = order[savings[order] > 0]
+
+        route_of = list(range(n + 1))  # noeud -> id de tournée
+        routes = {i: [i] for i in range(1, n + 1)}
+        loads = {i: float(demands[i - 1]) for i in range(1, n + 1)}
+
+        for k in order:
+            i, j = int(iu[k]), int(ju[k])
+            ri, rj = route_of[i], route_of[j]
+            if ri == rj:
+                continue
+            if loads[ri] + loads[rj] > capacity:
+                continue
+
+            a, b = routes[ri], routes[rj]
+            if max_stops and len(a) + len(b) > max_stops:
+                continue
+
+            # i et j doivent être en extrémité de leur tournée; on oriente pour que i et j soient adjacents
+            if a[-1] == i and b[0] == j:
+                merged = a + b
+            elif a[0] == i and b[-1] == j:
+                merged = b + a
+            elif a[-1] == i and b[-1] == j:
+                merged = a + b[::-1]
+            elif a[0] == i and b[0] == j:
+                merged = a[::-1] + b
+            else:
+                continue
+
+            routes[ri] = merged
+            loads[ri] += loads.pop(rj)
+            del routes[rj]
+            for node in b:
+                route_of[node] = ri
+
+        return [(route, loads[rid]) for rid, route in routes.items()]
+
+    @staticmethod
+    def route_length(dist: np.ndarray, route) -> float:
+        path = [0, *route, 0]
+        return float(dist[path[:-1], path[1:]].sum())
+
+    @staticmethod
+    def two_opt(dist: np.ndarray, route, max_passes: int = 50):
+        """2-opt (première amélioration) sur une tournée dépôt -> route -> dépôt."""
+        path = [0, *route, 0]
+        size = len(path)
+        if size < 5:
+            return route
+
+        improved = True
+        passes = 0
+        while improved and passes < max_passes:
+            improved = False
+            passes += 1
+            arr = np.asarray(path)
+            for i in range(1, size - 2):
+                a, b = arr[i - 1], arr[i]
+                # gain de l'inversion path[i..j] pour tous les j en une opération vectorisée
+                cs = arr[i + 1:size - 1]
+                ds = arr[i + 2:size]
+                delta = dist[a, cs] + dist[b, ds] - dist[a, b] - dist[cs, ds]
+                best = int(np.argmin(delta))
+                if delta[best] < -1e-9:
+                    j = i + 1 + best
+                    path[i:j + 1] = path[i:j + 1][::-1]
+                    improved = True
+                    break
+        return path[1:-1]
+
+    @staticmethod
+    def assign(routes, approach_km: np.ndarray, capacities: np.ndarray):
+        """
+        Affecte les tournées (plus lourdes d'abord) au chauffeur libre de capacité suffisante
+        le plus proche du dépôt. Retourne [(route_index, vehicle_index | None)].
+        """
+        free = set(range(len(capacities)))
+        by_distance = list(np.argsort(approach_km, kind="stable"))
+        result = []
+        for idx in sorted(range(len(routes)), key=lambda r: -routes[r][1]):
+            load = routes[idx][1]
+            vehicle = next((int(v) for v in by_distance if v in free and capacities[v] >= load), None)
+            if vehicle is not None:
+                free.discard(vehicle)
+            result.append((idx, vehicle))
+        return result
+
+    @staticmethod
+    def solve(depot, stops, vehicles, max_stops: int | None = None) -> dict:
+        """
+        depot: (lat, lng)
+        stops: [{"id", "lat", "lng", "demand"}, ...]
+        vehicles: [{"id", "lat", "lng", "capacity"}, ...]
+        """
+        timings = {}
+        t0 = time.perf_counter()
+
+        if not stops or not vehicles:
+            return {
+                "routes": [],
+                "unassigned": [s["id"] for s in stops],
+                "timings_ms": {},
+                "total_distance_km": 0.0,
+            }
+
+        capacities = np.array([float(v["capacity"]) for v in vehicles])
+        max_capacity = float(capacities.max())
+        demands = np.minimum(np.array([float(s["demand"]) for s in stops]), max_capacity)
+
+        coords = np.array([[depot[0], depot[1]]] + [[float(s["lat"]), float(s["lng"])] for s in stops])
+        dist = haversine_matrix(coords)
+        approach = haversine_from(depot, np.array([[float(v["lat"]), float(v["lng"])] for v in vehicles]))
+        timings["matrix"] = (time.perf_counter() - t0) * 1000
+
+        # flotte hétérogène: on construit les tournées pour la plus grande capacité encore libre,
+        # on affecte, puis on recommence avec les PDV restants et les chauffeurs restants
+        routes, assignment = [], []
+        remaining = list(range(1, len(stops) + 1))
+        free = np.ones(len(vehicles), dtype=bool)
+        timings.update({"savings": 0.0, "two_opt": 0.0, "assign": 0.0})
+
+        while remaining and free.any():
+            nodes = np.array([0, *remaining])
+            sub = dist[np.ix_(nodes, nodes)]
+            round_capacity = float(capacities[free].max())
+
+            # quantité livrable plafonnée à la capacité du tour (livraison partielle sinon)
+            demands[nodes[1:] - 1] = np.minimum(demands[nodes[1:] - 1], round_capacity)
+
+            t1 = time.perf_counter()
+            local = RouteSolver.savings_routes(sub, demands[nodes[1:] - 1], round_capacity, max_stops=max_stops)
+            timings["savings"] += (time.perf_counter() - t1) * 1000
+
+            t2 = time.perf_counter()
+            local = [([int(nodes[n]) for n in RouteSolver.two_opt(sub, route)], load) for route, load in local]
+            timings["two_opt"] += (time.perf_counter() - t2) * 1000
+
+            t3 = time.perf_counter()
+            free_idx = np.flatnonzero(free)
+            assigned_now = 0
+            leftover = []
+            for idx, vehicle in RouteSolver.assign(local, approach[free_idx], capacities[free_idx]):
+                if vehicle is None:
+                    leftover.extend(local[idx][0])
+                    continue
+                vehicle = int(free_idx[vehicle])
+                free[vehicle] = False
+                routes.append(local[idx])
+                assignment.append((len(routes) - 1, vehicle))
+                assigned_now += 1
+            timings["assign"] += (time.perf_counter() - t3) * 1000
+
+            remaining = sorted(leftover)
+            if not assigned_now:
+                break
+
+        for node in remaining:
+            routes.append(([node], float(demands[node - 1])))
+            assignment.append((len(routes) - 1, None))
+
+        planned, unassigned, total = [], [], 0.0
+        for idx, vehicle in assignment:
+            route, load = routes[idx]
+            if vehicle is None:
+                unassigned.extend(stops[node - 1]["id"] for node in route)
+                continue
+
+            length = RouteSolver.route_length(dist, route)
+            total += length
+            planned.append(
+                {
+                    "driver_id": vehicles[vehicle]["id"],
+                    "capacity": float(capacities[vehicle]),
+                    "load": round(load, 2),
+                    "distance_km": round(length, 3),
+                    "approach_km": round(float(approach[vehicle]), 3),
+                    "stops": [
+                        {
+                            "pdv_id": stops[node - 1]["id"],
+                            "quantity": round(float(demands[node - 1]), 2),
+                            "requested": round(float(stops[node - 1]["demand"]), 2),
+                        }
+                        for node in route
+                    ],
+                }
+            )
+
+        timings["total"] = (time.perf_counter() - t0) * 1000
+        return {
+            "routes": planned,
+            "unassigned": unassigned,
+            "total_distance_km": round(total, 3),
+            "timings_ms": {k: round(v, 2) for k, v in timings.items()},
+        }
+
+
+class RoutePlanner:
+    """Construit l'instance CVRP depuis la base (PDV sous le seuil, chauffeurs disponibles) puis résout."""
+
+    @staticmethod
+    def depot():
+        return (
+            float(getattr(settings, "LOGISTICS_DEPOT_LAT", 0.0)),
+            float(getattr(settings, "LOGISTICS_DEPOT_LNG", 0.0)),
+        )
+
+    @staticmethod
+    def stops(threshold, target, pdv_ids=None):
+        from apps.pdv.models import PointDeVente
+
+        qs = (
+            PointDeVente.objects.filter(latitude__isnull=False, longitude__isnull=False)
+            .annotate(
+                liters=Coalesce(
+                    F("stock__current_liters"),
+                    Value(Decimal("0")),
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                )
+            )
+            .filter(liters__lt=threshold)
+            .order_by("id")
+        )
+        if pdv_ids:
+            qs = qs.filter(id__in=pdv_ids)
+
+        return [
+            {"id": pdv_id, "lat": lat, "lng": lng, "demand": float(target - liters), "current": float(liters)}
+            for pdv_id, lat, lng, liters in qs.values_list("id", "latitude", "longitude", "liters")
+            if target > liters
+        ]
+
+    @staticmethod
+    def vehicles(driver_ids=None):
+        from apps.drivers.models import Driver
+
+        qs = (
+            Driver.objects.filter(
+                status="active",
+                max_capacity__gt=0,
+                availability__is_available=True,
+                availability__location_lat__isnull=False,
+                availability__location_lng__isnull=False,
+            )
+            .order_by("id")
+        )
+        if driver_ids:
+            qs = qs.filter(id__in=driver_ids)
+
+        return [
+            {"id": driver_id, "lat": lat, "lng": lng, "capacity": float(capacity)}
+            for driver_id, lat, lng, capacity in qs.values_list(
+                "id", "availability__location_lat", "availability__location_lng", "max_capacity"
+            )
+        ]
+
+    @staticmethod
+    def plan(*, threshold, target, depot=None, pdv_ids=None, driver_ids=None, max_stops=None) -> dict:
+        depot = depot or RoutePlanner.depot()
+        stops = RoutePlanner.stops(threshold, target, pdv_ids=pdv_ids)
+        vehicles = RoutePlanner.vehicles(driver_ids=driver_ids)
+
+        result = RouteSolver.solve(depot, stops, vehicles, max_stops=max_stops)
+        result.update(
+            {
+                "depot": {"lat": depot[0], "lng": depot[1]},
+                "pdv_count": len(stops),
+                "driver_count": len(vehicles),
+            }
+        )
+        return result
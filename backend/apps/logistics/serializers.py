@@ -3,7 +3,7 @@ from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
-from .models import Collection, Delivery, Attendance
+from .models import Collection, Delivery, Attendance, SettlementRun, Shift
 from apps.drivers.models import Driver
 from apps.pdv.models import PointDeVente, PDVStock
 from apps.qr.models import QRScan
@@ -36,8 +36,9 @@ class CollectionSerializer(serializers.ModelSerializer):
             "created_by",
             "qr_scan",
             "qr_scan_id",
+            "sync_token",
         ]
-        read_only_fields = ["id", "supplier", "driver", "created_by", "qr_scan"]
+        read_only_fields = ["id", "supplier", "driver", "created_by", "qr_scan", "sync_token"]
 
     def get_supplier_name(self, obj):
         try:
@@ -153,7 +154,111 @@ class DeliveryConfirmFromScanSerializer(serializers.Serializer):
         return attrs
 
 
+class RoutePlanRequestSerializer(serializers.Serializer):
+    """
+    Planification des tournées:
+    - threshold_liters: PDV dont le stock est sous ce seuil
+    - target_liters: niveau à recompléter (défaut: 2 x seuil)
+    - depot_lat/depot_lng: dépôt HQ (défaut: settings)
+    """
+    threshold_liters = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0)
+    target_liters = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, min_value=0)
+    depot_lat = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    depot_lng = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    pdv_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=True)
+    driver_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=True)
+    max_stops = serializers.IntegerField(required=False, min_value=1, max_value=100)
+
+    def validate(self, attrs):
+        attrs.setdefault("target_liters", attrs["threshold_liters"] * 2)
+        if attrs["target_liters"] <= attrs["threshold_liters"]:
+            raise serializers.ValidationError({"target_liters": _("Doit être supérieur au seuil")})
+        if ("depot_lat" in attrs) != ("depot_lng" in attrs):
+            raise serializers.ValidationError({"depot_lat": _("depot_lat et depot_lng vont ensemble")})
+        return attrs
+
+
+class CollectionBulkLineSerializer(serializers.Serializer):
+    """
+    Ligne de saisie groupée (tournée de collecte). Validation sans requête:
+    les références (chauffeur / fournisseur / scan) sont vérifiées en lot par CollectionBatchService.
+    """
+    supplier_id = serializers.IntegerField(required=False, min_value=1)
+    driver_id = serializers.IntegerField(required=False, min_value=1)
+    qr_scan_id = serializers.IntegerField(required=False, allow_null=True, min_value=1)
+    quantity_liters = serializers.DecimalField(max_digits=10, decimal_places=2)
+    value_amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    collected_at = serializers.DateTimeField(required=False)
+    sync_token = serializers.CharField(required=False, allow_blank=True, max_length=64, default="")
+
+    def validate(self, attrs):
+        if attrs["quantity_liters"] <= 0:
+            raise serializers.ValidationError({"quantity_liters": _("Quantité invalide")})
+        if attrs["value_amount"] < 0:
+            raise serializers.ValidationError({"value_amount": _("Valeur invalide")})
+        # rejeu idempotent: l'horodatage client fait partie de la clé unique (table partitionnée)
+        if attrs.get("sync_token") and not attrs.get("collected_at"):
+            raise serializers.ValidationError({"collected_at": _("Requis avec sync_token")})
+        return attrs
+
+
+class SettlementRequestSerializer(serializers.Serializer):
+    run_key = serializers.CharField(required=False, max_length=64)
+    cutoff = serializers.DateTimeField(required=False)
+    supplier_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=True)
+    dry_run = serializers.BooleanField(required=False, default=False)
+
+
+class SettlementRunSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SettlementRun
+        fields = [
+            "id",
+            "run_key",
+            "cutoff",
+            "supplier_ids",
+            "status",
+            "suppliers_paid",
+            "suppliers_skipped",
+            "collections_settled",
+            "total_amount",
+            "error",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+
 class AttendanceSerializer(serializers.ModelSerializer):
+    pdv_name = serializers.CharField(source="pdv.name", read_only=True, default=None)
+
     class Meta:
         model = Attendance
         fields = "__all__"
+
+
+class ShiftSerializer(serializers.ModelSerializer):
+    driver_code = serializers.CharField(source="driver.driver_code", read_only=True)
+
+    class Meta:
+        model = Shift
+        fields = [
+            "id",
+            "driver",
+            "driver_code",
+            "status",
+            "started_at",
+            "ended_at",
+            "duration_minutes",
+            "stops_count",
+            "pdvs_visited",
+            "time_at_pdv_minutes",
+            "stops_per_hour",
+            "deliveries_count",
+            "delivered_liters",
+        ]
+        read_only_fields = fields
+
+
+class ShiftCheckinSerializer(serializers.Serializer):
+    code = serializers.CharField(max_length=64)
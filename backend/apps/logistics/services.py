@@ -0,0 +1,385 @@
+# ========================= apps/logistics/services.py =========================
+"""
+Services métier logistique.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max, Sum
+from django.utils import timezone
+
+from apps.adminpanel.counters import DashboardCounters
+from apps.drivers.models import Driver
+from apps.pdv.models import PDVStock, PointDeVente
+from apps.qr.models import QRScan, QRToken
+from apps.suppliers.models import Supplier
+
+from .models import Attendance, Collection, Delivery, Shift
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryConfirmError(Exception):
+    """Erreur métier de confirmation (message + code HTTP)."""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class ShiftError(DeliveryConfirmError):
+    """Erreur métier tournée (message + code HTTP)."""
+
+
+class DeliveryService:
+    """
+    Confirmation de réception PDV (scan QR chauffeur) en une seule transaction:
+      PDV -> claim atomique du token (UPDATE ... RETURNING) -> chauffeur (join user)
+      -> QRScan -> Delivery -> stock (upsert) + mouvement de journal.
+    Toute erreur annule l'ensemble: jamais de token consommé sans livraison.
+    """
+
+    @staticmethod
+    def _claim_token(code: str, now, subject_type: str = "driver"):
+        """
+        Consomme le token (si one_time) et retourne (token_id, subject_id), ou None si non valide.
+        Un seul aller-retour sur PostgreSQL; deux scans concurrents ne peuvent pas réussir tous les deux.
+        """
+        if connection.vendor == "postgresql":
+            table = QRToken._meta.db_table
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {table}
+                    SET used_at = CASE WHEN one_time THEN %s ELSE used_at END
+                    WHERE code = %s AND used_at IS NULL AND expires_at > %s AND subject_type = %s
+                    RETURNING id, subject_id
+                    """,
+                    [now, code, now, subject_type],
+                )
+                return cursor.fetchone()
+
+        token = (
+            QRToken.objects.select_for_update()
+            .filter(code=code, used_at__isnull=True, expires_at__gt=now, subject_type=subject_type)
+            .first()
+        )
+        if not token:
+            return None
+        if token.one_time:
+            QRToken.objects.filter(pk=token.pk).update(used_at=now)
+        return token.pk, token.subject_id
+
+    @staticmethod
+    def _token_error(code: str, now, subject_label: str = "un chauffeur") -> DeliveryConfirmError:
+        """Chemin d'échec uniquement: retrouve la raison exacte du refus."""
+        token = QRToken.objects.filter(code=code).only("used_at", "expires_at", "subject_type").first()
+        if not token:
+            return DeliveryConfirmError("Token QR introuvable.", 404)
+        if token.used_at is not None or token.expires_at <= now:
+            return DeliveryConfirmError("Token QR expiré ou déjà utilisé.", 400)
+        return DeliveryConfirmError(f"Ce QR ne correspond pas à {subject_label}.", 400)
+
+    @staticmethod
+    def confirm(*, code: str, pdv_id: int, quantity, user, agent_only: bool = False, ip=None, user_agent: str = ""):
+        """
+        Retourne (delivery, stock). Lève DeliveryConfirmError.
+        agent_only: restreint au PDV dont `user` est l'agent.
+        """
+        with transaction.atomic():
+            pdvs = PointDeVente.objects.filter(id=pdv_id)
+            if agent_only:
+                pdvs = pdvs.filter(agent_user=user)
+            pdv = pdvs.only("id", "name", "province", "commune").first()
+            if not pdv:
+                raise DeliveryConfirmError(
+                    "PDV introuvable ou non autorisé." if agent_only else "PDV introuvable.", 404
+                )
+
+            now = timezone.now()
+            claimed = DeliveryService._claim_token(code, now)
+            if not claimed:
+                raise DeliveryService._token_error(code, now)
+            token_id, driver_id = claimed
+
+            driver = Driver.objects.select_related("user").filter(id=driver_id).first()
+            if not driver:
+                raise DeliveryConfirmError("Chauffeur introuvable.", 404)
+
+            scan = QRScan.objects.create(token_id=token_id, scanned_by=user, ip=ip, ua=user_agent or "")
+
+            delivery = Delivery.objects.create(
+                driver=driver,
+                pdv=pdv,
+                quantity_liters=quantity,
+                delivered_at=now,
+                confirmed_by=user,
+                confirmed_at=now,
+                qr_scan=scan,
+            )
+
+            stock, _ = PDVStock.receive(pdv.id, quantity, event_time=now, delivery=delivery, created_by=user)
+
+        logger.info("Delivery confirmed id=%s pdv=%s driver=%s qty=%s", delivery.pk, pdv.id, driver.id, quantity)
+        return delivery, stock
+
+
+class ShiftService:
+    """
+    Tournées chauffeur: start -> check_in (scan du QR PDV, une arrivée par scan) -> close.
+    La clôture fige les KPI de la tournée (une agrégation sur ses pointages + livraisons de la fenêtre).
+    """
+
+    @staticmethod
+    def open_shift(driver, *, lock: bool = False):
+        qs = Shift.objects.filter(driver=driver, status="open")
+        if lock:
+            qs = qs.select_for_update()
+        return qs.first()
+
+    @staticmethod
+    def start(driver) -> Shift:
+        try:
+            with transaction.atomic():
+                if ShiftService.open_shift(driver, lock=True):
+                    raise ShiftError("Une tournée est déjà ouverte.", 409)
+                shift = Shift.objects.create(driver=driver)
+                Attendance.objects.create(driver=driver, shift=shift, type="start_shift")
+        except IntegrityError:
+            # double démarrage concurrent: la contrainte uniq_open_shift_per_driver tranche
+            raise ShiftError("Une tournée est déjà ouverte.", 409)
+        return shift
+
+    @staticmethod
+    def check_in(driver, *, code: str, user, ip=None, user_agent: str = "") -> Attendance:
+        """Arrivée PDV: consomme le QR du PDV (claim atomique) et clôt le passage au PDV précédent."""
+        with transaction.atomic():
+            shift = ShiftService.open_shift(driver, lock=True)
+            if not shift:
+                raise ShiftError("Aucune tournée ouverte.", 409)
+
+            now = timezone.now()
+            claimed = DeliveryService._claim_token(code, now, subject_type="pdv")
+            if not claimed:
+                raise DeliveryService._token_error(code, now, "un point de vente")
+            token_id, pdv_id = claimed
+
+            if not PointDeVente.objects.filter(id=pdv_id).exists():
+                raise ShiftError("PDV introuvable.", 404)
+
+            scan = QRScan.objects.create(token_id=token_id, scanned_by=user, ip=ip, ua=user_agent or "")
+
+            Attendance.objects.filter(shift=shift, type="arrival_pdv", departed_at__isnull=True).update(
+                departed_at=now
+            )
+            attendance = Attendance.objects.create(
+                driver=driver,
+                pdv_id=pdv_id,
+                shift=shift,
+                qr_scan=scan,
+                type="arrival_pdv",
+            )
+
+        logger.info("Shift check-in shift=%s driver=%s pdv=%s", shift.pk, driver.pk, pdv_id)
+        return attendance
+
+    @staticmethod
+    def close(shift: Shift, *, ended_at=None) -> Shift:
+        """Clôture (maintenant, ou à `ended_at` pour une tournée oubliée) et fige les KPI."""
+        with transaction.atomic():
+            shift = Shift.objects.select_for_update().get(pk=shift.pk)
+            if shift.status == "closed":
+                return shift
+
+            now = ended_at or timezone.now()
+            Attendance.objects.filter(shift=shift, type="arrival_pdv", departed_at__isnull=True).update(
+                departed_at=now
+            )
+            Attendance.objects.create(driver_id=shift.driver_id, shift=shift, type="end_shift")
+
+            stops = Attendance.objects.filter(shift=shift, type="arrival_pdv").aggregate(
+                stops=Count("id"),
+                pdvs=Count("pdv", distinct=True),
+                dwell=Sum(ExpressionWrapper(F("departed_at") - F("checkin_at"), output_field=DurationField())),
+            )
+            deliveries = Delivery.objects.filter(
+                driver_id=shift.driver_id,
+                delivered_at__gte=shift.started_at,
+                delivered_at__lte=now,
+            ).aggregate(count=Count("id"), liters=Sum("quantity_liters"))
+
+            duration = now - shift.started_at
+            hours = duration.total_seconds() / 3600
+            stops_count = stops["stops"] or 0
+
+            shift.status = "closed"
+            shift.ended_at = now
+            shift.duration_minutes = int(duration.total_seconds() // 60)
+            shift.stops_count = stops_count
+            shift.pdvs_visited = stops["pdvs"] or 0
+            shift.time_at_pdv_minutes = int((stops["dwell"] or timedelta()).total_seconds() // 60)
+            shift.stops_per_hour = Decimal(f"{stops_count / hours:.2f}") if hours > 0 else Decimal("0")
+            shift.deliveries_count = deliveries["count"] or 0
+            shift.delivered_liters = deliveries["liters"] or Decimal("0")
+            shift.save()
+
+        logger.info(
+            "Shift closed id=%s driver=%s stops=%s minutes=%s",
+            shift.pk, shift.driver_id, shift.stops_count, shift.duration_minutes,
+        )
+        return shift
+
+    @staticmethod
+    def close_stale(max_hours: int) -> int:
+        """
+        Clôture les tournées oubliées (ouvertes depuis plus de max_hours) à leur dernière activité
+        (dernier pointage: arrivée ou départ PDV; à défaut le démarrage), pas à l'heure du passage
+        de la tâche: durée et arrêts/heure ne sont pas gonflés par l'oubli.
+        """
+        stale = (
+            Shift.objects.filter(status="open", started_at__lt=timezone.now() - timedelta(hours=max_hours))
+            .annotate(last_checkin=Max("attendances__checkin_at"), last_departure=Max("attendances__departed_at"))
+            .only("id", "started_at")
+        )
+        closed = 0
+        for shift in stale:
+            ended_at = max(t for t in (shift.started_at, shift.last_checkin, shift.last_departure) if t)
+            ShiftService.close(shift, ended_at=ended_at)
+            closed += 1
+        return closed
+
+
+class CollectionBatchService:
+    """
+    Saisie groupée des collectes (fournisseur ou admin, synchronisation hors-ligne).
+
+    - références validées en lot (in_bulk): chauffeurs, fournisseurs, scans QR
+    - insertion en un bulk_create; erreurs retournées ligne par ligne (les lignes valides passent)
+    - sync_token (par ligne, généré côté client, avec collected_at): un rejeu ne crée jamais de doublon
+    """
+
+    MAX_LINES = 500
+
+    @staticmethod
+    def ingest(lines, user, *, driver_id=None, supplier_id=None) -> dict:
+        """
+        lines: données validées par CollectionBulkLineSerializer.
+        driver_id / supplier_id: valeurs imposées selon l'auteur (fournisseur: supplier_id).
+        Retourne {"results": [...], "created": n, "duplicates": n, "errors": n}.
+        """
+        for line in lines:
+            if driver_id:
+                line["driver_id"] = driver_id
+            if supplier_id:
+                line["supplier_id"] = supplier_id
+
+        try:
+            return CollectionBatchService._ingest(lines, user)
+        except IntegrityError:
+            # rejeu concurrent du même lot: le second passage classe ces lignes en "duplicate"
+            return CollectionBatchService._ingest(lines, user)
+
+    @staticmethod
+    def _ingest(lines, user) -> dict:
+        # ---- références en lot (3 requêtes max, quel que soit le nombre de lignes)
+        driver_ids = {line.get("driver_id") for line in lines} - {None}
+        supplier_ids = {line.get("supplier_id") for line in lines} - {None}
+        scan_ids = {line.get("qr_scan_id") for line in lines} - {None}
+
+        drivers = Driver.objects.only("id").in_bulk(driver_ids) if driver_ids else {}
+        suppliers = Supplier.objects.only("id").in_bulk(supplier_ids) if supplier_ids else {}
+        scans = QRScan.objects.only("id").in_bulk(scan_ids) if scan_ids else {}
+
+        # ---- rejeux (sync_token déjà connu pour cet auteur)
+        tokens = [line["sync_token"] for line in lines if line.get("sync_token")]
+        known = {}
+        if tokens:
+            known = dict(
+                Collection.objects.filter(created_by=user, sync_token__in=tokens).values_list("sync_token", "id")
+            )
+
+        results = [None] * len(lines)
+        to_create, seen_tokens = [], set()
+        now = timezone.now()
+
+        for index, line in enumerate(lines):
+            token = line.get("sync_token") or ""
+            errors = {}
+
+            if token and token in known:
+                results[index] = {"index": index, "sync_token": token, "status": "duplicate", "id": known[token]}
+                continue
+            if token and token in seen_tokens:
+                errors["sync_token"] = "Dupliqué dans le lot."
+
+            driver_id = line.get("driver_id")
+            if not driver_id:
+                errors["driver_id"] = "Requis."
+            elif driver_id not in drivers:
+                errors["driver_id"] = "Driver introuvable"
+
+            supplier_id = line.get("supplier_id")
+            if not supplier_id:
+                errors["supplier_id"] = "Requis."
+            elif supplier_id not in suppliers:
+                errors["supplier_id"] = "Fournisseur introuvable"
+
+            scan_id = line.get("qr_scan_id")
+            if scan_id and scan_id not in scans:
+                errors["qr_scan_id"] = "Scan QR introuvable"
+
+            if errors:
+                results[index] = {"index": index, "sync_token": token, "status": "error", "errors": errors}
+                continue
+
+            if token:
+                seen_tokens.add(token)
+            to_create.append(
+                (
+                    index,
+                    Collection(
+                        supplier_id=supplier_id,
+                        driver_id=driver_id,
+                        qr_scan_id=scan_id,
+                        quantity_liters=line["quantity_liters"],
+                        value_amount=line["value_amount"],
+                        collected_at=line.get("collected_at") or now,
+                        created_by=user,
+                        sync_token=token,
+                    ),
+                )
+            )
+
+        with transaction.atomic():
+            created = Collection.objects.bulk_create([obj for _, obj in to_create], batch_size=500)
+
+            per_day = {}
+            for obj in created:
+                day = timezone.localdate(obj.collected_at)
+                per_day[(day, "collections")] = per_day.get((day, "collections"), 0) + 1
+            DashboardCounters.bump(day_deltas=per_day)
+
+        for (index, _), obj in zip(to_create, created):
+            results[index] = {"index": index, "sync_token": obj.sync_token, "status": "created", "id": obj.pk}
+
+        summary = {"created": 0, "duplicate": 0, "error": 0}
+        for r in results:
+            summary[r["status"]] += 1
+
+        logger.info(
+            "Collection batch by=%s lines=%s created=%s duplicates=%s errors=%s",
+            user.pk, len(lines), summary["created"], summary["duplicate"], summary["error"],
+        )
+        return {
+            "results": results,
+            "created": summary["created"],
+            "duplicates": summary["duplicate"],
+            "errors": summary["error"],
+        }
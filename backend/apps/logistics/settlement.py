@@ -0,0 +1,207 @@
+# ========================= apps/logistics/settlement.py =========================
+"""
+Règlement des collectes fournisseurs via le wallet plateforme.
+
+- sélection des collectes impayées (recorded / synced / paid_partial) jusqu'à une date de coupure,
+  éventuellement limitée à certains fournisseurs (périmètre enregistré sur le run)
+- montant dû par fournisseur = somme(value_amount - amount_paid), une agrégation groupée
+- paiement par lots de fournisseurs: une transaction par lot
+    verrou des collectes -> Wallet.batch_transfer -> SupplierPayout (bulk) -> UPDATE des collectes
+- idempotent: run_key unique, les collectes réglées portent settlement_run (jamais payées deux fois)
+- fournisseurs sans wallet ou avec un wallet désactivé: non payés (comptés dans suppliers_skipped)
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from apps.wallet.models import Wallet
+
+from .models import Collection, SettlementRun, SupplierPayout
+
+logger = logging.getLogger(__name__)
+
+UNPAID_STATUSES = ("recorded", "synced", "paid_partial")
+SUPPLIER_BATCH = 500
+ZERO = Decimal("0")
+
+
+class SettlementEngine:
+    @staticmethod
+    def unpaid(cutoff, supplier_ids=None):
+        qs = Collection.objects.filter(
+            status__in=UNPAID_STATUSES,
+            collected_at__lte=cutoff,
+            value_amount__gt=F("amount_paid"),
+        )
+        if supplier_ids:
+            qs = qs.filter(supplier_id__in=supplier_ids)
+        return qs
+
+    @staticmethod
+    def preview(cutoff=None, supplier_ids=None) -> list[dict]:
+        """Montants dus par fournisseur (une requête groupée), sans rien payer."""
+        cutoff = cutoff or timezone.now()
+        rows = (
+            SettlementEngine.unpaid(cutoff, supplier_ids)
+            .values("supplier_id", "supplier__user__wallet__id", "supplier__user__wallet__is_active")
+            .annotate(
+                amount=Sum(F("value_amount") - F("amount_paid")),
+                collections=Count("id"),
+                liters=Sum("quantity_liters"),
+            )
+            .order_by("supplier_id")
+        )
+        return [
+            {
+                "supplier_id": r["supplier_id"],
+                "wallet_id": r["supplier__user__wallet__id"],
+                "wallet_active": bool(r["supplier__user__wallet__is_active"]),
+                "amount": r["amount"] or ZERO,
+                "collections": r["collections"],
+                "liters": r["liters"] or ZERO,
+            }
+            for r in rows
+        ]
+
+    @staticmethod
+    def platform_wallet():
+        return Wallet.objects.filter(is_platform_wallet=True, is_active=True).order_by("pk").first()
+
+    @staticmethod
+    def run(run_key: str | None = None, *, cutoff=None, created_by=None, supplier_ids=None) -> SettlementRun:
+        now = timezone.now()
+        run_key = run_key or f"settlement-{timezone.localdate():%Y-%m-%d}"
+
+        run, _ = SettlementRun.objects.get_or_create(
+            run_key=run_key,
+            defaults={"cutoff": cutoff or now, "created_by": created_by, "supplier_ids": sorted(supplier_ids or [])},
+        )
+        if run.status == "completed":
+            return run
+
+        SettlementRun.objects.filter(pk=run.pk).update(status="running", error="")
+        platform = SettlementEngine.platform_wallet()
+        if not platform:
+            SettlementEngine._finish(run, "failed", error="Aucun wallet plateforme actif.")
+            return run
+
+        # reprise: périmètre du run d'origine (pas celui de l'appel)
+        plan = SettlementEngine.preview(run.cutoff, run.supplier_ids or None)
+        payable = [
+            p
+            for p in plan
+            if p["wallet_id"] and p["wallet_active"] and p["wallet_id"] != platform.pk and p["amount"] > 0
+        ]
+        skipped = len(plan) - len(payable)
+
+        try:
+            for i in range(0, len(payable), SUPPLIER_BATCH):
+                batch = [p["supplier_id"] for p in payable[i:i + SUPPLIER_BATCH]]
+                wallets = {p["supplier_id"]: p["wallet_id"] for p in payable[i:i + SUPPLIER_BATCH]}
+                skipped += SettlementEngine._settle_batch(run, platform.pk, batch, wallets, created_by)
+        except Exception as exc:
+            logger.exception("Settlement run %s failed", run.run_key)
+            SettlementEngine._finish(run, "failed", error=str(exc), skipped=skipped)
+            return run
+
+        SettlementEngine._finish(run, "completed", skipped=skipped)
+        return run
+
+    @staticmethod
+    def _settle_batch(run, platform_id, supplier_ids, wallets, created_by) -> int:
+        """Règle un lot de fournisseurs en une transaction. Retourne le nombre de fournisseurs non payés."""
+        now = timezone.now()
+        with transaction.atomic():
+            # verrou + montants exacts (une collecte arrivée entre-temps n'est ni payée ni marquée)
+            locked = list(
+                SettlementEngine.unpaid(run.cutoff, supplier_ids)
+                .select_for_update(of=("self",))
+                .values_list("id", "supplier_id", "value_amount", "amount_paid", "quantity_liters")
+            )
+
+            due = defaultdict(lambda: {"amount": ZERO, "ids": [], "liters": ZERO})
+            for collection_id, supplier_id, value, paid, liters in locked:
+                entry = due[supplier_id]
+                entry["amount"] += value - paid
+                entry["ids"].append(collection_id)
+                entry["liters"] += liters
+
+            # fonds limités: on paie dans l'ordre tant que le solde plateforme le permet
+            balance = Wallet.objects.select_for_update().values_list("balance", flat=True).get(pk=platform_id)
+            paying, skipped = [], 0
+            for supplier_id in supplier_ids:
+                entry = due.get(supplier_id)
+                if not entry or entry["amount"] <= 0:
+                    continue
+                if entry["amount"] > balance:
+                    skipped += 1
+                    continue
+                balance -= entry["amount"]
+                paying.append(supplier_id)
+
+            if not paying:
+                return skipped
+
+            txs = Wallet.batch_transfer(
+                platform_id,
+                [
+                    (wallets[s], due[s]["amount"], {"supplier_id": s, "settlement_run": run.run_key})
+                    for s in paying
+                ],
+                reason=f"settlement:{run.run_key}",
+                created_by=created_by,
+            )
+
+            SupplierPayout.objects.bulk_create(
+                [
+                    SupplierPayout(
+                        run=run,
+                        supplier_id=s,
+                        amount=due[s]["amount"],
+                        collections_count=len(due[s]["ids"]),
+                        liters=due[s]["liters"],
+                        wallet_tx_out=out_tx,
+                        wallet_tx_in=in_tx,
+                    )
+                    for s, (out_tx, in_tx) in zip(paying, txs)
+                ],
+                batch_size=1000,
+            )
+
+            collection_ids = [cid for s in paying for cid in due[s]["ids"]]
+            for i in range(0, len(collection_ids), 5000):
+                Collection.objects.filter(id__in=collection_ids[i:i + 5000]).update(
+                    status="paid_full",
+                    amount_paid=F("value_amount"),
+                    paid_at=now,
+                    settlement_run=run,
+                )
+
+            SettlementRun.objects.filter(pk=run.pk).update(
+                suppliers_paid=F("suppliers_paid") + len(paying),
+                collections_settled=F("collections_settled") + len(collection_ids),
+                total_amount=F("total_amount") + sum((due[s]["amount"] for s in paying), ZERO),
+            )
+
+        return skipped
+
+    @staticmethod
+    def _finish(run, status: str, *, error: str = "", skipped: int = 0):
+        SettlementRun.objects.filter(pk=run.pk).update(
+            status=status,
+            error=error,
+            suppliers_skipped=skipped,
+            finished_at=timezone.now(),
+        )
+        run.refresh_from_db()
+        logger.info(
+            "Settlement run=%s status=%s suppliers=%s collections=%s total=%s skipped=%s",
+            run.run_key, run.status, run.suppliers_paid, run.collections_settled, run.total_amount, skipped,
+        )
@@ -0,0 +1,56 @@
+# ========================= apps/logistics/tasks.py =========================
+"""
+Tâches Celery logistique.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.dateparse import parse_datetime
+
+from .partitioning import PartitionManager
+from .services import ShiftService
+from .settlement import SettlementEngine
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="logistics.settle_supplier_payments")
+def settle_supplier_payments(
+    run_key: str | None = None, cutoff: str | None = None, created_by_id=None, supplier_ids: list | None = None
+) -> dict:
+    """
+    Règlement des collectes fournisseurs (idempotent par run_key; par défaut: un run par jour).
+    cutoff au format ISO 8601 (défaut: maintenant); supplier_ids: périmètre (défaut: tous).
+    """
+    created_by = get_user_model().objects.filter(pk=created_by_id).first() if created_by_id else None
+
+    run = SettlementEngine.run(
+        run_key,
+        cutoff=parse_datetime(cutoff) if cutoff else None,
+        created_by=created_by,
+        supplier_ids=supplier_ids or None,
+    )
+    return {
+        "run_key": run.run_key,
+        "status": run.status,
+        "suppliers_paid": run.suppliers_paid,
+        "collections_settled": run.collections_settled,
+        "total_amount": str(run.total_amount),
+    }
+
+
+@shared_task(name="logistics.maintain_partitions")
+def maintain_partitions() -> dict:
+    """Partitions mensuelles à venir (+ détachement selon LOGISTICS_PARTITION_RETENTION_MONTHS)."""
+    return PartitionManager.maintain()
+
+
+@shared_task(name="logistics.close_stale_shifts")
+def close_stale_shifts() -> int:
+    """Clôture (et calcule les KPI) des tournées restées ouvertes au-delà de SHIFT_MAX_HOURS."""
+    return ShiftService.close_stale(int(getattr(settings, "SHIFT_MAX_HOURS", 16)))
@@ -1,3 +1,407 @@
+# ========================= apps/logistics/tests.py =========================
+"""
+Plans de requêtes (PostgreSQL uniquement): on seed des volumes réalistes puis on vérifie via
+EXPLAIN (FORMAT JSON) que les requêtes des écrans clés passent par un index: un changement de
+modèle/requête qui retomberait sur un Seq Scan fait échouer la suite. Le budget de requêtes
+des listes (N+1) est dans apps/api/tests.py.
+
+Saisie groupée des collectes: mêmes droits que la création unitaire (fournisseur / admin).
+Partitionnement (PostgreSQL): conversion puis insertion, unicité des sync_token conservée.
+Tournées: PDV distincts sur la période, clôture des tournées oubliées à leur dernière activité,
+KPI lus dans les résumés de tournée, filtres ?driver_id= / ?shift= non numériques ignorés.
+
+Règlement fournisseurs (SettlementEngine): périmètre supplier_ids respecté et enregistré, rejeu
+par run_key sans double paiement, plan vide, wallets désactivés ignorés.
+"""
+
+import json
+import random
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.drivers.models import Driver
+from apps.drivers.utils import DriverAnalytics
+from apps.pdv.models import PointDeVente
+from apps.suppliers.models import Supplier
+from apps.wallet.models import Wallet
+
+from .models import Attendance, Collection, SettlementRun, Shift, SupplierPayout
+from .partitioning import PartitionManager
+from .services import ShiftService
+from .settlement import SettlementEngine
+from .tasks import settle_supplier_payments
+
+DRIVERS = 40
+SUPPLIERS = 40
+PDVS = 60
+COLLECTIONS = 30000
+ATTENDANCES = 20000
+DAYS = 365
+
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Heap Scan"}
+
+
+def _nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN (FORMAT JSON) : PostgreSQL requis")
+class QueryPlanRegressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+        now = timezone.now()
+        User = get_user_model()
+
+        users = User.objects.bulk_create(
+            [User(username=f"plan-driver-{i}", role="livreur") for i in range(DRIVERS)]
+            + [User(username=f"plan-supplier-{i}", role="fournisseur") for i in range(SUPPLIERS)]
+            + [User(username="plan-agent", role="agent")]
+        )
+        drivers = Driver.objects.bulk_create(
+            [Driver(user=u, driver_code=f"CH_PLAN_{i:04d}") for i, u in enumerate(users[:DRIVERS])]
+        )
+        suppliers = Supplier.objects.bulk_create([Supplier(user=u) for u in users[DRIVERS:DRIVERS + SUPPLIERS]])
+        pdvs = PointDeVente.objects.bulk_create(
+            [PointDeVente(name=f"PDV {i}", code=f"PDV-PLAN-{i}", agent_user=users[-1]) for i in range(PDVS)]
+        )
+
+        Collection.objects.bulk_create(
+            [
+                Collection(
+                    supplier=rng.choice(suppliers),
+                    driver=rng.choice(drivers),
+                    quantity_liters=Decimal(rng.randint(20, 400)),
+                    value_amount=Decimal(rng.randint(20, 400) * 1000),
+                    collected_at=now - timedelta(minutes=rng.randint(0, DAYS * 24 * 60)),
+                )
+                for _ in range(COLLECTIONS)
+            ],
+            batch_size=5000,
+        )
+        attendances = Attendance.objects.bulk_create(
+            [Attendance(driver=rng.choice(drivers), pdv=rng.choice(pdvs), type="arrival_pdv") for _ in range(ATTENDANCES)],
+            batch_size=5000,
+        )
+        # checkin_at est auto_now_add: on étale les pointages sur l'année après coup
+        for attendance in attendances:
+            attendance.checkin_at = now - timedelta(minutes=rng.randint(0, DAYS * 24 * 60))
+        Attendance.objects.bulk_update(attendances, ["checkin_at"], batch_size=5000)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Collection._meta.db_table}")
+            cursor.execute(f"ANALYZE {Attendance._meta.db_table}")
+
+        cls.driver = drivers[0]
+        cls.supplier = suppliers[0]
+
+    def assertIndexScan(self, queryset, model):
+        plan = json.loads(queryset.explain(format="json"))[0]["Plan"]
+        table = model._meta.db_table
+        # table partitionnée: les noeuds portent le nom des partitions (<table>_pYYYYMM)
+        scans = [n for n in _nodes(plan) if str(n.get("Relation Name", "")).startswith(table)]
+
+        self.assertTrue(scans, f"{table} absente du plan: {json.dumps(plan)}")
+        seq = [n for n in scans if n["Node Type"] == "Seq Scan"]
+        self.assertFalse(seq, f"Seq Scan sur {table}: {json.dumps(plan, indent=1)}")
+        self.assertTrue(
+            any(n["Node Type"] in INDEX_NODES for n in scans),
+            f"aucun parcours d'index sur {table}: {json.dumps(plan, indent=1)}",
+        )
+
+    def test_driver_collections_list(self):
+        qs = (
+            Collection.objects.filter(driver=self.driver)
+            .select_related("supplier", "supplier__user", "driver", "driver__user", "created_by", "qr_scan")
+            .order_by("-collected_at")[:50]
+        )
+        self.assertIndexScan(qs, Collection)
+
+    def test_supplier_collections_list(self):
+        qs = Collection.objects.filter(supplier=self.supplier).order_by("-collected_at")[:50]
+        self.assertIndexScan(qs, Collection)
+
+    def test_admin_recent_collections(self):
+        qs = (
+            Collection.objects.select_related("supplier", "supplier__user", "driver", "driver__user")
+            .order_by("-collected_at")[:500]
+        )
+        self.assertIndexScan(qs, Collection)
+
+    def test_collections_today(self):
+        start_day = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.assertIndexScan(Collection.objects.filter(collected_at__gte=start_day), Collection)
+
+    def test_driver_period_collections(self):
+        end = timezone.now()
+        qs = Collection.objects.filter(driver_id=self.driver.pk, collected_at__range=[end - timedelta(days=30), end])
+        self.assertIndexScan(qs, Collection)
+
+    def test_driver_pdvs_visited(self):
+        end = timezone.now()
+        qs = (
+            Attendance.objects.filter(driver_id=self.driver.pk, checkin_at__range=[end - timedelta(days=30), end])
+            .values("pdv")
+            .distinct()
+        )
+        self.assertIndexScan(qs, Attendance)
+
+    def test_driver_attendance_cursor_page(self):
+        qs = Attendance.objects.filter(driver=self.driver).select_related("pdv").order_by("-checkin_at", "-id")[:51]
+        self.assertIndexScan(qs, Attendance)
+
+
+class CollectionBulkPermissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.driver = Driver.objects.create(
+            user=User.objects.create(username="bulk-driver", phone="+25779500001", role="livreur")
+        )
+        cls.supplier = Supplier.objects.create(
+            user=User.objects.create(username="bulk-supplier", phone="+25779500002", role="fournisseur")
+        )
+        cls.other_supplier = Supplier.objects.create(
+            user=User.objects.create(username="bulk-other", phone="+25779500003", role="fournisseur")
+        )
+
+    def post(self, user, lines):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post("/api/v1/collections/bulk/", {"lines": lines}, format="json")
+
+    def test_driver_cannot_create_collections(self):
+        line = {"supplier_id": self.supplier.pk, "quantity_liters": "10", "value_amount": "999999"}
+        response = self.post(self.driver.user, [line])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Collection.objects.exists())
+
+    def test_supplier_is_forced_to_own_account(self):
+        line = {
+            "supplier_id": self.other_supplier.pk,
+            "driver_id": self.driver.pk,
+            "quantity_liters": "10",
+            "value_amount": "5000",
+            "collected_at": "2026-01-05T08:30:00Z",
+            "sync_token": "offline-1",
+        }
+        response = self.post(self.supplier.user, [line])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(Collection.objects.values_list("supplier_id", flat=True)), [self.supplier.pk])
+
+        replay = self.post(self.supplier.user, [line])
+        self.assertEqual(replay.data["duplicates"], 1)
+        self.assertEqual(Collection.objects.count(), 1)
+
+    def test_sync_token_requires_collected_at(self):
+        line = {"driver_id": self.driver.pk, "quantity_liters": "10", "value_amount": "5000", "sync_token": "offline-2"}
+        response = self.post(self.supplier.user, [line])
+        self.assertEqual(response.status_code, 207)
+        self.assertIn("collected_at", response.data["results"][0]["errors"])
+
+
+@skipUnless(connection.vendor == "postgresql", "Partitionnement déclaratif: PostgreSQL requis")
+class PartitionConversionTests(TestCase):
+    def test_convert_then_insert(self):
+        User = get_user_model()
+        author = User.objects.create(username="partition-author", phone="+25779700000", role="fournisseur")
+        supplier = Supplier.objects.create(user=author)
+        driver = Driver.objects.create(
+            user=User.objects.create(username="partition-driver", phone="+25779700001", role="livreur")
+        )
+        collected_at = timezone.now() - timedelta(days=40)
+        before = Collection.objects.create(
+            supplier=supplier, driver=driver, quantity_liters=10, value_amount=100, collected_at=collected_at,
+            created_by=author, sync_token="partition-1",
+        )
+
+        table = Collection._meta.db_table
+        self.assertTrue(PartitionManager.convert(table, "collected_at", months_ahead=1))
+        with connection.cursor() as cursor:
+            self.assertTrue(PartitionManager.is_partitioned(cursor, table))
+            cursor.execute("SELECT attidentity FROM pg_attribute WHERE attrelid = %s::regclass AND attname = 'id'", [table])
+            self.assertEqual(cursor.fetchone()[0], "")
+
+        # insertion après conversion: id issu de la séquence recalée, ligne routée vers sa partition
+        after = Collection.objects.create(supplier=supplier, driver=driver, quantity_liters=5, value_amount=50)
+        self.assertGreater(after.pk, before.pk)
+        self.assertEqual(Collection.objects.get(pk=before.pk).sync_token, "partition-1")
+
+        # rejeu (même auteur, même sync_token, même horodatage client): toujours refusé par la base
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Collection.objects.create(
+                supplier=supplier, driver=driver, quantity_liters=10, value_amount=100, collected_at=collected_at,
+                created_by=author, sync_token="partition-1",
+            )
+
+
+class SettlementEngineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create(
+            username="settle-admin", phone="+25779600000", role="admin", is_staff=True, is_superuser=True
+        )
+        cls.platform = Wallet.objects.get(user=cls.admin)
+        Wallet.objects.filter(pk=cls.platform.pk).update(is_platform_wallet=True, balance=Decimal("1000000"))
+
+        cls.driver = Driver.objects.create(
+            user=User.objects.create(username="settle-driver", phone="+25779600001", role="livreur")
+        )
+        cls.suppliers = [
+            Supplier.objects.create(
+                user=User.objects.create(username=f"settle-supplier-{i}", phone=f"+2577960001{i}", role="fournisseur")
+            )
+            for i in range(3)
+        ]
+        cls.cutoff = timezone.now()
+        for supplier in cls.suppliers:
+            cls.collect(supplier, "1000", collected_at=cls.cutoff - timedelta(hours=1))
+
+    @classmethod
+    def collect(cls, supplier, amount, collected_at):
+        return Collection.objects.create(
+            supplier=supplier, driver=cls.driver, quantity_liters=Decimal("10"), value_amount=Decimal(amount),
+            collected_at=collected_at,
+        )
+
+    def balance(self, supplier):
+        return Wallet.objects.get(user=supplier.user).balance
+
+    def test_targeted_run_only_pays_selected_suppliers(self):
+        first, second, third = self.suppliers
+        before = {s.pk: self.balance(s) for s in self.suppliers}
+
+        result = settle_supplier_payments("targeted", self.cutoff.isoformat(), self.admin.pk, [first.pk])
+
+        run = SettlementRun.objects.get(run_key="targeted")
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(run.supplier_ids, [first.pk])
+        self.assertEqual((run.suppliers_paid, run.total_amount), (1, Decimal("1000")))
+        self.assertEqual(self.balance(first), before[first.pk] + Decimal("1000"))
+        self.assertEqual(self.balance(second), before[second.pk])
+        self.assertEqual(
+            set(Collection.objects.filter(settlement_run=run).values_list("supplier_id", flat=True)), {first.pk}
+        )
+        self.assertEqual(Collection.objects.filter(status="paid_full").count(), 1)
+
+    def test_replay_keeps_scope_and_never_pays_twice(self):
+        first, second, _ = self.suppliers
+        SettlementEngine.run("replay", cutoff=self.cutoff, supplier_ids=[first.pk])
+        platform_after_first = Wallet.objects.get(pk=self.platform.pk).balance
+
+        # run terminé: rejoué tel quel, rien n'est repayé
+        SettlementEngine.run("replay", cutoff=self.cutoff, supplier_ids=[first.pk])
+        self.assertEqual(SupplierPayout.objects.filter(run__run_key="replay").count(), 1)
+        self.assertEqual(Wallet.objects.get(pk=self.platform.pk).balance, platform_after_first)
+
+        # run interrompu: la reprise paie le reste de SON périmètre, pas les autres fournisseurs
+        self.collect(first, "500", collected_at=self.cutoff - timedelta(minutes=5))
+        SettlementRun.objects.filter(run_key="replay").update(status="failed")
+        run = SettlementEngine.run("replay")
+        self.assertEqual(run.status, "completed")
+        self.assertEqual((run.suppliers_paid, run.total_amount), (2, Decimal("1500")))
+        self.assertFalse(Collection.objects.filter(supplier=second, status="paid_full").exists())
+
+    def test_empty_plan(self):
+        run = SettlementEngine.run("empty", cutoff=self.cutoff - timedelta(days=1))
+        self.assertEqual(run.status, "completed")
+        self.assertEqual((run.suppliers_paid, run.suppliers_skipped, run.total_amount), (0, 0, Decimal("0")))
+        self.assertFalse(SupplierPayout.objects.exists())
+        self.assertEqual(Wallet.objects.get(pk=self.platform.pk).balance, Decimal("1000000"))
+
+    def test_inactive_supplier_wallet_is_skipped(self):
+        first, second, third = self.suppliers
+        Wallet.objects.filter(user=third.user).update(is_active=False)
+
+        run = SettlementEngine.run("inactive", cutoff=self.cutoff)
+        self.assertEqual((run.suppliers_paid, run.suppliers_skipped), (2, 1))
+        self.assertFalse(Collection.objects.filter(supplier=third, status="paid_full").exists())
+
+    def test_settle_endpoint_forwards_supplier_ids(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with mock.patch("apps.logistics.tasks.settle_supplier_payments.delay") as delay:
+            delay.return_value.id = "task-1"
+            response = client.post(
+                "/api/v1/collections/settle/",
+                {"run_key": "api", "supplier_ids": [self.suppliers[0].pk]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(delay.call_args.args[3], [self.suppliers[0].pk])
+
+
+class ShiftKpiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        agent = User.objects.create(username="shift-agent", phone="+25779800000", role="agent")
+        cls.driver = Driver.objects.create(
+            user=User.objects.create(username="shift-driver", phone="+25779800001", role="livreur")
+        )
+        cls.pdvs = [PointDeVente.objects.create(name=f"Shift PDV {i}", agent_user=agent) for i in range(2)]
+        cls.admin = User.objects.create(username="shift-admin", phone="+25779800002", role="admin", is_staff=True)
+
+    def visit(self, shift, pdv, at):
+        attendance = Attendance.objects.create(driver=self.driver, pdv=pdv, shift=shift, type="arrival_pdv")
+        Attendance.objects.filter(pk=attendance.pk).update(checkin_at=at, departed_at=at + timedelta(minutes=20))
+
+    def test_pdvs_visited_counts_distinct_pdvs_over_shifts(self):
+        now = timezone.now()
+        for day in (1, 2, 3):
+            shift = Shift.objects.create(driver=self.driver, status="closed", started_at=now - timedelta(days=day))
+            for pdv in self.pdvs:
+                self.visit(shift, pdv, now - timedelta(days=day) + timedelta(hours=1))
+
+        stats = DriverAnalytics.get_driver_performance(self.driver.pk)
+        self.assertEqual(stats["pdvs_visited"], 2)
+        annotated = DriverAnalytics.with_performance_counts(Driver.objects.filter(pk=self.driver.pk)).get()
+        self.assertEqual(annotated.perf_pdvs_visited, 2)
+
+    def test_stale_shift_closes_at_last_activity(self):
+        started = timezone.now() - timedelta(hours=20)
+        shift = Shift.objects.create(driver=self.driver, started_at=started)
+        self.visit(shift, self.pdvs[0], started + timedelta(hours=1))
+        self.visit(shift, self.pdvs[1], started + timedelta(hours=2))
+
+        self.assertEqual(ShiftService.close_stale(16), 1)
+        shift.refresh_from_db()
+        self.assertEqual(shift.status, "closed")
+        self.assertEqual(shift.ended_at, started + timedelta(hours=2, minutes=20))
+        self.assertEqual(shift.duration_minutes, 140)
+        self.assertEqual(shift.stops_count, 2)
+
+    def test_driver_performance_reads_shift_summaries(self):
+        supplier = Supplier.objects.create(
+            user=get_user_model().objects.create(username="shift-supplier", phone="+25779800003", role="fournisseur")
+        )
+        Collection.objects.create(supplier=supplier, driver=self.driver, quantity_liters=10, value_amount=100)
+        Shift.objects.create(
+            driver=self.driver,
+            status="closed",
+            started_at=timezone.now() - timedelta(hours=5),
+            ended_at=timezone.now() - timedelta(hours=1),
+            duration_minutes=240,
+            stops_count=8,
+            pdvs_visited=6,
+        )
+        stats = DriverAnalytics.get_driver_performance(self.driver.pk)
+        self.assertEqual(stats["collections"]["count"], 1)
+        self.assertEqual(stats["shifts"]["stops_per_hour"], 2.0)
 
-# Create your tests here.
+    def test_non_numeric_filters_are_ignored(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        for url in ("/api/v1/attendance/?shift=abc", "/api/v1/attendance/?driver_id=abc", "/api/v1/shifts/?driver_id=x"):
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).status_code, 200)
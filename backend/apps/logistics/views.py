@@ -1,23 +1,31 @@
 # ========================= apps/logistics/views.py =========================
 from django.utils import timezone
 from rest_framework import viewsets
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import Collection, Delivery, Attendance
+from .models import Collection, Delivery, Attendance, SettlementRun, Shift
 from .serializers import (
+    CollectionBulkLineSerializer,
     CollectionSerializer,
     DeliverySerializer,
     AttendanceSerializer,
     DeliveryConfirmFromScanSerializer,
+    RoutePlanRequestSerializer,
+    SettlementRequestSerializer,
+    SettlementRunSerializer,
+    ShiftCheckinSerializer,
+    ShiftSerializer,
 )
+from .routing import RoutePlanner
+from .services import CollectionBatchService, DeliveryConfirmError, DeliveryService, ShiftService
+from .settlement import SettlementEngine
 
-from apps.qr.models import QRToken, QRScan
-from apps.drivers.models import Driver
-from apps.pdv.models import PointDeVente, PDVStock
+from apps.pdv.models import PointDeVente
 
 
 def is_admin_user(user) -> bool:
@@ -54,6 +62,109 @@ class CollectionViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("Seul un fournisseur peut enregistrer une collecte.")
         serializer.save(context={"request": self.request})
 
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Saisie groupée (tournée de collecte / synchronisation hors-ligne).
+        Payload: { lines: [{ supplier_id?, driver_id, qr_scan_id?, quantity_liters, value_amount,
+                              collected_at?, sync_token? }, ...] }
+        - mêmes droits que la création unitaire: fournisseur (supplier_id imposé: le sien) ou admin;
+          les montants sont réglés au fournisseur (settle), un chauffeur ne les saisit pas
+        - réponse ligne par ligne: created / duplicate (sync_token déjà reçu) / error
+        """
+        user = request.user
+        forced = {}
+        if not is_admin_user(user):
+            if not hasattr(user, "supplier"):
+                return Response(
+                    {"detail": "Seul un fournisseur ou un administrateur peut enregistrer des collectes."},
+                    status=403,
+                )
+            forced["supplier_id"] = user.supplier.pk
+
+        raw_lines = request.data.get("lines")
+        if not isinstance(raw_lines, list) or not raw_lines:
+            return Response({"detail": "'lines' doit être une liste non vide."}, status=400)
+        if len(raw_lines) > CollectionBatchService.MAX_LINES:
+            return Response({"detail": f"Maximum {CollectionBatchService.MAX_LINES} lignes par lot."}, status=400)
+
+        # validation de forme ligne par ligne (aucune requête); les lignes invalides sont rapportées
+        valid_lines, valid_index, invalid = [], [], []
+        for index, raw in enumerate(raw_lines):
+            line_ser = CollectionBulkLineSerializer(data=raw if isinstance(raw, dict) else {})
+            if line_ser.is_valid():
+                valid_lines.append(dict(line_ser.validated_data))
+                valid_index.append(index)
+            else:
+                token = raw.get("sync_token", "") if isinstance(raw, dict) else ""
+                invalid.append({"index": index, "sync_token": token, "status": "error", "errors": line_ser.errors})
+
+        outcome = {"results": [], "created": 0, "duplicates": 0, "errors": 0}
+        if valid_lines:
+            outcome = CollectionBatchService.ingest(valid_lines, user, **forced)
+
+        results = invalid[:]
+        for r in outcome["results"]:
+            r["index"] = valid_index[r["index"]]
+            results.append(r)
+        results.sort(key=lambda r: r["index"])
+
+        return Response(
+            {
+                "created": outcome["created"],
+                "duplicates": outcome["duplicates"],
+                "errors": outcome["errors"] + len(invalid),
+                "results": results,
+            },
+            status=status.HTTP_207_MULTI_STATUS if (outcome["errors"] or invalid) else status.HTTP_201_CREATED,
+        )
+
+
+    @action(detail=False, methods=["post"], url_path="settle")
+    def settle(self, request):
+        """
+        Admin: règlement des collectes impayées via le wallet plateforme.
+        Payload: { run_key?, cutoff?, supplier_ids?, dry_run? }
+        - dry_run: montants dus par fournisseur (rien n'est payé)
+        - sinon: exécution asynchrone (Celery), idempotente par run_key
+        """
+        if not is_admin_user(request.user):
+            return Response({"detail": "Accès refusé."}, status=403)
+
+        ser = SettlementRequestSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+
+        if data["dry_run"]:
+            plan = SettlementEngine.preview(data.get("cutoff"), data.get("supplier_ids") or None)
+            return Response(
+                {
+                    "suppliers": len(plan),
+                    "total_amount": str(sum((p["amount"] for p in plan), 0)),
+                    "lines": [{**p, "amount": str(p["amount"]), "liters": str(p["liters"])} for p in plan],
+                }
+            )
+
+        from .tasks import settle_supplier_payments
+
+        run_key = data.get("run_key") or f"settlement-{timezone.now():%Y%m%d%H%M%S}"
+        cutoff = data.get("cutoff")
+        result = settle_supplier_payments.delay(
+            run_key, cutoff.isoformat() if cutoff else None, request.user.pk, data.get("supplier_ids") or None
+        )
+        return Response({"run_key": run_key, "task_id": result.id}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=["get"], url_path="settlements")
+    def settlements(self, request):
+        if not is_admin_user(request.user):
+            return Response({"detail": "Accès refusé."}, status=403)
+
+        runs = SettlementRun.objects.all()
+        page = self.paginate_queryset(runs)
+        if page is not None:
+            return self.get_paginated_response(SettlementRunSerializer(page, many=True).data)
+        return Response(SettlementRunSerializer(runs[:100], many=True).data)
+
 
 class DeliveryViewSet(viewsets.ModelViewSet):
     queryset = Delivery.objects.all().select_related("driver", "driver__user", "pdv", "confirmed_by", "qr_scan")
@@ -97,60 +208,22 @@ class DeliveryViewSet(viewsets.ModelViewSet):
         pdv_id = ser.validated_data["pdv_id"]
         qty = ser.validated_data["quantity_liters"]
 
-        # Agent ne peut confirmer que pour son PDV
-        if is_agent_user(request.user):
-            pdv = PointDeVente.objects.filter(id=pdv_id, agent_user=request.user).select_related("stock").first()
-            if not pdv:
-                return Response({"detail": "PDV introuvable ou non autorisé."}, status=404)
-        else:
-            pdv = PointDeVente.objects.filter(id=pdv_id).select_related("stock").first()
-            if not pdv:
-                return Response({"detail": "PDV introuvable."}, status=404)
-
-        # Token QR
-        token = QRToken.objects.filter(code=code).first()
-        if not token:
-            return Response({"detail": "Token QR introuvable."}, status=404)
-
-        if not token.is_valid():
-            return Response({"detail": "Token QR expiré ou déjà utilisé."}, status=400)
-
-        # On attend un QR pour chauffeur
-        if token.subject_type != "driver":
-            return Response({"detail": "Ce QR ne correspond pas à un chauffeur."}, status=400)
-
-        # (Optionnel) On recommande purpose=delivery, mais on n'interdit pas pour ne pas casser tes usages
-        # if token.purpose != "delivery":
-        #     return Response({"detail": "QR non prévu pour une livraison (purpose=delivery)."}, status=400)
-
-        driver = Driver.objects.select_related("user").filter(id=token.subject_id).first()
-        if not driver:
-            return Response({"detail": "Chauffeur introuvable."}, status=404)
-
-        # Trace scan
-        scan = QRScan.objects.create(
-            token=token,
-            scanned_by=request.user,
-            ip=request.META.get("REMOTE_ADDR"),
-            ua=request.META.get("HTTP_USER_AGENT", "") or "",
-        )
-
-        if token.one_time:
-            token.used_at = timezone.now()
-            token.save(update_fields=["used_at"])
-
-        delivery = Delivery.objects.create(
-            driver=driver,
-            pdv=pdv,
-            quantity_liters=qty,
-            delivered_at=timezone.now(),
-            confirmed_by=request.user,
-            confirmed_at=timezone.now(),
-            qr_scan=scan,
-        )
-
-        stock, _ = PDVStock.objects.get_or_create(pdv=pdv)
-        stock.increase(qty, event_time=timezone.now())
+        # ✅ une seule transaction (token jamais consommé sans livraison); agent limité à son PDV
+        try:
+            delivery, stock = DeliveryService.confirm(
+                code=code,
+                pdv_id=pdv_id,
+                quantity=qty,
+                user=request.user,
+                agent_only=is_agent_user(request.user),
+                ip=request.META.get("REMOTE_ADDR"),
+                user_agent=request.META.get("HTTP_USER_AGENT", ""),
+            )
+        except DeliveryConfirmError as e:
+            return Response({"detail": e.detail}, status=e.status_code)
+
+        pdv = delivery.pdv
+        driver = delivery.driver
 
         return Response(
             {
@@ -175,7 +248,158 @@ class DeliveryViewSet(viewsets.ModelViewSet):
         )
 
 
-class AttendanceViewSet(viewsets.ModelViewSet):
-    queryset = Attendance.objects.all().select_related("driver", "pdv")
+class RoutePlanningViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    @action(detail=False, methods=["post"], url_path="plan-routes")
+    def plan_routes(self, request):
+        """
+        Admin: propose des tournées HQ -> PDV (PDV sous le seuil, chauffeurs disponibles).
+        Lecture seule: aucune livraison n'est créée.
+        """
+        if not is_admin_user(request.user):
+            return Response({"detail": "Accès refusé."}, status=403)
+
+        ser = RoutePlanRequestSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+
+        depot = (data["depot_lat"], data["depot_lng"]) if "depot_lat" in data else None
+        plan = RoutePlanner.plan(
+            threshold=data["threshold_liters"],
+            target=data["target_liters"],
+            depot=depot,
+            pdv_ids=data.get("pdv_ids") or None,
+            driver_ids=data.get("driver_ids") or None,
+            max_stops=data.get("max_stops"),
+        )
+        return Response(plan)
+
+
+# ========================= Pagination =========================
+class AttendanceCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("-checkin_at", "-id")
+
+
+class ShiftCursorPagination(CursorPagination):
+    page_size = 30
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("-started_at", "-id")
+
+
+class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Pointages (lecture seule, pagination par curseur).
+    Les pointages sont créés par les tournées: /shifts/start/, /attendance/checkin/, /shifts/{id}/close/.
+    - admin: tout (filtres ?driver_id=, ?shift=)
+    - chauffeur: les siens
+    - agent PDV: ceux de ses PDV
+    """
+
     serializer_class = AttendanceSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = AttendanceCursorPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        qs = Attendance.objects.select_related("pdv")
+
+        if is_admin_user(user):
+            driver_id = (self.request.query_params.get("driver_id") or "").strip()
+            if driver_id.isdigit():
+                qs = qs.filter(driver_id=driver_id)
+        elif hasattr(user, "driver"):
+            qs = qs.filter(driver=user.driver)
+        elif is_agent_user(user):
+            qs = qs.filter(pdv__agent_user=user)
+        else:
+            return qs.none()
+
+        shift_id = (self.request.query_params.get("shift") or "").strip()
+        if shift_id.isdigit():
+            qs = qs.filter(shift_id=shift_id)
+        return qs
+
+    @action(detail=False, methods=["post"], url_path="checkin")
+    def checkin(self, request):
+        """
+        Chauffeur: arrivée PDV par scan du QR du PDV (subject_type=pdv) pendant une tournée ouverte.
+        Payload: { code }
+        """
+        if not hasattr(request.user, "driver"):
+            return Response({"detail": "Seul un chauffeur peut pointer une arrivée PDV."}, status=403)
+
+        ser = ShiftCheckinSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        try:
+            attendance = ShiftService.check_in(
+                request.user.driver,
+                code=ser.validated_data["code"],
+                user=request.user,
+                ip=request.META.get("REMOTE_ADDR"),
+                user_agent=request.META.get("HTTP_USER_AGENT", ""),
+            )
+        except DeliveryConfirmError as e:
+            return Response({"detail": e.detail}, status=e.status_code)
+
+        return Response(AttendanceSerializer(attendance).data, status=status.HTTP_201_CREATED)
+
+
+class ShiftViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Tournées chauffeur (résumés KPI calculés à la clôture), pagination par curseur.
+    - admin: tout (?driver_id=, ?status=)
+    - chauffeur: les siennes
+    """
+
+    serializer_class = ShiftSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ShiftCursorPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        qs = Shift.objects.select_related("driver")
+
+        if is_admin_user(user):
+            driver_id = (self.request.query_params.get("driver_id") or "").strip()
+            if driver_id.isdigit():
+                qs = qs.filter(driver_id=driver_id)
+        elif hasattr(user, "driver"):
+            qs = qs.filter(driver=user.driver)
+        else:
+            return qs.none()
+
+        status_filter = self.request.query_params.get("status")
+        if status_filter:
+            qs = qs.filter(status=status_filter)
+        return qs
+
+    @action(detail=False, methods=["post"], url_path="start")
+    def start(self, request):
+        if not hasattr(request.user, "driver"):
+            return Response({"detail": "Seul un chauffeur peut démarrer une tournée."}, status=403)
+        try:
+            shift = ShiftService.start(request.user.driver)
+        except DeliveryConfirmError as e:
+            return Response({"detail": e.detail}, status=e.status_code)
+        return Response(ShiftSerializer(shift).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"], url_path="current")
+    def current(self, request):
+        if not hasattr(request.user, "driver"):
+            return Response({"detail": "Seul un chauffeur a une tournée en cours."}, status=403)
+        shift = ShiftService.open_shift(request.user.driver)
+        if not shift:
+            return Response({"detail": "Aucune tournée ouverte."}, status=404)
+        return Response(ShiftSerializer(shift).data)
+
+    @action(detail=True, methods=["post"], url_path="close")
+    def close(self, request, pk=None):
+        shift = self.get_object()
+        shift = ShiftService.close(shift)
+        return Response(ShiftSerializer(shift).data)
@@ -1,6 +1,6 @@
 # ========================= apps/pdv/admin.py =========================
 from django.contrib import admin
-from .models import PointDeVente, PDVStock, PDVSale
+from .models import PointDeVente, PDVForecast, PDVStock, PDVSale, StockMovement, StockSnapshot
 
 
 @admin.register(PointDeVente)
@@ -14,6 +14,8 @@ class PDVAdmin(admin.ModelAdmin):
 class PDVStockAdmin(admin.ModelAdmin):
     list_display = ("id", "pdv", "current_liters", "last_event_at", "updated_at")
     search_fields = ("pdv__name", "pdv__province", "pdv__commune")
+    # ✅ le stock ne se modifie que via le journal (StockMovement)
+    readonly_fields = ("current_liters", "last_event_at", "updated_at")
 
 
 @admin.register(PDVSale)
@@ -21,3 +23,34 @@ class PDVSaleAdmin(admin.ModelAdmin):
     list_display = ("id", "pdv", "liters_sold", "sold_by", "sold_at")
     search_fields = ("pdv__name", "sold_by__username", "sold_by__full_name")
     list_filter = ("sold_at",)
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ("id", "pdv", "kind", "quantity", "balance_after", "occurred_at", "reference", "created_by")
+    search_fields = ("pdv__name", "pdv__code", "reference")
+    list_filter = ("kind", "occurred_at")
+    list_select_related = ("pdv", "created_by")
+    raw_id_fields = ("pdv", "sale", "delivery", "counterpart_pdv", "created_by")
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("id", "pdv", "taken_at", "balance", "movements_count")
+    search_fields = ("pdv__name", "pdv__code")
+    list_filter = ("taken_at",)
+    list_select_related = ("pdv",)
+
+
+@admin.register(PDVForecast)
+class PDVForecastAdmin(admin.ModelAdmin):
+    list_display = ("pdv", "avg_daily_liters", "current_liters", "days_of_cover", "stockout_date", "reorder_quantity", "computed_at")
+    search_fields = ("pdv__name", "pdv__code")
+    list_select_related = ("pdv",)
+    readonly_fields = [f.name for f in PDVForecast._meta.fields]
@@ -0,0 +1,187 @@
+# ========================= apps/pdv/forecasting.py =========================
+"""
+Prévision des ventes PDV et suggestions de réapprovisionnement.
+
+- séries journalières par PDV construites en une requête agrégée (PDVSale groupé par PDV/jour)
+- modèle vectorisé NumPy (tous les PDV d'un coup):
+    saisonnalité jour de semaine (indices multiplicatifs) + lissage exponentiel simple
+- jours de couverture, date de rupture estimée, quantité à commander => PDVForecast (upsert)
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import PDVForecast, PDVSale, PDVStock, PointDeVente
+
+HISTORY_DAYS = 56  # 8 semaines
+HORIZON_DAYS = 30
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class SalesForecaster:
+    @staticmethod
+    def daily_series(end_day, days: int = HISTORY_DAYS):
+        """
+        Retourne (pdv_ids, days_list, matrix) avec matrix[p, d] = litres vendus.
+        Une seule requête agrégée; les jours sans vente valent 0.
+        """
+        start_day = end_day - timedelta(days=days - 1)
+        pdv_ids = list(PointDeVente.objects.order_by("id").values_list("id", flat=True))
+        row_of = {pdv_id: i for i, pdv_id in enumerate(pdv_ids)}
+        matrix = np.zeros((len(pdv_ids), days), dtype=np.float64)
+
+        rows = (
+            PDVSale.objects.filter(
+                sold_at__gte=timezone.make_aware(datetime.combine(start_day, time.min)),
+                sold_at__lt=timezone.make_aware(datetime.combine(end_day + timedelta(days=1), time.min)),
+            )
+            .annotate(day=TruncDate("sold_at"))
+            .values("pdv_id", "day")
+            .annotate(liters=Sum("liters_sold"))
+            .order_by()
+        )
+        for r in rows:
+            row = row_of.get(r["pdv_id"])
+            if row is not None:
+                matrix[row, (r["day"] - start_day).days] = float(r["liters"] or 0)
+
+        return pdv_ids, [start_day + timedelta(days=i) for i in range(days)], matrix
+
+    @staticmethod
+    def weekday_indices(matrix, weekdays):
+        """Indices saisonniers (p, 7): moyenne du jour de semaine / moyenne globale (1 si pas de données)."""
+        weekdays = np.asarray(weekdays)
+        overall = matrix.mean(axis=1, keepdims=True)
+        indices = np.ones((matrix.shape[0], 7))
+        for wd in range(7):
+            cols = weekdays == wd
+            if cols.any():
+                indices[:, wd] = matrix[:, cols].mean(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            indices = np.where(overall > 0, indices / overall, 1.0)
+        # renormalise (moyenne = 1) pour ne pas biaiser le niveau
+        return indices / indices.mean(axis=1, keepdims=True)
+
+    @staticmethod
+    def smooth(series, alpha: float):
+        """Lissage exponentiel simple, vectorisé sur les lignes. Retourne le niveau final (p,)."""
+        level = series[:, 0].copy()
+        for t in range(1, series.shape[1]):
+            level = alpha * series[:, t] + (1 - alpha) * level
+        return level
+
+    @staticmethod
+    def forecast(matrix, days, horizon: int = HORIZON_DAYS, alpha: float | None = None):
+        """Prévision (p, horizon) en litres/jour."""
+        alpha = float(_setting("PDV_FORECAST_ALPHA", 0.3) if alpha is None else alpha)
+        weekdays = [d.weekday() for d in days]
+
+        seasonal = SalesForecaster.weekday_indices(matrix, weekdays)
+        deseasonalized = matrix / np.maximum(seasonal[:, weekdays], 1e-9)
+        level = SalesForecaster.smooth(deseasonalized, alpha)
+
+        future_wd = [(days[-1] + timedelta(days=h + 1)).weekday() for h in range(horizon)]
+        return np.maximum(level[:, None] * seasonal[:, future_wd], 0.0)
+
+    @staticmethod
+    def cover(forecast, stock):
+        """
+        Jours de couverture (fractionnaires, interpolés) pour chaque PDV.
+        NaN si aucune vente prévue; horizon si le stock dépasse l'horizon.
+        """
+        cumulative = np.cumsum(forecast, axis=1)
+        horizon = forecast.shape[1]
+        out = np.full(len(stock), np.nan)
+
+        has_demand = cumulative[:, -1] > 0
+        exhausted = cumulative >= stock[:, None]
+        first = np.where(exhausted.any(axis=1), exhausted.argmax(axis=1), horizon)
+
+        for p in np.flatnonzero(has_demand):
+            k = first[p]
+            if k >= horizon:
+                out[p] = float(horizon)
+                continue
+            before = cumulative[p, k - 1] if k > 0 else 0.0
+            day_need = forecast[p, k]
+            frac = (stock[p] - before) / day_need if day_need > 0 else 0.0
+            out[p] = k + max(0.0, min(1.0, frac))
+        return out
+
+    @staticmethod
+    def run(today=None) -> int:
+        today = today or timezone.localdate()
+        end_day = today - timedelta(days=1)
+
+        lead_days = int(_setting("PDV_REPLENISH_LEAD_DAYS", 1))
+        cover_days = int(_setting("PDV_REPLENISH_COVER_DAYS", 7))
+        rounding = float(_setting("PDV_REPLENISH_ROUNDING_LITERS", 10))
+
+        pdv_ids, days, matrix = SalesForecaster.daily_series(end_day)
+        if not pdv_ids:
+            return 0
+
+        stocks = dict(PDVStock.objects.values_list("pdv_id", "current_liters"))
+        stock = np.array([float(stocks.get(pdv_id, 0) or 0) for pdv_id in pdv_ids])
+
+        forecast = SalesForecaster.forecast(matrix, days)
+        cover = SalesForecaster.cover(forecast, stock)
+
+        need = forecast[:, : lead_days + cover_days].sum(axis=1) - stock
+        reorder = np.where(need > 0, np.ceil(need / rounding) * rounding, 0.0)
+
+        history = (matrix > 0).sum(axis=1)
+        now = timezone.now()
+
+        rows = []
+        for i, pdv_id in enumerate(pdv_ids):
+            days_of_cover = None if math.isnan(cover[i]) else Decimal(f"{cover[i]:.2f}")
+            stockout = None
+            if days_of_cover is not None and cover[i] < forecast.shape[1]:
+                stockout = today + timedelta(days=int(cover[i]))
+
+            rows.append(
+                PDVForecast(
+                    pdv_id=pdv_id,
+                    method="ses_dow",
+                    history_days=int(history[i]),
+                    avg_daily_liters=Decimal(f"{forecast[i].mean():.2f}"),
+                    forecast_daily=[round(float(v), 2) for v in forecast[i, :14]],
+                    current_liters=Decimal(f"{stock[i]:.2f}"),
+                    days_of_cover=days_of_cover,
+                    stockout_date=stockout,
+                    reorder_quantity=Decimal(f"{reorder[i]:.2f}"),
+                    computed_at=now,
+                )
+            )
+
+        PDVForecast.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["pdv"],
+            update_fields=[
+                "method",
+                "history_days",
+                "avg_daily_liters",
+                "forecast_daily",
+                "current_liters",
+                "days_of_cover",
+                "stockout_date",
+                "reorder_quantity",
+                "computed_at",
+            ],
+        )
+        return len(rows)
@@ -0,0 +1,151 @@
+# ========================= apps/pdv/ledger.py =========================
+"""
+Lecture du journal de stock PDV (StockMovement + StockSnapshot).
+
+- stock_at(pdv, ts): snapshot le plus proche (<= ts) + somme des mouvements non couverts
+  (postérieurs à taken_at, ou inscrits après la photo: mouvements antidatés)
+- take_snapshots(): photo de tous les PDV en une requête (tâche périodique)
+- audit(): PDV dont le stock courant diverge du journal (deux requêtes)
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db.models import BigIntegerField, Count, DateTimeField, DecimalField, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import PDVStock, PointDeVente, StockMovement, StockSnapshot
+
+ZERO = Decimal("0")
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_DEC = DecimalField(max_digits=12, decimal_places=2)
+
+
+class StockLedger:
+    @staticmethod
+    def _not_covered(taken_at, last_movement_id):
+        """Mouvements absents d'un snapshot: postérieurs à la photo ou inscrits après elle."""
+        return Q(occurred_at__gt=taken_at) | Q(id__gt=last_movement_id)
+
+    @staticmethod
+    def stock_at(pdv, ts=None) -> Decimal:
+        """Stock d'un PDV à l'instant `ts` (par défaut: maintenant)."""
+        ts = ts or timezone.now()
+        pdv_id = getattr(pdv, "pk", pdv)
+
+        snapshot = (
+            StockSnapshot.objects.filter(pdv_id=pdv_id, taken_at__lte=ts)
+            .order_by("-taken_at")
+            .values_list("taken_at", "balance", "last_movement_id")
+            .first()
+        )
+        movements = StockMovement.objects.filter(pdv_id=pdv_id, occurred_at__lte=ts)
+        base = ZERO
+        if snapshot:
+            taken_at, base, last_movement_id = snapshot
+            movements = movements.filter(StockLedger._not_covered(taken_at, last_movement_id))
+
+        delta = movements.aggregate(total=Sum("quantity"))["total"] or ZERO
+        return base + delta
+
+    @staticmethod
+    def _balances_at(ts, pdv_ids=None):
+        """
+        Queryset PointDeVente annoté pour `ts`: snapshot (snapshot_from, snapshot_balance, snapshot_count,
+        snapshot_last_id), mouvements non couverts (delta, delta_count) et last_movement_id.
+        Sous-requêtes corrélées: une seule requête quel que soit le nombre de PDV.
+        """
+        last_snapshot = StockSnapshot.objects.filter(pdv=OuterRef("pk"), taken_at__lte=ts).order_by("-taken_at")
+
+        since_snapshot = (
+            StockMovement.objects.filter(pdv=OuterRef("pk"), occurred_at__lte=ts)
+            .filter(StockLedger._not_covered(OuterRef("snapshot_from"), OuterRef("snapshot_last_id")))
+            .order_by()
+            .values("pdv")
+        )
+        all_movements = StockMovement.objects.filter(pdv=OuterRef("pk")).order_by().values("pdv")
+
+        qs = PointDeVente.objects.order_by("id")
+        if pdv_ids is not None:
+            qs = qs.filter(id__in=pdv_ids)
+
+        return qs.annotate(
+            snapshot_from=Coalesce(
+                Subquery(last_snapshot.values("taken_at")[:1]), Value(EPOCH), output_field=DateTimeField()
+            ),
+            snapshot_balance=Coalesce(Subquery(last_snapshot.values("balance")[:1]), Value(ZERO), output_field=_DEC),
+            snapshot_count=Coalesce(
+                Subquery(last_snapshot.values("movements_count")[:1]), Value(0), output_field=IntegerField()
+            ),
+            snapshot_last_id=Coalesce(
+                Subquery(last_snapshot.values("last_movement_id")[:1]), Value(0), output_field=BigIntegerField()
+            ),
+        ).annotate(
+            delta=Coalesce(
+                Subquery(since_snapshot.annotate(total=Sum("quantity")).values("total")[:1]),
+                Value(ZERO),
+                output_field=_DEC,
+            ),
+            delta_count=Coalesce(
+                Subquery(since_snapshot.annotate(n=Count("id")).values("n")[:1]), Value(0), output_field=IntegerField()
+            ),
+            last_movement_id=Coalesce(
+                Subquery(all_movements.annotate(last=Max("id")).values("last")[:1]),
+                Value(0),
+                output_field=BigIntegerField(),
+            ),
+        )
+
+    @staticmethod
+    def take_snapshots(at=None, pdv_ids=None) -> int:
+        """Crée un snapshot par PDV à l'instant `at` (ignore les doublons pdv/taken_at)."""
+        at = at or timezone.now()
+        rows = StockLedger._balances_at(at, pdv_ids).values_list(
+            "id", "snapshot_balance", "delta", "snapshot_count", "delta_count", "last_movement_id"
+        )
+
+        snapshots = [
+            StockSnapshot(
+                pdv_id=pdv_id,
+                taken_at=at,
+                balance=(balance or ZERO) + (delta or ZERO),
+                movements_count=(covered or 0) + (added or 0),
+                last_movement_id=last_movement_id or 0,
+            )
+            for pdv_id, balance, delta, covered, added, last_movement_id in rows.iterator(chunk_size=2000)
+        ]
+        StockSnapshot.objects.bulk_create(snapshots, batch_size=2000, ignore_conflicts=True)
+        return len(snapshots)
+
+    @staticmethod
+    def audit(pdv_ids=None) -> list[dict]:
+        """
+        Compare PDVStock.current_liters au solde reconstitué par le journal.
+        Retourne uniquement les PDV en écart.
+        """
+        now = timezone.now()
+        current = dict(
+            PDVStock.objects.filter(**({"pdv_id__in": pdv_ids} if pdv_ids is not None else {}))
+            .values_list("pdv_id", "current_liters")
+        )
+
+        out = []
+        for pdv_id, name, balance, delta in StockLedger._balances_at(now, pdv_ids).values_list(
+            "id", "name", "snapshot_balance", "delta"
+        ):
+            ledger = (balance or ZERO) + (delta or ZERO)
+            stock = current.get(pdv_id, ZERO)
+            if ledger != stock:
+                out.append(
+                    {
+                        "pdv_id": pdv_id,
+                        "pdv_name": name,
+                        "current_liters": str(stock),
+                        "ledger_liters": str(ledger),
+                        "difference": str(stock - ledger),
+                    }
+                )
+        return out
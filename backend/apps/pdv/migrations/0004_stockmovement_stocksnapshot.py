@@ -0,0 +1,88 @@
+# Generated by Django 5.2.9 on 2026-10-19 15:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_opening_balances(apps, schema_editor):
+    """Solde d'ouverture: un mouvement 'adjustment' + un snapshot par stock existant."""
+    PDVStock = apps.get_model("pdv", "PDVStock")
+    StockMovement = apps.get_model("pdv", "StockMovement")
+    StockSnapshot = apps.get_model("pdv", "StockSnapshot")
+
+    now = django.utils.timezone.now()
+    movements, snapshots = [], []
+    for pdv_id, liters, last_event_at in PDVStock.objects.values_list("pdv_id", "current_liters", "last_event_at"):
+        at = last_event_at or now
+        movements.append(
+            StockMovement(
+                pdv_id=pdv_id,
+                kind="adjustment",
+                quantity=liters,
+                balance_after=liters,
+                occurred_at=at,
+                notes="Solde d'ouverture (journal de stock)",
+            )
+        )
+        snapshots.append(StockSnapshot(pdv_id=pdv_id, taken_at=at, balance=liters))
+
+    StockMovement.objects.bulk_create(movements, batch_size=2000)
+    StockSnapshot.objects.bulk_create(snapshots, batch_size=2000)
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0003_alter_delivery_options_delivery_confirmed_at_and_more'),
+        ('pdv', '0003_pointdevente_code_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('delivery_in', 'Réception livraison'), ('sale_out', 'Vente'), ('adjustment', 'Ajustement'), ('transfer_in', 'Transfert entrant'), ('transfer_out', 'Transfert sortant')], max_length=20)),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('reference', models.CharField(blank=True, db_index=True, default='', max_length=40)),
+                ('notes', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('counterpart_pdv', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='pdv.pointdevente')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+                ('delivery', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='logistics.delivery')),
+                ('pdv', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='pdv.pointdevente')),
+                ('sale', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='pdv.pdvsale')),
+            ],
+            options={
+                'verbose_name': 'Mouvement de stock',
+                'verbose_name_plural': 'Mouvements de stock',
+                'ordering': ['-occurred_at', '-id'],
+                'indexes': [models.Index(fields=['pdv', 'occurred_at'], name='pdv_stockmo_pdv_id_c3f44c_idx'), models.Index(fields=['occurred_at'], name='pdv_stockmo_occurre_19ca3b_idx'), models.Index(fields=['kind'], name='pdv_stockmo_kind_69066e_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('movements_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('pdv', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='pdv.pointdevente')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de stock',
+                'verbose_name_plural': 'Snapshots de stock',
+                'ordering': ['-taken_at'],
+                'indexes': [models.Index(fields=['pdv', 'taken_at'], name='pdv_stocksn_pdv_id_5a7749_idx')],
+                'constraints': [models.UniqueConstraint(fields=('pdv', 'taken_at'), name='uniq_stock_snapshot_pdv_taken_at')],
+            },
+        ),
+        migrations.RunPython(seed_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdv', '0004_stockmovement_stocksnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pointdevente',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='pointdevente',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-19 15:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdv', '0005_pointdevente_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PDVForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(default='ses_dow', max_length=30)),
+                ('history_days', models.PositiveIntegerField(default=0)),
+                ('avg_daily_liters', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('forecast_daily', models.JSONField(blank=True, default=list)),
+                ('current_liters', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('days_of_cover', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('stockout_date', models.DateField(blank=True, null=True)),
+                ('reorder_quantity', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('pdv', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='pdv.pointdevente')),
+            ],
+            options={
+                'verbose_name': 'Prévision PDV',
+                'verbose_name_plural': 'Prévisions PDV',
+                'ordering': ['days_of_cover'],
+                'indexes': [models.Index(fields=['days_of_cover'], name='pdv_pdvfore_days_of_bb01fe_idx'), models.Index(fields=['reorder_quantity'], name='pdv_pdvfore_reorder_e3b1f1_idx')],
+            },
+        ),
+    ]
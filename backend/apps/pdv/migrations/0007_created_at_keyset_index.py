@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-19 15:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdv', '0006_pdvforecast'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pointdevente',
+            index=models.Index(fields=['created_at', 'id'], name='pdv_pointde_created_50323e_idx'),
+        ),
+    ]
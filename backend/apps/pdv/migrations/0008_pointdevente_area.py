@@ -0,0 +1,20 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_admin_areas'),
+        ('pdv', '0007_created_at_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pointdevente',
+            name='area',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pdvs', to='accounts.adminarea'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:26
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_snapshot_coverage(apps, schema_editor):
+    """Snapshots existants: mouvements du PDV déjà inscrits à la prise (created_at) = couverts."""
+    StockMovement = apps.get_model("pdv", "StockMovement")
+    StockSnapshot = apps.get_model("pdv", "StockSnapshot")
+
+    covered = StockMovement.objects.filter(
+        pdv=OuterRef("pdv"), created_at__lte=OuterRef("created_at"), occurred_at__lte=OuterRef("taken_at")
+    ).order_by().values("pdv")
+    inserted = StockMovement.objects.filter(pdv=OuterRef("pdv"), created_at__lte=OuterRef("created_at")).order_by().values("pdv")
+
+    StockSnapshot.objects.update(
+        last_movement_id=Coalesce(
+            Subquery(inserted.annotate(last=Max("id")).values("last")[:1]), 0, output_field=models.BigIntegerField()
+        ),
+        movements_count=Coalesce(
+            Subquery(covered.annotate(n=Count("id")).values("n")[:1]), 0, output_field=models.IntegerField()
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdv', '0008_pointdevente_area'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stocksnapshot',
+            name='pdv_stocksn_pdv_id_5a7749_idx',
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='last_movement_id',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_snapshot_coverage, migrations.RunPython.noop),
+    ]
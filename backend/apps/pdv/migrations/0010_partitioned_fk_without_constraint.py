@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0010_partitioned_fk_without_constraint'),
+        ('pdv', '0009_snapshot_last_movement'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='delivery',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='logistics.delivery'),
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='sale',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='pdv.pdvsale'),
+        ),
+    ]
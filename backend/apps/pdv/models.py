@@ -1,11 +1,12 @@
 # ========================= apps/pdv/models.py =========================
-import secrets
+import uuid
 
-from django.db import models, transaction
-from django.db.models import F
+from django.db import connection, models, transaction
 from django.conf import settings
 from django.utils import timezone
 
+from apps.accounts.areas import AreaResolver
+
 
 class PointDeVente(models.Model):
     name = models.CharField(max_length=150)
@@ -16,6 +17,14 @@ class PointDeVente(models.Model):
     province = models.CharField(max_length=100, blank=True)
     commune = models.CharField(max_length=100, blank=True)
     address = models.CharField(max_length=200, blank=True)
+    # ✅ zone normalisée (commune, sinon province), dérivée de province / commune à la sauvegarde
+    area = models.ForeignKey(
+        "accounts.AdminArea", null=True, blank=True, on_delete=models.SET_NULL, related_name="pdvs"
+    )
+
+    # ✅ coordonnées GPS (planification des tournées de livraison)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
 
     agent_user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -33,19 +42,21 @@ class PointDeVente(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    @staticmethod
-    def _gen_pdv_code() -> str:
-        year = timezone.now().year
-        return f"PDV{year}{secrets.token_hex(3).upper()}"
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        AreaResolver.remember_loaded(instance)
+        return instance
 
     def save(self, *args, **kwargs):
-        # ✅ Génère le code si absent (sans casser l’existant)
+        AreaResolver.prepare_save(self, kwargs)
+
+        # ✅ Génère le code si absent (séquence, sans exists(); collision avec un code historique => code suivant)
         if not self.code:
-            for _ in range(10):
-                c = self._gen_pdv_code()
-                if not PointDeVente.objects.filter(code=c).exists():
-                    self.code = c
-                    break
+            from apps.accounts.codes import CodeAllocator
+
+            return CodeAllocator.save_with_code(self, "code", "pdv", lambda: super(PointDeVente, self).save(*args, **kwargs))
+
         super().save(*args, **kwargs)
 
     class Meta:
@@ -54,6 +65,8 @@ class PointDeVente(models.Model):
             models.Index(fields=["province", "commune"]),
             models.Index(fields=["name"]),
             models.Index(fields=["code"]),
+            # ✅ listes admin paginées par clé (-created_at, -id)
+            models.Index(fields=["created_at", "id"]),
         ]
 
     def __str__(self):
@@ -66,6 +79,7 @@ class PDVStock(models.Model):
     Le stock est mis à jour:
       - + réception (delivery confirm)
       - - vente (sale report)
+    ✅ Toute variation passe par record_movement() => ligne StockMovement (journal).
     """
     pdv = models.OneToOneField(PointDeVente, on_delete=models.CASCADE, related_name="stock")
 
@@ -81,25 +95,202 @@ class PDVStock(models.Model):
         return f"Stock({self.pdv_id})={self.current_liters}L"
 
     @transaction.atomic
-    def increase(self, qty, event_time=None):
+    def record_movement(self, kind, quantity, *, event_time=None, created_by=None, sale=None, delivery=None,
+                        counterpart_pdv=None, reference="", notes=""):
+        """
+        Applique un mouvement signé (+ entrée / - sortie) sous verrou et l'inscrit au journal.
+        Lève ValueError si le stock deviendrait négatif.
+        """
         event_time = event_time or timezone.now()
+
+        locked = PDVStock.objects.select_for_update().get(pk=self.pk)
+        balance = locked.current_liters + quantity
+        if balance < 0:
+            raise ValueError("Stock insuffisant")
+
         PDVStock.objects.filter(pk=self.pk).update(
-            current_liters=F("current_liters") + qty,
+            current_liters=balance,
             last_event_at=event_time,
             updated_at=timezone.now(),
         )
-        self.refresh_from_db()
+        self.current_liters = balance
+        self.last_event_at = event_time
+
+        return StockMovement.objects.create(
+            pdv_id=self.pdv_id,
+            kind=kind,
+            quantity=quantity,
+            balance_after=balance,
+            occurred_at=event_time,
+            created_by=created_by,
+            sale=sale,
+            delivery=delivery,
+            counterpart_pdv=counterpart_pdv,
+            reference=reference,
+            notes=notes,
+        )
 
+    def increase(self, qty, event_time=None, *, delivery=None, created_by=None):
+        return self.record_movement(
+            "delivery_in", qty, event_time=event_time, delivery=delivery, created_by=created_by
+        )
+
+    @staticmethod
     @transaction.atomic
-    def decrease(self, qty, event_time=None):
+    def receive(pdv_id, qty, *, event_time=None, delivery=None, created_by=None):
+        """
+        Réception livraison en upsert: crée le stock si absent et l'incrémente en une seule requête
+        (INSERT ... ON CONFLICT ... RETURNING sur PostgreSQL). Retourne (stock, movement).
+        """
         event_time = event_time or timezone.now()
 
-        locked = PDVStock.objects.select_for_update().get(pk=self.pk)
-        if locked.current_liters < qty:
-            raise ValueError("Stock insuffisant")
-        locked.current_liters = locked.current_liters - qty
-        locked.last_event_at = event_time
-        locked.save(update_fields=["current_liters", "last_event_at", "updated_at"])
+        if connection.vendor != "postgresql":
+            stock, _ = PDVStock.objects.get_or_create(pdv_id=pdv_id)
+            movement = stock.increase(qty, event_time, delivery=delivery, created_by=created_by)
+            return stock, movement
+
+        now = timezone.now()
+        table = PDVStock._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (pdv_id, current_liters, last_event_at, updated_at)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (pdv_id) DO UPDATE SET
+                    current_liters = {table}.current_liters + EXCLUDED.current_liters,
+                    last_event_at = EXCLUDED.last_event_at,
+                    updated_at = EXCLUDED.updated_at
+                RETURNING id, current_liters
+                """,
+                [pdv_id, qty, event_time, now],
+            )
+            stock_id, balance = cursor.fetchone()
+
+        stock = PDVStock(id=stock_id, pdv_id=pdv_id, current_liters=balance, last_event_at=event_time, updated_at=now)
+        movement = StockMovement.objects.create(
+            pdv_id=pdv_id,
+            kind="delivery_in",
+            quantity=qty,
+            balance_after=balance,
+            occurred_at=event_time,
+            delivery=delivery,
+            created_by=created_by,
+        )
+        return stock, movement
+
+    def decrease(self, qty, event_time=None, *, sale=None, created_by=None):
+        return self.record_movement("sale_out", -qty, event_time=event_time, sale=sale, created_by=created_by)
+
+    def adjust(self, delta, *, created_by=None, notes="", event_time=None):
+        """Correction d'inventaire (delta signé)."""
+        return self.record_movement("adjustment", delta, event_time=event_time, created_by=created_by, notes=notes)
+
+    @staticmethod
+    @transaction.atomic
+    def record_sales(lines, *, sold_by=None, event_time=None):
+        """
+        Ventes groupées (saisie de fin de journée).
+        lines: [{"pdv_id", "liters_sold", "notes"?}, ...] — plusieurs PDV possibles.
+
+        Un seul verrou par stock (ordre des pk), décrément cumulé, PDVSale + StockMovement en bulk_create.
+        Lève ValueError (rien n'est écrit) si un PDV n'a pas assez de stock.
+        """
+        event_time = event_time or timezone.now()
+        pdv_ids = sorted({line["pdv_id"] for line in lines})
+
+        PDVStock.objects.bulk_create([PDVStock(pdv_id=pdv_id) for pdv_id in pdv_ids], ignore_conflicts=True)
+        stocks = {
+            stock.pdv_id: stock
+            for stock in PDVStock.objects.select_for_update().filter(pdv_id__in=pdv_ids).order_by("pdv_id")
+        }
+
+        totals = {}
+        for line in lines:
+            totals[line["pdv_id"]] = totals.get(line["pdv_id"], 0) + line["liters_sold"]
+
+        insufficient = [pdv_id for pdv_id, total in totals.items() if stocks[pdv_id].current_liters < total]
+        if insufficient:
+            raise ValueError(f"Stock insuffisant pour les PDV: {', '.join(str(i) for i in insufficient)}")
+
+        sales = PDVSale.objects.bulk_create(
+            [
+                PDVSale(
+                    pdv_id=line["pdv_id"],
+                    liters_sold=line["liters_sold"],
+                    sold_by=sold_by,
+                    sold_at=event_time,
+                    notes=line.get("notes", "") or "",
+                )
+                for line in lines
+            ]
+        )
+
+        now = timezone.now()
+        movements = []
+        for sale in sales:
+            stock = stocks[sale.pdv_id]
+            stock.current_liters -= sale.liters_sold
+            stock.last_event_at = event_time
+            stock.updated_at = now
+            movements.append(
+                StockMovement(
+                    pdv_id=sale.pdv_id,
+                    kind="sale_out",
+                    quantity=-sale.liters_sold,
+                    balance_after=stock.current_liters,
+                    occurred_at=event_time,
+                    sale=sale,
+                    created_by=sold_by,
+                )
+            )
+
+        StockMovement.objects.bulk_create(movements)
+        PDVStock.objects.bulk_update(list(stocks.values()), ["current_liters", "last_event_at", "updated_at"])
+
+        # bulk_create n'émet pas post_save: compteurs du tableau de bord et temps réel mis à jour ici
+        from apps.adminpanel.counters import DashboardCounters
+        from realtime import events
+
+        DashboardCounters.bump(
+            {"pdv.stock_liters": -sum(totals.values())},
+            day_deltas={(timezone.localdate(event_time), "sales"): len(sales)},
+        )
+        events.AdminEvents.publish(events.SALE_REPORTED, [events.sale_item(sale) for sale in sales])
+        events.AdminEvents.publish(events.STOCK_CHANGED, [events.stock_item(movement) for movement in movements])
+        return sales, stocks
+
+    @staticmethod
+    @transaction.atomic
+    def transfer(from_pdv, to_pdv, qty, *, created_by=None, notes="", event_time=None):
+        """
+        Transfert PDV -> PDV: deux mouvements liés par une même référence.
+        Les deux stocks sont verrouillés ensemble dans l'ordre des pdv_id avant toute écriture
+        (pas d'interblocage entre transferts croisés A -> B / B -> A).
+        Lève ValueError si source et destination sont le même PDV ou si le stock source est insuffisant.
+        """
+        if from_pdv.pk == to_pdv.pk:
+            raise ValueError("Transfert vers le même PDV")
+
+        event_time = event_time or timezone.now()
+        reference = f"TR-{uuid.uuid4().hex[:12].upper()}"
+
+        pdv_ids = sorted([from_pdv.pk, to_pdv.pk])
+        PDVStock.objects.bulk_create([PDVStock(pdv_id=pdv_id) for pdv_id in pdv_ids], ignore_conflicts=True)
+        stocks = {
+            stock.pdv_id: stock
+            for stock in PDVStock.objects.select_for_update().filter(pdv_id__in=pdv_ids).order_by("pdv_id")
+        }
+
+        # record_movement reprend les verrous déjà détenus par cette transaction
+        out = stocks[from_pdv.pk].record_movement(
+            "transfer_out", -qty, event_time=event_time, created_by=created_by,
+            counterpart_pdv=to_pdv, reference=reference, notes=notes,
+        )
+        stocks[to_pdv.pk].record_movement(
+            "transfer_in", qty, event_time=event_time, created_by=created_by,
+            counterpart_pdv=from_pdv, reference=reference, notes=notes,
+        )
+        return out
 
 
 class PDVSale(models.Model):
@@ -128,3 +319,123 @@ class PDVSale(models.Model):
 
     def __str__(self):
         return f"Sale#{self.pk} pdv={self.pdv_id} liters={self.liters_sold}"
+
+
+class StockMovement(models.Model):
+    """
+    Journal des mouvements de stock PDV (source de vérité de l'historique).
+    quantity est signée; balance_after = stock après application du mouvement.
+    """
+
+    KINDS = (
+        ("delivery_in", "Réception livraison"),
+        ("sale_out", "Vente"),
+        ("adjustment", "Ajustement"),
+        ("transfer_in", "Transfert entrant"),
+        ("transfer_out", "Transfert sortant"),
+    )
+
+    pdv = models.ForeignKey(PointDeVente, on_delete=models.CASCADE, related_name="stock_movements")
+    kind = models.CharField(max_length=20, choices=KINDS)
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2)
+    occurred_at = models.DateTimeField(default=timezone.now)
+
+    # pas de contrainte SQL: ventes et livraisons peuvent être partitionnées (LOGISTICS_PARTITIONING)
+    sale = models.ForeignKey(
+        PDVSale, null=True, blank=True, on_delete=models.SET_NULL, related_name="stock_movements", db_constraint=False
+    )
+    delivery = models.ForeignKey(
+        "logistics.Delivery",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="stock_movements",
+        db_constraint=False,
+    )
+    counterpart_pdv = models.ForeignKey(
+        PointDeVente, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    reference = models.CharField(max_length=40, blank=True, default="", db_index=True)
+    notes = models.CharField(max_length=255, blank=True, default="")
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="stock_movements",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-occurred_at", "-id"]
+        verbose_name = "Mouvement de stock"
+        verbose_name_plural = "Mouvements de stock"
+        indexes = [
+            models.Index(fields=["pdv", "occurred_at"]),
+            models.Index(fields=["occurred_at"]),
+            models.Index(fields=["kind"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} pdv={self.pdv_id} qty={self.quantity} -> {self.balance_after}L"
+
+
+class StockSnapshot(models.Model):
+    """
+    Photo périodique du stock d'un PDV (point de départ de stock_at()).
+    balance couvre les mouvements (occurred_at <= taken_at, id <= last_movement_id): un mouvement
+    antidaté inscrit après la photo (id > last_movement_id) reste compté dans le delta.
+    """
+
+    pdv = models.ForeignKey(PointDeVente, on_delete=models.CASCADE, related_name="stock_snapshots")
+    taken_at = models.DateTimeField()
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    movements_count = models.PositiveIntegerField(default=0)  # mouvements inclus dans balance
+    last_movement_id = models.BigIntegerField(default=0)  # dernier mouvement du PDV inscrit à la prise
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-taken_at"]
+        verbose_name = "Snapshot de stock"
+        verbose_name_plural = "Snapshots de stock"
+        constraints = [
+            models.UniqueConstraint(fields=["pdv", "taken_at"], name="uniq_stock_snapshot_pdv_taken_at"),
+        ]
+
+    def __str__(self):
+        return f"Snapshot pdv={self.pdv_id} @ {self.taken_at:%Y-%m-%d %H:%M} = {self.balance}L"
+
+
+class PDVForecast(models.Model):
+    """
+    Prévision de ventes + suggestion de réapprovisionnement (calcul nocturne, une ligne par PDV).
+    """
+
+    pdv = models.OneToOneField(PointDeVente, on_delete=models.CASCADE, related_name="forecast")
+
+    method = models.CharField(max_length=30, default="ses_dow")
+    history_days = models.PositiveIntegerField(default=0)
+
+    avg_daily_liters = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    forecast_daily = models.JSONField(default=list, blank=True)  # litres/jour prévus sur l'horizon
+
+    current_liters = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    days_of_cover = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    stockout_date = models.DateField(null=True, blank=True)
+    reorder_quantity = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["days_of_cover"]
+        verbose_name = "Prévision PDV"
+        verbose_name_plural = "Prévisions PDV"
+        indexes = [
+            models.Index(fields=["days_of_cover"]),
+            models.Index(fields=["reorder_quantity"]),
+        ]
+
+    def __str__(self):
+        return f"Forecast pdv={self.pdv_id} cover={self.days_of_cover} reorder={self.reorder_quantity}L"
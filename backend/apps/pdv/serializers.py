@@ -3,7 +3,7 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
 
-from .models import PointDeVente, PDVStock, PDVSale
+from .models import PointDeVente, PDVForecast, PDVStock, PDVSale, StockMovement
 
 User = get_user_model()
 
@@ -50,6 +50,8 @@ class PDVSerializer(serializers.ModelSerializer):
             "province",
             "commune",
             "address",
+            "latitude",
+            "longitude",
             "agent_user_id",
             "agent_username",
             "agent_full_name",
@@ -104,6 +106,16 @@ class PDVSaleCreateSerializer(serializers.Serializer):
         return attrs
 
 
+class PDVSaleBatchSerializer(serializers.Serializer):
+    sales = PDVSaleCreateSerializer(many=True, allow_empty=False)
+
+    def validate_sales(self, value):
+        max_lines = 1000
+        if len(value) > max_lines:
+            raise serializers.ValidationError(_("Trop de lignes (max %(n)s)") % {"n": max_lines})
+        return value
+
+
 class PDVSaleSerializer(serializers.ModelSerializer):
     pdv_name = serializers.CharField(source="pdv.name", read_only=True)
     pdv_code = serializers.CharField(source="pdv.code", read_only=True)
@@ -130,3 +142,63 @@ class PDVSaleSerializer(serializers.ModelSerializer):
             "notes",
         ]
         read_only_fields = ["sold_by", "sold_at"]
+
+
+class PDVStockAdjustSerializer(serializers.Serializer):
+    delta_liters = serializers.DecimalField(max_digits=12, decimal_places=2)
+    notes = serializers.CharField(required=False, allow_blank=True, default="", max_length=255)
+
+    def validate_delta_liters(self, value):
+        if value == 0:
+            raise serializers.ValidationError(_("Quantité invalide"))
+        return value
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    created_by_username = serializers.CharField(source="created_by.username", read_only=True, allow_null=True)
+
+    class Meta:
+        model = StockMovement
+        fields = [
+            "id",
+            "pdv",
+            "kind",
+            "quantity",
+            "balance_after",
+            "occurred_at",
+            "sale",
+            "delivery",
+            "counterpart_pdv",
+            "reference",
+            "notes",
+            "created_by",
+            "created_by_username",
+        ]
+        read_only_fields = fields
+
+
+class PDVForecastSerializer(serializers.ModelSerializer):
+    pdv_name = serializers.CharField(source="pdv.name", read_only=True)
+    pdv_code = serializers.CharField(source="pdv.code", read_only=True)
+    pdv_province = serializers.CharField(source="pdv.province", read_only=True)
+    pdv_commune = serializers.CharField(source="pdv.commune", read_only=True)
+
+    class Meta:
+        model = PDVForecast
+        fields = [
+            "pdv",
+            "pdv_name",
+            "pdv_code",
+            "pdv_province",
+            "pdv_commune",
+            "method",
+            "history_days",
+            "avg_daily_liters",
+            "forecast_daily",
+            "current_liters",
+            "days_of_cover",
+            "stockout_date",
+            "reorder_quantity",
+            "computed_at",
+        ]
+        read_only_fields = fields
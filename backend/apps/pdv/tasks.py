@@ -0,0 +1,32 @@
+# ========================= apps/pdv/tasks.py =========================
+"""
+Tâches Celery pour les points de vente.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from celery import shared_task
+
+from .ledger import StockLedger
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="pdv.snapshot_stock")
+def snapshot_stock() -> int:
+    """Snapshot quotidien du stock de tous les PDV (point de départ de StockLedger.stock_at)."""
+    count = StockLedger.take_snapshots()
+    logger.info("Stock snapshots created=%s", count)
+    return count
+
+
+@shared_task(name="pdv.forecast_replenishment")
+def forecast_replenishment() -> int:
+    """Batch nocturne: prévisions de ventes, jours de couverture et quantités à commander."""
+    from .forecasting import SalesForecaster
+
+    count = SalesForecaster.run()
+    logger.info("PDV forecasts computed=%s", count)
+    return count
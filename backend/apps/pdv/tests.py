@@ -1,3 +1,69 @@
+# ========================= apps/pdv/tests.py =========================
+"""
+Journal de stock (StockLedger): un mouvement antidaté inscrit après un snapshot
+reste compté dans les soldes historiques, courant et dans le snapshot suivant.
+
+Transferts PDV -> PDV: deux mouvements liés, refus d'un transfert vers le même PDV.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+
+from .ledger import StockLedger
+from .models import PDVStock, PointDeVente, StockMovement, StockSnapshot
+
+
+class StockLedgerBackdatedMovementTests(TestCase):
+    def setUp(self):
+        agent = get_user_model().objects.create(username="ledger-agent", phone="+25779400000", role="agent")
+        self.pdv = PointDeVente.objects.create(name="PDV ledger", agent_user=agent)
+        self.stock, _ = PDVStock.objects.get_or_create(pdv=self.pdv)
+        self.now = timezone.now()
+
+    def test_backdated_movement_after_snapshot(self):
+        self.stock.increase(Decimal("100"), self.now - timedelta(days=3))
+        StockLedger.take_snapshots(at=self.now - timedelta(days=1))
+
+        # saisie tardive: vente datée d'avant le snapshot
+        self.stock.decrease(Decimal("30"), self.now - timedelta(days=2))
+
+        self.assertEqual(StockLedger.stock_at(self.pdv, self.now - timedelta(hours=12)), Decimal("70"))
+        self.assertEqual(StockLedger.stock_at(self.pdv), Decimal("70"))
+        self.assertEqual(StockLedger.audit([self.pdv.pk]), [])
+
+        StockLedger.take_snapshots(at=self.now)
+        snapshot = StockSnapshot.objects.get(pdv=self.pdv, taken_at=self.now)
+        self.assertEqual((snapshot.balance, snapshot.movements_count), (Decimal("70"), 2))
+        self.assertEqual(StockLedger.stock_at(self.pdv, self.now + timedelta(hours=1)), Decimal("70"))
+
+    def test_future_movement_is_not_in_snapshot(self):
+        self.stock.increase(Decimal("50"), self.now - timedelta(days=2))
+        self.stock.increase(Decimal("20"), self.now + timedelta(hours=2))
+        StockLedger.take_snapshots(at=self.now)
+
+        snapshot = StockSnapshot.objects.get(pdv=self.pdv)
+        self.assertEqual((snapshot.balance, snapshot.movements_count), (Decimal("50"), 1))
+        self.assertEqual(StockLedger.stock_at(self.pdv, self.now + timedelta(hours=3)), Decimal("70"))
+
+
+class StockTransferTests(TestCase):
+    def setUp(self):
+        agent = get_user_model().objects.create(username="transfer-agent", phone="+25779410000", role="agent")
+        self.source = PointDeVente.objects.create(name="PDV source", agent_user=agent)
+        self.target = PointDeVente.objects.create(name="PDV cible", agent_user=agent)
+        PDVStock.objects.get_or_create(pdv=self.source)[0].increase(Decimal("40"))
+
+    def test_transfer_moves_stock(self):
+        out = PDVStock.transfer(self.source, self.target, Decimal("15"))
+        self.assertEqual(PDVStock.objects.get(pdv=self.source).current_liters, Decimal("25"))
+        self.assertEqual(PDVStock.objects.get(pdv=self.target).current_liters, Decimal("15"))
+        self.assertEqual(StockMovement.objects.filter(reference=out.reference).count(), 2)
 
-# Create your tests here.
+    def test_same_pdv_is_rejected(self):
+        with self.assertRaises(ValueError):
+            PDVStock.transfer(self.source, self.source, Decimal("5"))
+        self.assertFalse(StockMovement.objects.filter(kind__startswith="transfer").exists())
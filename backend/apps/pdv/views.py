@@ -1,12 +1,25 @@
 # ========================= apps/pdv/views.py =========================
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import PointDeVente, PDVStock, PDVSale
-from .serializers import PDVSerializer, PDVSaleCreateSerializer, PDVSaleSerializer
+from .ledger import StockLedger
+from .models import PointDeVente, PDVForecast, PDVStock, PDVSale, StockMovement
+from .serializers import (
+    PDVForecastSerializer,
+    PDVSerializer,
+    PDVSaleBatchSerializer,
+    PDVSaleCreateSerializer,
+    PDVSaleSerializer,
+    PDVStockAdjustSerializer,
+    StockMovementSerializer,
+)
 
 
 def is_admin_user(user) -> bool:
@@ -103,18 +116,19 @@ class PDVViewSet(viewsets.ModelViewSet):
 
         stock, _ = PDVStock.objects.get_or_create(pdv=pdv)
 
+        # ✅ vente + mouvement de stock dans la même transaction (rollback si stock insuffisant)
         try:
-            stock.decrease(liters_sold)
+            with transaction.atomic():
+                sale = PDVSale.objects.create(
+                    pdv=pdv,
+                    liters_sold=liters_sold,
+                    sold_by=request.user,
+                    notes=notes or "",
+                )
+                stock.decrease(liters_sold, event_time=sale.sold_at, sale=sale, created_by=request.user)
         except ValueError as e:
             return Response({"detail": str(e)}, status=400)
 
-        sale = PDVSale.objects.create(
-            pdv=pdv,
-            liters_sold=liters_sold,
-            sold_by=request.user,
-            notes=notes or "",
-        )
-
         return Response(
             {
                 "success": True,
@@ -128,3 +142,155 @@ class PDVViewSet(viewsets.ModelViewSet):
             },
             status=status.HTTP_201_CREATED,
         )
+
+    @action(detail=False, methods=["post"], url_path="report-sales")
+    def report_sales(self, request):
+        """
+        Agent/Admin: saisie groupée de ventes (un ou plusieurs PDV).
+        Payload: { sales: [{ pdv_id, liters_sold, notes? }, ...] }
+        Tout ou rien: une seule transaction, un verrou par stock.
+        """
+        if not is_agent_user(request.user) and not is_admin_user(request.user):
+            return Response({"detail": "Accès refusé."}, status=403)
+
+        ser = PDVSaleBatchSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        lines = ser.validated_data["sales"]
+
+        # Agent ne peut agir que sur son/ses PDV
+        requested = {line["pdv_id"] for line in lines}
+        qs = PointDeVente.objects.filter(id__in=requested)
+        if is_agent_user(request.user):
+            qs = qs.filter(agent_user=request.user)
+        allowed = set(qs.values_list("id", flat=True))
+
+        missing = sorted(requested - allowed)
+        if missing:
+            return Response({"detail": "PDV introuvable ou non autorisé.", "pdv_ids": missing}, status=404)
+
+        try:
+            sales, stocks = PDVStock.record_sales(lines, sold_by=request.user)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        return Response(
+            {
+                "success": True,
+                "message": f"{len(sales)} vente(s) enregistrée(s). Stock mis à jour.",
+                "count": len(sales),
+                "sale_ids": [sale.pk for sale in sales],
+                "stocks": [
+                    {
+                        "pdv_id": stock.pdv_id,
+                        "current_liters": str(stock.current_liters),
+                        "last_event_at": stock.last_event_at,
+                    }
+                    for stock in stocks.values()
+                ],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=True, methods=["get"], url_path="stock-at")
+    def stock_at(self, request, pk=None):
+        """
+        Stock du PDV à une date passée (journal + snapshot le plus proche).
+        Query: ?at=2025-01-31T23:59:59Z (défaut: maintenant)
+        """
+        pdv = self.get_object()
+
+        at = timezone.now()
+        raw = request.query_params.get("at")
+        if raw:
+            at = parse_datetime(raw)
+            if at is None:
+                return Response({"detail": "Paramètre 'at' invalide (ISO 8601 attendu)."}, status=400)
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+
+        return Response({"pdv_id": pdv.id, "at": at, "liters": str(StockLedger.stock_at(pdv, at))})
+
+    @action(detail=True, methods=["post"], url_path="adjust-stock")
+    def adjust_stock(self, request, pk=None):
+        """
+        Admin: correction d'inventaire (mouvement 'adjustment').
+        Payload: { delta_liters (signé), notes? }
+        """
+        if not is_admin_user(request.user):
+            return Response({"detail": "Accès refusé."}, status=403)
+
+        ser = PDVStockAdjustSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        pdv = self.get_object()
+        stock, _ = PDVStock.objects.get_or_create(pdv=pdv)
+        try:
+            movement = stock.adjust(
+                ser.validated_data["delta_liters"],
+                created_by=request.user,
+                notes=ser.validated_data.get("notes", ""),
+            )
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        return Response(
+            {
+                "success": True,
+                "movement": StockMovementSerializer(movement).data,
+                "stock": {"pdv_id": pdv.id, "current_liters": str(stock.current_liters)},
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=True, methods=["get"], url_path="stock-movements")
+    def stock_movements(self, request, pk=None):
+        pdv = self.get_object()
+        movements = StockMovement.objects.filter(pdv=pdv).select_related("created_by").order_by("-occurred_at", "-id")
+        page = self.paginate_queryset(movements)
+        if page is not None:
+            return self.get_paginated_response(StockMovementSerializer(page, many=True).data)
+        return Response(StockMovementSerializer(movements[:500], many=True).data)
+
+    @action(detail=False, methods=["get"], url_path="stock-audit")
+    def stock_audit(self, request):
+        """Admin: PDV dont le stock courant diverge du journal des mouvements."""
+        if not is_admin_user(request.user):
+            return Response({"detail": "Accès refusé."}, status=403)
+
+        mismatches = StockLedger.audit()
+        return Response({"checked_at": timezone.now(), "mismatches": mismatches, "count": len(mismatches)})
+
+    @action(detail=False, methods=["get"], url_path="replenishment")
+    def replenishment(self, request):
+        """
+        Suggestions de réapprovisionnement (calcul nocturne PDVForecast), les plus urgentes d'abord.
+        Query: ?max_cover_days=3  ?needs_reorder=1  ?province=...
+        Admin: tous les PDV; agent: son PDV.
+        """
+        user = request.user
+        qs = PDVForecast.objects.select_related("pdv")
+        if is_agent_user(user):
+            qs = qs.filter(pdv__agent_user=user)
+        elif not is_admin_user(user):
+            return Response({"detail": "Accès refusé."}, status=403)
+
+        max_cover = request.query_params.get("max_cover_days")
+        if max_cover:
+            try:
+                qs = qs.filter(days_of_cover__lte=float(max_cover))
+            except ValueError:
+                return Response({"detail": "max_cover_days invalide."}, status=400)
+
+        if str(request.query_params.get("needs_reorder", "")).lower() in ("1", "true"):
+            qs = qs.filter(reorder_quantity__gt=0)
+
+        province = request.query_params.get("province")
+        if province:
+            qs = qs.filter(pdv__province=province)
+
+        qs = qs.order_by(F("days_of_cover").asc(nulls_last=True), "-reorder_quantity")
+
+        page = self.paginate_queryset(qs)
+        if page is not None:
+            return self.get_paginated_response(PDVForecastSerializer(page, many=True).data)
+        return Response(PDVForecastSerializer(qs[:500], many=True).data)
@@ -2,6 +2,8 @@
 from django.db import models
 from django.conf import settings
 
+from apps.accounts.areas import AreaResolver
+
 
 class Supplier(models.Model):
     TYPES = (("individuel", "Individuel"), ("entreprise", "Entreprise"))
@@ -10,7 +12,20 @@ class Supplier(models.Model):
     province = models.CharField(max_length=100, blank=True)
     commune = models.CharField(max_length=100, blank=True)
     address = models.CharField(max_length=200, blank=True)
+    # ✅ zone normalisée (commune, sinon province), dérivée de province / commune à la sauvegarde
+    area = models.ForeignKey(
+        "accounts.AdminArea", null=True, blank=True, on_delete=models.SET_NULL, related_name="suppliers"
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        AreaResolver.remember_loaded(instance)
+        return instance
 
+    def save(self, *args, **kwargs):
+        AreaResolver.prepare_save(self, kwargs)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Supplier({self.user_id})"
\ No newline at end of file
@@ -27,9 +27,7 @@ class SupplierSerializer(serializers.ModelSerializer):
             "id",
             "user_id", "username", "full_name", "phone", "email",
             "type", "province", "commune", "address",
-            "created_at", "updated_at",
         ]
-        read_only_fields = ["created_at", "updated_at"]
 
     def validate_user_id(self, value):
         if value.account_type != "fournisseur":
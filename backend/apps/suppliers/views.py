@@ -9,6 +9,6 @@ from .serializers import SupplierSerializer
 
 
 class SupplierViewSet(viewsets.ModelViewSet):
-    queryset = Supplier.objects.all()
+    queryset = Supplier.objects.select_related("user").order_by("-id")
     serializer_class = SupplierSerializer
     permission_classes = [IsAuthenticated]
\ No newline at end of file
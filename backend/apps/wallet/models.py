@@ -5,7 +5,7 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.db import models, transaction
-from django.db.models import F
+from django.db.models import Case, F, Value, When
 from django.utils import timezone
 
 
@@ -179,9 +179,97 @@ class Wallet(models.Model):
             meta={"from_wallet_id": self.pk, **(meta or {})},
             provider=other.provider,
         )
+
+        from realtime import events
+
+        events.AdminEvents.publish(events.TRANSFER_DONE, events.transfer_item(out_tx, in_tx))
         return out_tx, in_tx
 
 
+    @staticmethod
+    @transaction.atomic
+    def batch_transfer(source_id, transfers, *, reason: str = "", created_by=None):
+        """
+        Transferts groupés depuis un wallet source (ex: wallet plateforme -> fournisseurs).
+        transfers: [(wallet_id, amount, meta), ...]
+
+        Verrous pris en une requête (ordre des pk), débit source en un UPDATE,
+        crédits en un UPDATE (CASE), écritures transfer_out / transfer_in en bulk_create.
+        Retourne [(out_tx, in_tx), ...] dans l'ordre de `transfers`.
+        """
+        transfers = [(wallet_id, Decimal(str(amount)), meta or {}) for wallet_id, amount, meta in transfers]
+        if not transfers:
+            return []
+        if any(amount <= 0 for _, amount, _ in transfers):
+            raise ValueError("Amount must be > 0")
+        if any(wallet_id == source_id for wallet_id, _, _ in transfers):
+            raise ValueError("Cannot transfer to same wallet")
+
+        ids = sorted({source_id, *(wallet_id for wallet_id, _, _ in transfers)})
+        wallets = {w.pk: w for w in Wallet.objects.select_for_update().filter(pk__in=ids).order_by("pk")}
+        if len(wallets) != len(ids):
+            raise ValueError("Wallet not found")
+
+        source = wallets[source_id]
+        total = sum((amount for _, amount, _ in transfers), Decimal("0"))
+        if source.balance < total:
+            raise ValueError("Insufficient balance")
+
+        credits = {}
+        for wallet_id, amount, _ in transfers:
+            credits[wallet_id] = credits.get(wallet_id, Decimal("0")) + amount
+
+        now = timezone.now()
+        Wallet.objects.filter(pk=source_id).update(balance=F("balance") - total, updated_at=now)
+        Wallet.objects.filter(pk__in=list(credits)).update(
+            balance=F("balance")
+            + Case(
+                *[When(pk=wallet_id, then=Value(amount)) for wallet_id, amount in credits.items()],
+                output_field=models.DecimalField(max_digits=18, decimal_places=2),
+            ),
+            updated_at=now,
+        )
+
+        rows = []
+        for wallet_id, amount, meta in transfers:
+            rows.append(
+                WalletTransaction(
+                    wallet_id=source_id,
+                    tx_type=WalletTransaction.TxTypes.TRANSFER_OUT,
+                    amount=amount,
+                    status=WalletTransaction.Status.SUCCESS,
+                    reference=reason or "transfer_out",
+                    created_by=created_by,
+                    meta={"to_wallet_id": wallet_id, **meta},
+                    provider=source.provider,
+                )
+            )
+            rows.append(
+                WalletTransaction(
+                    wallet_id=wallet_id,
+                    tx_type=WalletTransaction.TxTypes.TRANSFER_IN,
+                    amount=amount,
+                    status=WalletTransaction.Status.SUCCESS,
+                    reference=reason or "transfer_in",
+                    created_by=created_by,
+                    meta={"from_wallet_id": source_id, **meta},
+                    provider=wallets[wallet_id].provider,
+                )
+            )
+
+        created = WalletTransaction.objects.bulk_create(rows, batch_size=1000)
+
+        from apps.adminpanel.counters import DashboardCounters
+
+        DashboardCounters.bump_day("transactions", amount=len(created))
+
+        from realtime import events
+
+        pairs = list(zip(created[0::2], created[1::2]))
+        events.AdminEvents.publish(events.TRANSFER_DONE, [events.transfer_item(out_tx, in_tx) for out_tx, in_tx in pairs])
+        return pairs
+
+
 class WalletTransaction(models.Model):
     class TxTypes(models.TextChoices):
         CREDIT = "credit", "Credit"
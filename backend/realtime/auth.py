@@ -0,0 +1,49 @@
+# ========================= realtime/auth.py =========================
+"""
+Authentification JWT (SimpleJWT) des connexions WebSocket.
+
+Le navigateur ne peut pas poser d'en-tête Authorization sur un WebSocket: le jeton d'accès
+est lu dans ?token=<access>, sinon dans l'en-tête Authorization: Bearer <access> (clients natifs).
+scope["user"] = utilisateur du jeton, ou AnonymousUser si absent / invalide / expiré.
+"""
+
+from __future__ import annotations
+
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+
+
+def _raw_token(scope) -> str | None:
+    query = parse_qs(scope.get("query_string", b"").decode())
+    if query.get("token"):
+        return query["token"][0]
+
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0].lower() == "bearer":
+                return parts[1]
+    return None
+
+
+@database_sync_to_async
+def _user_for(raw: str):
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+    auth = JWTAuthentication()
+    try:
+        user = auth.get_user(auth.get_validated_token(raw))
+    except (InvalidToken, AuthenticationFailed):
+        return AnonymousUser()
+    return user if user.is_active else AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    async def __call__(self, scope, receive, send):
+        raw = _raw_token(scope)
+        scope["user"] = await _user_for(raw) if raw else AnonymousUser()
+        return await super().__call__(scope, receive, send)
@@ -1,6 +1,11 @@
 # ========================= realtime/consumers.py =========================
+import logging
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
+logger = logging.getLogger(__name__)
+
 
 class EchoConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):
@@ -13,4 +18,96 @@ async def receive_json(self, content, **kwargs):
 
 
 async def disconnect(self, code):
-    pass
\ No newline at end of file
+    pass
+
+class AdminEventsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws/admin/events/?token=<JWT access> — ADMIN ONLY.
+
+    - à la connexion: {"type": "snapshot", counters, day} (compteurs DashboardCounters)
+    - ensuite: {"type": "event", "event", "items", "ts"} pour chaque événement métier
+      (realtime.events: delivery.confirmed, sale.reported, stock.changed, user.blocked,
+      user.unblocked, transfer.done); le client met à jour ses compteurs sans re-poller
+    - messages client: {"action": "snapshot"} (réalignement), {"action": "ping"}
+    """
+
+    async def connect(self):
+        from apps.accounts.views import is_admin_user
+
+        from .events import ADMIN_GROUP
+
+        user = self.scope.get("user")
+        if not user or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        if not is_admin_user(user):
+            await self.close(code=4403)
+            return
+
+        await self.channel_layer.group_add(ADMIN_GROUP, self.channel_name)
+        await self.accept()
+        await self.send_json({"type": "snapshot", **await _dashboard_snapshot()})
+
+    async def disconnect(self, code):
+        from .events import ADMIN_GROUP
+
+        await self.channel_layer.group_discard(ADMIN_GROUP, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        action = (content or {}).get("action")
+        if action == "snapshot":
+            await self.send_json({"type": "snapshot", **await _dashboard_snapshot()})
+        elif action == "ping":
+            await self.send_json({"type": "pong"})
+
+    async def admin_event(self, message):
+        await self.send_json({"type": "event", "event": message["event"], "items": message["items"], "ts": message["ts"]})
+
+
+class NotificationsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws/notifications/?token=<JWT access> — tout utilisateur authentifié.
+
+    - à la connexion: {"type": "unread", "count"}
+    - ensuite: {"type": "notification", "outbox_id", "title", "body", "level", "data", "created_at"}
+      (un même envoi peut arriver par plusieurs groupes: dédoublonner sur outbox_id)
+    """
+
+    async def connect(self):
+        from apps.adminpanel.notifications import ALL_GROUP, role_group, user_group
+
+        user = self.scope.get("user")
+        if not user or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.notification_groups = [user_group(user.pk), role_group(getattr(user, "role", "")), ALL_GROUP]
+        for group in self.notification_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept()
+        await self.send_json({"type": "unread", "count": await _unread_count(user.pk)})
+
+    async def disconnect(self, code):
+        for group in getattr(self, "notification_groups", []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def notification_push(self, message):
+        await self.send_json({"type": "notification", **{k: v for k, v in message.items() if k != "type"}})
+
+
+@database_sync_to_async
+def _unread_count(user_id) -> int:
+    from apps.adminpanel.notifications import UnreadCounter
+
+    return UnreadCounter.get(user_id)
+
+
+@database_sync_to_async
+def _dashboard_snapshot() -> dict:
+    from apps.adminpanel.counters import DashboardCounters
+
+    try:
+        return DashboardCounters.snapshot()
+    except Exception:
+        logger.warning("Dashboard counters unavailable, computing from database", exc_info=True)
+        return DashboardCounters.compute_snapshot()
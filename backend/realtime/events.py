@@ -0,0 +1,96 @@
+# ========================= realtime/events.py =========================
+"""
+Diffusion d'événements métier vers les tableaux de bord admin (Channels, groupe ADMIN_GROUP).
+
+- publish() est appelé côté écriture (signaux, chemins bulk_create); l'envoi a lieu après commit
+  (rien n'est diffusé si la transaction est annulée)
+- un message = {"event", "items": [...], "ts"}: les chemins groupés envoient un seul message
+- couche Channels indisponible: l'événement est perdu (log), les clients se réalignent
+  via le snapshot envoyé à la connexion / action "snapshot"
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+ADMIN_GROUP = "admin.events"
+
+DELIVERY_CONFIRMED = "delivery.confirmed"
+SALE_REPORTED = "sale.reported"
+STOCK_CHANGED = "stock.changed"
+USER_BLOCKED = "user.blocked"
+USER_UNBLOCKED = "user.unblocked"
+TRANSFER_DONE = "transfer.done"
+
+
+def _jsonable(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def sale_item(sale) -> dict:
+    return {"id": sale.pk, "pdv_id": sale.pdv_id, "liters_sold": sale.liters_sold, "sold_at": sale.sold_at}
+
+
+def stock_item(movement) -> dict:
+    return {
+        "pdv_id": movement.pdv_id,
+        "kind": movement.kind,
+        "quantity": movement.quantity,
+        "current_liters": movement.balance_after,
+        "occurred_at": movement.occurred_at,
+    }
+
+
+def transfer_item(out_tx, in_tx) -> dict:
+    return {
+        "from_wallet_id": out_tx.wallet_id,
+        "to_wallet_id": in_tx.wallet_id,
+        "amount": out_tx.amount,
+        "reference": out_tx.reference,
+        "tx_out_id": out_tx.pk,
+        "tx_in_id": in_tx.pk,
+    }
+
+
+class AdminEvents:
+    @staticmethod
+    def _send(message: dict) -> None:
+        try:
+            from channels.layers import get_channel_layer
+
+            layer = get_channel_layer()
+            if layer is None:
+                return
+            async_to_sync(layer.group_send)(ADMIN_GROUP, message)
+        except Exception:
+            logger.warning("Admin event %s not delivered", message.get("event"), exc_info=True)
+
+    @staticmethod
+    def publish(event: str, items) -> None:
+        """items: dict ou liste de dicts (valeurs Decimal / dates converties pour le transport)."""
+        items = [items] if isinstance(items, dict) else list(items)
+        if not items:
+            return
+        message = {
+            "type": "admin.event",  # -> AdminEventsConsumer.admin_event
+            "event": event,
+            "items": _jsonable(items),
+            "ts": timezone.now().isoformat(),
+        }
+        transaction.on_commit(lambda: AdminEvents._send(message))
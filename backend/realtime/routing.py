@@ -1,9 +1,11 @@
 # ========================= realtime/routing.py =========================
 # (utilisé si vous préférez inclure par include())
 from django.urls import path
-from .consumers import EchoConsumer
+from .consumers import AdminEventsConsumer, EchoConsumer, NotificationsConsumer
 
 
 websocket_urlpatterns = [
 path("ws/echo/", EchoConsumer.as_asgi()),
-]
\ No newline at end of file
+path("ws/admin/events/", AdminEventsConsumer.as_asgi()),
+path("ws/notifications/", NotificationsConsumer.as_asgi()),
+]
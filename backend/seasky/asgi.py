@@ -5,19 +5,23 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from django.urls import path
 
-from realtime.consumers import EchoConsumer
-
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "seasky.settings")
 
 django_asgi_app = get_asgi_application()
 
+# ✅ après get_asgi_application(): les consumers importent des modèles
+from realtime.auth import JWTAuthMiddleware  # noqa: E402
+from realtime.consumers import AdminEventsConsumer, EchoConsumer, NotificationsConsumer  # noqa: E402
+
 websocket_urlpatterns = [
     path("ws/echo/", EchoConsumer.as_asgi()),
+    path("ws/admin/events/", AdminEventsConsumer.as_asgi()),
+    path("ws/notifications/", NotificationsConsumer.as_asgi()),
 ]
 
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
-        "websocket": URLRouter(websocket_urlpatterns),
+        "websocket": JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
     }
 )
@@ -205,6 +205,105 @@ CHANNEL_LAYERS = {
     }
 }
 
+# ========================= CELERY =========================
+from celery.schedules import crontab  # noqa: E402
+
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_LOCATION)
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", REDIS_LOCATION)
+CELERY_TIMEZONE = os.getenv("DJANGO_TIME_ZONE", "Africa/Bujumbura")
+CELERY_TASK_TRACK_STARTED = True
+
+CELERY_BEAT_SCHEDULE = {
+    "drivers-availability-rollup": {
+        "task": "drivers.rollup_driver_availability",
+        "schedule": crontab(hour=0, minute=15),
+    },
+    "drivers-document-compliance-scan": {
+        "task": "drivers.scan_document_compliance",
+        "schedule": crontab(hour=1, minute=0),
+    },
+    # ✅ performances quotidiennes de la veille (tous les chauffeurs, upsert) puis classements
+    "drivers-performance-daily": {
+        "task": "drivers.compute_driver_performance",
+        "schedule": crontab(hour=0, minute=30),
+    },
+    # ✅ fenêtres glissantes 7 / 30 / 90 jours: reconstruction quotidienne des classements
+    "drivers-leaderboards-rebuild": {
+        "task": "drivers.rebuild_leaderboards",
+        "schedule": crontab(hour=0, minute=10),
+    },
+    "pdv-stock-snapshot": {
+        "task": "pdv.snapshot_stock",
+        "schedule": crontab(hour=0, minute=5),
+    },
+    "pdv-forecast-replenishment": {
+        "task": "pdv.forecast_replenishment",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    "adminpanel-dashboard-counters-reconcile": {
+        "task": "adminpanel.reconcile_dashboard_counters",
+        "schedule": crontab(minute="*/10"),
+    },
+    "adminpanel-notifications-drain": {
+        "task": "adminpanel.deliver_notifications",
+        "schedule": crontab(minute="*"),
+    },
+    "adminpanel-area-rollups": {
+        "task": "adminpanel.rollup_areas",
+        "schedule": crontab(minute="*/30"),
+    },
+    # ✅ veille figée après minuit (ventes / livraisons saisies hors ligne puis synchronisées)
+    "adminpanel-area-rollups-yesterday": {
+        "task": "adminpanel.rollup_areas",
+        "schedule": crontab(hour=0, minute=20),
+        "kwargs": {"days_back": 1},
+    },
+    "logistics-close-stale-shifts": {
+        "task": "logistics.close_stale_shifts",
+        "schedule": crontab(minute=30),
+    },
+}
+
+# ✅ fenêtre "expire bientôt" de l'index de conformité (jours)
+COMPLIANCE_EXPIRING_SOON_DAYS = int(os.getenv("COMPLIANCE_EXPIRING_SOON_DAYS", "30"))
+
+# ✅ planification des tournées: dépôt HQ (départ/retour des chauffeurs)
+LOGISTICS_DEPOT_LAT = float(os.getenv("LOGISTICS_DEPOT_LAT", "-3.3822"))
+LOGISTICS_DEPOT_LNG = float(os.getenv("LOGISTICS_DEPOT_LNG", "29.3644"))
+
+# ✅ tournées chauffeur: clôture automatique au-delà de cette durée (heures)
+SHIFT_MAX_HOURS = int(os.getenv("SHIFT_MAX_HOURS", "16"))
+
+# ✅ rapports admin asynchrones: durée de validité des liens de téléchargement signés (secondes)
+REPORT_DOWNLOAD_TTL = int(os.getenv("REPORT_DOWNLOAD_TTL", "900"))
+
+# ✅ notifications: reprise des envois "processing" abandonnés, durée de vie du cache des non lues (secondes)
+NOTIFICATIONS_PROCESSING_TIMEOUT = int(os.getenv("NOTIFICATIONS_PROCESSING_TIMEOUT", "900"))
+NOTIFICATIONS_UNREAD_TTL = int(os.getenv("NOTIFICATIONS_UNREAD_TTL", "300"))
+
+# ✅ réapprovisionnement PDV (prévisions nocturnes)
+PDV_FORECAST_ALPHA = float(os.getenv("PDV_FORECAST_ALPHA", "0.3"))
+PDV_REPLENISH_LEAD_DAYS = int(os.getenv("PDV_REPLENISH_LEAD_DAYS", "1"))
+PDV_REPLENISH_COVER_DAYS = int(os.getenv("PDV_REPLENISH_COVER_DAYS", "7"))
+
+# ✅ règlement automatique des fournisseurs (désactivé par défaut: déclenchement manuel par l'admin)
+SUPPLIER_SETTLEMENT_AUTO = _bool_env("SUPPLIER_SETTLEMENT_AUTO", default=False)
+if SUPPLIER_SETTLEMENT_AUTO:
+    CELERY_BEAT_SCHEDULE["logistics-supplier-settlement"] = {
+        "task": "logistics.settle_supplier_payments",
+        "schedule": crontab(hour=3, minute=0),
+    }
+
+# ✅ partitionnement mensuel PostgreSQL des tables d'événements (opt-in, conversion à la migration)
+LOGISTICS_PARTITIONING = _bool_env("LOGISTICS_PARTITIONING", default=False)
+LOGISTICS_PARTITION_MONTHS_AHEAD = int(os.getenv("LOGISTICS_PARTITION_MONTHS_AHEAD", "3"))
+LOGISTICS_PARTITION_RETENTION_MONTHS = int(os.getenv("LOGISTICS_PARTITION_RETENTION_MONTHS", "0"))  # 0 = jamais
+if LOGISTICS_PARTITIONING:
+    CELERY_BEAT_SCHEDULE["logistics-partition-maintenance"] = {
+        "task": "logistics.maintain_partitions",
+        "schedule": crontab(hour=4, minute=0, day_of_month="1,15"),
+    }
+
 # ========================= AUTHENTICATION =========================
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},